@@ -4,12 +4,19 @@
 //! playthrough path. It streams PGNs with `pgn-reader`, replays only the
 //! mainline with `shakmaty`, and writes one JSONL record per game containing
 //! headers, UCI moves, parse errors, and positions marked by a chosen comment.
+//!
+//! With `--output -` the JSONL stream goes to stdout as games are replayed so
+//! Python callers can consume records lazily. Each record carries a
+//! `byte_offset`: the number of input bytes the reader had consumed when the
+//! game finished (read-ahead granularity, monotonic, ends at the file size).
 
+use std::cell::Cell;
 use std::collections::BTreeMap;
 use std::ffi::OsString;
 use std::fs::{self, File};
-use std::io::{self, BufWriter, Write};
+use std::io::{self, BufWriter, Read, Write};
 use std::path::{Path, PathBuf};
+use std::rc::Rc;
 
 use pgn_reader::{BufferedReader, Outcome, RawComment, RawTag, SanPlus, Skip, Visitor};
 use shakmaty::fen::Fen;
@@ -17,13 +24,15 @@ use shakmaty::{CastlingMode, Chess, Color, EnPassantMode, Position};
 
 use crate::cli;
 use crate::concat::expand_inputs;
+use crate::output::{is_stdin_path, print_stats};
 use crate::progress::ProgressReporter;
 
 const USAGE: &str = "\
 usage: pgn-utils annotated-pgn [options] INPUT_PGN_OR_DIR...
 
 options:
-  -o, --output PATH       write JSONL games to PATH (required)
+  -o, --output PATH       write JSONL games to PATH (required); '-' streams
+                          to stdout and moves the stats line to stderr
   --marker TEXT           marker comment text to match exactly after trimming
                           (default: CQL)
   --limit-files N         process at most N input PGN files
@@ -283,7 +292,7 @@ pub fn run_subcommand(args: &[OsString]) -> Result<(), String> {
     };
 
     let stats = run_annotated_pgn(&opts)?;
-    println!("{}", stats.to_json());
+    print_stats(&stats.to_json(), is_stdin_path(&opts.output));
     Ok(())
 }
 
@@ -294,6 +303,16 @@ pub fn run_annotated_pgn(opts: &AnnotatedOptions) -> Result<AnnotatedStats, Stri
         files.truncate(limit);
     }
 
+    if is_stdin_path(&opts.output) {
+        let stdout = io::stdout();
+        let mut writer = BufWriter::new(stdout.lock());
+        let stats = process_files(opts, &files, &mut writer)?;
+        writer
+            .flush()
+            .map_err(|e| format!("flush stdout failed: {e}"))?;
+        return finish_or_error(opts, stats);
+    }
+
     if opts.output.exists() && !opts.force {
         return Err(format!(
             "output already exists: {} (pass --force to replace it)",
@@ -359,7 +378,11 @@ fn process_files<W: Write>(
 
         let file =
             File::open(path).map_err(|e| format!("failed to open {}: {e}", path.display()))?;
-        let reader = progress.wrap(file);
+        let bytes_read = Rc::new(Cell::new(0u64));
+        let reader = CountingRead {
+            inner: progress.wrap(file),
+            count: Rc::clone(&bytes_read),
+        };
         let mut pgn_reader = BufferedReader::new(reader);
         let mut visitor = AnnotatedVisitor::new(&opts.marker_text);
 
@@ -388,7 +411,8 @@ fn process_files<W: Write>(
                 );
             }
             stats.positions_written += game.positions.len();
-            write_game(writer, &game).map_err(|e| format!("failed to write JSONL row: {e}"))?;
+            write_game(writer, &game, bytes_read.get())
+                .map_err(|e| format!("failed to write JSONL row: {e}"))?;
         }
     }
 
@@ -409,9 +433,25 @@ fn finish_or_error(
     Ok(stats)
 }
 
-fn write_game<W: Write>(out: &mut W, game: &GameExtraction) -> io::Result<()> {
+/// Reader wrapper that records how many bytes have been pulled from the file,
+/// so each JSONL record can report a real input offset for progress bars.
+struct CountingRead<R: Read> {
+    inner: R,
+    count: Rc<Cell<u64>>,
+}
+
+impl<R: Read> Read for CountingRead<R> {
+    fn read(&mut self, buf: &mut [u8]) -> io::Result<usize> {
+        let n = self.inner.read(buf)?;
+        self.count.set(self.count.get() + n as u64);
+        Ok(n)
+    }
+}
+
+fn write_game<W: Write>(out: &mut W, game: &GameExtraction, byte_offset: u64) -> io::Result<()> {
     write!(out, "{{\"schema_version\":1")?;
     write_num_field(out, "game_index", game.game_index)?;
+    write_num_field(out, "byte_offset", byte_offset)?;
 
     write!(out, ",\"headers\":{{")?;
     for (idx, (key, value)) in game.headers.iter().enumerate() {
@@ -586,6 +626,7 @@ mod tests {
         assert!(text.contains("\"move_san\":\"Nf3\""));
         assert!(text.contains("\"side_to_move\":\"black\""));
         assert!(text.contains("\"piece_count\":32"));
+        assert!(text.contains("\"byte_offset\":"));
         fs::remove_dir_all(dir).unwrap();
     }
 
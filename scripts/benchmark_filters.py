@@ -7,6 +7,9 @@ Usage:
         --cql-bin cql-bin/cql6-2/cql \
         --runs 3
 
+Scripts are invoked through the same :mod:`reti.cql.backend` argv as
+``analyse_cql``; ``-s`` maps to one CQL thread.
+
 Each filter gets a tiny CQL script that exercises it in isolation.  The script
 measures wall-clock time for each, subtracts the baseline (bare `cql()`), and
 ranks filters by marginal cost.
@@ -23,6 +26,12 @@ import time
 from dataclasses import dataclass
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.backend import CqlBackend, create_cql_backend
+
+DEFAULT_TIMEOUT_SECONDS = 300.0
+
 # ---------------------------------------------------------------------------
 # Filter definitions: (name, cql_body)
 #
@@ -189,11 +198,12 @@ class BenchResult:
 
 
 def run_one(
-    cql_bin: Path,
+    backend: CqlBackend,
     pgn: Path,
     cql_body: str,
     *,
     singlethreaded: bool = False,
+    timeout: float | None = DEFAULT_TIMEOUT_SECONDS,
 ) -> tuple[float, int | None, bool, str]:
     script = f"cql()\n{cql_body}\n"
     with tempfile.NamedTemporaryFile(
@@ -205,21 +215,23 @@ def run_one(
     with tempfile.NamedTemporaryFile(suffix=".pgn", delete=False) as out_f:
         out_path = Path(out_f.name)
 
-    cmd = [str(cql_bin), "-i", str(pgn), "-o", str(out_path)]
-    if singlethreaded:
-        cmd.append("-s")
-    cmd.append(str(cql_path))
+    cmd = backend.build_run_command(
+        pgn,
+        cql_path,
+        out_path,
+        threads=1 if singlethreaded else "auto",
+    )
 
     t0 = time.perf_counter()
     try:
         proc = subprocess.run(
             cmd, capture_output=True, text=True, encoding="utf-8",
-            errors="replace", timeout=300,
+            errors="replace", timeout=timeout,
         )
     except subprocess.TimeoutExpired:
         cql_path.unlink(missing_ok=True)
         out_path.unlink(missing_ok=True)
-        return 300.0, None, False, "TIMEOUT (300s)"
+        return float(timeout or 0.0), None, False, f"TIMEOUT ({timeout:g}s)"
     elapsed = time.perf_counter() - t0
 
     matches = None
@@ -260,9 +272,11 @@ def benchmark(
     pgn: Path,
     runs: int,
     singlethreaded: bool,
+    timeout: float | None = DEFAULT_TIMEOUT_SECONDS,
 ) -> list[BenchResult]:
     binary_type = detect_binary_type(cql_bin)
     print(f"Detected binary type: {binary_type}")
+    backend = create_cql_backend(cql_bin, binary_type)
 
     specs = [
         (name, body) for name, body, compat in FILTER_SPECS
@@ -286,7 +300,7 @@ def benchmark(
 
         for _ in range(runs):
             elapsed, matches, success, error = run_one(
-                cql_bin, pgn, body, singlethreaded=singlethreaded,
+                backend, pgn, body, singlethreaded=singlethreaded, timeout=timeout,
             )
             if not success:
                 last_success = False
@@ -382,6 +396,10 @@ def main() -> int:
         "-s", "--singlethreaded", action="store_true",
         help="Run CQL in single-threaded mode for more stable timing",
     )
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS,
+        help=f"Seconds before a filter run is abandoned (default {DEFAULT_TIMEOUT_SECONDS:g})",
+    )
     args = parser.parse_args()
 
     cql_bin = Path(args.cql_bin).expanduser()
@@ -400,7 +418,7 @@ def main() -> int:
     print(f"Filters to test: {len(FILTER_SPECS)}")
     print(f"Single-threaded: {args.singlethreaded}")
 
-    results = benchmark(cql_bin, pgn, args.runs, args.singlethreaded)
+    results = benchmark(cql_bin, pgn, args.runs, args.singlethreaded, args.timeout)
     print_results(results)
 
     if args.csv:
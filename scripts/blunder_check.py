@@ -5,14 +5,17 @@ For every position in every game the engine evaluates:
   2. The score after the move actually played
 
 If the difference exceeds a threshold the position is written to a CSV.
+Searches run on an engine pool, so --engines N keeps N Stockfish processes
+busy while rows are still written in game order.
 
 Usage:
-    python scripts/blunder_check.py [--pgn PATH] [--time 0.005] [--threshold 200]
+    python scripts/blunder_check.py [--pgn PATH] [--time 0.005] [--threshold 200] [--engines 4]
 """
 
 import argparse
 import csv
 import sys
+from collections import deque
 from pathlib import Path
 
 import chess
@@ -20,6 +23,10 @@ import chess.engine
 import chess.pgn
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.evaluation.backends import EnginePool
+
 
 def cp_score(pov_score: chess.engine.PovScore, turn: chess.Color) -> float | None:
     """Return centipawn score from White's perspective, or None for mate."""
@@ -28,61 +35,35 @@ def cp_score(pov_score: chess.engine.PovScore, turn: chess.Color) -> float | Non
     return cp
 
 
-def analyse_game(engine, game, time_limit, threshold):
-    """Yield blunder rows for a single game."""
+def submit_game(pool, game, time_limit):
+    """Queue both searches for every move played from a {CQL} position."""
     headers = game.headers
-    event = headers.get("Event", "?")
-    white = headers.get("White", "?")
-    black = headers.get("Black", "?")
-    date = headers.get("Date", "?")
-    result = headers.get("Result", "?")
+    context = {
+        "event": headers.get("Event", "?"),
+        "white": headers.get("White", "?"),
+        "black": headers.get("Black", "?"),
+        "date": headers.get("Date", "?"),
+        "result": headers.get("Result", "?"),
+    }
+    limit = chess.engine.Limit(time=time_limit)
 
     board = game.board()
     evaluate_next = False
+    pending = []
 
     for node in game.mainline():
         move = node.move
 
         if evaluate_next:
-            turn = board.turn  # side to move BEFORE this move
-            move_number_display = board.fullmove_number
-            side = "White" if turn == chess.WHITE else "Black"
-
             # 1. Engine's best move evaluation
-            best_info = engine.analyse(board, chess.engine.Limit(time=time_limit))
-            best_score = cp_score(best_info["score"], turn)
-            best_move = best_info.get("pv", [None])[0]
+            best_search = pool.submit(board, limit)
 
             # 2. Evaluate the position after the move actually played
             board.push(move)
-            played_info = engine.analyse(board, chess.engine.Limit(time=time_limit))
-            played_score = cp_score(played_info["score"], turn)
+            played_search = pool.submit(board, limit)
             board.pop()
 
-            if best_score is not None and played_score is not None:
-                # Eval drop from the perspective of the side that moved
-                if turn == chess.WHITE:
-                    drop = best_score - played_score
-                else:
-                    drop = played_score - best_score
-
-                if drop >= threshold:
-                    fen = board.fen()
-                    yield {
-                        "event": event,
-                        "white": white,
-                        "black": black,
-                        "date": date,
-                        "result": result,
-                        "move_number": move_number_display,
-                        "side": side,
-                        "played_move": board.san(move),
-                        "best_move": board.san(best_move) if best_move else "?",
-                        "played_eval": played_score,
-                        "best_eval": best_score,
-                        "eval_drop": drop,
-                        "fen": fen,
-                    }
+            pending.append((context, board.copy(stack=False), move, best_search, played_search))
 
         # {CQL} on this node means evaluate the NEXT move from this position
         evaluate_next = "CQL" in (node.comment or "")
@@ -90,6 +71,38 @@ def analyse_game(engine, game, time_limit, threshold):
         # Advance the board
         board.push(move)
 
+    return pending
+
+
+def analyse_game(pending, threshold):
+    """Yield blunder rows for one game's queued searches."""
+    for context, board, move, best_search, played_search in pending:
+        turn = board.turn  # side to move BEFORE this move
+        best_info = best_search.result()
+        best_score = cp_score(best_info["score"], turn)
+        best_move = best_info.get("pv", [None])[0]
+        played_score = cp_score(played_search.result()["score"], turn)
+
+        if best_score is not None and played_score is not None:
+            # Eval drop from the perspective of the side that moved
+            if turn == chess.WHITE:
+                drop = best_score - played_score
+            else:
+                drop = played_score - best_score
+
+            if drop >= threshold:
+                yield {
+                    **context,
+                    "move_number": board.fullmove_number,
+                    "side": "White" if turn == chess.WHITE else "Black",
+                    "played_move": board.san(move),
+                    "best_move": board.san(best_move) if best_move else "?",
+                    "played_eval": played_score,
+                    "best_eval": best_score,
+                    "eval_drop": drop,
+                    "fen": board.fen(),
+                }
+
 
 def main():
     parser = argparse.ArgumentParser(description="Detect blunders in a PGN file using Stockfish.")
@@ -98,6 +111,7 @@ def main():
     parser.add_argument("--time", type=float, default=0.005, help="Stockfish time per position in seconds")
     parser.add_argument("--threshold", type=int, default=200, help="Centipawn drop to flag as blunder")
     parser.add_argument("--stockfish", type=str, default="/opt/homebrew/bin/stockfish", help="Path to Stockfish binary")
+    parser.add_argument("--engines", type=int, default=1, help="Stockfish processes to run side by side")
     args = parser.parse_args()
 
     pgn_path = Path(args.pgn)
@@ -123,31 +137,47 @@ def main():
                 total_games += 1
     print(f"{total_games} games found.")
 
-    engine = chess.engine.SimpleEngine.popen_uci(args.stockfish)
-    engine.configure({"Threads": 1, "Hash": 16})
+    pool = EnginePool(
+        args.stockfish,
+        engines=args.engines,
+        threads=1,
+        hash_mb=16,
+        sf_time_seconds=args.time,
+        draw_threshold_cp=0,
+    )
 
     blunder_count = 0
+    # Queued games, oldest first; enough to keep every engine busy.
+    in_flight = deque()
 
     with open(pgn_path) as pgn_file, open(out_path, "w", newline="") as csv_file:
         writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
         writer.writeheader()
 
         pbar = tqdm(total=total_games, unit="game", desc="Analysing", dynamic_ncols=True)
-        while True:
-            game = chess.pgn.read_game(pgn_file)
-            if game is None:
-                break
-
-            for row in analyse_game(engine, game, args.time, args.threshold):
-                writer.writerow(row)
-                blunder_count += 1
 
-            pbar.set_postfix(blunders=blunder_count)
-            pbar.update(1)
+        def write_ready(limit):
+            nonlocal blunder_count
+            while len(in_flight) > limit:
+                for row in analyse_game(in_flight.popleft(), args.threshold):
+                    writer.writerow(row)
+                    blunder_count += 1
+                pbar.set_postfix(blunders=blunder_count)
+                pbar.update(1)
+
+        try:
+            while True:
+                game = chess.pgn.read_game(pgn_file)
+                if game is None:
+                    break
+                in_flight.append(submit_game(pool, game, args.time))
+                write_ready(args.engines * 8)
+            write_ready(0)
+        finally:
+            pool.close()
 
         pbar.close()
 
-    engine.quit()
     print(f"Done. {total_games} games, {blunder_count} blunders -> {out_path}")
 
 
@@ -9,7 +9,10 @@ classify each result as:
   - draw    (otherwise)
 
 By default only the first CQL position per game is evaluated; pass --all to
-evaluate every CQL position.
+evaluate every CQL position. Pass --eval-cache to reuse raw scores for
+positions already analysed with the same engine and time budget. Pass
+--engines N to keep N Stockfish processes busy from one engine pool; rows are
+still written in input order.
 
 Output CSV columns: white, black, fen, date, eval_result[, game_result]
 """
@@ -19,6 +22,8 @@ from __future__ import annotations
 import argparse
 import csv
 import sys
+from collections import deque
+from concurrent.futures import Future
 from pathlib import Path
 
 import chess
@@ -26,17 +31,29 @@ import chess.engine
 import chess.pgn
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.evaluation.backends import EnginePool
+from reti.evaluation.cache import (
+    EvaluationCache,
+    engine_position_key,
+    profile_id,
+    stockfish_profile,
+)
+
 DEFAULT_THRESHOLD_CP = 200
 DEFAULT_THINK_TIME = 0.1
 DEFAULT_STOCKFISH = "stockfish"
 
 
 def classify(score: chess.engine.PovScore, threshold_cp: int) -> str:
-    mate = score.white().mate()
+    return classify_white_score(score.white().score(), score.white().mate(), threshold_cp)
+
+
+def classify_white_score(cp: int | None, mate: int | None, threshold_cp: int) -> str:
     if mate is not None:
         return "white" if mate > 0 else "black"
 
-    cp = score.white().score()
     if cp is None:
         return "draw"
     if cp >= threshold_cp:
@@ -81,14 +98,44 @@ def process_pgns(
     *,
     all_comments: bool,
     include_game_result: bool,
+    eval_cache: EvaluationCache | None = None,
+    engines: int = 1,
+    hash_mb: int | None = None,
 ) -> None:
     total_games = sum(count_games(p) for p in pgn_paths)
+    # Raw White-POV scores are cached, so the threshold is not part of the profile.
+    cache_profile = profile_id(
+        stockfish_profile(stockfish_path, sf_time_seconds=think_time, kind="white_score")
+    )
 
     fieldnames = ["white", "black", "fen", "date", "eval_result"]
     if include_game_result:
         fieldnames.append("game_result")
 
-    with chess.engine.SimpleEngine.popen_uci(stockfish_path) as engine:
+    pool = EnginePool(
+        stockfish_path,
+        engines=engines,
+        hash_mb=hash_mb,
+        sf_time_seconds=think_time,
+        draw_threshold_cp=threshold_cp,
+    )
+    # (row, position key, cached score or pending search), in input order.
+    in_flight: deque[tuple[dict[str, str], str, dict | Future]] = deque()
+
+    def write_ready(writer: csv.DictWriter, limit: int) -> None:
+        while len(in_flight) > limit:
+            row, key, pending = in_flight.popleft()
+            if isinstance(pending, Future):
+                score: chess.engine.PovScore = pending.result()["score"]
+                pending = {"cp": score.white().score(), "mate": score.white().mate()}
+                if eval_cache is not None:
+                    eval_cache.put(key, cache_profile, pending)
+            row["eval_result"] = classify_white_score(
+                pending["cp"], pending["mate"], threshold_cp
+            )
+            writer.writerow(row)
+
+    try:
         with output_csv.open("w", newline="", encoding="utf-8") as csv_file:
             writer = csv.DictWriter(csv_file, fieldnames=fieldnames)
             writer.writeheader()
@@ -123,17 +170,23 @@ def process_pgns(
                                 base_row["game_result"] = headers.get("Result", "")
 
                             for board in boards:
-                                info = engine.analyse(
-                                    board,
-                                    chess.engine.Limit(time=think_time),
+                                key = engine_position_key(board)
+                                cached = (
+                                    eval_cache.get(key, cache_profile)
+                                    if eval_cache is not None
+                                    else None
                                 )
-                                score: chess.engine.PovScore = info["score"]
-                                row = {
-                                    **base_row,
-                                    "fen": board.fen(),
-                                    "eval_result": classify(score, threshold_cp),
-                                }
-                                writer.writerow(row)
+                                in_flight.append(
+                                    (
+                                        {**base_row, "fen": board.fen()},
+                                        key,
+                                        cached if cached is not None else pool.submit(board),
+                                    )
+                                )
+                            write_ready(writer, engines * 64)
+                write_ready(writer, 0)
+    finally:
+        pool.close()
 
     print(f"Written: {output_csv}")
 
@@ -190,6 +243,27 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=True,
         help="Omit the game result column from the CSV (included by default).",
     )
+    parser.add_argument(
+        "--eval-cache",
+        default=None,
+        metavar="PATH",
+        help="Shared SQLite evaluation cache to read from and add to (default: off).",
+    )
+    parser.add_argument(
+        "--engines",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Stockfish processes to run side by side (default: 1).",
+    )
+    parser.add_argument(
+        "--hash",
+        type=int,
+        default=None,
+        dest="hash_mb",
+        metavar="MB",
+        help="Stockfish Hash size per engine in MB (default: the engine's own).",
+    )
     return parser.parse_args(argv)
 
 
@@ -212,16 +286,27 @@ def main() -> int:
     if not pgn_paths:
         print("Error: no PGN files found.", file=sys.stderr)
         return 1
+    if args.engines < 1:
+        print("Error: --engines must be at least 1.", file=sys.stderr)
+        return 1
 
-    process_pgns(
-        pgn_paths=pgn_paths,
-        stockfish_path=args.stockfish,
-        threshold_cp=args.threshold,
-        think_time=args.think_time,
-        output_csv=Path(args.output),
-        all_comments=args.all_comments,
-        include_game_result=args.include_game_result,
-    )
+    eval_cache = EvaluationCache(Path(args.eval_cache).expanduser()) if args.eval_cache else None
+    try:
+        process_pgns(
+            pgn_paths=pgn_paths,
+            stockfish_path=args.stockfish,
+            threshold_cp=args.threshold,
+            think_time=args.think_time,
+            output_csv=Path(args.output),
+            all_comments=args.all_comments,
+            include_game_result=args.include_game_result,
+            eval_cache=eval_cache,
+            engines=args.engines,
+            hash_mb=args.hash_mb,
+        )
+    finally:
+        if eval_cache is not None:
+            eval_cache.close()
     return 0
 
 
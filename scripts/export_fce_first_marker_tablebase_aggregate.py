@@ -11,16 +11,15 @@ from typing import Any
 
 import chess
 
-REPO_ROOT = Path(__file__).resolve().parents[1]
-SRC_ROOT = REPO_ROOT / "src"
-if str(SRC_ROOT) not in sys.path:
-    sys.path.insert(0, str(SRC_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
+from reti.evaluation.csv_schema import classify_side_to_move_wdl
 from reti.fce_eval_snapshot import (
     AGGREGATE_COLUMNS,
     AGGREGATE_INTEGER_COLUMNS,
+    canonical_position,
     classify_material_side,
-    eval_key_for_fen,
+    eval_key_for_position,
     normalize_marker_row,
 )
 
@@ -32,23 +31,32 @@ def metadata_value(conn: sqlite3.Connection, key: str) -> str:
     return str(row[0])
 
 
-def load_evaluations(eval_db: Path) -> tuple[str, dict[str, tuple[str, str, str]]]:
+def load_evaluations(
+    eval_db: Path,
+) -> tuple[str, bool, dict[str, tuple[str, str, str, int | None]]]:
     conn = sqlite3.connect(f"file:{eval_db}?mode=ro", uri=True)
     try:
         profile = metadata_value(conn, "profile_id")
+        manifest = json.loads(metadata_value(conn, "input_manifest"))
+        probe_dtz = bool(manifest.get("evaluation", {}).get("probeDtz", False))
         rows = conn.execute(
             """
-            SELECT eval_key, eval_status, eval_source, winning_side
+            SELECT eval_key, eval_status, eval_source, winning_side, tb_wdl
             FROM evaluations
             """
         )
         evaluations = {
-            str(eval_key): (str(eval_status), str(eval_source), str(winning_side))
-            for eval_key, eval_status, eval_source, winning_side in rows
+            str(eval_key): (
+                str(eval_status),
+                str(eval_source),
+                str(winning_side),
+                None if tb_wdl is None else int(tb_wdl),
+            )
+            for eval_key, eval_status, eval_source, winning_side, tb_wdl in rows
         }
     finally:
         conn.close()
-    return profile, evaluations
+    return profile, probe_dtz, evaluations
 
 
 def blank_aggregate(ending: str, material_label: str) -> dict[str, Any]:
@@ -197,7 +205,7 @@ def export_first_marker_aggregate(
     if output_csv.exists() and not force:
         raise FileExistsError(f"output already exists: {output_csv} (pass --force)")
 
-    profile, evaluations = load_evaluations(source_eval_db)
+    profile, probe_dtz, evaluations = load_evaluations(source_eval_db)
     aggregates: dict[tuple[str, str], dict[str, Any]] = {}
     rows_seen = 0
     missing_evals = 0
@@ -218,7 +226,12 @@ def export_first_marker_aggregate(
             aggregate = aggregates.setdefault(key, blank_aggregate(*key))
 
             if piece_count <= tablebase_threshold:
-                evaluation = evaluations.get(eval_key_for_fen(fen, profile=profile))
+                canonical = canonical_position(
+                    fen,
+                    fold_mirrors=True,
+                    halfmove_matters=probe_dtz,
+                )
+                evaluation = evaluations.get(eval_key_for_position(canonical, profile=profile))
                 if evaluation is None:
                     missing_evals += 1
                     eval_status, eval_source, winning_side = (
@@ -227,7 +240,10 @@ def export_first_marker_aggregate(
                         "unknown",
                     )
                 else:
-                    eval_status, eval_source, winning_side = evaluation
+                    eval_status, eval_source, winning_side, tb_wdl = evaluation
+                    # The stored colour may belong to the mirrored entry.
+                    if eval_source == "tablebase" and tb_wdl is not None:
+                        winning_side = classify_side_to_move_wdl(tb_wdl, board.turn)
             else:
                 eval_status, eval_source, winning_side = (
                     "skipped_non_tablebase",
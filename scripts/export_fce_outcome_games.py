@@ -11,6 +11,10 @@ from typing import Any
 
 import chess.pgn
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.fce_eval_snapshot import POSITION_WINNING_SIDE_SQL
+
 
 def result_outcome_sql() -> str:
     return """
@@ -31,24 +35,29 @@ def result_outcome_sql() -> str:
     """
 
 
+def winning_side_sql() -> str:
+    return f"({POSITION_WINNING_SIDE_SQL.strip()})"
+
+
 def tb_outcome_sql() -> str:
-    return """
+    winning_side = winning_side_sql()
+    return f"""
         CASE
             WHEN e.eval_status != 'ok'
-              OR e.winning_side = 'unknown'
+              OR {winning_side} = 'unknown'
               OR p.material_side = 'unknown' THEN 'unknown'
             WHEN p.material_side = 'symmetric'
-              AND e.winning_side IN ('white', 'black') THEN 'decisive'
+              AND {winning_side} IN ('white', 'black') THEN 'decisive'
             WHEN p.material_side = 'symmetric'
-              AND e.winning_side = 'draw' THEN 'draw'
+              AND {winning_side} = 'draw' THEN 'draw'
             WHEN p.material_side IN ('white', 'black')
-              AND e.winning_side = p.material_side THEN 'win'
+              AND {winning_side} = p.material_side THEN 'win'
             WHEN p.material_side IN ('white', 'black')
-              AND e.winning_side = 'draw' THEN 'draw'
+              AND {winning_side} = 'draw' THEN 'draw'
             WHEN p.material_side = 'white'
-              AND e.winning_side = 'black' THEN 'loss'
+              AND {winning_side} = 'black' THEN 'loss'
             WHEN p.material_side = 'black'
-              AND e.winning_side = 'white' THEN 'loss'
+              AND {winning_side} = 'white' THEN 'loss'
             ELSE 'unknown'
         END
     """
@@ -84,7 +93,7 @@ def select_marker_rows(
                 p.material_label,
                 p.material_signature,
                 e.eval_source,
-                e.winning_side,
+                {winning_side_sql()} AS winning_side,
                 e.tb_wdl,
                 {tb_outcome_sql()} AS tb_outcome,
                 {result_outcome_sql()} AS result_outcome
@@ -14,6 +14,9 @@ Output: a new PGN containing only games that have at least one sharp
 {CQL} position. At each sharp node the {CQL} comment is rewritten to
 {CQL-SHARP} so downstream tooling (and a human reader) can tell them
 apart from the non-sharp {CQL} comments that are kept unchanged.
+
+Pass --eval-cache to keep verdicts in the shared evaluation cache so reruns
+over overlapping corpora skip positions that were already probed.
 """
 
 from __future__ import annotations
@@ -32,6 +35,10 @@ import chess.pgn
 import chess.syzygy
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.evaluation.cache import EvaluationCache, position_key, profile_id
+
 CQL_MARKER = "CQL"
 SHARP_WIN_MARKER = "CQL-SHARP-WIN"
 SHARP_DRAW_MARKER = "CQL-SHARP-DRAW"
@@ -147,6 +154,52 @@ class EngineAnalyzer(SharpnessAnalyzer):
         raise NotImplementedError("EngineAnalyzer is a stub; tablebase backend only for now.")
 
 
+class CachedAnalyzer(SharpnessAnalyzer):
+    """Serve verdicts from the shared evaluation cache before asking ``inner``.
+
+    ``unknown`` verdicts (missing tables) are not stored so they are retried
+    once coverage improves. The cache is left open for the caller to close.
+    """
+
+    def __init__(
+        self,
+        inner: SharpnessAnalyzer,
+        cache: EvaluationCache,
+        profile: dict[str, object],
+    ) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.profile = profile_id({"kind": "sharp_verdict", **profile})
+
+    def close(self) -> None:
+        self.inner.close()
+
+    def verdict(self, board: chess.Board) -> SharpVerdict:
+        key = position_key(board)
+        cached = self.cache.get(key, self.profile)
+        if cached is not None:
+            move = cached["preserving_move"]
+            return SharpVerdict(
+                bool(cached["sharp"]),
+                str(cached["outcome"]),
+                int(cached["preserving_moves"]),
+                chess.Move.from_uci(move) if move else None,
+            )
+        v = self.inner.verdict(board)
+        if v.outcome != "unknown":
+            self.cache.put(
+                key,
+                self.profile,
+                {
+                    "sharp": v.sharp,
+                    "outcome": v.outcome,
+                    "preserving_moves": v.preserving_moves,
+                    "preserving_move": v.preserving_move.uci() if v.preserving_move else None,
+                },
+            )
+        return v
+
+
 def iter_cql_nodes(game: chess.pgn.Game) -> Iterator[chess.pgn.ChildNode]:
     node: chess.pgn.GameNode = game
     while not node.is_end():
@@ -309,13 +362,33 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         "--time", type=float, default=0.1, help="Per-position engine think time (seconds)."
     )
     parser.add_argument("--threshold", type=int, default=200, help="Engine cp threshold.")
+    parser.add_argument(
+        "--eval-cache",
+        default="",
+        help="Optional shared SQLite evaluation cache for sharpness verdicts.",
+    )
     return parser.parse_args(argv)
 
 
-def build_analyzer(args: argparse.Namespace) -> SharpnessAnalyzer:
+def build_analyzer(
+    args: argparse.Namespace,
+    eval_cache: EvaluationCache | None = None,
+) -> SharpnessAnalyzer:
+    analyzer: SharpnessAnalyzer
     if args.backend == "tablebase":
-        return TablebaseAnalyzer(Path(args.tablebase).expanduser())
-    return EngineAnalyzer(args.engine, args.time, args.threshold)
+        analyzer = TablebaseAnalyzer(Path(args.tablebase).expanduser())
+        profile: dict[str, object] = {"backend": "syzygy"}
+    else:
+        analyzer = EngineAnalyzer(args.engine, args.time, args.threshold)
+        profile = {
+            "backend": "engine",
+            "engine": args.engine,
+            "time": args.time,
+            "threshold": args.threshold,
+        }
+    if eval_cache is None:
+        return analyzer
+    return CachedAnalyzer(analyzer, eval_cache, profile)
 
 
 def main() -> int:
@@ -331,8 +404,13 @@ def main() -> int:
         print("Error: specify --output and/or --csv.", file=sys.stderr)
         return 1
 
-    with build_analyzer(args) as analyzer:
-        games, sharp, total = process(pgn_paths, analyzer, pgn_path_out, csv_path_out)
+    eval_cache = EvaluationCache(Path(args.eval_cache).expanduser()) if args.eval_cache else None
+    try:
+        with build_analyzer(args, eval_cache) as analyzer:
+            games, sharp, total = process(pgn_paths, analyzer, pgn_path_out, csv_path_out)
+    finally:
+        if eval_cache is not None:
+            eval_cache.close()
 
     print(
         f"Wrote {games} games to {args.output} "
@@ -26,6 +26,12 @@ from tqdm import tqdm
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
 from reti.annotated_pgn import discover_pgn_files
+from reti.evaluation.cache import (
+    EvaluationCache,
+    engine_position_key,
+    profile_id,
+    stockfish_profile,
+)
 
 # ---------------------------------------------------------------------------
 # Fast PGN scanning (regex-based, no move validation)
@@ -214,11 +220,21 @@ def classify_position(
     limit: chess.engine.Limit,
     winning_threshold_cp: int,
     sharp_threshold_wc: float,
+    eval_cache: EvaluationCache | None = None,
+    cache_profile: str = "",
 ) -> PositionClassification:
     """Analyse a position and classify it."""
-    results = engine.analyse(board, limit, multipv=2)
+    key = engine_position_key(board)
+    cached = eval_cache.get(key, cache_profile) if eval_cache is not None else None
+    if cached is not None:
+        pv_cps = [int(cp) for cp in cached["cp_white"]]
+    else:
+        results = engine.analyse(board, limit, multipv=2)
+        pv_cps = [score_to_cp(info["score"].white()) for info in results[:2]]
+        if eval_cache is not None:
+            eval_cache.put(key, cache_profile, {"cp_white": pv_cps})
 
-    best_cp = score_to_cp(results[0]["score"].white())
+    best_cp = pv_cps[0]
 
     if best_cp > winning_threshold_cp:
         expected = "white"
@@ -227,10 +243,10 @@ def classify_position(
     else:
         expected = "draw"
 
-    if len(results) < 2:
+    if len(pv_cps) < 2:
         is_sharp = True  # only one legal move
     else:
-        second_cp = score_to_cp(results[1]["score"].white())
+        second_cp = pv_cps[1]
         gap = abs(
             winning_chances_from_cp(best_cp)
             - winning_chances_from_cp(second_cp)
@@ -262,6 +278,8 @@ def collect_positions(
     marker_text: str,
     winning_threshold_cp: int,
     sharp_threshold_wc: float,
+    eval_cache: EvaluationCache | None = None,
+    cache_profile: str = "",
 ) -> list[tuple[PositionClassification, str]]:
     """Return list of ``(classification, source_stem)`` tuples."""
     collected: list[tuple[PositionClassification, str]] = []
@@ -293,6 +311,8 @@ def collect_positions(
                 limit=limit,
                 winning_threshold_cp=winning_threshold_cp,
                 sharp_threshold_wc=sharp_threshold_wc,
+                eval_cache=eval_cache,
+                cache_profile=cache_profile,
             )
             pc.metadata = ep.metadata
             analysed += 1
@@ -475,6 +495,15 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
             "a position as sharp. Range 0.0-2.0. Default: 0.2."
         ),
     )
+    p.add_argument(
+        "--eval-cache",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Shared SQLite evaluation cache. Multi-PV scores for positions "
+            "already analysed with the same engine and limit are reused."
+        ),
+    )
 
     args = p.parse_args(argv)
     _NO_LIMIT = 2**63
@@ -532,6 +561,16 @@ def main(argv: list[str] | None = None) -> int:
         else chess.engine.Limit(time=args.time)
     )
     marker = args.marker_text.strip()
+    eval_cache = EvaluationCache(Path(args.eval_cache).expanduser()) if args.eval_cache else None
+    cache_profile = profile_id(
+        stockfish_profile(
+            args.engine,
+            sf_time_seconds=None if args.depth is not None else args.time,
+            depth=args.depth,
+            kind="multipv_cp_white",
+            multipv=2,
+        )
+    )
     engine = chess.engine.SimpleEngine.popen_uci(args.engine)
     all_positions: list[tuple[PositionClassification, str]] = []
 
@@ -554,6 +593,8 @@ def main(argv: list[str] | None = None) -> int:
                     marker_text=marker,
                     winning_threshold_cp=args.winning_threshold,
                     sharp_threshold_wc=args.sharp_threshold,
+                    eval_cache=eval_cache,
+                    cache_profile=cache_profile,
                 )
                 all_positions.extend(batch)
         else:
@@ -571,10 +612,14 @@ def main(argv: list[str] | None = None) -> int:
                     marker_text=marker,
                     winning_threshold_cp=args.winning_threshold,
                     sharp_threshold_wc=args.sharp_threshold,
+                    eval_cache=eval_cache,
+                    cache_profile=cache_profile,
                 )
             )
     finally:
         engine.quit()
+        if eval_cache is not None:
+            eval_cache.close()
 
     # Phase 3: write CSV.
     output_path = Path(args.output).expanduser()
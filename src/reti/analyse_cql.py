@@ -18,6 +18,7 @@ from reti.cql.backend import (
     infer_backend_name,
     resolve_cql_binary,
 )
+from reti.cql.cache import CqlResultCache
 from reti.cql.cli import (
     ExecutionOptions,
     OutputMode,
@@ -49,6 +50,7 @@ from reti.cql.runner import (
     build_output_path,
     parse_cql_threads_value,
     parse_jobs_value,
+    parse_shards_value,
     resolve_cql_threads,
     resolve_worker_count,
     run_cql_job as _run_cql_job,
@@ -72,6 +74,7 @@ __all__ = [
     "Cql6Backend",
     "CqlBackend",
     "CqliBackend",
+    "CqlResultCache",
     "ExecutionOptions",
     "InputCollection",
     "JobResult",
@@ -99,6 +102,7 @@ __all__ = [
     "parse_args",
     "parse_cql_threads_value",
     "parse_jobs_value",
+    "parse_shards_value",
     "preflight_pgn_files",
     "print_summary",
     "progress_write",
@@ -152,6 +156,7 @@ def run_cql_job(
     *,
     cql_threads: str | int = "auto",
     timeout_seconds: float | None = None,
+    cache: CqlResultCache | None = None,
 ) -> JobResult:
     """Legacy entrypoint accepting a ``Path``; new code should pass a ``CqlBackend``."""
     return _run_cql_job(
@@ -162,6 +167,7 @@ def run_cql_job(
         output_pgn,
         cql_threads=cql_threads,
         timeout_seconds=timeout_seconds,
+        cache=cache,
     )
 
 
@@ -173,6 +179,9 @@ def run_job_matrix(
     cql_threads: str | int,
     game_progress: bool = False,
     timeout_seconds: float | None = None,
+    shards: str | int = 1,
+    shard_root: Path | None = None,
+    cache: CqlResultCache | None = None,
 ) -> list[JobResult]:
     return _run_job_matrix(
         _as_backend(cql_bin_path),
@@ -181,6 +190,9 @@ def run_job_matrix(
         cql_threads=cql_threads,
         game_progress=game_progress,
         timeout_seconds=timeout_seconds,
+        shards=shards,
+        shard_root=shard_root,
+        cache=cache,
     )
 
 
@@ -24,6 +24,7 @@ __all__ = [
     "iter_annotated_pgn",
     "parse_annotated_pgn",
     "side_name",
+    "stream_annotated_pgn",
 ]
 
 
@@ -92,45 +93,52 @@ def _game_from_native(raw: dict[str, object]) -> ParsedAnnotatedGame:
     )
 
 
-def _native_annotated_pgn(
-    pgn_path: Path,
-    *,
-    marker_text: str,
-) -> list[ParsedAnnotatedGame]:
+def _native_annotated_command(pgn_path: Path, *, marker_text: str) -> list[str]:
     binary_path = find_pgn_utils_binary()
     if binary_path is None:
         raise RuntimeError(
             "native PGN playthrough helper not found; build it with "
             "`cargo build --release --manifest-path native/pgn-utils/Cargo.toml`"
         )
+    return [
+        str(binary_path),
+        "annotated-pgn",
+        "--marker",
+        marker_text,
+        "--allow-parse-errors",
+        "--no-progress",
+        "--output",
+        "-",
+        str(pgn_path),
+    ]
+
+
+def stream_annotated_pgn(
+    pgn_path: Path,
+    *,
+    marker_text: str,
+) -> Generator[tuple[ParsedAnnotatedGame, int], None, None]:
+    """Yield ``(parsed_game, byte_offset)`` as the native helper replays games.
 
-    with tempfile.TemporaryDirectory(prefix="reti_annotated_pgn_") as tmpdir:
-        output_path = Path(tmpdir) / "games.jsonl"
-        process = subprocess.run(
-            [
-                str(binary_path),
-                "annotated-pgn",
-                "--marker",
-                marker_text,
-                "--allow-parse-errors",
-                "--force",
-                "--no-progress",
-                "--output",
-                str(output_path),
-                str(pgn_path),
-            ],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
+    JSONL records are read straight from the helper's stdout, so memory stays
+    flat on multi-GB inputs and callers can start work before the scan
+    finishes. ``byte_offset`` is the input offset the native reader had
+    reached when the game was emitted. Closing the generator early stops the
+    helper.
+    """
+    command = _native_annotated_command(pgn_path, marker_text=marker_text)
+    # stderr goes to a temp file: per-game replay errors can exceed a pipe
+    # buffer and would otherwise deadlock the helper while we read stdout.
+    with tempfile.TemporaryFile() as stderr_handle:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=stderr_handle,
         )
-        if process.returncode != 0:
-            detail = process.stderr.strip() or process.stdout.strip()
-            raise RuntimeError(detail or "native PGN playthrough helper failed")
-
-        parsed: list[ParsedAnnotatedGame] = []
-        with output_path.open("r", encoding="utf-8") as handle:
-            for line_number, line in enumerate(handle, start=1):
+        assert process.stdout is not None
+        finished = False
+        try:
+            for line_number, line in enumerate(process.stdout, start=1):
                 if not line.strip():
                     continue
                 try:
@@ -143,8 +151,26 @@ def _native_annotated_pgn(
                     raise RuntimeError(
                         f"native PGN helper wrote non-object JSONL at line {line_number}"
                     )
-                parsed.append(_game_from_native(raw))
-        return parsed
+                if "game_index" not in raw or "byte_offset" not in raw:
+                    # A helper built before `--output -` streamed games treats
+                    # "-" as a file name and prints only its stats here.
+                    raise RuntimeError(
+                        f"{command[0]} is too old to stream games to stdout "
+                        f"(line {line_number} is not a game record); rebuild it with "
+                        "`cargo build --release --manifest-path native/pgn-utils/Cargo.toml`"
+                    )
+                yield _game_from_native(raw), int(raw["byte_offset"])
+            finished = True
+        finally:
+            if not finished and process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            returncode = process.wait()
+
+        if returncode != 0:
+            stderr_handle.seek(0)
+            detail = stderr_handle.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(detail or "native PGN playthrough helper failed")
 
 
 def parse_annotated_pgn(
@@ -152,7 +178,10 @@ def parse_annotated_pgn(
     *,
     marker_text: str,
 ) -> list[ParsedAnnotatedGame]:
-    return _native_annotated_pgn(pgn_path, marker_text=marker_text)
+    return [
+        parsed_game
+        for parsed_game, _ in stream_annotated_pgn(pgn_path, marker_text=marker_text)
+    ]
 
 
 def iter_annotated_pgn(
@@ -162,23 +191,24 @@ def iter_annotated_pgn(
 ) -> Generator[tuple[ParsedAnnotatedGame, int], None, None]:
     """Yield ``(parsed_game, bytes_consumed)`` for each game in the PGN.
 
-    ``bytes_consumed`` is the approximate number of bytes read since the
-    previous yield, based on the file-handle position.  This is useful for
-    driving a progress bar weighted by file size.
+    ``bytes_consumed`` is the number of input bytes the native reader advanced
+    since the previous yield. Games are yielded one behind the helper so the
+    last game can absorb any remainder, keeping the sum equal to the file
+    size for byte-weighted progress bars.
     """
-    parsed_games = parse_annotated_pgn(pgn_path, marker_text=marker_text)
-    if not parsed_games:
-        return
     file_size = pgn_path.stat().st_size
-    base = file_size // len(parsed_games)
     consumed = 0
-    for index, parsed_game in enumerate(parsed_games, start=1):
-        if index == len(parsed_games):
-            bytes_consumed = file_size - consumed
-        else:
-            bytes_consumed = base
+    pending: ParsedAnnotatedGame | None = None
+    pending_offset = 0
+    for parsed_game, byte_offset in stream_annotated_pgn(pgn_path, marker_text=marker_text):
+        if pending is not None:
+            bytes_consumed = max(0, min(pending_offset, file_size) - consumed)
             consumed += bytes_consumed
-        yield parsed_game, bytes_consumed
+            yield pending, bytes_consumed
+        pending = parsed_game
+        pending_offset = byte_offset
+    if pending is not None:
+        yield pending, file_size - consumed
 
 
 # ---------------------------------------------------------------------------
@@ -12,6 +12,8 @@ from reti.common.pgn_discovery import (
     format_relative,
     relative_stem,
 )
+from reti.common.compressed_pgn import open_pgn, pgn_compression
+from reti.common.file_copy import append_file, copy_byte_range, pgn_separator_after
 from reti.common.hashing import (
     canonical_json,
     manifest_fingerprint,
@@ -19,6 +21,7 @@ from reti.common.hashing import (
     sha256_text,
 )
 from reti.common.json_io import load_json, write_json
+from reti.common.pgn_catalog import PgnCatalog
 from reti.common.progress import (
     format_progress_label,
     make_terminal_safe,
@@ -40,7 +43,10 @@ from reti.common.subprocess_helpers import (
 
 __all__ = [
     "InputCollection",
+    "PgnCatalog",
+    "append_file",
     "canonical_json",
+    "copy_byte_range",
     "describe_returncode",
     "discover_input_files",
     "discover_pgn_files",
@@ -50,6 +56,9 @@ __all__ = [
     "load_json",
     "make_terminal_safe",
     "manifest_fingerprint",
+    "open_pgn",
+    "pgn_compression",
+    "pgn_separator_after",
     "progress_write",
     "relative_stem",
     "resolve_executable",
@@ -0,0 +1,361 @@
+"""Reading and writing PGNs stored as ``.pgn.gz``, ``.pgn.bz2`` or ``.pgn.zst``.
+
+Large corpus dumps are usually kept compressed, and CQL only reads plain
+PGN. Rather than asking users to unpack everything first, compressed inputs
+are decompressed as a stream while they are being read:
+
+- :func:`open_pgn` returns the decompressed bytes as a buffered binary file,
+  for Python readers (counting, inspecting, merging).
+- :class:`PgnFeed` copies those bytes into a named pipe (for a program that
+  takes an input path, like CQL) or an anonymous pipe (for one that reads
+  stdin, like ``pgn-utils ... -``) from a background thread.
+- :func:`decompress_pgn` writes a plain copy, for the stages that need to seek
+  (sharding, material prefilter, script fusion) or a backend that does.
+
+Decompression prefers the external tools (``pigz``/``gzip``, ``lbzip2``/
+``bzip2``, ``zstd``), which run in their own process and are faster than the
+stdlib modules; gzip and bzip2 fall back to :mod:`gzip`/:mod:`bz2` when no
+tool is on ``PATH``. zstd has no stdlib fallback here.
+"""
+
+from __future__ import annotations
+
+import bz2
+import contextlib
+import errno
+import gzip
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+from reti.common.subprocess_helpers import describe_returncode
+
+
+FEED_CHUNK_BYTES = 1024 * 1024
+
+# Name used on the command line -> suffix after ``.pgn``.
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "bzip2": ".bz2", "zstd": ".zst"}
+_COMPRESSION_BY_SUFFIX = {suffix: name for name, suffix in COMPRESSION_SUFFIXES.items()}
+
+# Candidate tools per format, fastest first.
+_DECOMPRESSORS = {
+    "gzip": (("pigz", "-dc"), ("gzip", "-dc")),
+    "bzip2": (("lbzip2", "-dc"), ("bzip2", "-dc")),
+    "zstd": (("zstd", "-dcq"),),
+}
+_COMPRESSORS = {
+    "gzip": (("pigz", "-c"), ("gzip", "-c")),
+    "bzip2": (("lbzip2", "-c"), ("bzip2", "-c")),
+    "zstd": (("zstd", "-cq", "-T0"),),
+}
+_STDLIB_OPENERS: dict[str, Callable[[BinaryIO], BinaryIO]] = {
+    "gzip": lambda raw: gzip.GzipFile(fileobj=raw, mode="rb"),
+    "bzip2": lambda raw: bz2.BZ2File(raw, mode="rb"),
+}
+_STDLIB_WRITERS: dict[str, Callable[[BinaryIO], BinaryIO]] = {
+    "gzip": lambda raw: gzip.GzipFile(fileobj=raw, mode="wb"),
+    "bzip2": lambda raw: bz2.BZ2File(raw, mode="wb"),
+}
+
+
+def pgn_compression(path: Path) -> str | None:
+    """``"gzip"``, ``"bzip2"`` or ``"zstd"`` for a compressed PGN name, else None."""
+    compression = _COMPRESSION_BY_SUFFIX.get(path.suffix.lower())
+    if compression is None or Path(path.stem).suffix.lower() != ".pgn":
+        return None
+    return compression
+
+
+def plain_pgn_name(path: Path) -> str:
+    """``db.pgn.gz`` -> ``db.pgn``; plain names are returned unchanged."""
+    return path.stem if pgn_compression(path) is not None else path.name
+
+
+def _find_tool(candidates: tuple[tuple[str, ...], ...]) -> list[str] | None:
+    for name, *args in candidates:
+        resolved = shutil.which(name)
+        if resolved:
+            return [resolved, *args]
+    return None
+
+
+def _missing_tool_error(compression: str, path: Path) -> OSError:
+    tool = _DECOMPRESSORS[compression][0][0]
+    return OSError(f"reading {path.name} needs the '{tool}' command on PATH")
+
+
+class _ProcessOutput(io.RawIOBase):
+    """stdout of a decompressor process as a raw stream.
+
+    Closing it reaps the process. A non-zero exit is raised only if the
+    reader got to the end of the stream; stopping early is allowed.
+    """
+
+    def __init__(self, process: subprocess.Popen, stderr: BinaryIO, label: str) -> None:
+        super().__init__()
+        self._process = process
+        self._stderr = stderr
+        self._label = label
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def fileno(self) -> int:
+        return self._process.stdout.fileno()
+
+    def readinto(self, buffer) -> int:
+        count = self._process.stdout.readinto(buffer)
+        if not count:
+            self._eof = True
+        return count
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self._process.stdout.close()
+        returncode = self._process.wait()
+        self._stderr.seek(0)
+        detail = self._stderr.read().decode("utf-8", errors="replace").strip()
+        self._stderr.close()
+        super().close()
+        if self._eof and returncode != 0:
+            message = f"{self._label} failed ({describe_returncode(returncode)})"
+            raise OSError(f"{message}: {detail}" if detail else message)
+
+
+class PgnReader(io.BufferedReader):
+    """Decompressed PGN bytes; :meth:`source_position` tracks the file on disk.
+
+    The position in the (possibly compressed) file is what progress bars
+    sized by ``stat().st_size`` should advance by.
+    """
+
+    def __init__(
+        self,
+        raw: io.RawIOBase | BinaryIO,
+        source: BinaryIO | None = None,
+    ) -> None:
+        super().__init__(raw, FEED_CHUNK_BYTES)
+        self._source = source
+
+    def source_position(self) -> int:
+        if self._source is None:
+            return self.tell()
+        # A decompressor process shares this file description as its stdin,
+        # so the offset it has read up to is visible here too.
+        return os.lseek(self._source.fileno(), 0, os.SEEK_CUR)
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            if self._source is not None:
+                self._source.close()
+
+
+def open_pgn(path: Path) -> PgnReader:
+    """Open ``path`` for binary reading, decompressing ``.gz/.bz2/.zst`` on the fly."""
+    compression = pgn_compression(path)
+    if compression is None:
+        return PgnReader(io.FileIO(path, "rb"))
+
+    command = _find_tool(_DECOMPRESSORS[compression])
+    source = path.open("rb")
+    try:
+        if command is None:
+            opener = _STDLIB_OPENERS.get(compression)
+            if opener is None:
+                raise _missing_tool_error(compression, path)
+            return PgnReader(opener(source), source)
+        stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen(
+            command, stdin=source, stdout=subprocess.PIPE, stderr=stderr, bufsize=0
+        )
+    except BaseException:
+        source.close()
+        raise
+    label = f"{Path(command[0]).name} on {path.name}"
+    return PgnReader(_ProcessOutput(process, stderr, label), source)
+
+
+class PgnFeed:
+    """Stream a PGN's decompressed bytes into a pipe from a background thread.
+
+    ``PgnFeed(path, fifo_dir=directory)`` creates a named pipe called
+    ``plain_pgn_name(path)`` in ``directory``; pass :attr:`path` to a program
+    as its input file. ``PgnFeed(path)`` makes an anonymous pipe instead;
+    pass :attr:`stdin` as a subprocess's ``stdin``.
+
+    ``open_source`` turns the source path into the stream to copy; it
+    defaults to :func:`open_pgn`. The opened stream stays available as
+    :attr:`reader` for inspection after :meth:`close`.
+
+    The consumer may stop reading early. Other failures (a corrupt archive,
+    a missing tool) are kept in :attr:`error` after :meth:`close`, which the
+    caller must check: the consumer itself only sees a truncated PGN.
+    """
+
+    def __init__(
+        self,
+        source_path: Path,
+        *,
+        fifo_dir: Path | None = None,
+        open_source: Callable[[Path], BinaryIO] = open_pgn,
+    ) -> None:
+        self.source_path = source_path
+        self.reader: BinaryIO | None = None
+        self.error: BaseException | None = None
+        self._open_source = open_source
+        self.path: Path | None = None
+        self.stdin: int | None = None
+        self._write_fd: int | None = None
+        self._stop = threading.Event()
+        if fifo_dir is not None:
+            self.path = fifo_dir / plain_pgn_name(source_path)
+            os.mkfifo(self.path)
+        else:
+            self.stdin, self._write_fd = os.pipe()
+        self._thread = threading.Thread(
+            target=self._produce, name=f"pgn-feed-{source_path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def _open_fifo(self) -> int | None:
+        # A blocking open would hang forever if the consumer never opens
+        # its end (e.g. it rejected its arguments), so poll instead.
+        while not self._stop.is_set():
+            try:
+                fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as exc:
+                if exc.errno != errno.ENXIO:
+                    raise
+                time.sleep(0.01)
+                continue
+            os.set_blocking(fd, True)
+            return fd
+        return None
+
+    def _produce(self) -> None:
+        try:
+            fd = self._write_fd if self.path is None else self._open_fifo()
+            if fd is None:
+                return
+            self._write_fd = None
+            with open(fd, "wb", buffering=0) as sink:
+                self.reader = self._open_source(self.source_path)
+                with self.reader as reader:
+                    for chunk in iter(lambda: reader.read(FEED_CHUNK_BYTES), b""):
+                        if self._stop.is_set():
+                            return
+                        sink.write(chunk)
+        except BrokenPipeError:
+            pass
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            if self._write_fd is not None:
+                os.close(self._write_fd)
+                self._write_fd = None
+
+    def close(self) -> None:
+        """Stop feeding, wait for the thread and remove the named pipe."""
+        self._stop.set()
+        if self.stdin is not None:
+            os.close(self.stdin)
+            self.stdin = None
+        self._thread.join()
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "PgnFeed":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+@contextlib.contextmanager
+def pgn_input_path(
+    path: Path,
+    *,
+    open_source: Callable[[Path], BinaryIO] | None = None,
+) -> Iterator[tuple[Path, PgnFeed | None]]:
+    """``path`` itself if plain, else a named pipe streaming its decompressed bytes.
+
+    With ``open_source`` the pipe is always used and carries that stream
+    instead (see :class:`PgnFeed`). Check the yielded feed's
+    :attr:`PgnFeed.error` after the block.
+    """
+    if open_source is None and pgn_compression(path) is None:
+        yield path, None
+        return
+    with tempfile.TemporaryDirectory(prefix="pgn_feed_") as fifo_dir:
+        with PgnFeed(
+            path, fifo_dir=Path(fifo_dir), open_source=open_source or open_pgn
+        ) as feed:
+            yield feed.path, feed
+
+
+@contextlib.contextmanager
+def pgn_stdin_argument(path: Path) -> Iterator[tuple[str, int | None, PgnFeed | None]]:
+    """``(argument, stdin, feed)`` for a tool that reads ``-`` as stdin.
+
+    Plain PGNs are passed by path; compressed ones as ``-`` with their
+    decompressed bytes on ``stdin``. Check ``feed.error`` after the block.
+    """
+    if pgn_compression(path) is None:
+        yield str(path), None, None
+        return
+    with PgnFeed(path) as feed:
+        yield "-", feed.stdin, feed
+
+
+def decompress_pgn(source_path: Path, destination: Path) -> Path:
+    """Write a plain copy of a compressed PGN to ``destination``."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_name(f"{destination.name}.{os.getpid()}.partial")
+    try:
+        with open_pgn(source_path) as reader, partial.open("wb") as out:
+            shutil.copyfileobj(reader, out, FEED_CHUNK_BYTES)
+        partial.replace(destination)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return destination
+
+
+def compress_pgn(source_path: Path, compression: str) -> Path:
+    """Replace ``source_path`` with ``<name><suffix>`` compressed as ``compression``."""
+    destination = source_path.with_name(source_path.name + COMPRESSION_SUFFIXES[compression])
+    partial = destination.with_name(f"{destination.name}.{os.getpid()}.partial")
+    command = _find_tool(_COMPRESSORS[compression])
+    try:
+        with source_path.open("rb") as source, partial.open("wb") as out:
+            if command is not None:
+                process = subprocess.run(
+                    command, stdin=source, stdout=out, stderr=subprocess.PIPE
+                )
+                if process.returncode != 0:
+                    detail = process.stderr.decode("utf-8", errors="replace").strip()
+                    raise OSError(
+                        f"{Path(command[0]).name} failed on {source_path.name}: "
+                        f"{detail or describe_returncode(process.returncode)}"
+                    )
+            elif compression in _STDLIB_WRITERS:
+                with _STDLIB_WRITERS[compression](out) as writer:
+                    shutil.copyfileobj(source, writer, FEED_CHUNK_BYTES)
+            else:
+                raise OSError("writing .zst output needs the 'zstd' command on PATH")
+        partial.replace(destination)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    source_path.unlink()
+    return destination
@@ -0,0 +1,99 @@
+"""Kernel-side file copies for concatenating and slicing PGNs.
+
+Merging per-pair outputs and cutting shards only move bytes around, so they
+should not pay for a read into Python and a write back out. These helpers
+use ``os.copy_file_range`` (same-filesystem copies, reflinks where the
+filesystem supports them) and then ``os.sendfile``, and fall back to a plain
+buffered loop where neither is available or the kernel refuses.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Errors meaning "this copy method does not apply here", not "the copy failed".
+_UNSUPPORTED_ERRNOS = frozenset(
+    {
+        errno.EXDEV,
+        errno.ENOSYS,
+        errno.EINVAL,
+        errno.EOPNOTSUPP,
+        errno.ENOTSUP,
+        errno.EPERM,
+    }
+)
+
+
+def _kernel_copy(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    """Copy up to ``count`` bytes at ``offset`` to ``out_fd``'s position; return bytes copied."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < count:
+                step = os.copy_file_range(in_fd, out_fd, count - copied, offset + copied)
+                if step == 0:
+                    return copied
+                copied += step
+            return copied
+        except OSError as exc:
+            if exc.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+    if hasattr(os, "sendfile"):
+        try:
+            while copied < count:
+                step = os.sendfile(out_fd, in_fd, offset + copied, count - copied)
+                if step == 0:
+                    return copied
+                copied += step
+        except OSError as exc:
+            if exc.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+    return copied
+
+
+def copy_byte_range(out: BinaryIO, source: BinaryIO, offset: int, count: int) -> int:
+    """Append ``source[offset:offset + count]`` to ``out``; return bytes copied.
+
+    Fewer than ``count`` bytes are copied only if ``source`` ends first.
+    ``out`` may keep being used as a normal buffered file afterwards.
+    """
+    if count <= 0:
+        return 0
+    out.flush()
+    copied = _kernel_copy(source.fileno(), out.fileno(), offset, count)
+    if copied < count:
+        source.seek(offset + copied)
+        while copied < count:
+            chunk = source.read(min(COPY_CHUNK_BYTES, count - copied))
+            if not chunk:
+                break
+            out.write(chunk)
+            copied += len(chunk)
+    return copied
+
+
+def append_file(out: BinaryIO, source_path: Path) -> bytes:
+    """Append all of ``source_path`` to ``out``; return its last two bytes.
+
+    The tail is what a caller needs to decide which separator, if any, goes
+    before the next file; only those bytes are read into Python.
+    """
+    with source_path.open("rb") as source:
+        size = os.fstat(source.fileno()).st_size
+        copied = copy_byte_range(out, source, 0, size)
+        return os.pread(source.fileno(), min(2, copied), copied - min(2, copied))
+
+
+def pgn_separator_after(tail: bytes) -> bytes:
+    """Bytes that end a PGN chunk ending in ``tail`` with a blank line."""
+    if not tail or tail.endswith(b"\n\n"):
+        return b""
+    if tail.endswith(b"\n"):
+        return b"\n"
+    return b"\n\n"
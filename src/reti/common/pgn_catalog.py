@@ -0,0 +1,229 @@
+"""Persistent per-PGN facts, so unchanged corpus files are not rescanned.
+
+Several tools used to rediscover the same things about each corpus PGN on
+every run: CQL preflight inspected its bytes and rewrote a sanitized copy
+into a throwaway temp dir, ``--game-progress`` recounted ``[Event `` lines,
+and the FCE snapshot builders counted (and optionally hashed) the source
+PGNs again. The catalog records those facts once per file.
+
+Each PGN gets a small JSON entry under the catalog root
+(``$XDG_CACHE_HOME/reti/pgn-catalog`` by default), keyed by its resolved
+path, so corpus directories are left untouched. With ``sidecars=True`` the
+entry is written next to the PGN instead, as ``<name>.pgn.catalog.json``,
+falling back to the root for read-only directories. An entry is only trusted
+while the PGN's stamp still matches:
+
+- resolved path, size, ``mtime_ns`` and inode
+- optionally its SHA-256 (``content_hash=True``; costs a full read)
+
+An entry holds game counts per counting method, the byte-level issues
+preflight found, the location and stamp of a persistent sanitized copy, and
+a memoized SHA-256 of the PGN.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from reti.common.compressed_pgn import open_pgn, plain_pgn_name
+from reti.common.hashing import canonical_json, sha256_file, sha256_text
+
+
+CATALOG_SCHEMA_VERSION = 1
+CATALOG_SUFFIX = ".catalog.json"
+
+# ``[Event `` lines after stripping leading blanks; matches the
+# ``event-tag-lines`` count method of ``pgn-utils source-totals``.
+GAME_COUNT_EVENT_TAG_LINES = "event-tag-lines"
+# Games seen by the fast pgn-utils inspect pass during CQL preflight.
+GAME_COUNT_PGN_UTILS = "pgn-utils-games"
+
+
+def default_pgn_catalog_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    root = Path(base).expanduser() if base else Path.home() / ".cache"
+    return root / "reti" / "pgn-catalog"
+
+
+def pgn_catalog_sidecar_path(pgn_path: Path) -> Path:
+    return pgn_path.with_name(pgn_path.name + CATALOG_SUFFIX)
+
+
+def count_event_tag_lines(pgn_path: Path) -> int:
+    count = 0
+    with open_pgn(pgn_path) as handle:
+        for line in handle:
+            if line.lstrip(b" \t").startswith(b"[Event "):
+                count += 1
+    return count
+
+
+def _file_stamp(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {
+        "path": str(path.resolve()),
+        "sizeBytes": stat.st_size,
+        "mtimeNs": stat.st_mtime_ns,
+        "inode": stat.st_ino,
+    }
+
+
+@dataclass
+class PgnCatalogEntry:
+    pgn_path: Path
+    stamp: dict[str, Any]
+    game_counts: dict[str, int] = field(default_factory=dict)
+    text_issues: list[str] | None = None
+    sanitized_copy: dict[str, Any] | None = None
+    sha256: str | None = None
+
+    def game_count(self, methods: tuple[str, ...]) -> int | None:
+        """The first recorded count among ``methods``, in order."""
+        for method in methods:
+            if method in self.game_counts:
+                return self.game_counts[method]
+        return None
+
+    def sanitized_path(self) -> Path | None:
+        """The recorded sanitized copy, if it is still the file we wrote."""
+        if self.sanitized_copy is None:
+            return None
+        path = Path(self.sanitized_copy["path"])
+        try:
+            if _file_stamp(path) != self.sanitized_copy:
+                return None
+        except OSError:
+            return None
+        return path
+
+    def record_sanitized_copy(self, path: Path) -> None:
+        self.sanitized_copy = _file_stamp(path)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "schemaVersion": CATALOG_SCHEMA_VERSION,
+            "kind": "reti-pgn-catalog-entry",
+            "stamp": self.stamp,
+            "gameCounts": self.game_counts,
+            "textIssues": self.text_issues,
+            "sanitizedCopy": self.sanitized_copy,
+            "sha256": self.sha256,
+        }
+
+
+class PgnCatalog:
+    """Catalog of per-PGN facts.
+
+    ``root`` holds the entries and the persistent sanitized copies; it
+    defaults to ``$XDG_CACHE_HOME/reti/pgn-catalog``. ``sidecars=True``
+    stores entries next to their PGNs where the directory is writable.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        *,
+        content_hash: bool = False,
+        sidecars: bool = False,
+    ) -> None:
+        self.root = root if root is not None else default_pgn_catalog_dir()
+        self.content_hash = content_hash
+        self.sidecars = sidecars
+
+    def _stamp(self, pgn_path: Path) -> dict[str, Any]:
+        stamp = _file_stamp(pgn_path)
+        if self.content_hash:
+            stamp["sha256"] = sha256_file(pgn_path)
+        return stamp
+
+    def _fallback_path(self, pgn_path: Path) -> Path:
+        key = sha256_text(str(pgn_path.resolve()))
+        return self.root / "entries" / key[:2] / f"{key}{CATALOG_SUFFIX}"
+
+    def _entry_paths(self, pgn_path: Path) -> tuple[Path, ...]:
+        if self.sidecars:
+            return (pgn_catalog_sidecar_path(pgn_path), self._fallback_path(pgn_path))
+        return (self._fallback_path(pgn_path),)
+
+    def entry(self, pgn_path: Path) -> PgnCatalogEntry:
+        """The current entry for ``pgn_path``; empty if none matches its stamp."""
+        stamp = self._stamp(pgn_path)
+        for path in self._entry_paths(pgn_path):
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            if not isinstance(payload, dict):
+                continue
+            if payload.get("schemaVersion") != CATALOG_SCHEMA_VERSION:
+                continue
+            recorded = payload.get("stamp")
+            if not isinstance(recorded, dict) or any(
+                recorded.get(key) != value for key, value in stamp.items()
+            ):
+                continue
+            return PgnCatalogEntry(
+                pgn_path=pgn_path,
+                stamp=recorded,
+                game_counts=dict(payload.get("gameCounts") or {}),
+                text_issues=payload.get("textIssues"),
+                sanitized_copy=payload.get("sanitizedCopy"),
+                sha256=payload.get("sha256"),
+            )
+        return PgnCatalogEntry(pgn_path=pgn_path, stamp=stamp)
+
+    def save(self, entry: PgnCatalogEntry) -> None:
+        """Write ``entry`` atomically under ``root``, or next to its PGN with sidecars."""
+        text = canonical_json(entry.to_json()) + "\n"
+        for path in self._entry_paths(entry.pgn_path):
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_text(text, encoding="utf-8")
+                tmp_path.replace(path)
+                return
+            except OSError:
+                tmp_path.unlink(missing_ok=True)
+                continue
+
+    def sanitized_copy_path(self, pgn_path: Path) -> Path:
+        """Stable location for ``pgn_path``'s sanitized copy under ``root``."""
+        key = sha256_text(str(pgn_path.resolve()))
+        return self.root / "sanitized" / key[:16] / plain_pgn_name(pgn_path)
+
+    def game_count(
+        self,
+        pgn_path: Path,
+        *,
+        methods: tuple[str, ...] = (GAME_COUNT_EVENT_TAG_LINES,),
+        count: Callable[[Path], int] = count_event_tag_lines,
+    ) -> int:
+        """Recorded game count for ``pgn_path``, counting with ``count`` on a miss.
+
+        A fresh count is recorded under ``methods[0]``.
+        """
+        entry = self.entry(pgn_path)
+        cached = entry.game_count(methods)
+        if cached is not None:
+            return cached
+        games = count(pgn_path)
+        entry.game_counts[methods[0]] = games
+        self.save(entry)
+        return games
+
+    def record_game_count(self, pgn_path: Path, method: str, games: int) -> None:
+        entry = self.entry(pgn_path)
+        if entry.game_counts.get(method) != games:
+            entry.game_counts[method] = games
+            self.save(entry)
+
+    def sha256(self, pgn_path: Path) -> str:
+        entry = self.entry(pgn_path)
+        if entry.sha256 is None:
+            entry.sha256 = entry.stamp.get("sha256") or sha256_file(pgn_path)
+            self.save(entry)
+        return entry.sha256
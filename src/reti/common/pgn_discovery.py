@@ -11,6 +11,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 
+from reti.common.compressed_pgn import pgn_compression
+
 
 @dataclass(frozen=True)
 class InputCollection:
@@ -25,16 +27,32 @@ class InputCollection:
     files: list[Path]
 
 
-def discover_input_files(location: str, suffix: str) -> InputCollection | None:
+def discover_input_files(
+    location: str,
+    suffix: str,
+    *,
+    allow_compressed: bool = False,
+) -> InputCollection | None:
     """Resolve a single file or recursively discover matching files in a directory.
 
-    ``suffix`` should include the leading dot (``".pgn"``).
+    ``suffix`` should include the leading dot (``".pgn"``). With
+    ``allow_compressed``, ``.pgn.gz``/``.pgn.bz2``/``.pgn.zst`` files match
+    ``".pgn"`` too (see :mod:`reti.common.compressed_pgn`).
     """
     path = Path(location).expanduser()
     expected_suffix = suffix.lower()
 
+    def matches(item: Path) -> bool:
+        if item.suffix.lower() == expected_suffix:
+            return True
+        return (
+            allow_compressed
+            and expected_suffix == ".pgn"
+            and pgn_compression(item) is not None
+        )
+
     if path.is_file():
-        if path.suffix.lower() != expected_suffix:
+        if not matches(path):
             print(f"Error: '{location}' is not a {suffix} file.")
             return None
         return InputCollection(root=path.parent, files=[path])
@@ -44,7 +62,7 @@ def discover_input_files(location: str, suffix: str) -> InputCollection | None:
             (
                 item
                 for item in path.rglob("*")
-                if item.is_file() and item.suffix.lower() == expected_suffix
+                if item.is_file() and matches(item)
             ),
             key=lambda item: str(item.relative_to(path)),
         )
@@ -76,8 +94,14 @@ def discover_pgn_files(location: str) -> tuple[list[Path], Path | None] | None:
 
 
 def relative_stem(path: Path, root: Path) -> Path:
-    """Path relative to ``root`` with the final suffix removed."""
-    return path.relative_to(root).with_suffix("")
+    """Path relative to ``root`` with the final suffix removed.
+
+    A compression suffix goes too: ``a/db.pgn.gz`` -> ``a/db``.
+    """
+    relative = path.relative_to(root)
+    if pgn_compression(relative) is not None:
+        relative = relative.with_suffix("")
+    return relative.with_suffix("")
 
 
 def format_relative(path: Path, root: Path) -> str:
@@ -8,7 +8,16 @@ The pieces:
 - :mod:`reti.cql.backend` — pluggable CQL executable wrapper
 - :mod:`reti.cql.preflight` — per-PGN sanity checks before the matrix
 - :mod:`reti.cql.runner` — job specs + parallel execution
+- :mod:`reti.cql.engine` — asyncio subprocess engine with bounded output capture
+- :mod:`reti.cql.scheduling` — cost-aware, page-cache-friendly job ordering
+- :mod:`reti.cql.sharding` — game-aligned byte-range splitting of large PGNs
+- :mod:`reti.cql.material_index` — per-game material index for prefiltering
+- :mod:`reti.cql.fusion` — one-pass fused scripts for a whole script directory
+- :mod:`reti.cql.header_filter` — ``--where`` header predicates streamed into CQL
+- :mod:`reti.cql.cache` — persistent content-addressed cache of job results
+- :mod:`reti.cql.journal` — per-job completion journal for ``--resume``
 - :mod:`reti.cql.output` — summary CSV + per-CQL output merging
+- :mod:`reti.cql.benchmark` — throughput benchmarks and regression gates
 - :mod:`reti.cql.cli` — argument parsing + the ``main`` orchestrator
 """
 
@@ -20,7 +29,9 @@ from reti.cql.backend import (
     infer_backend_name,
     resolve_cql_binary,
 )
+from reti.cql.cache import CqlResultCache
 from reti.cql.cli import ExecutionOptions, OutputMode, OutputOptions, PreflightOptions
+from reti.cql.header_filter import HeaderFilter, HeaderPredicate, parse_where_value
 from reti.cql.output import merge_outputs_by_cql, write_summary_csv
 from reti.cql.preflight import (
     PgnPreflightResult,
@@ -39,6 +50,7 @@ from reti.cql.runner import (
     count_games_in_pgn,
     parse_cql_threads_value,
     parse_jobs_value,
+    parse_shards_value,
     resolve_cql_threads,
     resolve_worker_count,
     run_cql_job,
@@ -49,7 +61,10 @@ __all__ = [
     "Cql6Backend",
     "CqlBackend",
     "CqliBackend",
+    "CqlResultCache",
     "ExecutionOptions",
+    "HeaderFilter",
+    "HeaderPredicate",
     "JobResult",
     "JobSpec",
     "OutputMode",
@@ -65,6 +80,8 @@ __all__ = [
     "merge_outputs_by_cql",
     "parse_cql_threads_value",
     "parse_jobs_value",
+    "parse_shards_value",
+    "parse_where_value",
     "preflight_pgn_files",
     "resolve_cql_binary",
     "resolve_cql_threads",
@@ -48,7 +48,13 @@ def create_cql_backend(binary_path: Path, backend_name: str = "auto") -> "CqlBac
 
 
 class CqlBackend(ABC):
-    """A CQL-like engine that takes a PGN + script and writes matched games."""
+    """A CQL-like engine that takes a PGN + script and writes matched games.
+
+    ``needs_seekable_input`` backends get a decompressed copy of a compressed
+    PGN instead of a named pipe streaming it (see ``--compressed-input``).
+    """
+
+    needs_seekable_input = False
 
     def __init__(self, binary_path: Path) -> None:
         self.binary_path = binary_path
@@ -61,8 +67,13 @@ class CqlBackend(ABC):
         output_path: Path,
         *,
         threads: str | int = "auto",
+        lineincrement: int | None = None,
     ) -> list[str]:
-        """Return argv for a normal cross-product run."""
+        """Return argv for a normal cross-product run.
+
+        ``lineincrement`` asks CQL to print a progress line every that many
+        games; the asyncio engine parses them for game-level progress.
+        """
 
     @abstractmethod
     def build_smoke_command(
@@ -91,16 +102,21 @@ class Cql6Backend(CqlBackend):
         output_path: Path,
         *,
         threads: str | int = "auto",
+        lineincrement: int | None = None,
     ) -> list[str]:
-        command = [
-            str(self.binary_path),
-            "-i",
-            str(pgn_path),
-            "-o",
-            str(output_path),
-            "-matchstring",
-            script_path.stem,
-        ]
+        command = [str(self.binary_path)]
+        if lineincrement is not None:
+            command.extend(["-lineincrement", str(lineincrement)])
+        command.extend(
+            [
+                "-i",
+                str(pgn_path),
+                "-o",
+                str(output_path),
+                "-matchstring",
+                script_path.stem,
+            ]
+        )
         if threads != "auto":
             command.extend(["-threads", str(threads)])
         command.append(str(script_path))
@@ -130,4 +146,10 @@ class Cql6Backend(CqlBackend):
 
 
 class CqliBackend(Cql6Backend):
-    """CQLi currently accepts the same conservative argv shape as CQL 6.x."""
+    """CQLi currently accepts the same conservative argv shape as CQL 6.x.
+
+    It has not been checked against a named pipe as ``-i``, so compressed
+    inputs are decompressed to a file first.
+    """
+
+    needs_seekable_input = True
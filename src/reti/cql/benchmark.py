@@ -0,0 +1,414 @@
+"""Throughput benchmarks for a :class:`CqlBackend` over (script, PGN) pairs.
+
+A *configuration* is one ``(PGN, cql_threads, jobs)`` combination: every
+script is run against the PGN through a pool of ``jobs`` concurrent CQL
+processes, each started with ``cql_threads``. That mirrors how
+``analyse_cql`` drives the matrix, so a sweep over configurations answers
+"more ``--jobs`` or more ``--cql-threads``?" for a given corpus.
+
+Per process we record wall time, CPU time (user + system) and peak RSS from
+``wait4``; throughput is derived from the input PGN's game count and size.
+Runs are appended to a JSON history file and can be compared against a
+stored baseline, where a drop in games/s beyond a tolerance is a regression.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from reti.common.json_io import load_json, write_json
+from reti.cql.backend import CqlBackend
+from reti.cql.cache import binary_fingerprint
+from reti.cql.preflight import count_games_in_pgn
+
+
+BENCHMARK_SCHEMA_VERSION = 1
+DEFAULT_REGRESSION_TOLERANCE = 0.10
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    cql_threads: str | int
+    jobs: int
+
+    @property
+    def label(self) -> str:
+        return f"threads={self.cql_threads} jobs={self.jobs}"
+
+
+@dataclass
+class ProcessMeasurement:
+    returncode: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int
+    output: str
+    timed_out: bool = False
+
+
+@dataclass
+class ScriptRecord:
+    """Median-of-repeats measurement for one script under one configuration."""
+
+    script: str
+    pgn: str
+    cql_threads: str | int
+    jobs: int
+    games: int
+    pgn_bytes: int
+    wall_seconds: float
+    cpu_seconds: float
+    peak_rss_bytes: int
+    match_count: int | None
+    success: bool
+    error: str = ""
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.pgn_bytes / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def cpu_utilization(self) -> float:
+        """Average busy cores over the run (1.0 = one core fully used)."""
+        return self.cpu_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        payload = asdict(self)
+        payload.update(
+            games_per_second=round(self.games_per_second, 3),
+            bytes_per_second=round(self.bytes_per_second, 1),
+            cpu_utilization=round(self.cpu_utilization, 3),
+        )
+        return payload
+
+
+@dataclass
+class ConfigurationResult:
+    """All scripts for one PGN under one configuration, run as a batch."""
+
+    pgn: str
+    config: BenchmarkConfig
+    games: int
+    pgn_bytes: int
+    wall_seconds: float
+    scripts: list[ScriptRecord] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        return all(record.success for record in self.scripts)
+
+    @property
+    def games_per_second(self) -> float:
+        """Game-script pairs processed per second across the whole batch."""
+        if self.wall_seconds <= 0:
+            return 0.0
+        return self.games * len(self.scripts) / self.wall_seconds
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.wall_seconds <= 0:
+            return 0.0
+        return self.pgn_bytes * len(self.scripts) / self.wall_seconds
+
+    @property
+    def peak_rss_bytes(self) -> int:
+        return max((record.peak_rss_bytes for record in self.scripts), default=0)
+
+    @property
+    def cpu_utilization(self) -> float:
+        if self.wall_seconds <= 0:
+            return 0.0
+        return sum(record.cpu_seconds for record in self.scripts) / self.wall_seconds
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "pgn": self.pgn,
+            "cql_threads": self.config.cql_threads,
+            "jobs": self.config.jobs,
+            "games": self.games,
+            "pgn_bytes": self.pgn_bytes,
+            "wall_seconds": self.wall_seconds,
+            "games_per_second": round(self.games_per_second, 3),
+            "bytes_per_second": round(self.bytes_per_second, 1),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "cpu_utilization": round(self.cpu_utilization, 3),
+            "success": self.success,
+            "scripts": [record.to_json() for record in self.scripts],
+        }
+
+
+@dataclass
+class Regression:
+    key: str
+    baseline_games_per_second: float
+    games_per_second: float
+
+    @property
+    def change(self) -> float:
+        return self.games_per_second / self.baseline_games_per_second - 1.0
+
+
+def parse_config_values(value: str) -> list[str | int]:
+    """Parse ``"1,2,auto"`` into ``[1, 2, "auto"]``."""
+    values: list[str | int] = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if part == "auto":
+            values.append(part)
+            continue
+        number = int(part)
+        if number < 1:
+            raise ValueError(f"expected a positive integer or 'auto', got {part!r}")
+        values.append(number)
+    return values
+
+
+def thread_scaling_sweep(cpu_count: int | None = None) -> list[BenchmarkConfig]:
+    """Split the machine's cores between ``jobs`` and ``cql_threads`` every power-of-two way."""
+    cores = max(1, cpu_count or os.cpu_count() or 1)
+    configs: list[BenchmarkConfig] = []
+    threads = 1
+    while threads <= cores:
+        configs.append(BenchmarkConfig(cql_threads=threads, jobs=max(1, cores // threads)))
+        threads *= 2
+    return configs
+
+
+def _rss_bytes(ru_maxrss: int) -> int:
+    # Linux reports KiB, macOS reports bytes.
+    return ru_maxrss if sys.platform == "darwin" else ru_maxrss * 1024
+
+
+def measure_command(command: list[str], *, timeout: float | None = None) -> ProcessMeasurement:
+    """Run ``command`` and collect wall time, CPU time and peak RSS for that child only."""
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile() as output:
+        start = time.perf_counter()
+        try:
+            process = subprocess.Popen(command, stdout=output, stderr=subprocess.STDOUT)
+        except OSError as exc:
+            return ProcessMeasurement(
+                returncode=127,
+                wall_seconds=0.0,
+                cpu_seconds=0.0,
+                peak_rss_bytes=0,
+                output=str(exc),
+            )
+
+        def _kill() -> None:
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, _kill) if timeout else None
+        if timer is not None:
+            timer.start()
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        finally:
+            if timer is not None:
+                timer.cancel()
+        wall_seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        output.seek(0)
+        text = output.read().decode("utf-8", errors="replace")
+
+    return ProcessMeasurement(
+        returncode=process.returncode,
+        wall_seconds=wall_seconds,
+        cpu_seconds=usage.ru_utime + usage.ru_stime,
+        peak_rss_bytes=_rss_bytes(usage.ru_maxrss),
+        output=text,
+        timed_out=timed_out.is_set(),
+    )
+
+
+def _measure_script(
+    backend: CqlBackend,
+    pgn_path: Path,
+    script_path: Path,
+    work_dir: Path,
+    *,
+    config: BenchmarkConfig,
+    timeout: float | None,
+) -> tuple[ProcessMeasurement, int | None]:
+    output_pgn = work_dir / f"{script_path.stem}.{threading.get_ident()}.pgn"
+    command = backend.build_run_command(
+        pgn_path,
+        script_path,
+        output_pgn,
+        threads=config.cql_threads,
+    )
+    measurement = measure_command(command, timeout=timeout)
+    match_count = count_games_in_pgn(output_pgn) if output_pgn.exists() else None
+    output_pgn.unlink(missing_ok=True)
+    return measurement, match_count
+
+
+def run_configuration(
+    backend: CqlBackend,
+    pgn_path: Path,
+    scripts: list[Path],
+    config: BenchmarkConfig,
+    *,
+    repeat: int = 1,
+    timeout: float | None = None,
+    games: int | None = None,
+) -> ConfigurationResult:
+    """Run every script against ``pgn_path`` ``repeat`` times and keep medians."""
+    if games is None:
+        games = count_games_in_pgn(pgn_path)
+    pgn_bytes = pgn_path.stat().st_size
+    per_script: dict[Path, list[tuple[ProcessMeasurement, int | None]]] = {
+        script: [] for script in scripts
+    }
+    batch_walls: list[float] = []
+
+    with tempfile.TemporaryDirectory(prefix="reti-cql-bench-") as tmpdir:
+        work_dir = Path(tmpdir)
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(max_workers=config.jobs) as pool:
+                futures = {
+                    pool.submit(
+                        _measure_script,
+                        backend,
+                        pgn_path,
+                        script,
+                        work_dir,
+                        config=config,
+                        timeout=timeout,
+                    ): script
+                    for script in scripts
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    per_script[futures[future]].append(future.result())
+            batch_walls.append(time.perf_counter() - start)
+
+    records = []
+    for script, runs in per_script.items():
+        runs.sort(key=lambda run: run[0].wall_seconds)
+        measurement, match_count = runs[len(runs) // 2]
+        failed = next((run for run, _ in runs if run.returncode != 0 or run.timed_out), None)
+        error = ""
+        if failed is not None:
+            error = "timed out" if failed.timed_out else failed.output.strip()[-500:]
+        records.append(
+            ScriptRecord(
+                script=script.name,
+                pgn=pgn_path.name,
+                cql_threads=config.cql_threads,
+                jobs=config.jobs,
+                games=games,
+                pgn_bytes=pgn_bytes,
+                wall_seconds=measurement.wall_seconds,
+                cpu_seconds=measurement.cpu_seconds,
+                peak_rss_bytes=max(run.peak_rss_bytes for run, _ in runs),
+                match_count=match_count,
+                success=failed is None,
+                error=error,
+            )
+        )
+
+    return ConfigurationResult(
+        pgn=pgn_path.name,
+        config=config,
+        games=games,
+        pgn_bytes=pgn_bytes,
+        wall_seconds=statistics.median(batch_walls),
+        scripts=records,
+    )
+
+
+def build_run_entry(
+    backend: CqlBackend,
+    results: list[ConfigurationResult],
+    *,
+    label: str | None = None,
+) -> dict[str, Any]:
+    return {
+        "schemaVersion": BENCHMARK_SCHEMA_VERSION,
+        "label": label,
+        "createdAt": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "backend": type(backend).__name__,
+        "binary": str(backend.binary_path),
+        "binarySha256": binary_fingerprint(backend.binary_path),
+        "host": {
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpuCount": os.cpu_count(),
+        },
+        "configurations": [result.to_json() for result in results],
+    }
+
+
+def append_history(history_path: Path, entry: dict[str, Any]) -> None:
+    history: dict[str, Any] = {"schemaVersion": BENCHMARK_SCHEMA_VERSION, "runs": []}
+    if history_path.exists():
+        history = load_json(history_path)
+    history.setdefault("runs", []).append(entry)
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    write_json(history_path, history)
+
+
+def load_baseline(baseline_path: Path) -> dict[str, Any]:
+    """Read a baseline file: a single run entry, or the last run of a history file."""
+    payload = load_json(baseline_path)
+    if "runs" in payload:
+        if not payload["runs"]:
+            raise ValueError(f"baseline history is empty: {baseline_path}")
+        return payload["runs"][-1]
+    return payload
+
+
+def _throughput_by_key(entry: dict[str, Any]) -> dict[str, float]:
+    throughput: dict[str, float] = {}
+    for config in entry.get("configurations", []):
+        prefix = f"{config['pgn']} threads={config['cql_threads']} jobs={config['jobs']}"
+        if config.get("success", True):
+            throughput[prefix] = float(config["games_per_second"])
+        for script in config.get("scripts", []):
+            if script.get("success", True):
+                throughput[f"{prefix} {script['script']}"] = float(script["games_per_second"])
+    return throughput
+
+
+def compare_to_baseline(
+    entry: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    tolerance: float = DEFAULT_REGRESSION_TOLERANCE,
+) -> list[Regression]:
+    """Keys present in both runs whose games/s fell by more than ``tolerance``."""
+    current = _throughput_by_key(entry)
+    regressions = []
+    for key, baseline_rate in sorted(_throughput_by_key(baseline).items()):
+        rate = current.get(key)
+        if rate is None or baseline_rate <= 0:
+            continue
+        if rate < baseline_rate * (1.0 - tolerance):
+            regressions.append(Regression(key, baseline_rate, rate))
+    return regressions
+
+
+def best_configuration(results: list[ConfigurationResult]) -> ConfigurationResult | None:
+    """Highest batch throughput among configurations where every script succeeded."""
+    successful = [result for result in results if result.success]
+    return max(successful, key=lambda result: result.games_per_second, default=None)
@@ -0,0 +1,213 @@
+"""Persistent content-addressed cache of CQL job results.
+
+Re-running the matrix after editing one script should not re-run every other
+(PGN, CQL) pair. Each successful job's output PGN and match count are stored
+under a key built from everything that can change CQL's output:
+
+- the source PGN (size + mtime + path by default, or its SHA-256)
+- the normalized script body plus the script stem (cql6 writes it into the
+  output via ``-matchstring``)
+- the backend name and a fingerprint of the binary
+- the ``--where`` header filter, when the run has one
+
+Thread counts are deliberately not part of the key; CQL produces the same
+games regardless of ``-threads``. Entries are evicted least-recently-used
+once the cache grows past ``max_bytes``, down to :data:`EVICT_TO_FRACTION` of
+it so that a full cache is not rescanned on every store. An output larger than
+``max_bytes`` is never stored.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from reti.common.hashing import canonical_json, sha256_file, sha256_text
+from reti.cql.backend import CqlBackend
+
+
+CACHE_SCHEMA_VERSION = 1
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+EVICT_TO_FRACTION = 0.9
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME")
+    root = Path(base).expanduser() if base else Path.home() / ".cache"
+    return root / "reti" / "cql-results"
+
+
+def normalize_cql_text(text: str) -> str:
+    """Drop line-ending and trailing-whitespace noise that cannot change results."""
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+@lru_cache(maxsize=None)
+def _binary_fingerprint(path: str, size: int, mtime_ns: int) -> str:
+    return sha256_file(Path(path))
+
+
+def binary_fingerprint(binary_path: Path) -> str:
+    """SHA-256 of the CQL executable, memoized on (path, size, mtime)."""
+    stat = binary_path.stat()
+    return _binary_fingerprint(str(binary_path.resolve()), stat.st_size, stat.st_mtime_ns)
+
+
+def pgn_fingerprint(pgn_path: Path, *, content_hash: bool = False) -> dict[str, object]:
+    if content_hash:
+        return {"sha256": sha256_file(pgn_path)}
+    stat = pgn_path.stat()
+    return {
+        "path": str(pgn_path.resolve()),
+        "sizeBytes": stat.st_size,
+        "mtimeNs": stat.st_mtime_ns,
+    }
+
+
+class CqlResultCache:
+    """On-disk cache of ``(output PGN, match_count)`` per CQL job key.
+
+    Layout: ``<root>/<key[:2]>/<key>.pgn`` next to a ``<key>.json`` metadata
+    file. The metadata file's mtime doubles as the LRU timestamp. The cache
+    size is scanned once, on the first store, and kept as a running total
+    after that; only eviction walks the directory again.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        content_hash: bool = False,
+        input_filter: str | None = None,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.input_filter = input_filter
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None
+
+    def job_key(
+        self,
+        backend: CqlBackend,
+        source_pgn_path: Path,
+        cql_path: Path,
+    ) -> str:
+        cql_text = cql_path.read_text(encoding="utf-8", errors="replace")
+        payload = {
+            "schema": CACHE_SCHEMA_VERSION,
+            "pgn": pgn_fingerprint(source_pgn_path, content_hash=self.content_hash),
+            "cqlSha256": sha256_text(normalize_cql_text(cql_text)),
+            "cqlStem": cql_path.stem,
+            "backend": type(backend).__name__,
+            "binarySha256": binary_fingerprint(backend.binary_path),
+        }
+        if self.input_filter is not None:
+            payload["where"] = self.input_filter
+        return sha256_text(canonical_json(payload))
+
+    def _entry_paths(self, key: str) -> tuple[Path, Path]:
+        directory = self.root / key[:2]
+        return directory / f"{key}.pgn", directory / f"{key}.json"
+
+    def restore(self, key: str, output_pgn: Path) -> int | None:
+        """Copy a cached output into place; return its match count or ``None`` on a miss."""
+        pgn_path, meta_path = self._entry_paths(key)
+        try:
+            metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+            match_count = int(metadata["match_count"])
+            output_pgn.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(pgn_path, output_pgn)
+            os.utime(meta_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        return match_count
+
+    @staticmethod
+    def _entry_size(pgn_path: Path, meta_path: Path) -> int:
+        size = 0
+        for path in (pgn_path, meta_path):
+            try:
+                size += path.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def _scan_entries(self) -> tuple[list[tuple[float, int, Path, Path]], int]:
+        """``(last_used, size, pgn, meta)`` for every entry, and their total size."""
+        entries: list[tuple[float, int, Path, Path]] = []
+        total_bytes = 0
+        for meta_path in self.root.glob("*/*.json"):
+            pgn_path = meta_path.with_suffix(".pgn")
+            try:
+                size = pgn_path.stat().st_size + meta_path.stat().st_size
+                last_used = meta_path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, size, pgn_path, meta_path))
+            total_bytes += size
+        return entries, total_bytes
+
+    def store(self, key: str, output_pgn: Path, match_count: int) -> None:
+        pgn_path, meta_path = self._entry_paths(key)
+        try:
+            if output_pgn.stat().st_size > self.max_bytes:
+                # It would only evict every other entry and then itself.
+                return
+        except OSError:
+            return
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_entries()[1]
+        previous_size = self._entry_size(pgn_path, meta_path)
+        try:
+            pgn_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_pgn = pgn_path.with_name(f"{pgn_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(output_pgn, tmp_pgn)
+            os.replace(tmp_pgn, pgn_path)
+            tmp_meta = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_meta.write_text(
+                canonical_json({"match_count": match_count}) + "\n",
+                encoding="utf-8",
+            )
+            os.replace(tmp_meta, meta_path)
+        except OSError:
+            return
+        with self._lock:
+            self._total_bytes += self._entry_size(pgn_path, meta_path) - previous_size
+            over_budget = self._total_bytes > self.max_bytes
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop least-recently-used entries until the cache fits in ``max_bytes``.
+
+        Once over budget, entries go until the cache is back under
+        :data:`EVICT_TO_FRACTION` of ``max_bytes``.
+        """
+        with self._lock:
+            entries, total_bytes = self._scan_entries()
+            target_bytes = (
+                total_bytes
+                if total_bytes <= self.max_bytes
+                else int(self.max_bytes * EVICT_TO_FRACTION)
+            )
+            entries.sort(key=lambda entry: entry[0])
+            for _, size, pgn_path, meta_path in entries:
+                if total_bytes <= target_bytes:
+                    break
+                for path in (meta_path, pgn_path):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total_bytes -= size
+            self._total_bytes = total_bytes
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import argparse
+import dataclasses
 from dataclasses import dataclass
 from enum import Enum
 import shutil
@@ -10,21 +11,32 @@ import tempfile
 from pathlib import Path
 
 from reti.cql.backend import create_cql_backend, resolve_cql_binary
+from reti.cql.cache import DEFAULT_CACHE_MAX_BYTES, CqlResultCache, default_cache_dir
+from reti.cql.header_filter import HeaderFilter, HeaderPredicate, parse_where_value
+from reti.cql.journal import JOURNAL_FILENAME, JobJournal
 from reti.cql.output import (
     JobOutputKey,
     job_output_key,
     merge_outputs_by_cql,
     write_summary_csv,
 )
-from reti.cql.preflight import PgnPreflightResult, preflight_pgn_files
+from reti.cql.preflight import (
+    PgnPreflightResult,
+    parse_preflight_jobs_value,
+    preflight_pgn_files,
+)
 from reti.cql.runner import (
     JobResult,
     build_job_specs,
     parse_cql_threads_value,
     parse_jobs_value,
+    parse_shards_value,
     run_job_matrix,
 )
+from reti.cql.scheduling import load_throughput_history
 from reti.cql.single_merge import merge_single_output
+from reti.common.compressed_pgn import COMPRESSION_SUFFIXES, compress_pgn
+from reti.common.pgn_catalog import PgnCatalog, default_pgn_catalog_dir
 from reti.common.pgn_discovery import InputCollection, discover_input_files, relative_stem
 from reti.common.progress import progress_write
 
@@ -40,6 +52,7 @@ class PreflightOptions:
     skip: bool = False
     smoke_test: bool = False
     strict_parse: bool = False
+    jobs: str | int = 1
 
 
 @dataclass(frozen=True)
@@ -48,12 +61,25 @@ class ExecutionOptions:
     cql_threads: str | int = "auto"
     game_progress: bool = False
     timeout_seconds: float | None = None
+    shards: str | int = 1
+    cache_dir: Path | None = None
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES
+    material_prefilter: bool = False
+    fuse_scripts: bool = False
+    schedule_history: tuple[Path, ...] = ()
+    resume: bool = False
+    engine: str = "threads"
+    pgn_catalog_dir: Path | None = None
+    pgn_catalog_sidecars: bool = False
+    compressed_input: str = "auto"
+    where: tuple[HeaderPredicate, ...] = ()
 
 
 @dataclass(frozen=True)
 class OutputOptions:
     mode: OutputMode = OutputMode.PAIRS
     include_unmatched: bool = False
+    compression: str | None = None
 
 
 def run_cql_analysis(
@@ -96,7 +122,7 @@ def run_cql_analysis(
             timeout_seconds=timeout_seconds,
         )
 
-    pgn_inputs = discover_input_files(pgn_location, ".pgn")
+    pgn_inputs = discover_input_files(pgn_location, ".pgn", allow_compressed=True)
     if pgn_inputs is None:
         return None
 
@@ -107,6 +133,35 @@ def run_cql_analysis(
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
+    header_filter = HeaderFilter(execution_options.where) if execution_options.where else None
+    where_fingerprint = header_filter.fingerprint() if header_filter is not None else None
+
+    cache: CqlResultCache | None = None
+    if execution_options.cache_dir is not None:
+        cache = CqlResultCache(
+            execution_options.cache_dir,
+            max_bytes=execution_options.cache_max_bytes,
+            input_filter=where_fingerprint,
+        )
+
+    catalog: PgnCatalog | None = None
+    if execution_options.pgn_catalog_dir is not None:
+        catalog = PgnCatalog(
+            execution_options.pgn_catalog_dir,
+            sidecars=execution_options.pgn_catalog_sidecars,
+        )
+
+    throughput_history = load_throughput_history(
+        [output_path / "summary.csv", *execution_options.schedule_history],
+        pgn_inputs.root,
+        cql_inputs.root,
+    )
+    if throughput_history.seconds_per_byte:
+        print(
+            "Scheduling with throughput history for "
+            f"{len(throughput_history.seconds_per_byte)} script(s)."
+        )
+
     with tempfile.TemporaryDirectory(prefix="cql_runtime_") as runtime_tmpdir:
         runtime_root = Path(runtime_tmpdir)
         if preflight_options.skip:
@@ -127,6 +182,8 @@ def run_cql_analysis(
                 runtime_root,
                 smoke_test_pgns=preflight_options.smoke_test,
                 strict_pgn_parse=preflight_options.strict_parse,
+                catalog=catalog,
+                workers=preflight_options.jobs,
             )
             if any(not result.success for result in prepared_pgns):
                 return None
@@ -137,15 +194,49 @@ def run_cql_analysis(
             f"Discovered {len(prepared_pgns)} PGN file(s) and "
             f"{len(cql_inputs.files)} CQL script(s)."
         )
+        if header_filter is not None:
+            print(f"Keeping only games where {header_filter}.")
         job_specs = build_job_specs(prepared_pgns, pgn_inputs, cql_inputs, output_path)
-        results = run_job_matrix(
+        journal = JobJournal(
+            output_path / JOURNAL_FILENAME,
             backend,
-            job_specs,
-            jobs=execution_options.jobs,
-            cql_threads=execution_options.cql_threads,
-            game_progress=execution_options.game_progress,
-            timeout_seconds=execution_options.timeout_seconds,
+            resume=execution_options.resume,
+            where=where_fingerprint,
         )
+        resumed = journal.resumable_results(job_specs) if execution_options.resume else {}
+        if resumed:
+            print(f"Resuming: {len(resumed)} job(s) already complete in {JOURNAL_FILENAME}.")
+        pending_specs = [spec for spec in job_specs if spec.job_index not in resumed]
+        with journal:
+            pending_results = run_job_matrix(
+                backend,
+                pending_specs,
+                jobs=execution_options.jobs,
+                cql_threads=execution_options.cql_threads,
+                game_progress=execution_options.game_progress,
+                timeout_seconds=execution_options.timeout_seconds,
+                shards=execution_options.shards,
+                shard_root=runtime_root / "shards",
+                cache=cache,
+                material_prefilter=execution_options.material_prefilter,
+                prefilter_root=runtime_root / "prefilter",
+                fuse_scripts=execution_options.fuse_scripts,
+                fusion_root=runtime_root / "fusion",
+                throughput_history=throughput_history,
+                engine=execution_options.engine,
+                catalog=catalog,
+                on_result=journal.record,
+                compressed_input=execution_options.compressed_input,
+                decompress_root=runtime_root / "decompressed",
+                header_filter=header_filter,
+                filter_root=runtime_root / "where",
+            )
+        resumed.update(
+            (spec.job_index, result) for spec, result in zip(pending_specs, pending_results)
+        )
+        results = [resumed[spec.job_index] for spec in job_specs]
+        if header_filter is not None:
+            results = fill_filter_counts(results, header_filter, catalog)
 
     return results, pgn_inputs, cql_inputs
 
@@ -174,14 +265,90 @@ def _summary_output_paths_for_mode(
     return output_paths
 
 
+def fill_filter_counts(
+    results: list[JobResult],
+    header_filter: HeaderFilter,
+    catalog: PgnCatalog | None,
+) -> list[JobResult]:
+    """Give every result its PGN's ``--where`` counts.
+
+    Cache hits and fused, prefiltered or resumed jobs may not have read the
+    PGN themselves; they take the counts of another job on the same PGN, or
+    the ones ``catalog`` remembers from an earlier run. Fresh counts are
+    recorded in ``catalog``.
+    """
+    scanned_method, kept_method = header_filter.catalog_count_methods()
+    counts: dict[Path, tuple[int, int]] = {}
+    for result in results:
+        if result.games_before_filter is not None and result.games_after_filter is not None:
+            counts.setdefault(
+                result.pgn_path, (result.games_before_filter, result.games_after_filter)
+            )
+    if catalog is not None:
+        for pgn_path, (scanned, kept) in counts.items():
+            try:
+                catalog.record_game_count(pgn_path, scanned_method, scanned)
+                catalog.record_game_count(pgn_path, kept_method, kept)
+            except OSError:
+                continue
+        for pgn_path in {result.pgn_path for result in results} - counts.keys():
+            try:
+                entry = catalog.entry(pgn_path)
+            except OSError:
+                continue
+            scanned = entry.game_count((scanned_method,))
+            kept = entry.game_count((kept_method,))
+            if scanned is not None and kept is not None:
+                counts[pgn_path] = (scanned, kept)
+
+    filled: list[JobResult] = []
+    for result in results:
+        if result.games_before_filter is None and result.pgn_path in counts:
+            scanned, kept = counts[result.pgn_path]
+            result = dataclasses.replace(
+                result, games_before_filter=scanned, games_after_filter=kept
+            )
+        filled.append(result)
+    return filled
+
+
+def compress_final_outputs(
+    results: list[JobResult],
+    output_paths: dict[JobOutputKey, Path],
+    compression: str,
+) -> dict[JobOutputKey, Path]:
+    """Compress every final output PGN once; returns the summary's new paths.
+
+    ``output_paths`` maps merged modes' results to their merged PGN; other
+    results keep their per-pair ``output_pgn``.
+    """
+    compressed: dict[Path, Path] = {}
+    updated: dict[JobOutputKey, Path] = {}
+    for result in results:
+        if not result.success:
+            continue
+        key = job_output_key(result)
+        final_output = output_paths.get(key, result.output_pgn)
+        if final_output not in compressed:
+            if not final_output.exists():
+                continue
+            compressed[final_output] = compress_pgn(final_output, compression)
+        updated[key] = compressed[final_output]
+    print(f"Compressed {len(compressed)} output PGN(s) with {compression}.")
+    return updated
+
+
 def print_summary(results: list[JobResult], output_dir: Path, summary_csv: Path) -> int:
     successes = sum(1 for result in results if result.success)
     failures = len(results) - successes
+    cached = sum(1 for result in results if result.cached)
 
     print("\n--- Summary ---")
     print(f"Jobs: {len(results)}")
     print(f"Successful: {successes}")
     print(f"Failed: {failures}")
+    if cached:
+        print(f"Restored from cache: {cached}")
     print(f"Output directory: {output_dir}")
     print(f"Summary CSV: {summary_csv}")
     print("---------------")
@@ -202,7 +369,10 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         "--pgn-input",
         dest="pgn_location",
         default=None,
-        help="Path to a .pgn file or a directory containing .pgn files.",
+        help=(
+            "Path to a .pgn file or a directory containing .pgn files. "
+            "Compressed .pgn.gz, .pgn.bz2 and .pgn.zst files are read too."
+        ),
     )
     parser.add_argument(
         "--cql-bin",
@@ -252,6 +422,17 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
             "PGN preflight policy. Replaces the older skip/smoke/strict boolean flags."
         ),
     )
+    parser.add_argument(
+        "--preflight-jobs",
+        dest="preflight_jobs",
+        type=parse_preflight_jobs_value,
+        default="auto",
+        help=(
+            "Number of PGNs to preflight in parallel, independent of --jobs. "
+            "'auto' uses one per CPU, at most 4, to avoid thrashing a single disk. "
+            "Defaults to auto."
+        ),
+    )
     parser.add_argument(
         "--skip-pgn-preflight",
         "--skip_pgn_preflight",
@@ -295,6 +476,123 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
             "'auto' becomes 1 to avoid oversubscription."
         ),
     )
+    parser.add_argument(
+        "--shards",
+        dest="shards",
+        type=parse_shards_value,
+        default=1,
+        help=(
+            "Split each PGN into this many game-aligned byte ranges and run one "
+            "CQL job per range, stitching the outputs back into the per-pair "
+            "PGN. 'auto' uses one shard per CPU for PGNs of at least 64 MiB per "
+            "shard. Combine with --jobs to use more cores on one large PGN."
+        ),
+    )
+    parser.add_argument(
+        "--material-prefilter",
+        dest="material_prefilter",
+        action="store_true",
+        help=(
+            "Before running CQL, index the material signatures each game reaches "
+            "(cached next to the PGN as <name>.pgn.material-index.sqlite) and feed "
+            "each script only the games its material constraints can match. "
+            "Scripts whose filters cannot be bounded by piece counts run unfiltered."
+        ),
+    )
+    parser.add_argument(
+        "--fuse-scripts",
+        dest="fuse_scripts",
+        action="store_true",
+        help=(
+            "Combine scripts that share a cql(...) header into one fused script "
+            "per PGN so the corpus is read once, then rerun each script on just "
+            "the games it matched. Scripts using quiet, sort, matchcount or "
+            "cross-game state run unfused."
+        ),
+    )
+    parser.add_argument(
+        "--schedule-history",
+        dest="schedule_history",
+        action="append",
+        type=Path,
+        default=[],
+        metavar="SUMMARY_CSV",
+        help=(
+            "Earlier summary.csv to learn per-script throughput from when ordering "
+            "jobs (repeatable). The output directory's own summary.csv is always "
+            "used when present. Jobs are dispatched longest-first, grouped by PGN."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        dest="resume",
+        action="store_true",
+        help=(
+            f"Skip jobs recorded as complete in <output-dir>/{JOURNAL_FILENAME} by an "
+            "earlier, interrupted run, provided the PGN, script, binary and output "
+            "PGN are unchanged. Requires --output-dir."
+        ),
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        help=(
+            "Keep a copy of each job's output in the persistent CQL result cache "
+            "at $XDG_CACHE_HOME/reti/cql-results (~/.cache/reti/cql-results). Jobs "
+            "whose PGN, normalized script, backend, and binary are unchanged "
+            "restore their output instead of re-running CQL. Off by default."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        dest="cache_dir",
+        type=Path,
+        default=None,
+        help="Use the persistent CQL result cache in this directory (implies --cache).",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Do not use the persistent CQL result cache (the default).",
+    )
+    parser.add_argument(
+        "--cache-max-gb",
+        dest="cache_max_gb",
+        type=float,
+        default=DEFAULT_CACHE_MAX_BYTES / (1024**3),
+        help=(
+            "Evict least-recently-used cache entries beyond this size; outputs "
+            "larger than it are not cached. Defaults to 10."
+        ),
+    )
+    parser.add_argument(
+        "--pgn-catalog-dir",
+        dest="pgn_catalog_dir",
+        type=Path,
+        default=None,
+        help=(
+            "Root of the per-PGN catalog that remembers preflight findings, game "
+            "counts and sanitized copies across runs. "
+            "Defaults to $XDG_CACHE_HOME/reti/pgn-catalog (~/.cache/reti/pgn-catalog)."
+        ),
+    )
+    parser.add_argument(
+        "--pgn-catalog-sidecars",
+        dest="pgn_catalog_sidecars",
+        action="store_true",
+        help=(
+            "Write catalog entries next to each PGN as <name>.pgn.catalog.json "
+            "instead of under --pgn-catalog-dir (which still takes read-only corpora)."
+        ),
+    )
+    parser.add_argument(
+        "--no-pgn-catalog",
+        dest="no_pgn_catalog",
+        action="store_true",
+        help="Inspect every PGN afresh and keep sanitized copies only for this run.",
+    )
     parser.add_argument(
         "--strict-pgn-parse",
         dest="strict_pgn_parse",
@@ -316,8 +614,59 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         dest="game_progress",
         action="store_true",
         help=(
-            "Show progress in games instead of jobs. Pre-counts games in each "
-            "PGN so the progress bar reflects actual game throughput."
+            "Show progress in games instead of jobs. The asyncio engine counts "
+            "games from CQL's own progress lines; the threads engine pre-counts "
+            "games in each PGN first."
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        dest="engine",
+        choices=["asyncio", "threads"],
+        default="threads",
+        help=(
+            "How CQL subprocesses are driven. 'threads' (default) runs one "
+            "subprocess.run per job and captures all of its output. 'asyncio' "
+            "(experimental) streams their output, keeps only the last 16 KiB of "
+            "stdout/stderr per job and kills whole process groups on timeout or "
+            "Ctrl-C."
+        ),
+    )
+    parser.add_argument(
+        "--compressed-input",
+        dest="compressed_input",
+        choices=["auto", "pipe", "tempfile"],
+        default="auto",
+        help=(
+            "How .pgn.gz/.pgn.bz2/.pgn.zst inputs reach CQL. 'pipe' streams the "
+            "decompressed PGN through a named pipe; 'tempfile' decompresses each "
+            "PGN to a temporary plain copy once. 'auto' (default) pipes unless the "
+            "backend needs a seekable file; --shards, --material-prefilter and "
+            "--fuse-scripts always use a plain copy."
+        ),
+    )
+    parser.add_argument(
+        "--where",
+        dest="where",
+        action="append",
+        type=parse_where_value,
+        default=[],
+        metavar="EXPR",
+        help=(
+            "Run CQL only on games whose headers match EXPR, e.g. 'WhiteElo>=2200', "
+            "'Year>=2000', 'Event~olympiad' or 'Site!=lichess.org' (repeatable; all "
+            "must match). Games are filtered while the PGN streams into CQL; "
+            "summary.csv records the games before and after filtering."
+        ),
+    )
+    parser.add_argument(
+        "--compress-output",
+        dest="compress_output",
+        choices=sorted(COMPRESSION_SUFFIXES),
+        default=None,
+        help=(
+            "After all jobs and merges finish, compress each final output PGN "
+            "(gzip -> .pgn.gz, bzip2 -> .pgn.bz2, zstd -> .pgn.zst)."
         ),
     )
     parser.add_argument(
@@ -376,6 +725,20 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     if args.timeout_seconds is not None and args.timeout_seconds <= 0:
         parser.error("--timeout must be greater than 0")
 
+    if args.resume and not args.output_dir:
+        parser.error("--resume requires --output-dir")
+    if args.resume and args.compress_output:
+        parser.error("--resume cannot be combined with --compress-output")
+
+    if args.no_cache and (args.cache or args.cache_dir is not None):
+        parser.error("--cache/--cache-dir and --no-cache are mutually exclusive")
+    if args.no_pgn_catalog and (args.pgn_catalog_dir is not None or args.pgn_catalog_sidecars):
+        parser.error(
+            "--pgn-catalog-dir/--pgn-catalog-sidecars and --no-pgn-catalog are mutually exclusive"
+        )
+    if args.cache_max_gb <= 0:
+        parser.error("--cache-max-gb must be greater than 0")
+
     legacy_output_modes = [
         bool(args.merge_output),
         bool(args.single_output),
@@ -460,16 +823,34 @@ def main() -> int:
         skip=args.skip_pgn_preflight,
         smoke_test=args.smoke_test_pgns,
         strict_parse=args.strict_pgn_parse,
+        jobs=args.preflight_jobs,
     )
     execution_options = ExecutionOptions(
         jobs=args.jobs,
         cql_threads=args.cql_threads,
         game_progress=args.game_progress,
         timeout_seconds=args.timeout_seconds,
+        shards=args.shards,
+        cache_dir=args.cache_dir or (default_cache_dir() if args.cache else None),
+        cache_max_bytes=int(args.cache_max_gb * 1024**3),
+        material_prefilter=args.material_prefilter,
+        fuse_scripts=args.fuse_scripts,
+        schedule_history=tuple(args.schedule_history),
+        resume=args.resume,
+        engine=args.engine,
+        pgn_catalog_dir=(
+            None
+            if args.no_pgn_catalog
+            else (args.pgn_catalog_dir or default_pgn_catalog_dir())
+        ),
+        pgn_catalog_sidecars=args.pgn_catalog_sidecars,
+        compressed_input=args.compressed_input,
+        where=tuple(args.where),
     )
     output_options = OutputOptions(
         mode=OutputMode(args.output_mode),
         include_unmatched=args.include_unmatched,
+        compression=args.compress_output,
     )
 
     result = run_cql_analysis(
@@ -495,6 +876,7 @@ def main() -> int:
             pgn_inputs,
             output_directory,
             include_unmatched=output_options.include_unmatched,
+            workers=execution_options.jobs,
         )
     elif output_options.mode == OutputMode.BY_CQL:
         merge_outputs_by_cql(results, cql_inputs, output_directory)
@@ -506,6 +888,10 @@ def main() -> int:
         output_directory,
         output_options,
     )
+    if output_options.compression is not None:
+        output_paths = compress_final_outputs(
+            results, output_paths, output_options.compression
+        )
     summary_csv = write_summary_csv(
         results,
         output_directory,
@@ -0,0 +1,185 @@
+"""Asyncio subprocess engine for CQL jobs.
+
+The thread engine (``subprocess.run(capture_output=True)`` per worker
+thread) buffers each child's entire stdout/stderr, keeps the decoded text
+on every :class:`~reti.cql.runner.JobResult` until the matrix finishes, and
+can only kill the direct child on timeout. This engine instead:
+
+- reads stdout and stderr incrementally and keeps only the last
+  :data:`STREAM_TAIL_BYTES` of each, so memory stays flat however chatty
+  CQL is and however many jobs run;
+- parses CQL's ``-lineincrement`` progress lines as they arrive, so
+  game-level progress needs no up-front pass counting games;
+- starts every child in its own session and kills the whole process group
+  on timeout or when the run is interrupted (Ctrl-C cancels the event loop,
+  which cancels every job).
+
+It only knows about argv and processes; building commands and turning
+outcomes into job results stays in :mod:`reti.cql.runner`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import signal
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+
+STREAM_TAIL_BYTES = 16 * 1024
+PROGRESS_LINE_INCREMENT = 1000
+
+_READ_CHUNK_BYTES = 64 * 1024
+_PARTIAL_LINE_LIMIT = 4 * 1024
+_PROGRESS_RE = re.compile(rb"(?i)\bgames?\b(?:\s+number)?\D{0,16}?(\d+)")
+
+
+@dataclass(frozen=True)
+class ProcessOutcome:
+    returncode: int
+    stdout: str
+    stderr: str
+    duration_seconds: float
+    timed_out: bool = False
+    # Everything the child wrote, including bytes dropped from the tails.
+    stdout_bytes: int = 0
+    stderr_bytes: int = 0
+
+
+class StreamTail:
+    """Keep the last ``limit`` bytes written to it."""
+
+    def __init__(self, limit: int = STREAM_TAIL_BYTES) -> None:
+        self.limit = limit
+        self.dropped = 0
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+
+    def append(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self.limit:
+            excess = self._size - self.limit
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+                self.dropped += len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+                self.dropped += excess
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes appended so far, dropped or kept."""
+        return self.dropped + self._size
+
+    def text(self) -> str:
+        body = b"".join(self._chunks).decode("utf-8", errors="replace")
+        if self.dropped:
+            return f"[... {self.dropped} earlier byte(s) dropped]\n{body}"
+        return body
+
+
+def parse_progress_games(line: bytes) -> int | None:
+    """Game count from one CQL progress line, or ``None`` for other output."""
+    matches = _PROGRESS_RE.findall(line)
+    if not matches:
+        return None
+    return max(int(value) for value in matches)
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    tail: StreamTail,
+    on_progress: Callable[[int], None] | None,
+) -> None:
+    partial = b""
+    while True:
+        chunk = await stream.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        tail.append(chunk)
+        if on_progress is None:
+            continue
+        lines = re.split(rb"[\r\n]", partial + chunk)
+        partial = lines.pop()[-_PARTIAL_LINE_LIMIT:]
+        for line in lines:
+            games = parse_progress_games(line)
+            if games is not None:
+                on_progress(games)
+    if on_progress is not None and partial:
+        games = parse_progress_games(partial)
+        if games is not None:
+            on_progress(games)
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def run_streaming_process(
+    command: list[str],
+    *,
+    timeout_seconds: float | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    tail_bytes: int = STREAM_TAIL_BYTES,
+) -> ProcessOutcome:
+    """Run ``command`` to completion, streaming its output into bounded tails.
+
+    ``on_progress`` receives the cumulative game count each time the child
+    prints a progress line. ``OSError`` from spawning propagates; a timeout
+    kills the process group and returns ``timed_out=True``; cancellation
+    kills the process group and re-raises.
+    """
+    stdout_tail = StreamTail(tail_bytes)
+    stderr_tail = StreamTail(tail_bytes)
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    assert process.stdout is not None and process.stderr is not None
+    timed_out = False
+    pumps = asyncio.gather(
+        _pump(process.stdout, stdout_tail, on_progress),
+        _pump(process.stderr, stderr_tail, on_progress),
+    )
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(pumps), timeout_seconds)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_process_group(process)
+            await pumps
+        returncode = await process.wait()
+    except BaseException:
+        _kill_process_group(process)
+        pumps.cancel()
+        await process.wait()
+        raise
+    return ProcessOutcome(
+        returncode=returncode,
+        stdout=stdout_tail.text(),
+        stderr=stderr_tail.text(),
+        duration_seconds=time.monotonic() - started,
+        timed_out=timed_out,
+        stdout_bytes=stdout_tail.total_bytes,
+        stderr_bytes=stderr_tail.total_bytes,
+    )
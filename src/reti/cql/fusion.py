@@ -0,0 +1,316 @@
+"""Fuse a directory of CQL scripts into one pass over each PGN.
+
+Running ``N`` scripts against a PGN reads the corpus ``N`` times. Scripts
+that share a ``cql(...)`` header can instead be ORed into one fused script
+(the same idea :func:`reti.fce_combined_cql.render_combined_cql` uses for the
+FCE table), but generically:
+
+- every member body is evaluated at every position (no ``or`` short-circuit)
+  and drops a ``{reti-fuse:<i>}`` marker comment where it matches;
+- a position matches the fused script when at least one member matched.
+
+The fused output therefore tells us exactly which games each member matches.
+It is only used to *select* games: each member then runs unfused against a
+copy of just those games, so its output PGN is what CQL writes for those
+games, byte for byte, under the same assumption sharding already relies on
+(a game's output does not depend on its neighbours). Output games are tied
+back to input byte ranges by their tag pairs; games the mapping cannot place
+send that member back to a full unfused run.
+
+Scripts are left unfused when their header uses output-shaping or
+match-count parameters, when their body keeps cross-game state or edits
+comments/tags, or when they would clash with another member's variable names.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+
+FUSION_MARKER_PREFIX = "reti-fuse:"
+FUSION_HIT_VARIABLE = "reti_fuse_hit"
+
+UNFUSABLE_HEADER_WORDS = frozenset(
+    {
+        "gamenumber",
+        "input",
+        "matchcount",
+        "matchstring",
+        "output",
+        "quiet",
+        "silent",
+        "sort",
+    }
+)
+UNFUSABLE_BODY_WORDS = frozenset(
+    {
+        "dictionary",
+        "gamenumber",
+        "matchcount",
+        "persistent",
+        "quiet",
+        "readfile",
+        "removecomment",
+        "removetag",
+        "settag",
+        "sort",
+        "writefile",
+    }
+)
+
+# Words whose result depends on every game in the input (numbering,
+# match counting, sorting, state carried between games); a script using
+# them can be neither fused nor split into shards.
+WHOLE_INPUT_WORDS = frozenset(
+    {
+        "dictionary",
+        "gamenumber",
+        "matchcount",
+        "persistent",
+        "sort",
+    }
+)
+
+HeaderKey = tuple[tuple[str, str], ...]
+
+_CQL_HEADER_RE = re.compile(r"cql\s*\(")
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_ASSIGNMENT_RE = re.compile(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*(?:[-+*/]?=)(?!=)")
+_DECLARATION_RE = re.compile(
+    r"\b(?:piece|square|function)\s+(?:all\s+)?([A-Za-z_][A-Za-z0-9_]*)"
+)
+_TAG_PAIR_RE = re.compile(r'^\[\s*([A-Za-z0-9_]+)\s+"(.*)"\s*\]\s*$')
+_MARKER_RE = re.compile(re.escape(FUSION_MARKER_PREFIX) + r"(\d+)")
+
+
+@dataclass(frozen=True)
+class FusableScript:
+    cql_path: Path
+    header: str
+    body: str
+    names: frozenset[str]
+
+
+def _blank_comments_and_strings(text: str) -> str:
+    """Replace comments and string literals with spaces, keeping offsets and newlines."""
+    out = list(text)
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        pair = text[index : index + 2]
+        if pair in ("//", ";;"):
+            end = text.find("\n", index)
+            end = length if end < 0 else end
+        elif pair == "/*":
+            end = text.find("*/", index + 2)
+            end = length if end < 0 else end + 2
+        elif char == '"':
+            end = index + 1
+            while end < length and text[end] != '"':
+                end += 2 if text[end] == "\\" else 1
+            end = min(length, end + 1)
+        else:
+            index += 1
+            continue
+        for position in range(index, end):
+            if out[position] != "\n":
+                out[position] = " "
+        index = end
+    return "".join(out)
+
+
+def needs_whole_input(cql_path: Path) -> bool:
+    """True when ``cql_path`` uses a :data:`WHOLE_INPUT_WORDS` word.
+
+    Such a script must see the whole PGN in one run: sharding it would, for
+    instance, sort each shard separately and stitch the sorted runs together.
+    Unreadable scripts are left to CQL to report.
+    """
+    try:
+        text = cql_path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return False
+    words = set(_WORD_RE.findall(_blank_comments_and_strings(text)))
+    return not words.isdisjoint(WHOLE_INPUT_WORDS)
+
+
+def inspect_fusable_script(cql_path: Path) -> FusableScript | None:
+    """Split a script into header and body, or ``None`` if it must run on its own."""
+    try:
+        text = cql_path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+    code = _blank_comments_and_strings(text)
+    match = _CQL_HEADER_RE.search(code)
+    if match is None or code[: match.start()].strip():
+        return None
+    close = code.find(")", match.end())
+    if close < 0:
+        return None
+
+    header = " ".join(code[match.end() : close].split())
+    body_code = code[close + 1 :]
+    header_words = set(_WORD_RE.findall(header))
+    body_words = set(_WORD_RE.findall(body_code))
+    if header_words & UNFUSABLE_HEADER_WORDS or body_words & UNFUSABLE_BODY_WORDS:
+        return None
+    if FUSION_HIT_VARIABLE in body_words or not body_code.strip():
+        return None
+
+    names = set(_ASSIGNMENT_RE.findall(body_code)) | set(_DECLARATION_RE.findall(body_code))
+    return FusableScript(
+        cql_path=cql_path,
+        header=header,
+        body=text[close + 1 :].strip("\n"),
+        names=frozenset(names),
+    )
+
+
+def plan_fusion_groups(cql_paths: list[Path]) -> list[tuple[FusableScript, ...]]:
+    """Group fusable scripts by header, keeping members' variable names disjoint.
+
+    Only groups with at least two members are returned; everything else runs
+    unfused.
+    """
+    groups: list[tuple[str, list[FusableScript], set[str]]] = []
+    for cql_path in cql_paths:
+        script = inspect_fusable_script(cql_path)
+        if script is None:
+            continue
+        for header, members, names in groups:
+            if header == script.header and not (names & script.names):
+                members.append(script)
+                names.update(script.names)
+                break
+        else:
+            groups.append((script.header, [script], set(script.names)))
+    return [tuple(members) for _, members, _ in groups if len(members) > 1]
+
+
+def render_fused_cql(scripts: tuple[FusableScript, ...]) -> str:
+    if not scripts:
+        raise ValueError("cannot render a fused CQL script with no members")
+    headers = {script.header for script in scripts}
+    if len(headers) != 1:
+        raise ValueError("fused CQL members must share one cql(...) header")
+
+    lines = [f"cql({scripts[0].header})", f"{FUSION_HIT_VARIABLE} = 0"]
+    for index, script in enumerate(scripts):
+        lines.extend(
+            [
+                "{",
+                "    {",
+                script.body,
+                "    }",
+                f'    comment("{FUSION_MARKER_PREFIX}{index}")',
+                f"    {FUSION_HIT_VARIABLE} = 1",
+                "} or true",
+            ]
+        )
+    lines.extend([f"{FUSION_HIT_VARIABLE} == 1", ""])
+    return "\n".join(lines)
+
+
+def _header_key(header_lines: list[str]) -> HeaderKey:
+    pairs = []
+    for line in header_lines:
+        match = _TAG_PAIR_RE.match(line.strip())
+        if match is not None:
+            pairs.append((match.group(1), match.group(2)))
+    return tuple(sorted(pairs))
+
+
+def fused_output_markers(output_pgn: Path) -> list[tuple[HeaderKey, frozenset[int]]]:
+    """``(tag pairs, member indexes)`` for every game in a fused output PGN."""
+    games: list[tuple[HeaderKey, frozenset[int]]] = []
+    header_lines: list[str] = []
+    markers: set[int] = set()
+    in_game = False
+
+    def _flush() -> None:
+        if in_game:
+            games.append((_header_key(header_lines), frozenset(markers)))
+
+    with output_pgn.open("r", encoding="utf-8", errors="replace") as handle:
+        in_headers = False
+        for line in handle:
+            if line.startswith("[Event "):
+                _flush()
+                header_lines, markers, in_game, in_headers = [], set(), True, True
+            if in_headers and line.startswith("["):
+                header_lines.append(line)
+                continue
+            in_headers = False
+            markers.update(int(value) for value in _MARKER_RE.findall(line))
+    _flush()
+    return games
+
+
+def _input_game_ranges(
+    pgn_path: Path,
+    wanted: set[HeaderKey],
+) -> dict[HeaderKey, list[tuple[int, int]]]:
+    """Byte ranges of input games whose tag pairs are in ``wanted``."""
+    ranges: dict[HeaderKey, list[tuple[int, int]]] = {}
+    start: int | None = None
+    header_lines: list[str] = []
+    in_headers = False
+    offset = 0
+
+    def _flush(end: int) -> None:
+        if start is None:
+            return
+        key = _header_key(header_lines)
+        if key in wanted:
+            ranges.setdefault(key, []).append((start, end))
+
+    with pgn_path.open("rb") as handle:
+        for raw_line in handle:
+            if raw_line.startswith(b"[Event "):
+                _flush(offset)
+                start, header_lines, in_headers = offset, [], True
+            if in_headers and raw_line.startswith(b"["):
+                header_lines.append(raw_line.decode("utf-8", errors="replace"))
+            else:
+                in_headers = False
+            offset += len(raw_line)
+    _flush(offset)
+    return ranges
+
+
+def _merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(set(ranges)):
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def select_fused_game_ranges(
+    pgn_path: Path,
+    fused_output: Path,
+    member_count: int,
+) -> list[list[tuple[int, int]] | None]:
+    """Input byte ranges each fused member matched.
+
+    ``None`` means at least one matched game could not be placed in the input
+    and the member has to run over the whole PGN.
+    """
+    games = fused_output_markers(fused_output)
+    located = _input_game_ranges(pgn_path, {key for key, _ in games})
+    kept: list[list[tuple[int, int]] | None] = [[] for _ in range(member_count)]
+    for key, members in games:
+        ranges = located.get(key)
+        for member in members:
+            if member >= member_count or kept[member] is None:
+                continue
+            if ranges is None:
+                kept[member] = None
+            else:
+                kept[member].extend(ranges)
+    return [None if ranges is None else _merge_ranges(ranges) for ranges in kept]
@@ -0,0 +1,377 @@
+"""Header predicates (``--where``) that narrow a CQL run to a sub-corpus.
+
+"FCE table over OTB games from 2000 on, both players rated 2200+" used to
+mean writing a filtered copy of the corpus first. A :class:`HeaderFilter`
+instead drops non-matching games while the PGN streams into CQL, so CQL never
+parses them and nothing is written to disk.
+
+A predicate is ``TAG OP VALUE``:
+
+- ``~`` token match, as ``pgn-utils grep`` does it: every word of ``VALUE``
+  must appear in the tag, ignoring case, accents and word order
+- ``=`` / ``!=`` whole-value comparison, ignoring case and accents
+- ``>=``, ``>``, ``<=``, ``<`` numeric comparison (``WhiteElo>=2200``); a tag
+  that is missing or not a number never matches
+
+``Year`` is the year of the ``Date`` tag and ``Player`` means White or Black.
+Predicates are ANDed. Filters ``pgn-utils grep`` can express run natively;
+anything else (numeric tag comparisons, ``=``, ``!=``) uses the Python
+splitter, which splits games at ``[Event `` lines exactly as the native one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import re
+import subprocess
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from reti.common.compressed_pgn import open_pgn, pgn_stdin_argument
+from reti.common.hashing import canonical_json, sha256_text
+from reti.common.subprocess_helpers import describe_returncode
+from reti.pgn_utils import find_pgn_utils_binary
+
+
+# Longest first, so ``>=`` is not read as ``>`` followed by ``=VALUE``.
+WHERE_OPERATORS = ("!=", ">=", "<=", "~", "=", ">", "<")
+NUMERIC_OPERATORS = (">=", ">", "<=", "<")
+_PREDICATE_RE = re.compile(
+    r"^\s*([A-Za-z][A-Za-z0-9_]*)\s*("
+    + "|".join(re.escape(operator) for operator in WHERE_OPERATORS)
+    + r")\s*(.*?)\s*$"
+)
+_HEADER_RE = re.compile(rb'^\[([^ \t]+)[ \t][^"]*"([^"]*)"')
+_NUMBER_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)")
+
+# Mirrors ``fold_accent`` in ``native/pgn-utils/src/search.rs``.
+_ACCENT_FOLDS = {
+    **dict.fromkeys("àáâãäåāăą", "a"),
+    "æ": "ae",
+    **dict.fromkeys("çćčċĉ", "c"),
+    **dict.fromkeys("ðďđ", "d"),
+    **dict.fromkeys("èéêëēĕėęě", "e"),
+    **dict.fromkeys("ĝğġģ", "g"),
+    **dict.fromkeys("ĥħ", "h"),
+    **dict.fromkeys("ìíîïīĭįı", "i"),
+    "ĵ": "j",
+    "ķ": "k",
+    **dict.fromkeys("łľĺļŀ", "l"),
+    **dict.fromkeys("ñńňņŋ", "n"),
+    **dict.fromkeys("òóôõöøōŏő", "o"),
+    "œ": "oe",
+    **dict.fromkeys("ŕřŗ", "r"),
+    **dict.fromkeys("śšşșŝ", "s"),
+    "ß": "ss",
+    **dict.fromkeys("ťţțŧ", "t"),
+    **dict.fromkeys("ùúûüūŭůűų", "u"),
+    "ŵ": "w",
+    **dict.fromkeys("ýÿŷ", "y"),
+    **dict.fromkeys("źžż", "z"),
+}
+
+# ``TAG~VALUE`` predicates ``pgn-utils grep`` has a dedicated flag for.
+_NATIVE_TOKEN_FLAGS = {
+    "Player": "--player",
+    "White": "--white",
+    "Black": "--black",
+    "Event": "--event",
+    "Site": "--site",
+}
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip diacritics like ``pgn-utils grep``."""
+    out: list[str] = []
+    for char in text:
+        for lower in char.lower():
+            if "̀" <= lower <= "ͯ":
+                continue
+            out.append(_ACCENT_FOLDS.get(lower, lower))
+    return "".join(out)
+
+
+def _query_tokens(query: str) -> tuple[str, ...]:
+    return tuple(token for token in re.split(r"[\W_]+", fold_text(query)) if token)
+
+
+def _number(text: str | None) -> float | None:
+    if text is None:
+        return None
+    match = _NUMBER_RE.match(text)
+    return float(match.group(1)) if match else None
+
+
+@dataclass(frozen=True)
+class HeaderPredicate:
+    tag: str
+    operator: str
+    value: str
+
+    def __str__(self) -> str:
+        return f"{self.tag}{self.operator}{self.value}"
+
+    def _values(self, headers: dict[str, str]) -> list[str]:
+        if self.tag == "Player":
+            return [headers[tag] for tag in ("White", "Black") if tag in headers]
+        if self.tag == "Year":
+            year = headers.get("Date", "")[:4]
+            return [year] if year.isdigit() else []
+        value = headers.get(self.tag)
+        return [value] if value is not None else []
+
+    def matches(self, headers: dict[str, str]) -> bool:
+        values = self._values(headers)
+        if self.operator == "~":
+            tokens = _query_tokens(self.value)
+            return bool(tokens) and any(
+                all(token in fold_text(value) for token in tokens) for value in values
+            )
+        if self.operator in ("=", "!="):
+            equal = any(fold_text(value) == fold_text(self.value) for value in values)
+            return equal if self.operator == "=" else not equal
+        bound = float(self.value)
+        for value in values:
+            number = _number(value)
+            if number is None:
+                continue
+            if (
+                (self.operator == ">=" and number >= bound)
+                or (self.operator == ">" and number > bound)
+                or (self.operator == "<=" and number <= bound)
+                or (self.operator == "<" and number < bound)
+            ):
+                return True
+        return False
+
+
+def parse_where_value(value: str) -> HeaderPredicate:
+    """argparse ``type=`` for one ``--where`` predicate."""
+    match = _PREDICATE_RE.match(value)
+    if match is None:
+        raise argparse.ArgumentTypeError(
+            f"--where expects TAG OP VALUE with OP one of {' '.join(WHERE_OPERATORS)}, "
+            f"got {value!r}"
+        )
+    tag, operator, operand = match.groups()
+    operand = operand.strip('"')
+    if operator in NUMERIC_OPERATORS and _number(operand) is None:
+        raise argparse.ArgumentTypeError(
+            f"--where {tag}{operator}: {operand!r} is not a number"
+        )
+    if not operand and operator == "~":
+        raise argparse.ArgumentTypeError(f"--where {tag}~ needs a value")
+    return HeaderPredicate(tag=tag, operator=operator, value=operand)
+
+
+@dataclass(frozen=True)
+class HeaderFilterCounts:
+    games_scanned: int
+    games_kept: int
+
+
+@dataclass(frozen=True)
+class HeaderFilter:
+    predicates: tuple[HeaderPredicate, ...]
+
+    def __str__(self) -> str:
+        return " AND ".join(str(predicate) for predicate in self.predicates)
+
+    def matches(self, headers: dict[str, str]) -> bool:
+        return all(predicate.matches(headers) for predicate in self.predicates)
+
+    def fingerprint(self) -> str:
+        """Stable key for caches and the journal; order does not matter."""
+        return sha256_text(
+            canonical_json(sorted(str(predicate) for predicate in self.predicates))
+        )
+
+    def catalog_count_methods(self) -> tuple[str, str]:
+        """:class:`~reti.common.pgn_catalog.PgnCatalog` count methods (scanned, kept)."""
+        key = self.fingerprint()[:16]
+        return f"where-scanned:{key}", f"where-kept:{key}"
+
+    def native_grep_args(self) -> list[str] | None:
+        """``pgn-utils grep`` flags for this filter, or None if it cannot express it."""
+        args: list[str] = []
+        used: set[str] = set()
+        for predicate in self.predicates:
+            tag, operator, value = predicate.tag, predicate.operator, predicate.value
+            if operator == "~":
+                flag = _NATIVE_TOKEN_FLAGS.get(tag)
+                if flag is None:
+                    args.extend(["--tag", f"{tag}={value}"])
+                    continue
+            elif tag == "Year" and operator != "!=" and float(value).is_integer():
+                year = int(float(value))
+                flag, year = {
+                    "=": ("--year", year),
+                    ">=": ("--year-min", year),
+                    ">": ("--year-min", year + 1),
+                    "<=": ("--year-max", year),
+                    "<": ("--year-max", year - 1),
+                }[operator]
+                value = str(year)
+            else:
+                return None
+            if flag in used or (flag == "--year" and used & {"--year-min", "--year-max"}):
+                return None
+            used.add(flag)
+            args.extend([flag, value])
+        if "--year" in used and used & {"--year-min", "--year-max"}:
+            return None
+        return args
+
+
+def _game_headers(game: bytes) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    for line in game.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if not stripped.startswith(b"["):
+            break
+        match = _HEADER_RE.match(stripped)
+        if match is None:
+            continue
+        name = match.group(1).decode("utf-8", errors="replace")
+        headers.setdefault(name, match.group(2).decode("utf-8", errors="replace"))
+    return headers
+
+
+def iter_pgn_games(handle: BinaryIO) -> Iterator[bytes]:
+    """Games split at ``[Event `` lines; anything before the first is dropped."""
+    current: list[bytes] = []
+    for line in handle:
+        if line.lstrip(b" \t").startswith(b"[Event "):
+            if current:
+                yield b"".join(current)
+            current = [line]
+        elif current:
+            current.append(line)
+    if current:
+        yield b"".join(current)
+
+
+class _FilteredGames(io.RawIOBase):
+    """Matching games of a PGN, split and tested in Python."""
+
+    def __init__(self, pgn_path: Path, header_filter: HeaderFilter) -> None:
+        super().__init__()
+        self._source = open_pgn(pgn_path)
+        self._games = iter_pgn_games(self._source)
+        self._filter = header_filter
+        self._pending = memoryview(b"")
+        self._scanned = 0
+        self._kept = 0
+        self.counts: HeaderFilterCounts | None = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            game = next(self._games, None)
+            if game is None:
+                self.counts = HeaderFilterCounts(self._scanned, self._kept)
+                return 0
+            self._scanned += 1
+            if self._filter.matches(_game_headers(game)):
+                self._kept += 1
+                self._pending = memoryview(game.rstrip(b" \t\r\n") + b"\n\n")
+        count = min(len(buffer), len(self._pending))
+        buffer[:count] = self._pending[:count]
+        self._pending = self._pending[count:]
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._source.close()
+        super().close()
+
+
+class _NativeFilteredGames(io.RawIOBase):
+    """Matching games of a PGN from ``pgn-utils grep ... -o -``."""
+
+    def __init__(self, binary_path: Path, pgn_path: Path, args: list[str]) -> None:
+        super().__init__()
+        self._stack = contextlib.ExitStack()
+        try:
+            pgn_argument, stdin, self._feed = self._stack.enter_context(
+                pgn_stdin_argument(pgn_path)
+            )
+            self._stderr = self._stack.enter_context(tempfile.TemporaryFile())
+            self._process = subprocess.Popen(
+                [str(binary_path), "grep", "--no-progress", *args, pgn_argument, "-o", "-"],
+                stdin=stdin,
+                stdout=subprocess.PIPE,
+                stderr=self._stderr,
+            )
+        except BaseException:
+            self._stack.close()
+            raise
+        self.counts: HeaderFilterCounts | None = None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._process.stdout.readinto(buffer)
+        if not count:
+            self._finish()
+        return count
+
+    def _finish(self) -> None:
+        returncode = self._process.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode("utf-8", errors="replace").strip()
+        if returncode != 0:
+            message = f"pgn-utils grep failed ({describe_returncode(returncode)})"
+            raise OSError(f"{message}: {stderr}" if stderr else message)
+        if self._feed is not None and self._feed.error is not None:
+            raise self._feed.error
+        stats = json.loads(stderr.splitlines()[-1])
+        self.counts = HeaderFilterCounts(
+            int(stats["games_scanned"]), int(stats["matched"])
+        )
+
+    def close(self) -> None:
+        if not self.closed:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.stdout.close()
+            self._process.wait()
+            self._stack.close()
+        super().close()
+
+
+def open_filtered_pgn(pgn_path: Path, header_filter: HeaderFilter) -> BinaryIO:
+    """Stream the games of ``pgn_path`` that ``header_filter`` keeps.
+
+    Compressed PGNs are read through :func:`~reti.common.compressed_pgn.open_pgn`.
+    Once the stream has been read to the end, its ``counts`` attribute holds
+    the games scanned and kept.
+    """
+    args = header_filter.native_grep_args()
+    binary_path = find_pgn_utils_binary() if args is not None else None
+    if binary_path is not None:
+        return _NativeFilteredGames(binary_path, pgn_path, args)
+    return _FilteredGames(pgn_path, header_filter)
+
+
+def write_filtered_pgn(
+    pgn_path: Path,
+    header_filter: HeaderFilter,
+    destination: Path,
+) -> HeaderFilterCounts:
+    """Write the games ``header_filter`` keeps to ``destination``."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    with open_filtered_pgn(pgn_path, header_filter) as reader, destination.open("wb") as out:
+        while chunk := reader.read(1024 * 1024):
+            out.write(chunk)
+        return reader.counts
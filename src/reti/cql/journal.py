@@ -0,0 +1,190 @@
+"""Append-only journal of completed CQL jobs, for ``--resume``.
+
+``summary.csv`` is only written once the whole matrix finishes, so a run
+that dies at job 900/1000 used to start over. The runner now appends one
+JSON line per finished ``(PGN, script)`` pair to ``<output>/journal.jsonl``
+as soon as the pair's output PGN is final, and fsyncs it.
+
+Each line carries:
+
+- the input fingerprints: source PGN (path + size + mtime, as in
+  :mod:`reti.cql.cache`), script SHA-256, backend and binary SHA-256, and
+  the ``--where`` filter fingerprint if there is one
+- the output PGN's size and mtime when the job finished
+- every :class:`JobResult` field that reaches ``summary.csv``
+
+``--resume`` reuses a record only if all fingerprints still match and the
+output PGN on disk is the one the job wrote. Failed jobs are not recorded,
+so they run again. A torn last line (the process died mid-write) is
+ignored.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from reti.common.hashing import canonical_json, sha256_file
+from reti.cql.backend import CqlBackend
+from reti.cql.cache import binary_fingerprint, pgn_fingerprint
+from reti.cql.runner import JobResult, JobSpec
+
+
+JOURNAL_FILENAME = "journal.jsonl"
+JOURNAL_SCHEMA_VERSION = 1
+
+
+def _output_stamp(output_pgn: Path) -> dict[str, int] | None:
+    try:
+        stat = output_pgn.stat()
+    except OSError:
+        return None
+    return {"sizeBytes": stat.st_size, "mtimeNs": stat.st_mtime_ns}
+
+
+def _record_key(source_pgn_path: Path, cql_path: Path, output_pgn: Path) -> str:
+    return canonical_json(
+        [str(source_pgn_path.resolve()), str(cql_path.resolve()), str(output_pgn.resolve())]
+    )
+
+
+class JobJournal:
+    """Durable record of finished jobs in one output directory.
+
+    ``resume=False`` starts a fresh journal; ``resume=True`` keeps appending
+    to the existing one (the last line per pair wins) so a resumed run can
+    itself be resumed.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        backend: CqlBackend,
+        *,
+        resume: bool = False,
+        where: str | None = None,
+    ) -> None:
+        self.path = path
+        self.backend = backend
+        self.where = where
+        self._lock = threading.Lock()
+        self._records: dict[str, dict[str, Any]] = self._load() if resume else {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = path.open("a" if resume else "w", encoding="utf-8")
+        if self._handle.tell() > 0:
+            # Terminate a torn last line so the next record starts cleanly.
+            with path.open("rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    self._handle.write("\n")
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        records: dict[str, dict[str, Any]] = {}
+        try:
+            handle = self.path.open("r", encoding="utf-8")
+        except OSError:
+            return records
+        with handle:
+            for line in handle:
+                try:
+                    record = json.loads(line)
+                    if record["schemaVersion"] == JOURNAL_SCHEMA_VERSION:
+                        records[record["key"]] = record
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return records
+
+    def _fingerprint(self, source_pgn_path: Path, cql_path: Path) -> dict[str, Any]:
+        fingerprint = {
+            "pgn": pgn_fingerprint(source_pgn_path),
+            "cqlSha256": sha256_file(cql_path),
+            "backend": type(self.backend).__name__,
+            "binarySha256": binary_fingerprint(self.backend.binary_path),
+        }
+        if self.where is not None:
+            fingerprint["where"] = self.where
+        return fingerprint
+
+    def record(self, result: JobResult) -> None:
+        """Append a finished pair's result; failures and missing outputs are skipped."""
+        if not result.success:
+            return
+        output = _output_stamp(result.output_pgn)
+        if output is None:
+            return
+        try:
+            fingerprint = self._fingerprint(result.pgn_path, result.cql_path)
+        except OSError:
+            return
+        record = {
+            "schemaVersion": JOURNAL_SCHEMA_VERSION,
+            "key": _record_key(result.pgn_path, result.cql_path, result.output_pgn),
+            "fingerprint": fingerprint,
+            "output": output,
+            "result": {
+                "match_count": result.match_count,
+                "returncode": result.returncode,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+                "duration_seconds": result.duration_seconds,
+                "cached": result.cached,
+                "games_before_filter": result.games_before_filter,
+                "games_after_filter": result.games_after_filter,
+                "stdout_bytes": result.stdout_bytes,
+                "stderr_bytes": result.stderr_bytes,
+            },
+        }
+        line = canonical_json(record) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def resumable_results(self, job_specs: list[JobSpec]) -> dict[int, JobResult]:
+        """Results for specs whose journal record still matches inputs and output."""
+        resumed: dict[int, JobResult] = {}
+        for spec in job_specs:
+            record = self._records.get(
+                _record_key(spec.source_pgn_path, spec.cql_path, spec.output_pgn)
+            )
+            if record is None:
+                continue
+            try:
+                fingerprint = self._fingerprint(spec.source_pgn_path, spec.cql_path)
+            except OSError:
+                continue
+            if record["fingerprint"] != fingerprint:
+                continue
+            if record["output"] != _output_stamp(spec.output_pgn):
+                continue
+            payload = record["result"]
+            resumed[spec.job_index] = JobResult(
+                pgn_path=spec.source_pgn_path,
+                cql_path=spec.cql_path,
+                output_pgn=spec.output_pgn,
+                success=True,
+                match_count=payload["match_count"],
+                returncode=payload["returncode"],
+                stdout=payload["stdout"],
+                stderr=payload["stderr"],
+                duration_seconds=payload["duration_seconds"],
+                cached=payload["cached"],
+                games_before_filter=payload.get("games_before_filter"),
+                games_after_filter=payload.get("games_after_filter"),
+                stdout_bytes=payload.get("stdout_bytes"),
+                stderr_bytes=payload.get("stderr_bytes"),
+            )
+        return resumed
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+    def __enter__(self) -> "JobJournal":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,560 @@
+"""Per-game material-signature index used to prefilter PGNs before CQL.
+
+Most endgame scripts are pure material predicates (``flipcolor (N == 1 and
+B == 1)``, ``[Aa] == 4``), yet CQL replays every game of the corpus. This
+module records, once per PGN, which material signatures each game reaches on
+its mainline, and turns a script's top-level material constraints into a
+predicate over those signatures. Only the games whose signatures can satisfy
+the predicate are handed to CQL.
+
+Two rules keep the prefilter safe:
+
+- The script predicate is an *over-approximation*. Filters that cannot be
+  judged from piece counts (``light [Bb] == 1``, ``connectedpawns``,
+  ``comment(...)``) are treated as always true; anything the parser does not
+  understand at all disables the prefilter for that script.
+- Games python-chess cannot fully replay are always kept.
+
+The index is a small SQLite file written next to the PGN
+(``<name>.pgn.material-index.sqlite``) and rebuilt when the PGN's size or
+mtime changes.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import io
+import re
+import sqlite3
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+import chess
+import chess.pgn
+
+from reti.cql.sharding import iter_game_byte_ranges, split_pgn_byte_ranges
+
+
+MATERIAL_INDEX_SCHEMA_VERSION = 1
+MATERIAL_INDEX_SUFFIX = ".material-index.sqlite"
+# Piece order of a signature tuple: white P N B R Q, then black p n b r q.
+SIGNATURE_PIECES = "PNBRQpnbrq"
+PARALLEL_INDEX_MIN_BYTES = 16 * 1024 * 1024
+
+MaterialSignature = tuple[int, ...]
+MaterialPredicate = Callable[[MaterialSignature], bool]
+
+
+class UnsupportedCqlError(ValueError):
+    """The script uses a construct the material parser cannot bound."""
+
+
+# ---------------------------------------------------------------------------
+# Index building
+# ---------------------------------------------------------------------------
+
+
+def board_signature(board: chess.Board) -> MaterialSignature:
+    return tuple(
+        len(board.pieces(piece_type, color))
+        for color in (chess.WHITE, chess.BLACK)
+        for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN)
+    )
+
+
+def _signature_slot(piece_type: chess.PieceType, color: chess.Color) -> int:
+    return (0 if color == chess.WHITE else 5) + piece_type - 1
+
+
+class _MaterialVisitor(chess.pgn.BaseVisitor):
+    """Collect mainline material signatures; captures and promotions only."""
+
+    def begin_game(self) -> None:
+        self.counts: list[int] = [0] * 10
+        self.signatures: set[MaterialSignature] = set()
+        self.complete = True
+
+    def visit_board(self, board: chess.Board) -> None:
+        if not self.signatures:
+            self.counts = list(board_signature(board))
+            self.signatures.add(tuple(self.counts))
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def visit_move(self, board: chess.Board, move: chess.Move) -> None:
+        changed = False
+        if board.is_en_passant(move):
+            self.counts[_signature_slot(chess.PAWN, not board.turn)] -= 1
+            changed = True
+        else:
+            captured = board.piece_type_at(move.to_square)
+            if captured is not None and captured != chess.KING:
+                self.counts[_signature_slot(captured, not board.turn)] -= 1
+                changed = True
+        if move.promotion is not None:
+            self.counts[_signature_slot(chess.PAWN, board.turn)] -= 1
+            self.counts[_signature_slot(move.promotion, board.turn)] += 1
+            changed = True
+        if changed:
+            self.signatures.add(tuple(self.counts))
+
+    def handle_error(self, error: Exception) -> None:
+        self.complete = False
+
+    def result(self) -> tuple[set[MaterialSignature], bool]:
+        return self.signatures, self.complete
+
+
+def game_signatures(text: str) -> tuple[set[MaterialSignature], bool]:
+    """Signatures reached by every game in ``text`` and whether all replayed cleanly."""
+    handle = io.StringIO(text)
+    signatures: set[MaterialSignature] = set()
+    complete = True
+    while True:
+        try:
+            result = chess.pgn.read_game(handle, Visitor=_MaterialVisitor)
+        except Exception:
+            return signatures, False
+        if result is None:
+            return signatures, complete
+        game_set, game_complete = result
+        signatures |= game_set
+        complete = complete and game_complete
+
+
+def _index_byte_range(
+    pgn_path: Path,
+    start: int,
+    end: int,
+) -> list[tuple[int, int, set[MaterialSignature], bool]]:
+    rows = []
+    with pgn_path.open("rb") as handle:
+        for game_start, game_end in iter_game_byte_ranges(pgn_path, start, end):
+            handle.seek(game_start)
+            text = handle.read(game_end - game_start).decode("utf-8", errors="replace")
+            signatures, complete = game_signatures(text)
+            rows.append((game_start, game_end, signatures, complete))
+    return rows
+
+
+def material_index_path(pgn_path: Path) -> Path:
+    return pgn_path.with_name(pgn_path.name + MATERIAL_INDEX_SUFFIX)
+
+
+def _pgn_stamp(pgn_path: Path) -> str:
+    stat = pgn_path.stat()
+    return f"{MATERIAL_INDEX_SCHEMA_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _index_is_current(index_path: Path, pgn_path: Path) -> bool:
+    if not index_path.exists():
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT value FROM metadata WHERE key = 'pgn_stamp'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return row is not None and row[0] == _pgn_stamp(pgn_path)
+
+
+def build_material_index(
+    pgn_path: Path,
+    index_path: Path,
+    *,
+    workers: int = 1,
+) -> Path:
+    """Replay every game of ``pgn_path`` and write its signature index."""
+    stamp = _pgn_stamp(pgn_path)
+    size = pgn_path.stat().st_size
+    chunk_count = workers * 4 if workers > 1 and size >= PARALLEL_INDEX_MIN_BYTES else 1
+    byte_ranges = split_pgn_byte_ranges(pgn_path, chunk_count)
+
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(
+            """
+            PRAGMA journal_mode=OFF;
+            PRAGMA synchronous=OFF;
+            CREATE TABLE metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE signatures (
+                signature_id INTEGER PRIMARY KEY,
+                signature TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE games (
+                start_byte INTEGER PRIMARY KEY,
+                end_byte INTEGER NOT NULL,
+                complete INTEGER NOT NULL,
+                signature_ids BLOB NOT NULL
+            );
+            """
+        )
+        signature_ids: dict[MaterialSignature, int] = {}
+
+        def write_rows(rows: list[tuple[int, int, set[MaterialSignature], bool]]) -> None:
+            game_rows = []
+            for start, end, signatures, complete in rows:
+                ids = array("I")
+                for signature in sorted(signatures):
+                    signature_id = signature_ids.get(signature)
+                    if signature_id is None:
+                        signature_id = len(signature_ids)
+                        signature_ids[signature] = signature_id
+                        conn.execute(
+                            "INSERT INTO signatures(signature_id, signature) VALUES (?, ?)",
+                            (signature_id, ",".join(map(str, signature))),
+                        )
+                    ids.append(signature_id)
+                game_rows.append((start, end, int(complete), ids.tobytes()))
+            conn.executemany("INSERT INTO games VALUES (?, ?, ?, ?)", game_rows)
+
+        if len(byte_ranges) == 1:
+            start, end = byte_ranges[0]
+            write_rows(_index_byte_range(pgn_path, start, end))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_index_byte_range, pgn_path, start, end)
+                    for start, end in byte_ranges
+                ]
+                for future in futures:
+                    write_rows(future.result())
+        conn.execute(
+            "INSERT INTO metadata(key, value) VALUES ('pgn_stamp', ?)",
+            (stamp,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_path.replace(index_path)
+    return index_path
+
+
+def ensure_material_index(
+    pgn_path: Path,
+    *,
+    fallback_dir: Path,
+    workers: int = 1,
+) -> Path:
+    """Return a current index for ``pgn_path``, building it if needed.
+
+    The index goes next to the PGN; if that directory is read-only it is built
+    under ``fallback_dir`` for this run only.
+    """
+    index_path = material_index_path(pgn_path)
+    if _index_is_current(index_path, pgn_path):
+        return index_path
+    try:
+        return build_material_index(pgn_path, index_path, workers=workers)
+    except OSError:
+        fallback_dir.mkdir(parents=True, exist_ok=True)
+        return build_material_index(
+            pgn_path,
+            fallback_dir / index_path.name,
+            workers=workers,
+        )
+
+
+def select_game_ranges(
+    index_path: Path,
+    predicates: list[MaterialPredicate],
+) -> list[list[tuple[int, int]]]:
+    """One pass over the index: the byte ranges each predicate keeps.
+
+    Adjacent kept games are merged into a single range.
+    """
+    conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    try:
+        matching_ids: list[set[int]] = [set() for _ in predicates]
+        for signature_id, text in conn.execute("SELECT signature_id, signature FROM signatures"):
+            signature = tuple(int(value) for value in text.split(","))
+            for matches, predicate in zip(matching_ids, predicates):
+                if predicate(signature):
+                    matches.add(signature_id)
+
+        kept: list[list[tuple[int, int]]] = [[] for _ in predicates]
+        for start, end, complete, blob in conn.execute(
+            "SELECT start_byte, end_byte, complete, signature_ids FROM games ORDER BY start_byte"
+        ):
+            ids = array("I")
+            ids.frombytes(blob)
+            for ranges, matches in zip(kept, matching_ids):
+                if complete and matches.isdisjoint(ids):
+                    continue
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+    finally:
+        conn.close()
+    return kept
+
+
+# ---------------------------------------------------------------------------
+# CQL material constraints
+# ---------------------------------------------------------------------------
+
+_TOKEN_REGEX = re.compile(
+    r"""
+    (?P<space>\s+)
+    | (?P<line_comment>//[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<set>\[[A-Za-z]+\])
+    | (?P<number>\d+)
+    | (?P<op>==|!=|<=|>=|<|>)
+    | (?P<punct>[(){}])
+    | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_PIECE_LETTERS = set("KQRBNPkqrbnpAa")
+# Geometric transforms never change whole-board piece counts.
+_COUNT_PRESERVING_TRANSFORMS = {"flip", "flipvertical", "fliphorizontal", "rotate90"}
+# Prefixes whose count is bounded by, but not equal to, the designator's.
+_UNBOUNDED_COUNT_PREFIXES = {"light", "dark"}
+_UNBOUNDED_COUNT_WORDS = {"connectedpawns", "isolatedpawns", "doubledpawns", "passedpawns"}
+
+
+@dataclass(frozen=True)
+class MaterialConstraint:
+    """Over-approximating predicate for one script; ``exact`` if nothing was guessed."""
+
+    predicate: MaterialPredicate
+    exact: bool
+
+    def __call__(self, signature: MaterialSignature) -> bool:
+        return self.predicate(signature)
+
+
+_ALWAYS = MaterialConstraint(lambda signature: True, exact=False)
+
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens: list[tuple[str, str]] = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_REGEX.match(text, position)
+        if match is None:
+            raise UnsupportedCqlError(f"unexpected character {text[position]!r}")
+        position = match.end()
+        kind = match.lastgroup or ""
+        if kind in {"space", "line_comment", "block_comment"}:
+            continue
+        tokens.append((kind, match.group(0)))
+    return tokens
+
+
+def _designator_counter(letters: str) -> Callable[[MaterialSignature], int]:
+    slots: set[int] = set()
+    white_king = black_king = False
+    for letter in letters:
+        if letter not in _PIECE_LETTERS:
+            raise UnsupportedCqlError(f"unsupported piece designator {letters!r}")
+        if letter == "A":
+            slots.update(range(0, 5))
+            white_king = True
+        elif letter == "a":
+            slots.update(range(5, 10))
+            black_king = True
+        elif letter == "K":
+            white_king = True
+        elif letter == "k":
+            black_king = True
+        else:
+            slots.add(SIGNATURE_PIECES.index(letter))
+    kings = int(white_king) + int(black_king)
+    ordered_slots = sorted(slots)
+    return lambda signature: kings + sum(signature[slot] for slot in ordered_slots)
+
+
+def _flip_signature(signature: MaterialSignature) -> MaterialSignature:
+    return signature[5:] + signature[:5]
+
+
+_COMPARATORS: dict[str, Callable[[int, int], bool]] = {
+    "==": lambda left, right: left == right,
+    "!=": lambda left, right: left != right,
+    "<=": lambda left, right: left <= right,
+    ">=": lambda left, right: left >= right,
+    "<": lambda left, right: left < right,
+    ">": lambda left, right: left > right,
+}
+
+
+class _ConstraintParser:
+    def __init__(self, tokens: list[tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise UnsupportedCqlError("unexpected end of script")
+        self.index += 1
+        return token
+
+    def expect(self, value: str) -> None:
+        kind, text = self.take()
+        if text != value:
+            raise UnsupportedCqlError(f"expected {value!r}, got {text!r}")
+
+    def parse_script(self) -> MaterialConstraint:
+        kind, text = self.take()
+        if text != "cql":
+            raise UnsupportedCqlError("script does not start with cql(...)")
+        self.expect("(")
+        depth = 1
+        while depth:
+            kind, text = self.take()
+            if text == "(":
+                depth += 1
+            elif text == ")":
+                depth -= 1
+            elif text == "variations":
+                # The index only covers mainlines.
+                raise UnsupportedCqlError("cql(variations) searches side lines")
+        return self.parse_sequence(closing=None)
+
+    def parse_sequence(self, closing: str | None) -> MaterialConstraint:
+        parts: list[MaterialConstraint] = []
+        while True:
+            token = self.peek()
+            if token is None:
+                if closing is not None:
+                    raise UnsupportedCqlError(f"missing {closing!r}")
+                break
+            if token[1] == closing:
+                self.take()
+                break
+            parts.append(self.parse_or())
+        return _conjoin(parts)
+
+    def parse_or(self) -> MaterialConstraint:
+        parts = [self.parse_and()]
+        while self.peek() is not None and self.peek()[1] == "or":
+            self.take()
+            parts.append(self.parse_and())
+        if len(parts) == 1:
+            return parts[0]
+        predicates = [part.predicate for part in parts]
+        return MaterialConstraint(
+            lambda signature: any(predicate(signature) for predicate in predicates),
+            exact=all(part.exact for part in parts),
+        )
+
+    def parse_and(self) -> MaterialConstraint:
+        parts = [self.parse_unary()]
+        while self.peek() is not None and self.peek()[1] == "and":
+            self.take()
+            parts.append(self.parse_unary())
+        return _conjoin(parts)
+
+    def parse_unary(self) -> MaterialConstraint:
+        kind, text = self.peek() or ("", "")
+        if text == "not":
+            self.take()
+            inner = self.parse_unary()
+            if not inner.exact:
+                return _ALWAYS
+            return MaterialConstraint(
+                lambda signature: not inner.predicate(signature),
+                exact=True,
+            )
+        if text == "flipcolor":
+            self.take()
+            inner = self.parse_unary()
+            return MaterialConstraint(
+                lambda signature: inner.predicate(signature)
+                or inner.predicate(_flip_signature(signature)),
+                exact=inner.exact,
+            )
+        if text in _COUNT_PRESERVING_TRANSFORMS:
+            self.take()
+            return self.parse_unary()
+        if text == "(":
+            self.take()
+            return self.parse_sequence(closing=")")
+        if text == "{":
+            self.take()
+            return self.parse_sequence(closing="}")
+        if text == "comment":
+            self.take()
+            self.expect("(")
+            while self.take()[1] != ")":
+                pass
+            return MaterialConstraint(lambda signature: True, exact=True)
+        return self.parse_comparison()
+
+    def parse_count(self) -> Callable[[MaterialSignature], int] | None:
+        """A count operand; ``None`` when it cannot be read off the signature."""
+        kind, text = self.take()
+        if kind == "number":
+            value = int(text)
+            return lambda signature: value
+        if kind == "set":
+            return _designator_counter(text[1:-1])
+        if kind == "word" and text in _UNBOUNDED_COUNT_PREFIXES:
+            self.parse_count()
+            return None
+        if kind == "word" and text in _UNBOUNDED_COUNT_WORDS:
+            return None
+        if kind == "word" and len(text) == 1:
+            return _designator_counter(text)
+        raise UnsupportedCqlError(f"unsupported filter {text!r}")
+
+    def parse_comparison(self) -> MaterialConstraint:
+        left = self.parse_count()
+        token = self.peek()
+        if token is None or token[0] != "op":
+            if left is None:
+                return _ALWAYS
+            # A bare designator is true when any such piece is on the board.
+            return MaterialConstraint(lambda signature: left(signature) > 0, exact=True)
+        comparator = _COMPARATORS[self.take()[1]]
+        right = self.parse_count()
+        if left is None or right is None:
+            return _ALWAYS
+        return MaterialConstraint(
+            lambda signature: comparator(left(signature), right(signature)),
+            exact=True,
+        )
+
+
+def _conjoin(parts: list[MaterialConstraint]) -> MaterialConstraint:
+    if not parts:
+        return MaterialConstraint(lambda signature: True, exact=True)
+    if len(parts) == 1:
+        return parts[0]
+    predicates = [part.predicate for part in parts]
+    return MaterialConstraint(
+        lambda signature: all(predicate(signature) for predicate in predicates),
+        exact=all(part.exact for part in parts),
+    )
+
+
+def parse_material_constraint(cql_text: str) -> MaterialConstraint | None:
+    """Material predicate implied by a CQL script, or ``None`` if it cannot be bounded."""
+    try:
+        return _ConstraintParser(_tokenize(cql_text)).parse_script()
+    except (UnsupportedCqlError, KeyError):
+        return None
+
+
+def load_material_constraints(
+    cql_paths: Iterable[Path],
+) -> dict[Path, MaterialConstraint | None]:
+    return {
+        path: parse_material_constraint(path.read_text(encoding="utf-8", errors="replace"))
+        for path in cql_paths
+    }
@@ -6,13 +6,14 @@ import csv
 from collections import defaultdict
 from pathlib import Path
 
+from reti.common.file_copy import append_file, pgn_separator_after
 from reti.common.pgn_discovery import (
     InputCollection,
     format_relative,
     relative_stem,
 )
 from reti.cql.preflight import count_games_in_pgn
-from reti.cql.runner import JobResult
+from reti.cql.runner import JobResult, captured_bytes
 
 
 JobOutputKey = tuple[Path, Path, Path]
@@ -38,6 +39,10 @@ def _first_nonempty_line(*texts: str) -> str:
     return ""
 
 
+def _format_optional_count(count: int | None) -> str:
+    return "" if count is None else str(count)
+
+
 def write_summary_csv(
     results: list[JobResult],
     output_dir: Path,
@@ -64,6 +69,9 @@ def write_summary_csv(
                 "stdout_bytes",
                 "stderr_bytes",
                 "error",
+                "cached",
+                "games_before_filter",
+                "games_after_filter",
             ],
         )
         writer.writeheader()
@@ -87,9 +95,12 @@ def write_summary_csv(
                     "duration_seconds": f"{result.duration_seconds:.3f}",
                     "timed_out": "yes" if result.timed_out else "no",
                     "missing_output": "yes" if result.missing_output else "no",
-                    "stdout_bytes": str(len(result.stdout.encode("utf-8"))),
-                    "stderr_bytes": str(len(result.stderr.encode("utf-8"))),
+                    "stdout_bytes": str(captured_bytes(result.stdout, result.stdout_bytes)),
+                    "stderr_bytes": str(captured_bytes(result.stderr, result.stderr_bytes)),
                     "error": "" if result.success else _first_nonempty_line(result.stderr, result.stdout),
+                    "cached": "yes" if result.cached else "no",
+                    "games_before_filter": _format_optional_count(result.games_before_filter),
+                    "games_after_filter": _format_optional_count(result.games_after_filter),
                 }
             )
     return summary_path
@@ -102,33 +113,40 @@ def merge_outputs_by_cql(
 ) -> list[Path]:
     """Concatenate per-PGN output files into one merged file per CQL script.
 
+    Bytes are copied kernel-side (see :mod:`reti.common.file_copy`) and only
+    each file's last two bytes are inspected to place the blank line between
+    games. Game totals come from the jobs' ``match_count``; only outputs
+    without one are counted.
+
     After merging, the individual per-pair output files are removed so the
     output directory contains only the merged PGNs and ``summary.csv``.
     """
-    by_cql: dict[Path, list[Path]] = defaultdict(list)
+    by_cql: dict[Path, list[JobResult]] = defaultdict(list)
     for result in results:
         if result.success and result.output_pgn.exists():
-            by_cql[result.cql_path].append(result.output_pgn)
+            by_cql[result.cql_path].append(result)
 
     merged_paths: list[Path] = []
     all_per_pair_files: list[Path] = []
 
     for cql_path in cql_inputs.files:
-        output_pgns = by_cql.get(cql_path, [])
-        if not output_pgns:
+        cql_results = by_cql.get(cql_path, [])
+        if not cql_results:
             continue
+        output_pgns = [result.output_pgn for result in cql_results]
         all_per_pair_files.extend(output_pgns)
         merged_name = relative_stem(cql_path, cql_inputs.root)
         merged_path = output_dir / f"{merged_name}.pgn"
         merged_path.parent.mkdir(parents=True, exist_ok=True)
-        with merged_path.open("w", encoding="utf-8") as out:
+        with merged_path.open("wb") as out:
             for pgn_path in output_pgns:
-                with pgn_path.open("r", encoding="utf-8", errors="replace") as inp:
-                    content = inp.read()
-                    out.write(content)
-                    if content and not content.endswith("\n\n"):
-                        out.write("\n\n" if not content.endswith("\n") else "\n")
-        total_games = count_games_in_pgn(merged_path)
+                out.write(pgn_separator_after(append_file(out, pgn_path)))
+        total_games = sum(
+            result.match_count
+            if result.match_count is not None
+            else count_games_in_pgn(result.output_pgn)
+            for result in cql_results
+        )
         print(
             f"Merged {len(output_pgns)} file(s) into {merged_path} ({total_games} game(s))"
         )
@@ -5,20 +5,37 @@ builds abort hard on byte-level garbage (BOMs, invalid UTF-8, control chars),
 which kills the whole batch. Preflight catches that once per PGN and either
 points the runner at a sanitized temp copy or fails the whole run before any
 real work happens.
+
+With a :class:`~reti.common.pgn_catalog.PgnCatalog`, the inspect result and
+the sanitized copy persist across runs: an unchanged PGN is not read again.
 """
 
 from __future__ import annotations
 
+import argparse
 import io
 import json
+import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 
 from tqdm import tqdm as tqdm_progress
 
 from reti.cql.backend import CqlBackend
+from reti.common.compressed_pgn import (
+    open_pgn,
+    pgn_input_path,
+    pgn_stdin_argument,
+    plain_pgn_name,
+)
+from reti.common.pgn_catalog import (
+    GAME_COUNT_EVENT_TAG_LINES,
+    GAME_COUNT_PGN_UTILS,
+    PgnCatalog,
+)
 from reti.common.pgn_discovery import InputCollection, format_relative
 from reti.common.progress import format_progress_label, progress_write
 from reti.common.subprocess_helpers import describe_returncode
@@ -30,6 +47,11 @@ from reti.pgn_utils import (
 )
 
 
+# Preflight is mostly sequential reads of whole PGNs; past a few concurrent
+# scans a single disk just seeks more.
+AUTO_PREFLIGHT_WORKER_CAP = 4
+
+
 @dataclass(frozen=True)
 class PgnPreflightResult:
     pgn_path: Path
@@ -42,8 +64,8 @@ class PgnPreflightResult:
 def count_games_in_pgn(pgn_file_path: str | Path) -> int:
     """Count games in a PGN by scanning for ``[Event `` tags."""
     try:
-        with open(pgn_file_path, "r", encoding="utf-8", errors="replace") as f:
-            return sum(1 for line in f if line.startswith("[Event "))
+        with open_pgn(Path(pgn_file_path)) as raw_handle:
+            return sum(1 for line in raw_handle if line.startswith(b"[Event "))
     except FileNotFoundError:
         print(f"Error: PGN file not found for counting: {pgn_file_path}")
         return 0
@@ -78,7 +100,7 @@ def issues_from_fast_stats(stats: FastPgnRewriteStats) -> list[str]:
 def inspect_pgn_text_compatibility(pgn_path: Path) -> list[str]:
     """Find text/byte issues that can make older CQL builds abort on specific PGNs."""
     try:
-        raw_handle = pgn_path.open("rb")
+        raw_handle = open_pgn(pgn_path)
     except Exception as exc:
         return [f"could not read PGN bytes: {exc}"]
 
@@ -88,11 +110,9 @@ def inspect_pgn_text_compatibility(pgn_path: Path) -> list[str]:
     first_control_codepoint: int | None = None
 
     with raw_handle:
-        prefix = raw_handle.read(3)
-        if prefix == b"\xef\xbb\xbf":
+        if raw_handle.peek(3)[:3] == b"\xef\xbb\xbf":
+            raw_handle.read(3)
             issues.append("starts with a UTF-8 BOM")
-        else:
-            raw_handle.seek(0)
 
         text_handle = io.TextIOWrapper(
             raw_handle,
@@ -143,7 +163,9 @@ def sanitize_pgn_to_temp(
     control chars) we want here without touching markup, since CQL scripts
     using ``{CQL}`` markers need their comments intact.
     """
-    destination = runtime_root / pgn_path.relative_to(pgn_root)
+    destination = runtime_root / pgn_path.relative_to(pgn_root).with_name(
+        plain_pgn_name(pgn_path)
+    )
     destination.parent.mkdir(parents=True, exist_ok=True)
     rewrite_pgn_fast(pgn_path, destination, preserve_markup=True)
     return destination
@@ -158,19 +180,23 @@ def validate_pgn_with_native_lint(pgn_path: Path) -> str | None:
             "`cargo build --release --manifest-path native/pgn-utils/Cargo.toml`"
         )
 
-    process = subprocess.run(
-        [
-            str(binary_path),
-            "lint",
-            "--json",
-            "--no-progress",
-            str(pgn_path),
-        ],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    with pgn_stdin_argument(pgn_path) as (pgn_argument, stdin, feed):
+        process = subprocess.run(
+            [
+                str(binary_path),
+                "lint",
+                "--json",
+                "--no-progress",
+                pgn_argument,
+            ],
+            stdin=stdin,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if feed is not None and feed.error is not None:
+        return f"could not decompress PGN: {feed.error}"
     if process.returncode == 0:
         return None
 
@@ -212,18 +238,179 @@ def smoke_test_pgn_with_cql(
     if smoke_output.exists():
         smoke_output.unlink()
 
-    process = subprocess.run(
-        backend.build_smoke_command(
+    with pgn_input_path(pgn_path) as (input_path, feed):
+        process = subprocess.run(
+            backend.build_smoke_command(
+                input_path,
+                smoke_script,
+                smoke_output,
+            ),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if feed is not None and feed.error is not None:
+        return 1, process.stdout, f"could not decompress PGN: {feed.error}"
+    return process.returncode, process.stdout, process.stderr
+
+
+def parse_preflight_jobs_value(value: str) -> str | int:
+    text = value.strip().lower()
+    if text == "auto":
+        return "auto"
+
+    try:
+        parsed = int(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            "--preflight-jobs must be a positive integer or 'auto'"
+        ) from exc
+
+    if parsed < 1:
+        raise argparse.ArgumentTypeError("--preflight-jobs must be at least 1")
+    return parsed
+
+
+def resolve_preflight_workers(requested_workers: str | int, file_count: int) -> int:
+    """Preflight worker count; ``auto`` is capped at :data:`AUTO_PREFLIGHT_WORKER_CAP`.
+
+    Every worker streams a whole PGN (and may write a sanitized copy of it),
+    so the automatic count stops well short of the core count to avoid
+    thrashing a single disk.
+    """
+    if requested_workers == "auto":
+        requested = min(os.cpu_count() or 1, AUTO_PREFLIGHT_WORKER_CAP)
+    else:
+        requested = int(requested_workers)
+    return max(1, min(file_count, requested))
+
+
+def _preflight_one_pgn(
+    pgn_path: Path,
+    index: int,
+    *,
+    pgn_inputs: InputCollection,
+    backend: CqlBackend,
+    runtime_root: Path,
+    smoke_script: Path | None,
+    strict_pgn_parse: bool,
+    catalog: PgnCatalog | None,
+) -> tuple[PgnPreflightResult, list[str]]:
+    """Preflight one PGN; returns its result and the messages to print for it.
+
+    Messages are returned rather than printed so that the caller can emit
+    them in input order whatever order the workers finish in.
+    """
+    messages: list[str] = []
+    relative_name = format_relative(pgn_path, pgn_inputs.root)
+    runtime_pgn_path = pgn_path
+    sanitized = False
+
+    def failed(message: str) -> tuple[PgnPreflightResult, list[str]]:
+        messages.append(f"FAILED preflight: {relative_name}: {message}")
+        return (
+            PgnPreflightResult(
+                pgn_path=pgn_path,
+                runtime_pgn_path=runtime_pgn_path,
+                success=False,
+                sanitized=sanitized,
+                message=message,
+            ),
+            messages,
+        )
+
+    entry = catalog.entry(pgn_path) if catalog is not None else None
+    cached_count = (
+        entry.game_count((GAME_COUNT_PGN_UTILS, GAME_COUNT_EVENT_TAG_LINES))
+        if entry is not None
+        else None
+    )
+    if entry is not None and entry.text_issues is not None and cached_count is not None:
+        text_issues = list(entry.text_issues)
+        event_count = cached_count
+    else:
+        try:
+            inspect_stats = inspect_pgn_fast(pgn_path)
+        except Exception as exc:
+            inspect_stats = None
+            messages.append(f"Fast inspect failed for {relative_name}, falling back: {exc}")
+
+        if inspect_stats is not None:
+            text_issues = issues_from_fast_stats(inspect_stats)
+            event_count = inspect_stats.games_written
+        else:
+            text_issues = inspect_pgn_text_compatibility(pgn_path)
+            event_count = count_games_in_pgn(pgn_path)
+        if entry is not None and inspect_stats is not None:
+            entry.text_issues = text_issues
+            entry.game_counts[GAME_COUNT_PGN_UTILS] = event_count
+            catalog.save(entry)
+
+    if text_issues and entry is not None:
+        runtime_pgn_path = entry.sanitized_path()
+        if runtime_pgn_path is None:
+            runtime_pgn_path = catalog.sanitized_copy_path(pgn_path)
+            runtime_pgn_path.parent.mkdir(parents=True, exist_ok=True)
+            rewrite_pgn_fast(pgn_path, runtime_pgn_path, preserve_markup=True)
+            entry.record_sanitized_copy(runtime_pgn_path)
+            catalog.save(entry)
+        sanitized = True
+        messages.append(
+            f"Using sanitized cached copy for {relative_name}: {'; '.join(text_issues)}"
+        )
+    elif text_issues:
+        runtime_pgn_path = sanitize_pgn_to_temp(
             pgn_path,
+            pgn_inputs.root,
+            runtime_root / "sanitized-pgns",
+        )
+        sanitized = True
+        messages.append(
+            f"Using sanitized temporary copy for {relative_name}: {'; '.join(text_issues)}"
+        )
+
+    if event_count == 0:
+        return failed("no [Event] tags found; file does not look like an export PGN")
+
+    if strict_pgn_parse:
+        parse_error = validate_pgn_with_python_parser(runtime_pgn_path)
+        if parse_error:
+            return failed(parse_error)
+
+    if smoke_script is not None:
+        smoke_output = runtime_root / f"smoke-{index}.pgn"
+        returncode, stdout, stderr = smoke_test_pgn_with_cql(
+            backend,
+            runtime_pgn_path,
             smoke_script,
             smoke_output,
+        )
+        if returncode != 0:
+            detail = describe_returncode(returncode)
+            extra = first_nonempty_line(stderr) or first_nonempty_line(stdout)
+            message = f"CQL smoke test failed ({detail})"
+            if extra:
+                message += f": {extra}"
+            return failed(message)
+
+    ok_message = f"OK ({event_count} game(s) by [Event] count)"
+    if sanitized:
+        ok_message += (
+            "; using sanitized cached copy"
+            if catalog is not None
+            else "; using sanitized temporary copy"
+        )
+    return (
+        PgnPreflightResult(
+            pgn_path=pgn_path,
+            runtime_pgn_path=runtime_pgn_path,
+            success=True,
+            sanitized=sanitized,
+            message=ok_message,
         ),
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
+        messages,
     )
-    return process.returncode, process.stdout, process.stderr
 
 
 def preflight_pgn_files(
@@ -233,22 +420,39 @@ def preflight_pgn_files(
     *,
     smoke_test_pgns: bool = False,
     strict_pgn_parse: bool = False,
+    catalog: PgnCatalog | None = None,
+    workers: str | int = 1,
 ) -> list[PgnPreflightResult]:
-    """Validate each PGN once before the full matrix run."""
-    print(f"Preflighting {len(pgn_inputs.files)} PGN file(s)...")
+    """Validate each PGN once before the full matrix run.
 
-    results: list[PgnPreflightResult] = []
+    With ``catalog``, cached byte-level findings and game counts replace the
+    inspect pass, and sanitized copies live under the catalog root instead of
+    ``runtime_root``.
+
+    ``workers`` PGNs are checked at once (see :func:`resolve_preflight_workers`).
+    Results and per-file messages come out in input order regardless; the
+    byte progress bar advances as each file finishes.
+    """
     runtime_root.mkdir(parents=True, exist_ok=True)
     smoke_script: Path | None = None
     if smoke_test_pgns:
         smoke_script = runtime_root / "smoke_check.cql"
         smoke_script.write_text("cql() check\n", encoding="utf-8")
 
+    pgn_files = list(pgn_inputs.files)
     pgn_sizes = {
         pgn_path: pgn_path.stat().st_size if pgn_path.exists() else 0
-        for pgn_path in pgn_inputs.files
+        for pgn_path in pgn_files
     }
     total_bytes = sum(pgn_sizes.values())
+    worker_count = resolve_preflight_workers(workers, len(pgn_files))
+    if worker_count > 1:
+        print(f"Preflighting {len(pgn_files)} PGN file(s) with {worker_count} workers...")
+    else:
+        print(f"Preflighting {len(pgn_files)} PGN file(s)...")
+
+    results: list[PgnPreflightResult] = []
+    finished: dict[int, tuple[PgnPreflightResult, list[str]]] = {}
     progress = tqdm_progress(
         total=total_bytes,
         desc="PGN preflight",
@@ -257,115 +461,44 @@ def preflight_pgn_files(
         dynamic_ncols=sys.stderr.isatty(),
         file=sys.stderr,
     )
+    executor = ThreadPoolExecutor(max_workers=worker_count)
     try:
-        for index, pgn_path in enumerate(pgn_inputs.files, start=1):
-            relative_name = format_relative(pgn_path, pgn_inputs.root)
-            progress.set_postfix_str(format_progress_label(relative_name))
-            runtime_pgn_path = pgn_path
-            sanitized = False
-
-            try:
-                inspect_stats = inspect_pgn_fast(pgn_path)
-            except Exception as exc:
-                inspect_stats = None
-                progress_write(
-                    f"Fast inspect failed for {relative_name}, falling back: {exc}"
-                )
-
-            if inspect_stats is not None:
-                text_issues = issues_from_fast_stats(inspect_stats)
-                event_count = inspect_stats.games_written
-            else:
-                text_issues = inspect_pgn_text_compatibility(pgn_path)
-                event_count = count_games_in_pgn(pgn_path)
-
-            if text_issues:
-                runtime_pgn_path = sanitize_pgn_to_temp(
-                    pgn_path,
-                    pgn_inputs.root,
-                    runtime_root / "sanitized-pgns",
-                )
-                sanitized = True
-                progress_write(
-                    "Using sanitized temporary copy for "
-                    f"{relative_name}: {'; '.join(text_issues)}"
-                )
-
-            if event_count == 0:
-                results.append(
-                    PgnPreflightResult(
-                        pgn_path=pgn_path,
-                        runtime_pgn_path=runtime_pgn_path,
-                        success=False,
-                        sanitized=sanitized,
-                        message="no [Event] tags found; file does not look like an export PGN",
-                    )
-                )
-                progress_write(
-                    f"FAILED preflight: {relative_name}: "
-                    "no [Event] tags found; file does not look like an export PGN"
-                )
-                progress.update(pgn_sizes[pgn_path])
-                continue
-
-            if strict_pgn_parse:
-                parse_error = validate_pgn_with_python_parser(runtime_pgn_path)
-                if parse_error:
-                    results.append(
-                        PgnPreflightResult(
-                            pgn_path=pgn_path,
-                            runtime_pgn_path=runtime_pgn_path,
-                            success=False,
-                            sanitized=sanitized,
-                            message=parse_error,
-                        )
-                    )
-                    progress_write(f"FAILED preflight: {relative_name}: {parse_error}")
-                    progress.update(pgn_sizes[pgn_path])
-                    continue
-
-            if smoke_test_pgns:
-                assert smoke_script is not None
-                smoke_output = runtime_root / f"smoke-{index}.pgn"
-                returncode, stdout, stderr = smoke_test_pgn_with_cql(
-                    backend,
-                    runtime_pgn_path,
-                    smoke_script,
-                    smoke_output,
-                )
-                if returncode != 0:
-                    detail = describe_returncode(returncode)
-                    extra = first_nonempty_line(stderr) or first_nonempty_line(stdout)
-                    message = f"CQL smoke test failed ({detail})"
-                    if extra:
-                        message += f": {extra}"
-                    results.append(
-                        PgnPreflightResult(
-                            pgn_path=pgn_path,
-                            runtime_pgn_path=runtime_pgn_path,
-                            success=False,
-                            sanitized=sanitized,
-                            message=message,
-                        )
+        futures = {
+            executor.submit(
+                _preflight_one_pgn,
+                pgn_path,
+                index,
+                pgn_inputs=pgn_inputs,
+                backend=backend,
+                runtime_root=runtime_root,
+                smoke_script=smoke_script,
+                strict_pgn_parse=strict_pgn_parse,
+                catalog=catalog,
+            ): index - 1
+            for index, pgn_path in enumerate(pgn_files, start=1)
+        }
+        if pgn_files:
+            progress.set_postfix_str(
+                format_progress_label(format_relative(pgn_files[0], pgn_inputs.root))
+            )
+        for future in as_completed(futures):
+            position = futures[future]
+            finished[position] = future.result()
+            progress.update(pgn_sizes[pgn_files[position]])
+            # Emit in input order: flush every file up to the first unfinished one.
+            while len(results) in finished:
+                result, messages = finished.pop(len(results))
+                for message in messages:
+                    progress_write(message)
+                results.append(result)
+            if len(results) < len(pgn_files):
+                progress.set_postfix_str(
+                    format_progress_label(
+                        format_relative(pgn_files[len(results)], pgn_inputs.root)
                     )
-                    progress_write(f"FAILED preflight: {relative_name}: {message}")
-                    progress.update(pgn_sizes[pgn_path])
-                    continue
-
-            ok_message = f"OK ({event_count} game(s) by [Event] count)"
-            if sanitized:
-                ok_message += "; using sanitized temporary copy"
-            results.append(
-                PgnPreflightResult(
-                    pgn_path=pgn_path,
-                    runtime_pgn_path=runtime_pgn_path,
-                    success=True,
-                    sanitized=sanitized,
-                    message=ok_message,
                 )
-            )
-            progress.update(pgn_sizes[pgn_path])
     finally:
+        executor.shutdown(wait=True, cancel_futures=True)
         progress.close()
 
     failures = [result for result in results if not result.success]
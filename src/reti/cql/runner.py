@@ -3,23 +3,67 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import concurrent.futures
+import contextlib
+import dataclasses
 import os
 import subprocess
 import sys
+import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterable
 
 from tqdm import tqdm as tqdm_progress
 
 from reti.cql.backend import CqlBackend
+from reti.cql.cache import CqlResultCache
+from reti.cql.engine import PROGRESS_LINE_INCREMENT, run_streaming_process
+from reti.cql.fusion import (
+    needs_whole_input,
+    plan_fusion_groups,
+    render_fused_cql,
+    select_fused_game_ranges,
+)
+from reti.cql.header_filter import (
+    HeaderFilter,
+    HeaderFilterCounts,
+    open_filtered_pgn,
+    write_filtered_pgn,
+)
+from reti.cql.material_index import (
+    ensure_material_index,
+    load_material_constraints,
+    select_game_ranges,
+)
 from reti.cql.preflight import PgnPreflightResult, count_games_in_pgn
+from reti.cql.scheduling import ThroughputHistory, schedule_job_specs
+from reti.cql.sharding import (
+    copy_pgn_byte_ranges,
+    count_games_in_byte_range,
+    open_pgn_byte_range,
+    resolve_shard_count,
+    split_pgn_byte_ranges,
+    stitch_pgn_outputs,
+)
+from reti.common.compressed_pgn import (
+    decompress_pgn,
+    pgn_compression,
+    pgn_input_path,
+    plain_pgn_name,
+)
 from reti.common.pgn_discovery import (
     InputCollection,
     format_relative,
     relative_stem,
 )
+from reti.common.pgn_catalog import (
+    GAME_COUNT_EVENT_TAG_LINES,
+    GAME_COUNT_PGN_UTILS,
+    PgnCatalog,
+)
 from reti.common.progress import format_progress_label, progress_write
 from reti.common.subprocess_helpers import describe_returncode
 
@@ -37,6 +81,17 @@ class JobResult:
     duration_seconds: float = 0.0
     timed_out: bool = False
     missing_output: bool = False
+    cached: bool = False
+    games_before_filter: int | None = None
+    games_after_filter: int | None = None
+    # Bytes the process wrote, when ``stdout``/``stderr`` keep only a tail.
+    stdout_bytes: int | None = None
+    stderr_bytes: int | None = None
+
+
+def captured_bytes(text: str, total_bytes: int | None) -> int:
+    """``total_bytes`` if the stream was truncated, else the size of ``text``."""
+    return len(text.encode("utf-8")) if total_bytes is None else total_bytes
 
 
 @dataclass(frozen=True)
@@ -47,6 +102,8 @@ class JobSpec:
     runtime_pgn_path: Path
     cql_path: Path
     output_pgn: Path
+    # A shard job reads only ``[start, end)`` of ``runtime_pgn_path``.
+    byte_range: tuple[int, int] | None = None
 
 
 def parse_jobs_value(value: str) -> str | int:
@@ -83,6 +140,23 @@ def parse_cql_threads_value(value: str) -> str | int:
     return parsed
 
 
+def parse_shards_value(value: str) -> str | int:
+    text = value.strip().lower()
+    if text == "auto":
+        return "auto"
+
+    try:
+        parsed = int(text)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(
+            "--shards must be a positive integer or 'auto'"
+        ) from exc
+
+    if parsed < 1:
+        raise argparse.ArgumentTypeError("--shards must be at least 1")
+    return parsed
+
+
 def resolve_worker_count(requested_jobs: str | int, total_jobs: int) -> int:
     if total_jobs <= 1:
         return 1
@@ -154,152 +228,959 @@ def build_job_specs(
     return job_specs
 
 
-def run_cql_job(
+def _cache_key(
+    cache: CqlResultCache,
     backend: CqlBackend,
     source_pgn_path: Path,
-    runtime_pgn_path: Path,
+    cql_path: Path,
+) -> str | None:
+    try:
+        return cache.job_key(backend, source_pgn_path, cql_path)
+    except OSError:
+        return None
+
+
+def _restore_cached_result(
+    cache: CqlResultCache,
+    key: str,
+    source_pgn_path: Path,
+    cql_path: Path,
+    output_pgn: Path,
+) -> JobResult | None:
+    match_count = cache.restore(key, output_pgn)
+    if match_count is None:
+        return None
+    return JobResult(
+        pgn_path=source_pgn_path,
+        cql_path=cql_path,
+        output_pgn=output_pgn,
+        success=True,
+        match_count=match_count,
+        returncode=0,
+        stdout="",
+        stderr="",
+        cached=True,
+    )
+
+
+def _failed_result(
+    source_pgn_path: Path,
     cql_path: Path,
     output_pgn: Path,
+    returncode: int,
+    stderr: str,
     *,
-    cql_threads: str | int = "auto",
-    timeout_seconds: float | None = None,
+    stdout: str = "",
+    duration_seconds: float = 0.0,
+    timed_out: bool = False,
+    missing_output: bool = False,
 ) -> JobResult:
+    return JobResult(
+        pgn_path=source_pgn_path,
+        cql_path=cql_path,
+        output_pgn=output_pgn,
+        success=False,
+        match_count=None,
+        returncode=returncode,
+        stdout=stdout,
+        stderr=stderr,
+        duration_seconds=duration_seconds,
+        timed_out=timed_out,
+        missing_output=missing_output,
+    )
+
+
+def _prepare_cql_job(
+    backend: CqlBackend,
+    source_pgn_path: Path,
+    cql_path: Path,
+    output_pgn: Path,
+    cache: CqlResultCache | None,
+) -> tuple[JobResult | None, str | None]:
+    """Restore a cache hit or clear the output; a result here means "done"."""
+    cache_key: str | None = None
+    if cache is not None:
+        cache_key = _cache_key(cache, backend, source_pgn_path, cql_path)
+        if cache_key is not None:
+            cached_result = _restore_cached_result(
+                cache, cache_key, source_pgn_path, cql_path, output_pgn
+            )
+            if cached_result is not None:
+                return cached_result, cache_key
+
     output_pgn.parent.mkdir(parents=True, exist_ok=True)
     if output_pgn.exists():
         try:
             output_pgn.unlink()
         except OSError as exc:
-            return JobResult(
-                pgn_path=source_pgn_path,
-                cql_path=cql_path,
-                output_pgn=output_pgn,
-                success=False,
-                match_count=None,
-                returncode=1,
-                stdout="",
-                stderr=f"could not remove existing output before run: {exc}",
-            )
-
-    command = backend.build_run_command(
-        runtime_pgn_path,
-        cql_path,
-        output_pgn,
-        threads=cql_threads,
-    )
+            return (
+                _failed_result(
+                    source_pgn_path,
+                    cql_path,
+                    output_pgn,
+                    1,
+                    f"could not remove existing output before run: {exc}",
+                ),
+                cache_key,
+            )
+    return None, cache_key
 
-    started = time.monotonic()
-    try:
-        process = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
-            timeout=timeout_seconds,
-        )
-        duration_seconds = time.monotonic() - started
-    except subprocess.TimeoutExpired as exc:
-        duration_seconds = time.monotonic() - started
-        stdout = exc.stdout
-        stderr = exc.stderr
-        if isinstance(stdout, bytes):
-            stdout = stdout.decode("utf-8", errors="replace")
-        if isinstance(stderr, bytes):
-            stderr = stderr.decode("utf-8", errors="replace")
-        message = f"CQL job timed out after {timeout_seconds:g} second(s)"
-        if stderr:
-            message = f"{message}\n{stderr}"
-        return JobResult(
-            pgn_path=source_pgn_path,
-            cql_path=cql_path,
-            output_pgn=output_pgn,
-            success=False,
-            match_count=None,
-            returncode=124,
-            stdout=stdout or "",
-            stderr=message,
-            duration_seconds=duration_seconds,
-            timed_out=True,
-        )
-    except FileNotFoundError as exc:
-        duration_seconds = time.monotonic() - started
-        return JobResult(
-            pgn_path=source_pgn_path,
-            cql_path=cql_path,
-            output_pgn=output_pgn,
-            success=False,
-            match_count=None,
-            returncode=127,
-            stdout="",
-            stderr=str(exc),
-            duration_seconds=duration_seconds,
-        )
-    except Exception as exc:
-        duration_seconds = time.monotonic() - started
-        return JobResult(
-            pgn_path=source_pgn_path,
-            cql_path=cql_path,
-            output_pgn=output_pgn,
-            success=False,
-            match_count=None,
-            returncode=1,
-            stdout="",
-            stderr=str(exc),
-            duration_seconds=duration_seconds,
-        )
 
-    if process.returncode != 0:
-        return JobResult(
-            pgn_path=source_pgn_path,
-            cql_path=cql_path,
-            output_pgn=output_pgn,
-            success=False,
-            match_count=None,
-            returncode=process.returncode,
-            stdout=process.stdout,
-            stderr=process.stderr,
+def _finish_cql_job(
+    source_pgn_path: Path,
+    cql_path: Path,
+    output_pgn: Path,
+    *,
+    returncode: int,
+    stdout: str,
+    stderr: str,
+    duration_seconds: float,
+    cache: CqlResultCache | None,
+    cache_key: str | None,
+) -> JobResult:
+    if returncode != 0:
+        return _failed_result(
+            source_pgn_path,
+            cql_path,
+            output_pgn,
+            returncode,
+            stderr,
+            stdout=stdout,
             duration_seconds=duration_seconds,
         )
 
     if not output_pgn.exists():
-        return JobResult(
-            pgn_path=source_pgn_path,
-            cql_path=cql_path,
-            output_pgn=output_pgn,
-            success=False,
-            match_count=None,
-            returncode=process.returncode,
-            stdout=process.stdout,
-            stderr="CQL exited successfully but did not create the expected output PGN",
+        return _failed_result(
+            source_pgn_path,
+            cql_path,
+            output_pgn,
+            returncode,
+            "CQL exited successfully but did not create the expected output PGN",
+            stdout=stdout,
             duration_seconds=duration_seconds,
             missing_output=True,
         )
 
     match_count = count_games_in_pgn(output_pgn)
+    if cache is not None and cache_key is not None:
+        cache.store(cache_key, output_pgn, match_count)
     return JobResult(
         pgn_path=source_pgn_path,
         cql_path=cql_path,
         output_pgn=output_pgn,
         success=True,
         match_count=match_count,
+        returncode=returncode,
+        stdout=stdout,
+        stderr=stderr,
+        duration_seconds=duration_seconds,
+    )
+
+
+def _timeout_message(timeout_seconds: float | None, stderr: str) -> str:
+    message = f"CQL job timed out after {timeout_seconds:g} second(s)"
+    if stderr:
+        message = f"{message}\n{stderr}"
+    return message
+
+
+def _decompress_message(runtime_pgn_path: Path, error: BaseException) -> str:
+    return f"could not decompress {runtime_pgn_path.name}: {error}"
+
+
+def _filter_message(runtime_pgn_path: Path, error: BaseException) -> str:
+    return f"could not filter {runtime_pgn_path.name}: {error}"
+
+
+@contextlib.contextmanager
+def _shard_copy(runtime_pgn_path: Path, byte_range: tuple[int, int], scratch_dir: Path):
+    """A plain copy of one shard, written just before its job and removed after."""
+    shard_pgn = scratch_dir / f"input-{byte_range[0]}.pgn"
+    try:
+        copy_pgn_byte_ranges(runtime_pgn_path, [byte_range], shard_pgn)
+        yield shard_pgn, None
+    finally:
+        shard_pgn.unlink(missing_ok=True)
+
+
+def _cql_input(
+    runtime_pgn_path: Path,
+    header_filter: HeaderFilter | None,
+    byte_range: tuple[int, int] | None = None,
+    *,
+    backend: CqlBackend | None = None,
+    scratch_dir: Path | None = None,
+):
+    """:func:`pgn_input_path`, streaming only ``header_filter``'s games if set.
+
+    A shard's ``byte_range`` is streamed through a named pipe too, or, for a
+    backend that needs a seekable file, copied to ``scratch_dir`` for the
+    duration of the job.
+    """
+    if byte_range is not None:
+        if backend is not None and backend.needs_seekable_input:
+            assert scratch_dir is not None
+            return _shard_copy(runtime_pgn_path, byte_range, scratch_dir)
+        start, end = byte_range
+        return pgn_input_path(
+            runtime_pgn_path,
+            open_source=lambda path: open_pgn_byte_range(path, start, end),
+        )
+    if header_filter is None:
+        return pgn_input_path(runtime_pgn_path)
+    return pgn_input_path(
+        runtime_pgn_path,
+        open_source=lambda path: open_filtered_pgn(path, header_filter),
+    )
+
+
+def _feed_failure_message(
+    runtime_pgn_path: Path,
+    header_filter: HeaderFilter | None,
+    error: BaseException,
+    byte_range: tuple[int, int] | None = None,
+) -> str:
+    if byte_range is not None:
+        return f"could not read shard of {runtime_pgn_path.name}: {error}"
+    if header_filter is None:
+        return _decompress_message(runtime_pgn_path, error)
+    return _filter_message(runtime_pgn_path, error)
+
+
+def with_filter_counts(
+    result: JobResult,
+    counts: HeaderFilterCounts | None,
+) -> JobResult:
+    """``result`` with the games its ``--where`` filter scanned and kept."""
+    if counts is None:
+        return result
+    return dataclasses.replace(
+        result,
+        games_before_filter=counts.games_scanned,
+        games_after_filter=counts.games_kept,
+    )
+
+
+def run_cql_job(
+    backend: CqlBackend,
+    source_pgn_path: Path,
+    runtime_pgn_path: Path,
+    cql_path: Path,
+    output_pgn: Path,
+    *,
+    cql_threads: str | int = "auto",
+    timeout_seconds: float | None = None,
+    cache: CqlResultCache | None = None,
+    header_filter: HeaderFilter | None = None,
+    byte_range: tuple[int, int] | None = None,
+) -> JobResult:
+    """Run one CQL process over ``runtime_pgn_path``.
+
+    With ``header_filter`` only the games it keeps are streamed to CQL, and
+    the result records how many games were scanned and kept. With
+    ``byte_range`` CQL sees only that shard of the PGN.
+    """
+    done, cache_key = _prepare_cql_job(backend, source_pgn_path, cql_path, output_pgn, cache)
+    if done is not None:
+        return done
+
+    with _cql_input(
+        runtime_pgn_path,
+        header_filter,
+        byte_range,
+        backend=backend,
+        scratch_dir=output_pgn.parent,
+    ) as (input_path, feed):
+        command = backend.build_run_command(
+            input_path,
+            cql_path,
+            output_pgn,
+            threads=cql_threads,
+        )
+
+        started = time.monotonic()
+        try:
+            process = subprocess.run(
+                command,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=timeout_seconds,
+            )
+            duration_seconds = time.monotonic() - started
+        except subprocess.TimeoutExpired as exc:
+            duration_seconds = time.monotonic() - started
+            stdout = exc.stdout
+            stderr = exc.stderr
+            if isinstance(stdout, bytes):
+                stdout = stdout.decode("utf-8", errors="replace")
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode("utf-8", errors="replace")
+            return _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                124,
+                _timeout_message(timeout_seconds, stderr or ""),
+                stdout=stdout or "",
+                duration_seconds=duration_seconds,
+                timed_out=True,
+            )
+        except FileNotFoundError as exc:
+            return _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                127,
+                str(exc),
+                duration_seconds=time.monotonic() - started,
+            )
+        except Exception as exc:
+            return _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                1,
+                str(exc),
+                duration_seconds=time.monotonic() - started,
+            )
+
+    if feed is not None and feed.error is not None:
+        return _failed_result(
+            source_pgn_path,
+            cql_path,
+            output_pgn,
+            1,
+            _feed_failure_message(runtime_pgn_path, header_filter, feed.error, byte_range),
+            stdout=process.stdout,
+            duration_seconds=duration_seconds,
+        )
+
+    result = _finish_cql_job(
+        source_pgn_path,
+        cql_path,
+        output_pgn,
         returncode=process.returncode,
         stdout=process.stdout,
         stderr=process.stderr,
         duration_seconds=duration_seconds,
+        cache=cache,
+        cache_key=cache_key,
     )
+    if header_filter is None:
+        return result
+    return with_filter_counts(result, getattr(feed.reader, "counts", None))
+
+
+async def run_cql_job_async(
+    backend: CqlBackend,
+    job_spec: JobSpec,
+    *,
+    cql_threads: str | int = "auto",
+    timeout_seconds: float | None = None,
+    cache: CqlResultCache | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    header_filter: HeaderFilter | None = None,
+) -> JobResult:
+    """:func:`run_cql_job` on the asyncio engine (see :mod:`reti.cql.engine`).
+
+    ``stdout``/``stderr`` on the result are bounded tails. With
+    ``on_progress`` the child is asked for ``-lineincrement`` progress lines
+    and the callback receives each cumulative game count.
+    """
+    source_pgn_path = job_spec.source_pgn_path
+    cql_path = job_spec.cql_path
+    output_pgn = job_spec.output_pgn
+    done, cache_key = await asyncio.to_thread(
+        _prepare_cql_job, backend, source_pgn_path, cql_path, output_pgn, cache
+    )
+    if done is not None:
+        return done
+
+    with _cql_input(
+        job_spec.runtime_pgn_path,
+        header_filter,
+        job_spec.byte_range,
+        backend=backend,
+        scratch_dir=output_pgn.parent,
+    ) as (input_path, feed):
+        command = backend.build_run_command(
+            input_path,
+            cql_path,
+            output_pgn,
+            threads=cql_threads,
+            lineincrement=PROGRESS_LINE_INCREMENT if on_progress is not None else None,
+        )
+        started = time.monotonic()
+        try:
+            outcome = await run_streaming_process(
+                command,
+                timeout_seconds=timeout_seconds,
+                on_progress=on_progress,
+            )
+        except FileNotFoundError as exc:
+            return _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                127,
+                str(exc),
+                duration_seconds=time.monotonic() - started,
+            )
+        except OSError as exc:
+            return _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                1,
+                str(exc),
+                duration_seconds=time.monotonic() - started,
+            )
+
+    def _with_sizes(result: JobResult) -> JobResult:
+        return dataclasses.replace(
+            result, stdout_bytes=outcome.stdout_bytes, stderr_bytes=outcome.stderr_bytes
+        )
+
+    if outcome.timed_out:
+        return _with_sizes(
+            _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                124,
+                _timeout_message(timeout_seconds, outcome.stderr),
+                stdout=outcome.stdout,
+                duration_seconds=outcome.duration_seconds,
+                timed_out=True,
+            )
+        )
+    if feed is not None and feed.error is not None:
+        return _with_sizes(
+            _failed_result(
+                source_pgn_path,
+                cql_path,
+                output_pgn,
+                1,
+                _feed_failure_message(
+                    job_spec.runtime_pgn_path, header_filter, feed.error, job_spec.byte_range
+                ),
+                stdout=outcome.stdout,
+                duration_seconds=outcome.duration_seconds,
+            )
+        )
+    result = await asyncio.to_thread(
+        _finish_cql_job,
+        source_pgn_path,
+        cql_path,
+        output_pgn,
+        returncode=outcome.returncode,
+        stdout=outcome.stdout,
+        stderr=outcome.stderr,
+        duration_seconds=outcome.duration_seconds,
+        cache=cache,
+        cache_key=cache_key,
+    )
+    result = _with_sizes(result)
+    if header_filter is None:
+        return result
+    return with_filter_counts(result, getattr(feed.reader, "counts", None))
+
+
+def _job_input(spec: JobSpec) -> tuple[Path, tuple[int, int] | None]:
+    return spec.runtime_pgn_path, spec.byte_range
 
 
 def _count_games_for_specs(
     job_specs: list[JobSpec],
-) -> dict[Path, int]:
-    """Pre-count games per source PGN (deduplicated across CQL scripts)."""
-    counts: dict[Path, int] = {}
+    catalog: PgnCatalog | None = None,
+) -> dict[tuple[Path, tuple[int, int] | None], int]:
+    """Pre-count games per runtime PGN or shard (deduplicated across CQL scripts).
+
+    With ``catalog``, counts recorded by preflight or earlier runs are reused.
+    """
+    counts: dict[tuple[Path, tuple[int, int] | None], int] = {}
     for spec in job_specs:
-        if spec.source_pgn_path not in counts:
-            counts[spec.source_pgn_path] = count_games_in_pgn(spec.source_pgn_path)
+        runtime_pgn = spec.runtime_pgn_path
+        key = _job_input(spec)
+        if key in counts:
+            continue
+        if spec.byte_range is not None:
+            counts[key] = count_games_in_byte_range(runtime_pgn, *spec.byte_range)
+            continue
+        if catalog is None:
+            counts[key] = count_games_in_pgn(runtime_pgn)
+            continue
+        try:
+            counts[key] = catalog.game_count(
+                runtime_pgn,
+                methods=(GAME_COUNT_EVENT_TAG_LINES, GAME_COUNT_PGN_UTILS),
+            )
+        except OSError:
+            counts[key] = 0
     return counts
 
 
+def expand_sharded_job_specs(
+    job_specs: list[JobSpec],
+    shards: str | int,
+    shard_root: Path,
+) -> dict[int, list[JobSpec]]:
+    """Split each job into one sub-job per game-aligned shard of its runtime PGN.
+
+    Byte ranges are computed once per runtime PGN and shared by every script
+    run against it; each shard job streams its range to CQL, so no shard is
+    copied up front. Returns the shard sub-jobs keyed by the parent
+    ``job_index``; jobs whose PGN is not worth splitting, or whose script must
+    see the whole input (:func:`reti.cql.fusion.needs_whole_input`), get a
+    single sub-job identical to the original spec.
+    """
+    ranges_by_pgn: dict[Path, list[tuple[int, int]]] = {}
+    expanded: dict[int, list[JobSpec]] = {}
+    next_index = 1
+    for spec in job_specs:
+        runtime_pgn = spec.runtime_pgn_path
+        if runtime_pgn not in ranges_by_pgn:
+            shard_count = resolve_shard_count(shards, runtime_pgn.stat().st_size)
+            ranges_by_pgn[runtime_pgn] = split_pgn_byte_ranges(runtime_pgn, shard_count)
+
+        byte_ranges = ranges_by_pgn[runtime_pgn]
+        if len(byte_ranges) <= 1 or needs_whole_input(spec.cql_path):
+            expanded[spec.job_index] = [
+                JobSpec(
+                    job_index=next_index,
+                    pair_label=spec.pair_label,
+                    source_pgn_path=spec.source_pgn_path,
+                    runtime_pgn_path=spec.runtime_pgn_path,
+                    cql_path=spec.cql_path,
+                    output_pgn=spec.output_pgn,
+                )
+            ]
+            next_index += 1
+            continue
+
+        sub_jobs: list[JobSpec] = []
+        for shard_number, byte_range in enumerate(byte_ranges, start=1):
+            sub_jobs.append(
+                JobSpec(
+                    job_index=next_index,
+                    pair_label=(
+                        f"{spec.pair_label} [shard {shard_number}/{len(byte_ranges)}]"
+                    ),
+                    source_pgn_path=spec.source_pgn_path,
+                    runtime_pgn_path=runtime_pgn,
+                    cql_path=spec.cql_path,
+                    output_pgn=(
+                        shard_root
+                        / f"job-{spec.job_index:05d}"
+                        / f"shard-{shard_number:04d}.pgn"
+                    ),
+                    byte_range=byte_range,
+                )
+            )
+            next_index += 1
+        expanded[spec.job_index] = sub_jobs
+    return expanded
+
+
+PREFILTER_MAX_KEPT_FRACTION = 0.9
+
+
+def _empty_match_result(job_spec: JobSpec) -> JobResult:
+    job_spec.output_pgn.parent.mkdir(parents=True, exist_ok=True)
+    job_spec.output_pgn.write_bytes(b"")
+    return JobResult(
+        pgn_path=job_spec.source_pgn_path,
+        cql_path=job_spec.cql_path,
+        output_pgn=job_spec.output_pgn,
+        success=True,
+        match_count=0,
+        returncode=0,
+        stdout="",
+        stderr="",
+    )
+
+
+def _narrow_runtime_pgns(
+    runtime_pgn: Path,
+    kept_by_spec: list[tuple[JobSpec, list[tuple[int, int]]]],
+    directory: Path,
+) -> tuple[dict[int, Path], dict[int, JobResult]]:
+    """Copy each spec's kept games out of ``runtime_pgn``.
+
+    Returns replacement runtime PGNs by job index (only where that saves
+    enough input) and ready empty results for specs that keep nothing.
+    Specs keeping the same ranges share one copy.
+    """
+    runtime_by_index: dict[int, Path] = {}
+    empty_results: dict[int, JobResult] = {}
+    file_size = runtime_pgn.stat().st_size
+    filtered_paths: dict[tuple[tuple[int, int], ...], Path] = {}
+    for spec, ranges in kept_by_spec:
+        kept = tuple(ranges)
+        if not kept:
+            empty_results[spec.job_index] = _empty_match_result(spec)
+            continue
+        kept_bytes = sum(end - start for start, end in kept)
+        if kept_bytes >= file_size * PREFILTER_MAX_KEPT_FRACTION:
+            continue
+        filtered_pgn = filtered_paths.get(kept)
+        if filtered_pgn is None:
+            filtered_pgn = directory / f"filtered-{len(filtered_paths) + 1:04d}.pgn"
+            copy_pgn_byte_ranges(runtime_pgn, list(kept), filtered_pgn)
+            filtered_paths[kept] = filtered_pgn
+        runtime_by_index[spec.job_index] = filtered_pgn
+    return runtime_by_index, empty_results
+
+
+def _with_runtime_pgns(
+    job_specs: list[JobSpec],
+    runtime_by_index: dict[int, Path],
+    resolved: dict[int, JobResult],
+) -> list[JobSpec]:
+    return [
+        JobSpec(
+            job_index=spec.job_index,
+            pair_label=spec.pair_label,
+            source_pgn_path=spec.source_pgn_path,
+            runtime_pgn_path=runtime_by_index.get(spec.job_index, spec.runtime_pgn_path),
+            cql_path=spec.cql_path,
+            output_pgn=spec.output_pgn,
+        )
+        for spec in job_specs
+        if spec.job_index not in resolved
+    ]
+
+
+def decompress_job_specs(
+    job_specs: list[JobSpec],
+    decompress_root: Path,
+) -> tuple[list[JobSpec], dict[int, JobResult]]:
+    """Point jobs whose runtime PGN is compressed at a plain copy.
+
+    Each compressed PGN is decompressed once under ``decompress_root``,
+    however many scripts read it. Returns the specs to run and failed
+    results for jobs whose PGN could not be decompressed.
+    """
+    plain_paths: dict[Path, Path | OSError] = {}
+    runtime_by_index: dict[int, Path] = {}
+    failed_results: dict[int, JobResult] = {}
+    for spec in job_specs:
+        runtime_pgn = spec.runtime_pgn_path
+        if pgn_compression(runtime_pgn) is None:
+            continue
+        if runtime_pgn not in plain_paths:
+            destination = (
+                decompress_root
+                / f"pgn-{len(plain_paths) + 1:04d}"
+                / plain_pgn_name(runtime_pgn)
+            )
+            try:
+                plain_paths[runtime_pgn] = decompress_pgn(runtime_pgn, destination)
+            except OSError as exc:
+                plain_paths[runtime_pgn] = exc
+        plain_pgn = plain_paths[runtime_pgn]
+        if isinstance(plain_pgn, OSError):
+            failed_results[spec.job_index] = _failed_result(
+                spec.source_pgn_path,
+                spec.cql_path,
+                spec.output_pgn,
+                1,
+                _decompress_message(runtime_pgn, plain_pgn),
+            )
+        else:
+            runtime_by_index[spec.job_index] = plain_pgn
+    return _with_runtime_pgns(job_specs, runtime_by_index, failed_results), failed_results
+
+
+def filter_job_specs(
+    job_specs: list[JobSpec],
+    header_filter: HeaderFilter,
+    filter_root: Path,
+) -> tuple[list[JobSpec], dict[int, JobResult], dict[Path, HeaderFilterCounts]]:
+    """Point jobs at a plain copy of just the games ``header_filter`` keeps.
+
+    For stages that seek into the PGN and so cannot read a filtered stream.
+    Each runtime PGN is filtered once, however many scripts read it. Returns
+    the specs to run, failed results for PGNs that could not be filtered,
+    and the filter counts by runtime PGN.
+    """
+    filtered_paths: dict[Path, Path | OSError] = {}
+    counts: dict[Path, HeaderFilterCounts] = {}
+    runtime_by_index: dict[int, Path] = {}
+    failed_results: dict[int, JobResult] = {}
+    for spec in job_specs:
+        runtime_pgn = spec.runtime_pgn_path
+        if runtime_pgn not in filtered_paths:
+            destination = (
+                filter_root
+                / f"pgn-{len(filtered_paths) + 1:04d}"
+                / plain_pgn_name(runtime_pgn)
+            )
+            try:
+                counts[runtime_pgn] = write_filtered_pgn(runtime_pgn, header_filter, destination)
+                filtered_paths[runtime_pgn] = destination
+            except OSError as exc:
+                filtered_paths[runtime_pgn] = exc
+        filtered_pgn = filtered_paths[runtime_pgn]
+        if isinstance(filtered_pgn, OSError):
+            failed_results[spec.job_index] = _failed_result(
+                spec.source_pgn_path,
+                spec.cql_path,
+                spec.output_pgn,
+                1,
+                _filter_message(runtime_pgn, filtered_pgn),
+            )
+        else:
+            runtime_by_index[spec.job_index] = filtered_pgn
+    pending_specs = _with_runtime_pgns(job_specs, runtime_by_index, failed_results)
+    return pending_specs, failed_results, counts
+
+
+def prefilter_job_specs(
+    job_specs: list[JobSpec],
+    prefilter_root: Path,
+    *,
+    workers: int = 1,
+) -> tuple[list[JobSpec], dict[int, JobResult]]:
+    """Point each job at only the games its script's material constraint allows.
+
+    Returns the specs still to run (runtime PGNs swapped for filtered copies
+    where that saves enough input) and ready results for jobs no game can
+    satisfy. Filtered PGNs are shared by scripts that keep the same games.
+    """
+    constraints = load_material_constraints({spec.cql_path for spec in job_specs})
+    specs_by_pgn: dict[Path, list[JobSpec]] = {}
+    for spec in job_specs:
+        specs_by_pgn.setdefault(spec.runtime_pgn_path, []).append(spec)
+
+    runtime_by_index: dict[int, Path] = {}
+    empty_results: dict[int, JobResult] = {}
+    for pgn_number, (runtime_pgn, specs) in enumerate(specs_by_pgn.items(), start=1):
+        filterable = [spec for spec in specs if constraints.get(spec.cql_path) is not None]
+        if not filterable:
+            continue
+        index_path = ensure_material_index(
+            runtime_pgn,
+            fallback_dir=prefilter_root / "indexes",
+            workers=workers,
+        )
+        scripts = sorted({spec.cql_path for spec in filterable})
+        kept_by_script = dict(
+            zip(
+                scripts,
+                select_game_ranges(
+                    index_path,
+                    [constraints[script].predicate for script in scripts],
+                ),
+            )
+        )
+        narrowed, empty = _narrow_runtime_pgns(
+            runtime_pgn,
+            [(spec, kept_by_script[spec.cql_path]) for spec in filterable],
+            prefilter_root / f"pgn-{pgn_number:04d}",
+        )
+        runtime_by_index.update(narrowed)
+        empty_results.update(empty)
+
+    return _with_runtime_pgns(job_specs, runtime_by_index, empty_results), empty_results
+
+
+def fuse_job_specs(
+    backend: CqlBackend,
+    job_specs: list[JobSpec],
+    fusion_root: Path,
+    *,
+    jobs: str | int,
+    cql_threads: str | int,
+    game_progress: bool = False,
+    timeout_seconds: float | None = None,
+    shards: str | int = 1,
+    shard_root: Path | None = None,
+    cache: CqlResultCache | None = None,
+    throughput_history: ThroughputHistory | None = None,
+    engine: str = "threads",
+    catalog: PgnCatalog | None = None,
+) -> tuple[list[JobSpec], dict[int, JobResult]]:
+    """Run one fused script per (PGN, fusion group) and narrow members to their games.
+
+    Returns the specs still to run (members pointed at copies of just the
+    games they matched) and ready results for cache hits and members that
+    matched nothing. Members whose fused pass failed, or whose matches could
+    not be placed in the input, are returned unchanged.
+    """
+    ready: dict[int, JobResult] = {}
+    candidates: list[JobSpec] = []
+    for spec in job_specs:
+        cached_result = None
+        if cache is not None:
+            key = _cache_key(cache, backend, spec.source_pgn_path, spec.cql_path)
+            if key is not None:
+                cached_result = _restore_cached_result(
+                    cache, key, spec.source_pgn_path, spec.cql_path, spec.output_pgn
+                )
+        if cached_result is not None:
+            ready[spec.job_index] = cached_result
+        else:
+            candidates.append(spec)
+
+    groups = plan_fusion_groups(sorted({spec.cql_path for spec in candidates}))
+    group_by_script = {
+        script.cql_path: (group_index, script)
+        for group_index, group in enumerate(groups)
+        for script in group
+    }
+    specs_by_pgn: dict[Path, list[JobSpec]] = {}
+    for spec in candidates:
+        if spec.cql_path in group_by_script:
+            specs_by_pgn.setdefault(spec.runtime_pgn_path, []).append(spec)
+
+    fused_specs: list[JobSpec] = []
+    fused_members: list[list[JobSpec]] = []
+    fused_scripts: dict[tuple[Path, ...], Path] = {}
+    for pgn_number, (runtime_pgn, specs) in enumerate(specs_by_pgn.items(), start=1):
+        specs_by_group: dict[int, list[JobSpec]] = {}
+        for spec in specs:
+            specs_by_group.setdefault(group_by_script[spec.cql_path][0], []).append(spec)
+        for members in specs_by_group.values():
+            if len(members) < 2:
+                continue
+            member_scripts = tuple(group_by_script[spec.cql_path][1] for spec in members)
+            script_key = tuple(script.cql_path for script in member_scripts)
+            fused_cql = fused_scripts.get(script_key)
+            if fused_cql is None:
+                fused_cql = fusion_root / f"fused-{len(fused_scripts) + 1:04d}.cql"
+                fused_cql.parent.mkdir(parents=True, exist_ok=True)
+                fused_cql.write_text(render_fused_cql(member_scripts), encoding="utf-8")
+                fused_scripts[script_key] = fused_cql
+            fused_specs.append(
+                JobSpec(
+                    job_index=len(fused_specs) + 1,
+                    pair_label=(
+                        f"{members[0].source_pgn_path.name} x "
+                        f"{len(members)} fused script(s)"
+                    ),
+                    source_pgn_path=members[0].source_pgn_path,
+                    runtime_pgn_path=runtime_pgn,
+                    cql_path=fused_cql,
+                    output_pgn=(
+                        fusion_root
+                        / f"pgn-{pgn_number:04d}"
+                        / f"{fused_cql.stem}.pgn"
+                    ),
+                )
+            )
+            fused_members.append(members)
+
+    if not fused_specs:
+        return [spec for spec in job_specs if spec.job_index not in ready], ready
+
+    fused_total = sum(len(members) for members in fused_members)
+    print(f"Fusing {fused_total} job(s) into {len(fused_specs)} CQL pass(es)...")
+    fused_results = run_job_matrix(
+        backend,
+        fused_specs,
+        jobs=jobs,
+        cql_threads=cql_threads,
+        game_progress=game_progress,
+        timeout_seconds=timeout_seconds,
+        shards=shards,
+        shard_root=shard_root,
+        throughput_history=throughput_history,
+        engine=engine,
+        catalog=catalog,
+    )
+
+    runtime_by_index: dict[int, Path] = {}
+    fallback_count = 0
+    for fused_spec, members, result in zip(fused_specs, fused_members, fused_results):
+        if not result.success:
+            fallback_count += len(members)
+            continue
+        kept = select_fused_game_ranges(
+            fused_spec.runtime_pgn_path, result.output_pgn, len(members)
+        )
+        placed = [
+            (spec, ranges) for spec, ranges in zip(members, kept) if ranges is not None
+        ]
+        fallback_count += len(members) - len(placed)
+        narrowed, empty = _narrow_runtime_pgns(
+            fused_spec.runtime_pgn_path,
+            placed,
+            fused_spec.output_pgn.parent / fused_spec.cql_path.stem,
+        )
+        runtime_by_index.update(narrowed)
+        ready.update(empty)
+    if fallback_count:
+        print(f"{fallback_count} fused job(s) fell back to an unfused run.")
+
+    return _with_runtime_pgns(job_specs, runtime_by_index, ready), ready
+
+
+def combine_shard_results(
+    job_spec: JobSpec,
+    shard_results: list[JobResult],
+) -> JobResult:
+    """Fold per-shard results back into the per-pair result and output PGN.
+
+    ``duration_seconds`` is the summed CQL process time across shards, so the
+    summary stays comparable with unsharded runs of the same pair.
+    """
+    if len(shard_results) == 1 and shard_results[0].output_pgn == job_spec.output_pgn:
+        return shard_results[0]
+
+    duration_seconds = sum(result.duration_seconds for result in shard_results)
+    stdout = "".join(result.stdout for result in shard_results)
+    stdout_bytes = sum(
+        captured_bytes(result.stdout, result.stdout_bytes) for result in shard_results
+    )
+    failed = [result for result in shard_results if not result.success]
+    if failed:
+        if job_spec.output_pgn.exists():
+            try:
+                job_spec.output_pgn.unlink()
+            except OSError:
+                pass
+        return JobResult(
+            pgn_path=job_spec.source_pgn_path,
+            cql_path=job_spec.cql_path,
+            output_pgn=job_spec.output_pgn,
+            success=False,
+            match_count=None,
+            returncode=failed[0].returncode,
+            stdout=stdout,
+            stderr=failed[0].stderr,
+            duration_seconds=duration_seconds,
+            timed_out=any(result.timed_out for result in shard_results),
+            missing_output=any(result.missing_output for result in shard_results),
+            stdout_bytes=stdout_bytes,
+            stderr_bytes=captured_bytes(failed[0].stderr, failed[0].stderr_bytes),
+        )
+
+    stitch_pgn_outputs([result.output_pgn for result in shard_results], job_spec.output_pgn)
+    for result in shard_results:
+        try:
+            result.output_pgn.unlink()
+        except OSError:
+            pass
+    return JobResult(
+        pgn_path=job_spec.source_pgn_path,
+        cql_path=job_spec.cql_path,
+        output_pgn=job_spec.output_pgn,
+        success=True,
+        match_count=sum(result.match_count or 0 for result in shard_results),
+        returncode=0,
+        stdout=stdout,
+        stderr="".join(result.stderr for result in shard_results),
+        duration_seconds=duration_seconds,
+        stdout_bytes=stdout_bytes,
+        stderr_bytes=sum(
+            captured_bytes(result.stderr, result.stderr_bytes) for result in shard_results
+        ),
+    )
+
+
 def run_job_matrix(
     backend: CqlBackend,
     job_specs: list[JobSpec],
@@ -308,21 +1189,330 @@ def run_job_matrix(
     cql_threads: str | int,
     game_progress: bool = False,
     timeout_seconds: float | None = None,
+    shards: str | int = 1,
+    shard_root: Path | None = None,
+    cache: CqlResultCache | None = None,
+    material_prefilter: bool = False,
+    prefilter_root: Path | None = None,
+    fuse_scripts: bool = False,
+    fusion_root: Path | None = None,
+    throughput_history: ThroughputHistory | None = None,
+    engine: str = "threads",
+    catalog: PgnCatalog | None = None,
+    on_result: Callable[[JobResult], None] | None = None,
+    compressed_input: str = "auto",
+    decompress_root: Path | None = None,
+    header_filter: HeaderFilter | None = None,
+    filter_root: Path | None = None,
+) -> list[JobResult]:
+    """Run every ``(PGN, script)`` job and return results in ``job_specs`` order.
+
+    ``on_result`` is called once per pair as soon as its result and output
+    PGN are final (never for shards or fused passes); the ``--resume``
+    journal hooks in here. ``engine`` is ``"threads"`` or ``"asyncio"``
+    (:mod:`reti.cql.engine`).
+
+    Compressed runtime PGNs are streamed to CQL through a named pipe. They
+    are decompressed to a plain copy first when ``compressed_input`` is
+    ``"tempfile"``, when it is ``"auto"`` and the backend needs seekable
+    input, and whenever sharding, the material prefilter or script fusion
+    (which all seek into the PGN) are on.
+
+    ``header_filter`` (``--where``) is applied the same way: streamed into
+    CQL through the pipe, or written once per PGN to a plain filtered copy
+    under ``filter_root`` when a plain file is needed. Either way each
+    result carries the games scanned and kept.
+    """
+    needs_plain_input = (
+        compressed_input == "tempfile"
+        or (compressed_input == "auto" and backend.needs_seekable_input)
+        or fuse_scripts
+        or material_prefilter
+        or shards != 1
+    )
+    if header_filter is not None and needs_plain_input:
+        with tempfile.TemporaryDirectory(prefix="cql_where_") as fallback_root:
+            root = filter_root if filter_root is not None else Path(fallback_root)
+            print(f"Filtering PGNs with --where {header_filter}...")
+            pending_specs, failed, counts = filter_job_specs(job_specs, header_filter, root)
+            _report_results(failed.values(), on_result)
+            counts_by_source = {
+                spec.source_pgn_path: counts[spec.runtime_pgn_path]
+                for spec in job_specs
+                if spec.runtime_pgn_path in counts
+            }
+
+            def _with_counts(result: JobResult) -> JobResult:
+                return with_filter_counts(result, counts_by_source.get(result.pgn_path))
+
+            results = run_job_matrix(
+                backend,
+                pending_specs,
+                jobs=jobs,
+                cql_threads=cql_threads,
+                game_progress=game_progress,
+                timeout_seconds=timeout_seconds,
+                shards=shards,
+                shard_root=shard_root,
+                cache=cache,
+                material_prefilter=material_prefilter,
+                prefilter_root=prefilter_root,
+                fuse_scripts=fuse_scripts,
+                fusion_root=fusion_root,
+                throughput_history=throughput_history,
+                engine=engine,
+                catalog=catalog,
+                on_result=(
+                    None
+                    if on_result is None
+                    else lambda result: on_result(_with_counts(result))
+                ),
+            )
+            failed.update(
+                (spec.job_index, _with_counts(result))
+                for spec, result in zip(pending_specs, results)
+            )
+            return [failed[spec.job_index] for spec in job_specs]
+
+    if needs_plain_input and any(
+        pgn_compression(spec.runtime_pgn_path) is not None for spec in job_specs
+    ):
+        with tempfile.TemporaryDirectory(prefix="cql_decompressed_") as fallback_root:
+            root = decompress_root if decompress_root is not None else Path(fallback_root)
+            print("Decompressing compressed PGNs...")
+            pending_specs, failed = decompress_job_specs(job_specs, root)
+            _report_results(failed.values(), on_result)
+            results = run_job_matrix(
+                backend,
+                pending_specs,
+                jobs=jobs,
+                cql_threads=cql_threads,
+                game_progress=game_progress,
+                timeout_seconds=timeout_seconds,
+                shards=shards,
+                shard_root=shard_root,
+                cache=cache,
+                material_prefilter=material_prefilter,
+                prefilter_root=prefilter_root,
+                fuse_scripts=fuse_scripts,
+                fusion_root=fusion_root,
+                throughput_history=throughput_history,
+                engine=engine,
+                catalog=catalog,
+                on_result=on_result,
+            )
+            failed.update(
+                (spec.job_index, result) for spec, result in zip(pending_specs, results)
+            )
+            return [failed[spec.job_index] for spec in job_specs]
+
+    if fuse_scripts:
+        with tempfile.TemporaryDirectory(prefix="cql_fusion_") as fallback_root:
+            root = fusion_root if fusion_root is not None else Path(fallback_root)
+            pending_specs, resolved = fuse_job_specs(
+                backend,
+                job_specs,
+                root,
+                jobs=jobs,
+                cql_threads=cql_threads,
+                game_progress=game_progress,
+                timeout_seconds=timeout_seconds,
+                shards=shards,
+                shard_root=shard_root,
+                cache=cache,
+                throughput_history=throughput_history,
+                engine=engine,
+                catalog=catalog,
+            )
+            _report_results(resolved.values(), on_result)
+            results = run_job_matrix(
+                backend,
+                pending_specs,
+                jobs=jobs,
+                cql_threads=cql_threads,
+                game_progress=game_progress,
+                timeout_seconds=timeout_seconds,
+                shards=shards,
+                shard_root=shard_root,
+                cache=cache,
+                material_prefilter=material_prefilter,
+                prefilter_root=prefilter_root,
+                throughput_history=throughput_history,
+                engine=engine,
+                catalog=catalog,
+                on_result=on_result,
+            )
+            resolved.update(
+                (spec.job_index, result) for spec, result in zip(pending_specs, results)
+            )
+            return [resolved[spec.job_index] for spec in job_specs]
+
+    if material_prefilter:
+        with tempfile.TemporaryDirectory(prefix="cql_prefilter_") as fallback_root:
+            root = prefilter_root if prefilter_root is not None else Path(fallback_root)
+            print("Prefiltering PGNs by material signature...")
+            pending_specs, prefiltered = prefilter_job_specs(
+                job_specs,
+                root,
+                workers=resolve_worker_count(jobs, os.cpu_count() or 1),
+            )
+            if prefiltered:
+                print(f"Skipped {len(prefiltered)} job(s) with no material-compatible games.")
+            _report_results(prefiltered.values(), on_result)
+            results = run_job_matrix(
+                backend,
+                pending_specs,
+                jobs=jobs,
+                cql_threads=cql_threads,
+                game_progress=game_progress,
+                timeout_seconds=timeout_seconds,
+                shards=shards,
+                shard_root=shard_root,
+                cache=cache,
+                throughput_history=throughput_history,
+                engine=engine,
+                catalog=catalog,
+                on_result=on_result,
+            )
+            prefiltered.update(
+                (spec.job_index, result) for spec, result in zip(pending_specs, results)
+            )
+            return [prefiltered[spec.job_index] for spec in job_specs]
+
+    if shards == 1:
+        return _dispatch_jobs(
+            backend,
+            job_specs,
+            jobs=jobs,
+            cql_threads=cql_threads,
+            game_progress=game_progress,
+            timeout_seconds=timeout_seconds,
+            cache=cache,
+            throughput_history=throughput_history,
+            engine=engine,
+            catalog=catalog,
+            on_result=on_result,
+            header_filter=header_filter,
+        )
+
+    # Sharded jobs are cached per (source PGN, script) pair, not per shard:
+    # shard files are temporary and would never produce a stable key.
+    cache_keys: dict[int, str] = {}
+    cached_results: dict[int, JobResult] = {}
+    if cache is not None:
+        for spec in job_specs:
+            key = _cache_key(cache, backend, spec.source_pgn_path, spec.cql_path)
+            if key is None:
+                continue
+            cache_keys[spec.job_index] = key
+            cached_result = _restore_cached_result(
+                cache, key, spec.source_pgn_path, spec.cql_path, spec.output_pgn
+            )
+            if cached_result is not None:
+                cached_results[spec.job_index] = cached_result
+    pending_specs = [spec for spec in job_specs if spec.job_index not in cached_results]
+    if cached_results:
+        print(f"Restored {len(cached_results)} job(s) from the result cache.")
+        _report_results(cached_results.values(), on_result)
+
+    with tempfile.TemporaryDirectory(prefix="cql_shards_") as fallback_root:
+        root = shard_root if shard_root is not None else Path(fallback_root)
+        print("Splitting PGNs into game-aligned shards...")
+        expanded = expand_sharded_job_specs(pending_specs, shards, root)
+        shard_specs = [
+            shard_spec
+            for spec in pending_specs
+            for shard_spec in expanded[spec.job_index]
+        ]
+        shard_results = _dispatch_jobs(
+            backend,
+            shard_specs,
+            jobs=jobs,
+            cql_threads=cql_threads,
+            game_progress=game_progress,
+            timeout_seconds=timeout_seconds,
+            throughput_history=throughput_history,
+            engine=engine,
+            catalog=catalog,
+        )
+        results_by_index = {
+            shard_spec.job_index: result
+            for shard_spec, result in zip(shard_specs, shard_results)
+        }
+        for spec in pending_specs:
+            result = combine_shard_results(
+                spec,
+                [
+                    results_by_index[shard_spec.job_index]
+                    for shard_spec in expanded[spec.job_index]
+                ],
+            )
+            key = cache_keys.get(spec.job_index)
+            if (
+                cache is not None
+                and key is not None
+                and result.success
+                and result.match_count is not None
+            ):
+                cache.store(key, result.output_pgn, result.match_count)
+            cached_results[spec.job_index] = result
+            _report_results([result], on_result)
+        return [cached_results[spec.job_index] for spec in job_specs]
+
+
+def _report_results(
+    results: Iterable[JobResult],
+    on_result: Callable[[JobResult], None] | None,
+) -> None:
+    if on_result is None:
+        return
+    for result in results:
+        on_result(result)
+
+
+def _dispatch_jobs(
+    backend: CqlBackend,
+    job_specs: list[JobSpec],
+    *,
+    jobs: str | int,
+    cql_threads: str | int,
+    game_progress: bool = False,
+    timeout_seconds: float | None = None,
+    cache: CqlResultCache | None = None,
+    throughput_history: ThroughputHistory | None = None,
+    engine: str = "threads",
+    catalog: PgnCatalog | None = None,
+    on_result: Callable[[JobResult], None] | None = None,
+    header_filter: HeaderFilter | None = None,
 ) -> list[JobResult]:
+    if engine not in ("threads", "asyncio"):
+        raise ValueError(f"unsupported CQL engine: {engine}")
     total_jobs = len(job_specs)
     worker_count = resolve_worker_count(jobs, total_jobs)
     effective_cql_threads = resolve_cql_threads(cql_threads, worker_count)
+    if worker_count > 1:
+        job_specs = schedule_job_specs(job_specs, throughput_history)
     print(
         f"Running {total_jobs} job(s) with {worker_count} worker(s); "
         f"CQL threads per process: {effective_cql_threads}..."
     )
 
-    game_counts: dict[Path, int] = {}
-    if game_progress:
+    streamed_progress = game_progress and engine == "asyncio"
+    game_counts: dict[tuple[Path, tuple[int, int] | None], int] = {}
+    if streamed_progress:
+        # Games are counted from CQL's own progress lines as they arrive.
+        progress = tqdm_progress(
+            total=None,
+            desc="CQL jobs",
+            unit="game",
+            dynamic_ncols=sys.stderr.isatty(),
+            file=sys.stderr,
+        )
+    elif game_progress:
         print("Counting games for progress bar...")
-        game_counts = _count_games_for_specs(job_specs)
+        game_counts = _count_games_for_specs(job_specs, catalog)
         total_games = sum(
-            game_counts.get(spec.source_pgn_path, 0) for spec in job_specs
+            game_counts.get(_job_input(spec), 0) for spec in job_specs
         )
         progress = tqdm_progress(
             total=total_games,
@@ -344,8 +1534,12 @@ def run_job_matrix(
 
     def _on_job_done(job_spec: JobSpec, result: JobResult) -> None:
         indexed_results.append((job_spec.job_index, result))
-        if game_progress:
-            progress.update(game_counts.get(job_spec.source_pgn_path, 0))
+        if on_result is not None:
+            on_result(result)
+        if streamed_progress:
+            progress.set_postfix_str(f"{len(indexed_results)}/{total_jobs} jobs")
+        elif game_progress:
+            progress.update(game_counts.get(_job_input(job_spec), 0))
         else:
             progress.update(1)
         if not result.success:
@@ -356,6 +1550,31 @@ def run_job_matrix(
             if result.stderr.strip():
                 progress_write(result.stderr.strip())
 
+    def _on_async_job_done(job_spec: JobSpec, result: JobResult) -> None:
+        if not streamed_progress:
+            progress.set_postfix_str(format_progress_label(job_spec.pair_label))
+        _on_job_done(job_spec, result)
+
+    if engine == "asyncio":
+        try:
+            asyncio.run(
+                _dispatch_jobs_async(
+                    backend,
+                    job_specs,
+                    worker_count=worker_count,
+                    cql_threads=effective_cql_threads,
+                    timeout_seconds=timeout_seconds,
+                    cache=cache,
+                    header_filter=header_filter,
+                    on_job_done=_on_async_job_done,
+                    on_games=progress.update if streamed_progress else None,
+                )
+            )
+        finally:
+            progress.close()
+        indexed_results.sort(key=lambda item: item[0])
+        return [result for _, result in indexed_results]
+
     if worker_count == 1:
         for job_spec in job_specs:
             progress.set_postfix_str(format_progress_label(job_spec.pair_label))
@@ -367,6 +1586,9 @@ def run_job_matrix(
                 job_spec.output_pgn,
                 cql_threads=effective_cql_threads,
                 timeout_seconds=timeout_seconds,
+                cache=cache,
+                header_filter=header_filter,
+                byte_range=job_spec.byte_range,
             )
             _on_job_done(job_spec, result)
 
@@ -385,6 +1607,9 @@ def run_job_matrix(
                 job_spec.output_pgn,
                 cql_threads=effective_cql_threads,
                 timeout_seconds=timeout_seconds,
+                cache=cache,
+                header_filter=header_filter,
+                byte_range=job_spec.byte_range,
             ): job_spec
             for job_spec in job_specs
         }
@@ -398,3 +1623,54 @@ def run_job_matrix(
     progress.close()
     indexed_results.sort(key=lambda item: item[0])
     return [result for _, result in indexed_results]
+
+
+async def _dispatch_jobs_async(
+    backend: CqlBackend,
+    job_specs: list[JobSpec],
+    *,
+    worker_count: int,
+    cql_threads: str | int,
+    timeout_seconds: float | None,
+    cache: CqlResultCache | None,
+    header_filter: HeaderFilter | None,
+    on_job_done: Callable[[JobSpec, JobResult], None],
+    on_games: Callable[[int], object] | None,
+) -> None:
+    """Run jobs on ``worker_count`` coroutines pulling from one shared queue.
+
+    Only ``worker_count`` jobs exist at a time, however long the matrix. If
+    one worker fails or the run is cancelled, the others are cancelled too,
+    which kills their CQL process groups.
+    """
+    pending = iter(job_specs)
+
+    async def _worker() -> None:
+        for job_spec in pending:
+            reported = 0
+
+            def _on_progress(games: int) -> None:
+                nonlocal reported
+                if on_games is not None and games > reported:
+                    on_games(games - reported)
+                    reported = games
+
+            result = await run_cql_job_async(
+                backend,
+                job_spec,
+                cql_threads=cql_threads,
+                timeout_seconds=timeout_seconds,
+                cache=cache,
+                on_progress=_on_progress if on_games is not None else None,
+                header_filter=header_filter,
+            )
+            on_job_done(job_spec, result)
+
+    workers = [asyncio.ensure_future(_worker()) for _ in range(worker_count)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
@@ -0,0 +1,112 @@
+"""Cost-aware dispatch order for the CQL job matrix.
+
+Jobs are handed to the worker pool in the order this module returns, which
+matters twice on a mixed-size corpus:
+
+- **Makespan.** Submitting in ``job_index`` order can leave the single most
+  expensive (huge PGN x slow script) job for last, with every other worker
+  idle while it finishes. Longest-job-first bounds that tail.
+- **Page cache.** Interleaving PGNs means concurrent workers read different
+  files; on a corpus larger than RAM each read evicts the others. Jobs are
+  grouped by runtime PGN so concurrent workers mostly stream the same file.
+
+A job's cost is its runtime PGN (or shard) size times the script's historical
+seconds-per-byte, learned from earlier ``summary.csv`` files. Scripts
+without history use the median known rate, so an unknown script on a large
+PGN still sorts by size.
+"""
+
+from __future__ import annotations
+
+import csv
+import statistics
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from reti.cql.runner import JobSpec
+
+
+@dataclass
+class ThroughputHistory:
+    """Historical wall-clock seconds per input byte, per CQL script."""
+
+    seconds_per_byte: dict[Path, float] = field(default_factory=dict)
+
+    def rate_for(self, cql_path: Path) -> float:
+        rate = self.seconds_per_byte.get(cql_path.resolve())
+        if rate is not None:
+            return rate
+        if self.seconds_per_byte:
+            return statistics.median(self.seconds_per_byte.values())
+        return 1.0
+
+    def job_cost(self, spec: JobSpec) -> float:
+        if spec.byte_range is not None:
+            size = spec.byte_range[1] - spec.byte_range[0]
+        else:
+            try:
+                size = spec.runtime_pgn_path.stat().st_size
+            except OSError:
+                size = 0
+        return max(size, 1) * self.rate_for(spec.cql_path)
+
+
+def load_throughput_history(
+    summary_paths: list[Path],
+    pgn_root: Path,
+    cql_root: Path,
+) -> ThroughputHistory:
+    """Learn per-script rates from ``summary.csv`` rows of earlier runs.
+
+    Only successful, uncached rows whose PGN still exists count; a script's
+    rate is its total duration over the total bytes it read.
+    """
+    seconds: dict[Path, float] = {}
+    byte_totals: dict[Path, int] = {}
+    for summary_path in summary_paths:
+        try:
+            handle = summary_path.open(newline="", encoding="utf-8")
+        except OSError:
+            continue
+        with handle:
+            for row in csv.DictReader(handle):
+                if row.get("status") != "ok" or row.get("cached") == "yes":
+                    continue
+                try:
+                    duration = float(row.get("duration_seconds") or 0)
+                    size = (pgn_root / row["pgn"]).stat().st_size
+                except (KeyError, OSError, ValueError):
+                    continue
+                if duration <= 0 or size <= 0:
+                    continue
+                cql_path = (cql_root / row["cql"]).resolve()
+                seconds[cql_path] = seconds.get(cql_path, 0.0) + duration
+                byte_totals[cql_path] = byte_totals.get(cql_path, 0) + size
+    return ThroughputHistory(
+        {path: seconds[path] / byte_totals[path] for path in seconds}
+    )
+
+
+def schedule_job_specs(
+    job_specs: list[JobSpec],
+    history: ThroughputHistory | None = None,
+) -> list[JobSpec]:
+    """Order jobs longest-first while keeping each runtime PGN's jobs together.
+
+    PGN groups are ordered by their most expensive job, so the overall
+    longest job still starts first; within a group jobs run longest-first.
+    """
+    history = history if history is not None else ThroughputHistory()
+    costs = {spec.job_index: history.job_cost(spec) for spec in job_specs}
+    groups: dict[Path, list[JobSpec]] = {}
+    for spec in job_specs:
+        groups.setdefault(spec.runtime_pgn_path, []).append(spec)
+    for specs in groups.values():
+        specs.sort(key=lambda spec: (-costs[spec.job_index], spec.job_index))
+    ordered_groups = sorted(
+        groups.values(),
+        key=lambda specs: (-costs[specs[0].job_index], specs[0].job_index),
+    )
+    return [spec for specs in ordered_groups for spec in specs]
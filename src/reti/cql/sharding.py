@@ -0,0 +1,196 @@
+"""Game-aligned byte-range sharding of large PGNs.
+
+CQL's own threading stops scaling well past a few cores, so one huge PGN x
+one script leaves most of a big machine idle. Sharding splits the runtime PGN
+into ``N`` contiguous byte ranges that each start on an ``[Event `` line (the
+same game boundary :func:`reti.cql.preflight.count_games_in_pgn` assumes), runs
+one CQL process per range, and stitches the per-shard outputs back together in
+source order. Ranges are streamed to CQL (:func:`open_pgn_byte_range`) rather
+than copied up front, so sharding needs no scratch space for its inputs.
+
+This module only deals with bytes on disk. Expanding job specs into shard jobs
+and folding the shard results back into one ``JobResult`` lives in
+:mod:`reti.cql.runner`.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path
+from typing import BinaryIO
+
+from reti.common.file_copy import append_file, copy_byte_range, pgn_separator_after
+
+
+EVENT_TAG_PREFIX = b"[Event "
+DEFAULT_MIN_SHARD_BYTES = 64 * 1024 * 1024
+
+
+def resolve_shard_count(
+    requested_shards: str | int,
+    file_size: int,
+    *,
+    min_shard_bytes: int = DEFAULT_MIN_SHARD_BYTES,
+) -> int:
+    """Pick a shard count for one PGN.
+
+    ``auto`` uses one shard per CPU but never cuts a file into pieces smaller
+    than ``min_shard_bytes``; an explicit count is taken as-is (the splitter
+    still collapses ranges when the file has fewer games than shards).
+    """
+    if requested_shards == "auto":
+        by_size = max(1, file_size // max(1, min_shard_bytes))
+        return max(1, min(os.cpu_count() or 1, by_size))
+    return max(1, int(requested_shards))
+
+
+def _next_game_boundary(handle, offset: int, file_size: int) -> int:
+    """First ``[Event `` line start at or after ``offset``."""
+    if offset <= 0:
+        return 0
+    handle.seek(offset - 1)
+    # Skip the (possibly partial) line we landed in unless ``offset`` is
+    # already a line start.
+    if handle.read(1) != b"\n":
+        handle.readline()
+    while True:
+        position = handle.tell()
+        line = handle.readline()
+        if not line:
+            return file_size
+        if line.startswith(EVENT_TAG_PREFIX):
+            return position
+
+
+def split_pgn_byte_ranges(pgn_path: Path, shard_count: int) -> list[tuple[int, int]]:
+    """Split a PGN into at most ``shard_count`` game-aligned ``[start, end)`` ranges.
+
+    Every range except the first starts on an ``[Event `` line, so concatenating
+    the ranges reproduces the file byte for byte. Empty ranges are dropped.
+    """
+    file_size = pgn_path.stat().st_size
+    if shard_count <= 1 or file_size == 0:
+        return [(0, file_size)]
+
+    boundaries = [0]
+    with pgn_path.open("rb") as handle:
+        for index in range(1, shard_count):
+            target = file_size * index // shard_count
+            boundary = _next_game_boundary(
+                handle, max(target, boundaries[-1] + 1), file_size
+            )
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+    if boundaries[-1] != file_size:
+        boundaries.append(file_size)
+    return [
+        (start, end)
+        for start, end in zip(boundaries, boundaries[1:])
+        if end > start
+    ]
+
+
+class _ByteRangeReader(io.RawIOBase):
+    def __init__(self, path: Path, start: int, end: int) -> None:
+        super().__init__()
+        self._fd = os.open(path, os.O_RDONLY)
+        self._offset = start
+        self._end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self._end - self._offset)
+        if count <= 0:
+            return 0
+        data = os.pread(self._fd, count, self._offset)
+        buffer[: len(data)] = data
+        self._offset += len(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            os.close(self._fd)
+        super().close()
+
+
+def open_pgn_byte_range(pgn_path: Path, start: int, end: int) -> BinaryIO:
+    """Open ``[start, end)`` of a plain PGN as a stream of its own.
+
+    Pass it as ``open_source`` to :class:`reti.common.compressed_pgn.PgnFeed`
+    to hand one shard to CQL through a named pipe.
+    """
+    return io.BufferedReader(_ByteRangeReader(pgn_path, start, end))
+
+
+def count_games_in_byte_range(pgn_path: Path, start: int, end: int) -> int:
+    """``[Event `` lines inside ``[start, end)``, as for a whole PGN."""
+    with open_pgn_byte_range(pgn_path, start, end) as handle:
+        return sum(1 for line in handle if line.startswith(EVENT_TAG_PREFIX))
+
+
+def iter_game_byte_ranges(
+    pgn_path: Path,
+    start: int = 0,
+    end: int | None = None,
+):
+    """Yield ``[start, end)`` byte ranges of the games inside one PGN range.
+
+    A game runs from its ``[Event `` line to the next one; the first range also
+    carries any preamble before the first game. ``start`` must itself be a game
+    boundary (as returned by :func:`split_pgn_byte_ranges`).
+    """
+    file_size = pgn_path.stat().st_size
+    end = file_size if end is None else min(end, file_size)
+    if end <= start:
+        return
+    game_start = start
+    with pgn_path.open("rb") as handle:
+        handle.seek(start)
+        position = start
+        while position < end:
+            line = handle.readline()
+            if not line:
+                break
+            if line.startswith(EVENT_TAG_PREFIX) and position > game_start:
+                yield game_start, position
+                game_start = position
+            position += len(line)
+    yield game_start, min(position, end)
+
+
+def copy_pgn_byte_ranges(
+    pgn_path: Path,
+    byte_ranges: list[tuple[int, int]],
+    output_pgn: Path,
+) -> int:
+    """Write the given game ranges of ``pgn_path`` into one PGN; return bytes written."""
+    output_pgn.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with pgn_path.open("rb") as source, output_pgn.open("wb") as out:
+        for start, end in byte_ranges:
+            copied = copy_byte_range(out, source, start, end - start)
+            written += copied
+            # Only the file's last game can lack a trailing newline.
+            if copied and os.pread(source.fileno(), 1, start + copied - 1) != b"\n":
+                out.write(b"\n\n")
+                written += 2
+    return written
+
+
+def stitch_pgn_outputs(part_paths: list[Path], output_pgn: Path) -> None:
+    """Concatenate per-shard CQL outputs in shard order into ``output_pgn``.
+
+    Games are kept separated by a blank line between parts; missing or empty
+    parts (shards with no matches) contribute nothing.
+    """
+    output_pgn.parent.mkdir(parents=True, exist_ok=True)
+    with output_pgn.open("wb") as out:
+        pending_separator = b""
+        for part_path in part_paths:
+            if not part_path.exists() or part_path.stat().st_size == 0:
+                continue
+            out.write(pending_separator)
+            pending_separator = pgn_separator_after(append_file(out, part_path))
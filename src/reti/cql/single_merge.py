@@ -9,6 +9,7 @@ all matching scripts' comments at the plies they were inserted.
 from __future__ import annotations
 
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
 import re
@@ -16,9 +17,10 @@ import shutil
 
 from tqdm import tqdm as tqdm_progress
 
+from reti.common.compressed_pgn import open_pgn, pgn_compression
 from reti.common.progress import format_progress_label
 from reti.common.pgn_discovery import InputCollection, relative_stem
-from reti.cql.runner import JobResult
+from reti.cql.runner import JobResult, resolve_worker_count
 
 
 _GAME_ID_TAGS = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
@@ -28,6 +30,10 @@ _MOVETEXT_TOKEN_RE = re.compile(
 )
 _SAN_START = set("abcdefghKQRBNO")
 _RESULT_TOKENS = {"1-0", "0-1", "1/2-1/2", "*"}
+_SAN_SUFFIXES = "+#!?"
+
+# (comments by ply, insertion offsets by ply, mainline moves)
+_MovetextScan = tuple[dict[int, str], dict[int, int], tuple[str, ...]]
 
 
 @dataclass(frozen=True)
@@ -63,11 +69,19 @@ def _chunk_from_text(text: str) -> _PgnChunk | None:
 
 def _iter_pgn_chunks(pgn_path: Path, *, progress: object | None = None):
     current: list[str] = []
-    with pgn_path.open("rb") as handle:
+    # Progress is in on-disk bytes; for a compressed source that is the
+    # decompressor's read offset, sampled once per game.
+    compressed = pgn_compression(pgn_path) is not None
+    reported = 0
+    with open_pgn(pgn_path) as handle:
         for raw_line in handle:
-            if progress is not None:
+            if progress is not None and not compressed:
                 progress.update(len(raw_line))
             if raw_line.startswith(b'[Event "') and current:
+                if progress is not None and compressed:
+                    position = handle.source_position()
+                    progress.update(position - reported)
+                    reported = position
                 chunk = _chunk_from_text("".join(current))
                 if chunk is not None:
                     yield chunk
@@ -75,6 +89,8 @@ def _iter_pgn_chunks(pgn_path: Path, *, progress: object | None = None):
                 continue
             if current or raw_line.startswith(b'[Event "'):
                 current.append(raw_line.decode("utf-8", errors="replace"))
+        if progress is not None and compressed:
+            progress.update(handle.source_position() - reported)
     if current:
         chunk = _chunk_from_text("".join(current))
         if chunk is not None:
@@ -96,13 +112,22 @@ def _append_comment(by_ply: dict[int, str], ply: int, text: str) -> None:
 
 
 def _scan_comments_and_insertions(movetext: str) -> tuple[dict[int, str], dict[int, int]]:
-    """Return mainline comments and insertion offsets relative to ``movetext``.
+    """Return mainline comments and insertion offsets relative to ``movetext``."""
+    comments, insertions, _ = _scan_movetext(movetext)
+    return comments, insertions
+
+
+def _scan_movetext(movetext: str) -> _MovetextScan:
+    """Return mainline comments, insertion offsets and moves of ``movetext``.
 
     This is intentionally lexical. It skips variations and comments without
-    validating SAN, so broken side lines cannot derail the merge.
+    validating SAN, so broken side lines cannot derail the merge. Moves lose
+    their check and annotation suffixes, so they compare equal however a
+    CQL output re-renders them.
     """
     comments: dict[int, str] = {}
     insertions: dict[int, int] = {0: 0}
+    moves: list[str] = []
     ply = 0
     variation_depth = 0
 
@@ -136,13 +161,9 @@ def _scan_comments_and_insertions(movetext: str) -> tuple[dict[int, str], dict[i
             if token not in _RESULT_TOKENS:
                 ply += 1
                 insertions[ply] = match.end()
+                moves.append(token.rstrip(_SAN_SUFFIXES))
 
-    return comments, insertions
-
-
-def _comments_by_ply(chunk: _PgnChunk) -> dict[int, str]:
-    comments, _ = _scan_comments_and_insertions(chunk.raw[chunk.movetext_start :])
-    return comments
+    return comments, insertions, tuple(moves)
 
 
 def _new_part(source: str, annotated: str) -> str:
@@ -185,9 +206,12 @@ def _comment_literal(text: str) -> str:
 def _apply_annotations_to_chunk(
     chunk: _PgnChunk,
     additions: dict[int, list[str]],
+    insertion_offsets: dict[int, int] | None = None,
 ) -> str:
+    """Build the annotated game in one left-to-right pass over ``chunk.raw``."""
     movetext = chunk.raw[chunk.movetext_start :]
-    _, insertion_offsets = _scan_comments_and_insertions(movetext)
+    if insertion_offsets is None:
+        _, insertion_offsets = _scan_comments_and_insertions(movetext)
     edits: list[tuple[int, str]] = []
     for ply, parts in additions.items():
         merged = _join_comments(parts)
@@ -199,10 +223,157 @@ def _apply_annotations_to_chunk(
         absolute_offset = chunk.movetext_start + relative_offset
         edits.append((absolute_offset, " " + _comment_literal(merged)))
 
-    text = chunk.raw
-    for offset, insertion in sorted(edits, key=lambda item: item[0], reverse=True):
-        text = text[:offset] + insertion + text[offset:]
-    return text
+    pieces: list[str] = []
+    previous = 0
+    for offset, insertion in sorted(edits, key=lambda item: item[0]):
+        pieces.append(chunk.raw[previous:offset])
+        pieces.append(insertion)
+        previous = offset
+    pieces.append(chunk.raw[previous:])
+    return "".join(pieces)
+
+
+def _merged_game_text(
+    chunk: _PgnChunk,
+    per_script_comments: list[dict[int, str]],
+    scan: _MovetextScan | None = None,
+) -> str:
+    """``chunk`` with every script's new comments overlaid."""
+    if not per_script_comments:
+        return chunk.raw
+    if scan is None:
+        scan = _scan_movetext(chunk.raw[chunk.movetext_start :])
+    source_comments, insertion_offsets, _ = scan
+    additions: dict[int, list[str]] = defaultdict(list)
+    for comments_by_ply in per_script_comments:
+        for ply, ann_text in comments_by_ply.items():
+            added = _new_part(source_comments.get(ply, ""), ann_text)
+            if added:
+                additions[ply].append(added)
+    if not additions:
+        return chunk.raw
+    return _apply_annotations_to_chunk(chunk, additions, insertion_offsets)
+
+
+@dataclass(frozen=True)
+class _SourceMerge:
+    """One source PGN to overlay, and the per-pair outputs that matched in it."""
+
+    source_pgn: Path
+    merged_path: Path
+    annotated_outputs: tuple[Path, ...]
+    include_unmatched: bool
+
+    @property
+    def input_bytes(self) -> int:
+        return self.source_pgn.stat().st_size + sum(
+            path.stat().st_size for path in self.annotated_outputs
+        )
+
+
+class _AnnotatedStream:
+    """Cursor over one per-pair output, one annotated game at a time."""
+
+    def __init__(self, path: Path, progress: object | None) -> None:
+        self._games = _iter_pgn_chunks(path, progress=progress)
+        self.head: _PgnChunk | None = None
+        self.head_key: tuple[str, ...] | None = None
+        self._head_scan: _MovetextScan | None = None
+        self.advance()
+
+    def advance(self) -> None:
+        self.head = next(self._games, None)
+        self.head_key = _game_key(self.head.headers) if self.head is not None else None
+        self._head_scan = None
+
+    def head_scan(self) -> _MovetextScan:
+        assert self.head is not None
+        if self._head_scan is None:
+            self._head_scan = _scan_movetext(
+                self.head.raw[self.head.movetext_start :]
+            )
+        return self._head_scan
+
+    def close(self) -> None:
+        self._games.close()
+
+
+def _merge_source_streaming(task: _SourceMerge, progress: object | None) -> int | None:
+    """k-way merge of the source PGN with its annotated outputs.
+
+    CQL writes matching games in source order, so each output is a
+    subsequence of the source. Walk the source once and, for every game,
+    take the head of each output whose identity (seven-tag roster plus
+    mainline moves) matches, so duplicate-header games stay apart. Only one game per stream is held at a time.
+
+    Returns ``None`` if some output was not consumed to the end, i.e. it
+    was not a subsequence of the source after all.
+    """
+    streams = [_AnnotatedStream(path, progress) for path in task.annotated_outputs]
+    written_games = 0
+    try:
+        with task.merged_path.open("w", encoding="utf-8") as out:
+            for chunk in _iter_pgn_chunks(task.source_pgn, progress=progress):
+                key = _game_key(chunk.headers)
+                candidates = [stream for stream in streams if stream.head_key == key]
+                if not candidates and not task.include_unmatched:
+                    continue
+                scan = None
+                per_script_comments: list[dict[int, str]] = []
+                if candidates:
+                    scan = _scan_movetext(chunk.raw[chunk.movetext_start :])
+                    for stream in candidates:
+                        annotated_comments, _, annotated_moves = stream.head_scan()
+                        if annotated_moves != scan[2]:
+                            continue
+                        per_script_comments.append(annotated_comments)
+                        stream.advance()
+                    if not per_script_comments and not task.include_unmatched:
+                        continue
+                out.write(_merged_game_text(chunk, per_script_comments, scan))
+                out.write("\n\n")
+                written_games += 1
+        if any(stream.head is not None for stream in streams):
+            return None
+        return written_games
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+def _merge_source_in_memory(task: _SourceMerge) -> int:
+    """Fallback: index every annotated game by identity, then walk the source."""
+    annotated_comments: dict[
+        tuple[tuple[str, ...], tuple[str, ...]], list[dict[int, str]]
+    ] = defaultdict(list)
+    for output_pgn in task.annotated_outputs:
+        for annotated_game in _iter_pgn_chunks(output_pgn):
+            comments, _, moves = _scan_movetext(
+                annotated_game.raw[annotated_game.movetext_start :]
+            )
+            annotated_comments[(_game_key(annotated_game.headers), moves)].append(comments)
+    written_games = 0
+    with task.merged_path.open("w", encoding="utf-8") as out:
+        for chunk in _iter_pgn_chunks(task.source_pgn):
+            scan = _scan_movetext(chunk.raw[chunk.movetext_start :])
+            per_script_comments = annotated_comments.get((_game_key(chunk.headers), scan[2]))
+            if per_script_comments is None and not task.include_unmatched:
+                continue
+            out.write(_merged_game_text(chunk, per_script_comments or [], scan))
+            out.write("\n\n")
+            written_games += 1
+    return written_games
+
+
+def _merge_source(
+    task: _SourceMerge,
+    progress: object | None = None,
+) -> tuple[int, bool]:
+    """Write ``task.merged_path``; returns ``(games written, used fallback)``."""
+    written_games = _merge_source_streaming(task, progress)
+    if written_games is not None:
+        return written_games, False
+    return _merge_source_in_memory(task), True
 
 
 def merge_single_output(
@@ -212,15 +383,15 @@ def merge_single_output(
     *,
     include_unmatched: bool,
     show_progress: bool = True,
+    workers: str | int = 1,
 ) -> list[Path]:
     """Emit one merged PGN per source PGN with all matching scripts' comments overlaid.
 
-    Per-pair output files are removed once they've been folded into a merged PGN.
+    Sources that need an overlay are merged by streaming (see
+    :func:`_merge_source_streaming`), ``workers`` sources at a time in
+    separate processes. Per-pair output files are removed once they've been
+    folded into a merged PGN.
     """
-    annotated_comments: dict[
-        Path, dict[tuple[str, ...], list[dict[int, str]]]
-    ] = defaultdict(lambda: defaultdict(list))
-
     successful_results = [
         result
         for result in results
@@ -254,30 +425,28 @@ def merge_single_output(
         dynamic_ncols=True,
         disable=not show_progress,
     )
+    merged_paths: dict[Path, Path] = {}
     try:
         for result in successful_results:
+            if (
+                result.pgn_path in sources_requiring_overlay
+                and result.match_count is not None
+                and result.match_count > 0
+            ):
+                continue
             progress.set_postfix_str(
                 format_progress_label(
                     f"scan {result.pgn_path.name} x {result.cql_path.name}"
                 )
             )
-            if result.pgn_path not in sources_requiring_overlay:
-                progress.update(result.output_pgn.stat().st_size)
-                continue
-            if result.match_count is None or result.match_count == 0:
-                progress.update(result.output_pgn.stat().st_size)
-                continue
-            for annotated_game in _iter_pgn_chunks(result.output_pgn, progress=progress):
-                key = _game_key(annotated_game.headers)
-                annotated_comments[result.pgn_path][key].append(
-                    _comments_by_ply(annotated_game)
-                )
+            progress.update(result.output_pgn.stat().st_size)
 
-        merged_paths: list[Path] = []
+        tasks: list[_SourceMerge] = []
         for source_pgn in sorted(source_pgns):
             merged_name = relative_stem(source_pgn, pgn_inputs.root)
             merged_path = output_dir / f"{merged_name}.merged.pgn"
             merged_path.parent.mkdir(parents=True, exist_ok=True)
+            merged_paths[source_pgn] = merged_path
 
             source_results = results_by_source[source_pgn]
             matched_results = [
@@ -294,7 +463,6 @@ def merge_single_output(
                     f"Merged single-output PGN (matched): {merged_path} "
                     "(0 game(s))"
                 )
-                merged_paths.append(merged_path)
                 continue
             if not include_unmatched and len(matched_results) == 1:
                 only_result = matched_results[0]
@@ -310,43 +478,49 @@ def merge_single_output(
                     f"Merged single-output PGN (matched): {merged_path} "
                     f"({written_games} game(s))"
                 )
-                merged_paths.append(merged_path)
                 continue
 
-            source_matches = annotated_comments.get(source_pgn, {})
-            written_games = 0
-            progress.set_postfix_str(
-                format_progress_label(f"write {source_pgn.name}")
+            tasks.append(
+                _SourceMerge(
+                    source_pgn=source_pgn,
+                    merged_path=merged_path,
+                    annotated_outputs=tuple(
+                        result.output_pgn for result in matched_results
+                    ),
+                    include_unmatched=include_unmatched,
+                )
             )
-            with merged_path.open("w", encoding="utf-8") as out:
-                for chunk in _iter_pgn_chunks(source_pgn, progress=progress):
-                    key = _game_key(chunk.headers)
-                    per_script_comments = source_matches.get(key)
-                    if per_script_comments is None and not include_unmatched:
-                        continue
 
-                    additions: dict[int, list[str]] = defaultdict(list)
-                    if per_script_comments:
-                        source_comments = _comments_by_ply(chunk)
-                        for comments_by_ply in per_script_comments:
-                            for ply, ann_text in comments_by_ply.items():
-                                added = _new_part(source_comments.get(ply, ""), ann_text)
-                                if added:
-                                    additions[ply].append(added)
-
-                    if additions:
-                        out.write(_apply_annotations_to_chunk(chunk, additions))
-                    else:
-                        out.write(chunk.raw)
-                    out.write("\n\n")
-                    written_games += 1
-
-            kind = "all" if include_unmatched else "matched"
+        kind = "all" if include_unmatched else "matched"
+
+        def report(task: _SourceMerge, written_games: int, used_fallback: bool) -> None:
+            if used_fallback:
+                print(
+                    f"Outputs for {task.source_pgn.name} were not in source order; "
+                    "merged them in memory instead."
+                )
             print(
-                f"Merged single-output PGN ({kind}): {merged_path} "
+                f"Merged single-output PGN ({kind}): {task.merged_path} "
                 f"({written_games} game(s))"
             )
-            merged_paths.append(merged_path)
+
+        worker_count = resolve_worker_count(workers, len(tasks))
+        if worker_count <= 1:
+            for task in tasks:
+                progress.set_postfix_str(
+                    format_progress_label(f"write {task.source_pgn.name}")
+                )
+                report(task, *_merge_source(task, progress))
+        else:
+            with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                futures = {executor.submit(_merge_source, task): task for task in tasks}
+                for future in as_completed(futures):
+                    task = futures[future]
+                    progress.set_postfix_str(
+                        format_progress_label(f"write {task.source_pgn.name}")
+                    )
+                    progress.update(task.input_bytes)
+                    report(task, *future.result())
     finally:
         progress.close()
 
@@ -367,4 +541,4 @@ def merge_single_output(
         except OSError:
             pass
 
-    return merged_paths
+    return [merged_paths[source_pgn] for source_pgn in sorted(source_pgns)]
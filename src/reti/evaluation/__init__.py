@@ -5,9 +5,13 @@ The point of the split:
 - :mod:`reti.evaluation.backends` defines a small ``PositionEvaluator``
   interface so a Syzygy probe, a Stockfish search, or a routing dispatcher
   ("≤5 pieces → tablebase, else engine") can all be plugged in interchangeably.
+  Its ``EnginePool`` drives several Stockfish processes from one asyncio loop
+  for tools that evaluate in bulk.
 - :mod:`reti.evaluation.csv_schema` owns the CSV column list, the
   ``EvaluationResult`` dataclass, and the row-builder helpers that turn an
   evaluated position into a CSV row.
+- :mod:`reti.evaluation.cache` is a SQLite position cache keyed on the EPD
+  plus an evaluator profile, shared by every tool given ``--eval-cache``.
 
 The high-level orchestrator (parse PGN, evaluate, write rows, manage progress)
 still lives in ``reti.export_cql_positions`` so test patches that target that
@@ -15,6 +19,8 @@ module's namespace continue to work.
 """
 
 from reti.evaluation.backends import (
+    AdaptiveBudget,
+    EnginePool,
     PositionEvaluator,
     RoutingEvaluator,
     StockfishEvaluator,
@@ -23,6 +29,15 @@ from reti.evaluation.backends import (
     evaluate_with_tablebase,
     open_tablebase_from_directories,
 )
+from reti.evaluation.cache import (
+    CachedEvaluator,
+    EvaluationCache,
+    engine_position_key,
+    position_key,
+    profile_id,
+    stockfish_profile,
+    tablebase_profile,
+)
 from reti.evaluation.csv_schema import (
     CSV_COLUMNS,
     EvaluationResult,
@@ -36,7 +51,11 @@ from reti.evaluation.csv_schema import (
 )
 
 __all__ = [
+    "AdaptiveBudget",
     "CSV_COLUMNS",
+    "CachedEvaluator",
+    "EnginePool",
+    "EvaluationCache",
     "EvaluationResult",
     "PositionEvaluator",
     "RoutingEvaluator",
@@ -49,7 +68,12 @@ __all__ = [
     "classify_side_to_move_wdl",
     "classify_stockfish_winner",
     "empty_row",
+    "engine_position_key",
     "evaluate_with_tablebase",
     "open_tablebase_from_directories",
+    "position_key",
     "prepare_output_csv",
+    "profile_id",
+    "stockfish_profile",
+    "tablebase_profile",
 ]
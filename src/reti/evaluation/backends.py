@@ -1,10 +1,13 @@
 """Pluggable position-evaluation backends.
 
 The shape we want is "give me a board, get back an :class:`EvaluationResult`".
-Three concrete backends ship in this module:
+Four concrete backends ship in this module:
 
 - :class:`TablebaseEvaluator` — Syzygy WDL/DTZ probe.
-- :class:`StockfishEvaluator` — UCI engine analysis with a fixed time budget.
+- :class:`StockfishEvaluator` — UCI engine analysis with a fixed time budget,
+  or an :class:`AdaptiveBudget` that stops once the verdict is settled.
+- :class:`EnginePool` — K engine processes driven from one asyncio loop, for
+  callers that want every core busy without a Python worker per engine.
 - :class:`RoutingEvaluator` — picks a backend per position. Defaults to
   "≤5 pieces → tablebase, else engine", which is what the existing exporter
   hardcoded; pass a different ``decide`` to plug in a different policy.
@@ -15,9 +18,13 @@ old ``export_cql_positions`` flow keeps working without ceremony.
 
 from __future__ import annotations
 
+import asyncio
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable
+from typing import Any, Callable
 
 import chess
 import chess.engine
@@ -82,6 +89,129 @@ def evaluate_with_tablebase(
         )
 
 
+def stockfish_result(
+    info: chess.engine.InfoDict,
+    *,
+    sf_time_seconds: float,
+    draw_threshold_cp: int,
+) -> EvaluationResult:
+    score = info.get("score")
+    if score is None:
+        raise RuntimeError("Stockfish returned no score.")
+
+    white_score = score.white()
+    cp_white = white_score.score()
+    mate_white = white_score.mate()
+    return EvaluationResult(
+        eval_source="stockfish",
+        winning_side=classify_stockfish_winner(cp_white, mate_white, draw_threshold_cp),
+        sf_cp_white=cp_white,
+        sf_mate_white=mate_white,
+        sf_time_seconds=sf_time_seconds,
+        sf_depth=info.get("depth"),
+        draw_threshold_cp=draw_threshold_cp,
+        eval_status="ok",
+    )
+
+
+def stockfish_error_result(
+    exc: BaseException,
+    *,
+    sf_time_seconds: float,
+    draw_threshold_cp: int,
+) -> EvaluationResult:
+    return EvaluationResult(
+        eval_source="stockfish",
+        winning_side="unknown",
+        sf_time_seconds=sf_time_seconds,
+        draw_threshold_cp=draw_threshold_cp,
+        eval_status="stockfish_error",
+        error_message=str(exc),
+    )
+
+
+@dataclass(frozen=True)
+class AdaptiveBudget:
+    """When a search may stop before its time limit.
+
+    Only the :func:`classify_stockfish_winner` verdict is kept, so once
+    ``stable_depths`` consecutive depths agree on it (and the search has
+    reached ``min_depth``) more time is unlikely to change the row. A depth
+    counts towards the streak only if its score is clear of the draw band by
+    ``margin_cp``, or, for a draw, inside the inner half of the band. A mate
+    score stops the search at once. Borderline positions still get the full
+    time limit.
+    """
+
+    min_depth: int = 10
+    stable_depths: int = 3
+    margin_cp: int = 50
+
+    def profile(self) -> dict[str, int]:
+        return {
+            "minDepth": self.min_depth,
+            "stableDepths": self.stable_depths,
+            "marginCp": self.margin_cp,
+        }
+
+
+class _VerdictTracker:
+    """Feed a search's info lines to :meth:`update`; it says when to stop."""
+
+    def __init__(self, budget: AdaptiveBudget, draw_threshold_cp: int) -> None:
+        self.budget = budget
+        self.draw_threshold_cp = draw_threshold_cp
+        self.verdict: str | None = None
+        self.streak = 0
+        self.depth = 0
+
+    def update(self, info: chess.engine.InfoDict) -> bool:
+        score = info.get("score")
+        depth = info.get("depth")
+        if score is None or depth is None or depth <= self.depth:
+            return False
+        if info.get("lowerbound") or info.get("upperbound"):
+            return False
+        self.depth = depth
+
+        white_score = score.white()
+        if white_score.is_mate():
+            return True
+        cp_white = white_score.score()
+        assert cp_white is not None
+        verdict = classify_stockfish_winner(cp_white, None, self.draw_threshold_cp)
+        if verdict == "draw":
+            clear = 2 * abs(cp_white) <= self.draw_threshold_cp
+        else:
+            clear = abs(cp_white) >= self.draw_threshold_cp + self.budget.margin_cp
+        if not clear:
+            self.verdict, self.streak = None, 0
+        elif verdict == self.verdict:
+            self.streak += 1
+        else:
+            self.verdict, self.streak = verdict, 1
+        return depth >= self.budget.min_depth and self.streak >= self.budget.stable_depths
+
+
+def _engine_options(threads: int, hash_mb: int | None) -> dict[str, int]:
+    options = {"Threads": threads}
+    if hash_mb is not None:
+        options["Hash"] = hash_mb
+    return options
+
+
+def _resolve_stockfish(binary: str | None) -> str:
+    if not binary:
+        raise RuntimeError(
+            "Stockfish is required for positions with more than 5 pieces; "
+            "pass --stockfish-bin."
+        )
+    resolved = resolve_executable(binary)
+    if resolved is None:
+        raise RuntimeError(f"Stockfish binary not found: {binary}")
+    return str(resolved)
+
+
 class StockfishSession:
     """Lazy UCI engine handle.
 
@@ -89,9 +219,10 @@ class StockfishSession:
     if it was never started.
     """
 
-    def __init__(self, binary: str | None, threads: int) -> None:
+    def __init__(self, binary: str | None, threads: int, hash_mb: int | None = None) -> None:
         self._binary = binary
         self._threads = threads
+        self._hash_mb = hash_mb
         self._engine: chess.engine.SimpleEngine | None = None
         self._init_error: str | None = None
 
@@ -100,21 +231,15 @@ class StockfishSession:
             return self._engine
         if self._init_error is not None:
             raise RuntimeError(self._init_error)
-        if not self._binary:
-            self._init_error = (
-                "Stockfish is required for positions with more than 5 pieces; "
-                "pass --stockfish-bin."
-            )
-            raise RuntimeError(self._init_error)
-
-        resolved = resolve_executable(self._binary)
-        if resolved is None:
-            self._init_error = f"Stockfish binary not found: {self._binary}"
-            raise RuntimeError(self._init_error)
+        try:
+            resolved = _resolve_stockfish(self._binary)
+        except RuntimeError as exc:
+            self._init_error = str(exc)
+            raise
 
         try:
-            self._engine = chess.engine.SimpleEngine.popen_uci(str(resolved))
-            self._engine.configure({"Threads": self._threads})
+            self._engine = chess.engine.SimpleEngine.popen_uci(resolved)
+            self._engine.configure(_engine_options(self._threads, self._hash_mb))
         except Exception as exc:
             self._init_error = f"Failed to start Stockfish: {exc}"
             raise RuntimeError(self._init_error) from exc
@@ -126,37 +251,31 @@ class StockfishSession:
         *,
         sf_time_seconds: float,
         draw_threshold_cp: int,
+        adaptive: AdaptiveBudget | None = None,
     ) -> EvaluationResult:
         try:
             engine = self._ensure_engine()
-            info = engine.analyse(board, chess.engine.Limit(time=sf_time_seconds))
-            score = info.get("score")
-            if score is None:
-                raise RuntimeError("Stockfish returned no score.")
-
-            white_score = score.white()
-            cp_white = white_score.score()
-            mate_white = white_score.mate()
-            winning_side = classify_stockfish_winner(
-                cp_white, mate_white, draw_threshold_cp
-            )
-            return EvaluationResult(
-                eval_source="stockfish",
-                winning_side=winning_side,
-                sf_cp_white=cp_white,
-                sf_mate_white=mate_white,
+            limit = chess.engine.Limit(time=sf_time_seconds)
+            if adaptive is None:
+                info = engine.analyse(board, limit)
+            else:
+                tracker = _VerdictTracker(adaptive, draw_threshold_cp)
+                with engine.analysis(board, limit) as analysis:
+                    for line in analysis:
+                        if tracker.update(line):
+                            break
+                analysis.wait()
+                info = analysis.info
+            return stockfish_result(
+                info,
                 sf_time_seconds=sf_time_seconds,
                 draw_threshold_cp=draw_threshold_cp,
-                eval_status="ok",
             )
         except Exception as exc:
-            return EvaluationResult(
-                eval_source="stockfish",
-                winning_side="unknown",
+            return stockfish_error_result(
+                exc,
                 sf_time_seconds=sf_time_seconds,
                 draw_threshold_cp=draw_threshold_cp,
-                eval_status="stockfish_error",
-                error_message=str(exc),
             )
 
     def close(self) -> None:
@@ -194,22 +313,275 @@ class StockfishEvaluator(PositionEvaluator):
         *,
         sf_time_seconds: float,
         draw_threshold_cp: int,
+        adaptive: AdaptiveBudget | None = None,
     ) -> None:
         self.session = session
         self.sf_time_seconds = sf_time_seconds
         self.draw_threshold_cp = draw_threshold_cp
+        self.adaptive = adaptive
 
     def evaluate(self, board: chess.Board) -> EvaluationResult:
         return self.session.analyse(
             board,
             sf_time_seconds=self.sf_time_seconds,
             draw_threshold_cp=self.draw_threshold_cp,
+            adaptive=self.adaptive,
         )
 
     def close(self) -> None:
         self.session.close()
 
 
+class EnginePool(PositionEvaluator):
+    """K UCI engines driven by one asyncio loop on a background thread.
+
+    :meth:`submit` queues a search and returns a
+    :class:`concurrent.futures.Future` that whichever engine frees up first
+    resolves, so one Python process can keep every engine busy; callers keep
+    as many searches in flight as they like and read results in any order.
+    :meth:`submit_run` pins a sequence of related positions to one engine.
+    :meth:`evaluate` is the blocking :class:`PositionEvaluator` form.
+
+    Engines start on first use with ``Threads``/``Hash`` applied to each and
+    are never sent ``ucinewgame`` between searches, so an engine keeps its
+    transposition table. An engine that dies mid-search is restarted and the
+    search retried once; after ``max_restarts`` crashes in total the pool
+    stops restarting and fails the remaining searches instead. With
+    ``adaptive``, evaluation searches stop early as in
+    :meth:`StockfishSession.analyse`; raw :meth:`submit` searches do not.
+    """
+
+    def __init__(
+        self,
+        binary: str | None,
+        *,
+        engines: int,
+        threads: int = 1,
+        hash_mb: int | None = None,
+        sf_time_seconds: float,
+        draw_threshold_cp: int,
+        adaptive: AdaptiveBudget | None = None,
+        max_restarts: int = 3,
+    ) -> None:
+        if engines < 1:
+            raise ValueError("EnginePool needs at least one engine.")
+        self.binary = binary
+        self.engines = engines
+        self.threads = threads
+        self.hash_mb = hash_mb
+        self.sf_time_seconds = sf_time_seconds
+        self.draw_threshold_cp = draw_threshold_cp
+        self.adaptive = adaptive
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self._resolved: str | None = None
+        self._init_error: str | None = None
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._queue: asyncio.Queue[Any] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            if self._init_error is not None:
+                raise RuntimeError(self._init_error)
+            try:
+                self._resolved = _resolve_stockfish(self.binary)
+            except RuntimeError as exc:
+                self._init_error = str(exc)
+                raise
+
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=loop.run_forever, name="reti-engine-pool", daemon=True
+            )
+            self._thread.start()
+            asyncio.run_coroutine_threadsafe(self._start_workers(), loop).result()
+            self._loop = loop
+            return loop
+
+    async def _start_workers(self) -> None:
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.get_running_loop().create_task(self._run_engine())
+            for _ in range(self.engines)
+        ]
+
+    async def _open_engine(
+        self,
+    ) -> tuple[asyncio.SubprocessTransport, chess.engine.UciProtocol]:
+        if self._init_error is not None:
+            raise RuntimeError(self._init_error)
+        assert self._resolved is not None
+        try:
+            transport, engine = await chess.engine.popen_uci(self._resolved)
+            await engine.configure(_engine_options(self.threads, self.hash_mb))
+        except Exception as exc:
+            self._init_error = f"Failed to start Stockfish: {exc}"
+            raise RuntimeError(self._init_error) from exc
+        return transport, engine
+
+    async def _run_engine(self) -> None:
+        assert self._queue is not None
+        handle: tuple[asyncio.SubprocessTransport, chess.engine.UciProtocol] | None = None
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is None:
+                    return
+                boards, limit, futures, as_evaluation = item
+                # A run stays on this engine so each search starts from the
+                # previous one's hash.
+                for board, future in zip(boards, futures):
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    for attempt in range(2):
+                        try:
+                            if handle is None:
+                                handle = await self._open_engine()
+                            info = await self._search(handle[1], board, limit, as_evaluation)
+                        except chess.engine.EngineTerminatedError as exc:
+                            if handle is not None:
+                                handle[0].close()
+                                handle = None
+                            self.restarts += 1
+                            if attempt == 0 and self.restarts <= self.max_restarts:
+                                continue
+                            self._settle(future, exc, as_evaluation)
+                        except Exception as exc:
+                            self._settle(future, exc, as_evaluation)
+                        else:
+                            self._settle(future, info, as_evaluation)
+                        break
+        finally:
+            if handle is not None:
+                try:
+                    await asyncio.wait_for(handle[1].quit(), timeout=10)
+                except Exception:
+                    handle[0].close()
+
+    async def _search(
+        self,
+        engine: chess.engine.UciProtocol,
+        board: chess.Board,
+        limit: chess.engine.Limit,
+        as_evaluation: bool,
+    ) -> chess.engine.InfoDict:
+        if self.adaptive is None or not as_evaluation:
+            return await engine.analyse(board, limit)
+        tracker = _VerdictTracker(self.adaptive, self.draw_threshold_cp)
+        with await engine.analysis(board, limit) as analysis:
+            async for line in analysis:
+                if tracker.update(line):
+                    break
+        await analysis.wait()
+        return analysis.info
+
+    def _settle(self, future: Future[Any], outcome: Any, as_evaluation: bool) -> None:
+        if as_evaluation:
+            budget = {
+                "sf_time_seconds": self.sf_time_seconds,
+                "draw_threshold_cp": self.draw_threshold_cp,
+            }
+            try:
+                if isinstance(outcome, BaseException):
+                    raise outcome
+                outcome = stockfish_result(outcome, **budget)
+            except Exception as exc:
+                outcome = stockfish_error_result(exc, **budget)
+        if isinstance(outcome, BaseException):
+            future.set_exception(outcome)
+        else:
+            future.set_result(outcome)
+
+    def _enqueue(
+        self,
+        boards: list[chess.Board],
+        limit: chess.engine.Limit,
+        *,
+        as_evaluation: bool,
+    ) -> list[Future[Any]]:
+        futures: list[Future[Any]] = [Future() for _ in boards]
+        try:
+            loop = self._ensure_loop()
+        except RuntimeError as exc:
+            for future in futures:
+                future.set_running_or_notify_cancel()
+                self._settle(future, exc, as_evaluation)
+            return futures
+        assert self._queue is not None
+        item = ([board.copy() for board in boards], limit, futures, as_evaluation)
+        loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return futures
+
+    def submit(
+        self,
+        board: chess.Board,
+        limit: chess.engine.Limit | None = None,
+    ) -> Future[chess.engine.InfoDict]:
+        """Queue a raw search; the future resolves to python-chess's ``InfoDict``.
+
+        ``limit`` defaults to ``sf_time_seconds`` per position. Engine
+        failures surface as the future's exception.
+        """
+        [future] = self._enqueue(
+            [board],
+            limit or chess.engine.Limit(time=self.sf_time_seconds),
+            as_evaluation=False,
+        )
+        return future
+
+    def submit_evaluation(self, board: chess.Board) -> Future[EvaluationResult]:
+        """Queue a search whose future resolves to an :class:`EvaluationResult`.
+
+        Failures come back as ``stockfish_error`` results, as from
+        :meth:`StockfishSession.analyse`, never as exceptions.
+        """
+        return self.submit_run([board])[0]
+
+    def submit_run(self, boards: list[chess.Board]) -> list[Future[EvaluationResult]]:
+        """Queue evaluations that one engine should search back to back.
+
+        Use this for positions that share search trees, such as successive
+        plies of one game: the whole run goes to the next free engine and is
+        searched in order, so each search starts from a hash the previous one
+        warmed. Futures resolve as for :meth:`submit_evaluation`.
+        """
+        return self._enqueue(
+            boards,
+            chess.engine.Limit(time=self.sf_time_seconds),
+            as_evaluation=True,
+        )
+
+    def evaluate(self, board: chess.Board) -> EvaluationResult:
+        return self.submit_evaluation(board).result()
+
+    def evaluate_many(self, boards: list[chess.Board]) -> list[EvaluationResult]:
+        futures = [self.submit_evaluation(board) for board in boards]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        assert self._queue is not None and self._thread is not None
+        for _ in self._workers:
+            loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+        async def drain() -> None:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(drain(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+        self._workers = []
+
+
 class RoutingEvaluator(PositionEvaluator):
     """Pick one of two backends per position.
 
@@ -0,0 +1,228 @@
+"""Persistent position-evaluation cache shared across the evaluation tools.
+
+The same endgame positions turn up in every export, snapshot and training
+run. This module stores one JSON payload per ``(profile, position)`` in a
+small SQLite file so any tool pointed at the same ``--eval-cache`` skips
+positions it (or another tool) has already evaluated.
+
+- The position key is the EPD of the board: placement, side to move,
+  castling rights and a *legal* en-passant square. Move counters are
+  deliberately dropped so the same position reached at a different ply hits.
+  Engine searches use :func:`engine_position_key`, which adds a coarse
+  halfmove-clock bucket because the 50-move rule can change their score.
+- The profile is a small JSON-able mapping describing everything that can
+  change the payload (backend, engine binary, time/depth, draw threshold,
+  payload kind). :func:`profile_id` hashes it; tools that want to share
+  entries must build identical profiles.
+
+:class:`CachedEvaluator` wraps any :class:`PositionEvaluator`; scripts that
+produce their own payloads (multi-PV scores, sharpness verdicts) use
+:meth:`EvaluationCache.get` / :meth:`EvaluationCache.put` directly.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sqlite3
+from dataclasses import asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+import chess
+
+from reti.common.hashing import canonical_json, sha256_text
+from reti.evaluation.backends import PositionEvaluator
+from reti.evaluation.csv_schema import EvaluationResult
+
+EVAL_CACHE_SCHEMA_VERSION = 1
+DEFAULT_COMMIT_EVERY = 256
+HALFMOVE_BUCKET_PLIES = 10
+
+
+def position_key(board: chess.Board) -> str:
+    """Counter-free position key (EPD with a legal-only en-passant square)."""
+    return board.epd()
+
+
+def halfmove_bucket(halfmove_clock: int) -> int:
+    """Coarse halfmove-clock bucket, ``0`` to ``10``; the last one is 100+ plies."""
+    return min(halfmove_clock, 100) // HALFMOVE_BUCKET_PLIES
+
+
+def engine_position_key(board: chess.Board) -> str:
+    """:func:`position_key` plus the halfmove-clock bucket, for engine results."""
+    return f"{position_key(board)} h{halfmove_bucket(board.halfmove_clock)}"
+
+
+def profile_id(profile: Mapping[str, Any]) -> str:
+    payload = {"schemaVersion": EVAL_CACHE_SCHEMA_VERSION, **profile}
+    return sha256_text(canonical_json(payload))[:16]
+
+
+def engine_fingerprint(binary: str | None) -> dict[str, Any] | None:
+    """Identify a UCI binary by resolved path, size and mtime."""
+    if not binary:
+        return None
+    resolved = Path(shutil.which(binary) or binary).expanduser()
+    payload: dict[str, Any] = {"path": str(resolved)}
+    try:
+        stat = resolved.stat()
+    except OSError:
+        return payload
+    payload.update(sizeBytes=stat.st_size, mtimeNs=stat.st_mtime_ns)
+    return payload
+
+
+def tablebase_profile(*, probe_dtz: bool = True) -> dict[str, Any]:
+    """Profile for :class:`EvaluationResult` payloads from a Syzygy probe."""
+    return {"kind": "evaluation_result", "backend": "syzygy", "probeDtz": probe_dtz}
+
+
+def stockfish_profile(
+    binary: str | None,
+    *,
+    sf_time_seconds: float | None = None,
+    depth: int | None = None,
+    draw_threshold_cp: int | None = None,
+    kind: str = "evaluation_result",
+    **extra: Any,
+) -> dict[str, Any]:
+    """Profile for Stockfish payloads.
+
+    ``kind`` separates payload shapes (a full :class:`EvaluationResult` vs a
+    script's raw score list); pass anything else that changes the payload,
+    e.g. ``multipv=2``, as keyword arguments.
+    """
+    return {
+        "kind": kind,
+        "backend": "stockfish",
+        "engine": engine_fingerprint(binary),
+        "sfTimeSeconds": sf_time_seconds,
+        "depth": depth,
+        "drawThresholdCp": draw_threshold_cp,
+        **extra,
+    }
+
+
+class EvaluationCache:
+    """SQLite-backed ``(profile, position) -> JSON payload`` store.
+
+    Writes are committed every ``commit_every`` puts and on :meth:`close`,
+    so a crash loses at most one batch of fresh evaluations.
+    """
+
+    def __init__(self, path: Path, *, commit_every: int = DEFAULT_COMMIT_EVERY) -> None:
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self.hits = 0
+        self.misses = 0
+        self._uncommitted = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS evaluations (
+                profile TEXT NOT NULL,
+                position TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (profile, position)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def get(self, position: str, profile: str) -> dict[str, Any] | None:
+        row = self._conn.execute(
+            "SELECT payload FROM evaluations WHERE profile = ? AND position = ?",
+            (profile, position),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, position: str, profile: str, payload: Mapping[str, Any]) -> None:
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO evaluations (profile, position, payload, created_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                profile,
+                position,
+                canonical_json(dict(payload)),
+                datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            ),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def get_result(self, position: str, profile: str) -> EvaluationResult | None:
+        payload = self.get(position, profile)
+        if payload is None:
+            return None
+        try:
+            return EvaluationResult(**payload)
+        except TypeError:
+            return None
+
+    def put_result(self, position: str, profile: str, result: EvaluationResult) -> None:
+        """Store ``result`` unless it is an error; errors are worth retrying."""
+        if result.eval_status != "ok":
+            return
+        self.put(position, profile, asdict(result))
+
+    def commit(self) -> None:
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "EvaluationCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class CachedEvaluator(PositionEvaluator):
+    """Serve :class:`EvaluationResult` payloads from an :class:`EvaluationCache`.
+
+    The cache is not closed with the evaluator; one cache file is typically
+    shared by several wrapped backends (e.g. the two arms of a
+    :class:`RoutingEvaluator`). Engine backends should pass
+    ``key=engine_position_key``.
+    """
+
+    def __init__(
+        self,
+        inner: PositionEvaluator,
+        cache: EvaluationCache,
+        profile: Mapping[str, Any],
+        key: Callable[[chess.Board], str] = position_key,
+    ) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.profile = profile_id(profile)
+        self.key = key
+
+    def evaluate(self, board: chess.Board) -> EvaluationResult:
+        key = self.key(board)
+        cached = self.cache.get_result(key, self.profile)
+        if cached is not None:
+            return cached
+        result = self.inner.evaluate(board)
+        self.cache.put_result(key, self.profile, result)
+        return result
+
+    def close(self) -> None:
+        self.inner.close()
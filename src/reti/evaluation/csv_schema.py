@@ -9,6 +9,7 @@ an entry in ``CSV_COLUMNS`` — nothing else changes.
 from __future__ import annotations
 
 import csv
+import os
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -40,11 +41,16 @@ CSV_COLUMNS = [
     "sf_cp_white",
     "sf_mate_white",
     "sf_time_seconds",
+    "sf_depth",
     "draw_threshold_cp",
     "eval_status",
     "error_message",
 ]
 
+# Header written before ``sf_depth`` was added. Appending to such a CSV
+# upgrades it in place (see :func:`prepare_output_csv`).
+LEGACY_CSV_COLUMNS = [column for column in CSV_COLUMNS if column != "sf_depth"]
+
 
 @dataclass(frozen=True)
 class EvaluationResult:
@@ -55,6 +61,7 @@ class EvaluationResult:
     sf_cp_white: int | None = None
     sf_mate_white: int | None = None
     sf_time_seconds: float | None = None
+    sf_depth: int | None = None
     draw_threshold_cp: int | None = None
     eval_status: str = "ok"
     error_message: str = ""
@@ -119,6 +126,7 @@ def empty_row(
     sf_cp_white: int | str = "",
     sf_mate_white: int | str = "",
     sf_time_seconds: float | str = "",
+    sf_depth: int | str = "",
     draw_threshold_cp: int | str = "",
     eval_status: str = "",
     error_message: str = "",
@@ -149,6 +157,7 @@ def empty_row(
         "sf_cp_white": sf_cp_white,
         "sf_mate_white": sf_mate_white,
         "sf_time_seconds": sf_time_seconds,
+        "sf_depth": sf_depth,
         "draw_threshold_cp": draw_threshold_cp,
         "eval_status": eval_status,
         "error_message": error_message,
@@ -168,6 +177,10 @@ def prepare_output_csv(output_csv: Path) -> bool:
         except StopIteration:
             return True
 
+    if header == LEGACY_CSV_COLUMNS:
+        _upgrade_legacy_csv(output_csv)
+        return False
+
     if header != CSV_COLUMNS:
         expected = ", ".join(CSV_COLUMNS)
         found = ", ".join(header)
@@ -180,6 +193,24 @@ def prepare_output_csv(output_csv: Path) -> bool:
     return False
 
 
+def _upgrade_legacy_csv(output_csv: Path) -> None:
+    """Rewrite a pre-``sf_depth`` CSV with the current header and empty depths."""
+    depth_index = CSV_COLUMNS.index("sf_depth")
+    upgraded = output_csv.with_name(f".{output_csv.name}.upgrade")
+    with (
+        output_csv.open("r", encoding="utf-8", newline="") as source,
+        upgraded.open("w", encoding="utf-8", newline="") as target,
+    ):
+        reader = csv.reader(source)
+        writer = csv.writer(target)
+        next(reader)
+        writer.writerow(CSV_COLUMNS)
+        for row in reader:
+            row.insert(depth_index, "")
+            writer.writerow(row)
+    os.replace(upgraded, output_csv)
+
+
 def build_marker_row(
     *,
     source_pgn: str,
@@ -220,6 +251,7 @@ def build_marker_row(
         sf_time_seconds=""
         if evaluation.sf_time_seconds is None
         else evaluation.sf_time_seconds,
+        sf_depth="" if evaluation.sf_depth is None else evaluation.sf_depth,
         draw_threshold_cp=""
         if evaluation.draw_threshold_cp is None
         else evaluation.draw_threshold_cp,
@@ -14,6 +14,8 @@ from __future__ import annotations
 import argparse
 import csv
 import sys
+from collections import deque
+from concurrent.futures import Future
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -23,10 +25,11 @@ import chess.syzygy
 
 from reti.annotated_pgn import (
     AnnotatedPosition,
+    ParsedAnnotatedGame,
     discover_pgn_files,
     format_pgn_display_path,
-    parse_annotated_pgn,
     side_name,
+    stream_annotated_pgn,
 )
 from reti.common.progress import (
     format_progress_label,
@@ -35,6 +38,8 @@ from reti.common.progress import (
 )
 from reti.common.subprocess_helpers import resolve_executable
 from reti.evaluation.backends import (
+    AdaptiveBudget,
+    EnginePool,
     PositionEvaluator,
     RoutingEvaluator,
     StockfishEvaluator,
@@ -43,6 +48,14 @@ from reti.evaluation.backends import (
     evaluate_with_tablebase,
     open_tablebase_from_directories,
 )
+from reti.evaluation.cache import (
+    EvaluationCache,
+    engine_position_key,
+    position_key,
+    profile_id,
+    stockfish_profile,
+    tablebase_profile,
+)
 from reti.evaluation.csv_schema import (
     CSV_COLUMNS,
     EvaluationResult,
@@ -57,7 +70,9 @@ from reti.evaluation.csv_schema import (
 from tqdm import tqdm as tqdm_progress
 
 __all__ = [
+    "AdaptiveBudget",
     "CSV_COLUMNS",
+    "EnginePool",
     "EvaluationResult",
     "ExportStats",
     "PositionEvaluator",
@@ -73,6 +88,7 @@ __all__ = [
     "empty_row",
     "evaluate_position",
     "evaluate_with_tablebase",
+    "export_cache_profiles",
     "export_cql_positions",
     "format_progress_label",
     "main",
@@ -100,6 +116,7 @@ def evaluate_position(
     stockfish: StockfishSession,
     sf_time_seconds: float,
     draw_threshold_cp: int,
+    adaptive: AdaptiveBudget | None = None,
 ) -> EvaluationResult:
     """Legacy dispatcher: ≤5 pieces uses tablebase, larger positions Stockfish.
 
@@ -114,6 +131,32 @@ def evaluate_position(
         board,
         sf_time_seconds=sf_time_seconds,
         draw_threshold_cp=draw_threshold_cp,
+        adaptive=adaptive,
+    )
+
+
+def export_cache_profiles(
+    stockfish_bin: str | None,
+    *,
+    sf_time_seconds: float,
+    sf_threads: int,
+    draw_threshold_cp: int,
+    sf_hash_mb: int | None = None,
+    adaptive: AdaptiveBudget | None = None,
+) -> tuple[str, str]:
+    """Evaluation-cache profile ids for the (tablebase, Stockfish) routes."""
+    return (
+        profile_id(tablebase_profile(probe_dtz=True)),
+        profile_id(
+            stockfish_profile(
+                stockfish_bin,
+                sf_time_seconds=sf_time_seconds,
+                draw_threshold_cp=draw_threshold_cp,
+                threads=sf_threads,
+                **({"hash_mb": sf_hash_mb} if sf_hash_mb is not None else {}),
+                **({"adaptive": adaptive.profile()} if adaptive is not None else {}),
+            )
+        ),
     )
 
 
@@ -124,17 +167,48 @@ def process_pgn_file(
     marker_text: str,
     writer: csv.DictWriter,
     tablebase: chess.syzygy.Tablebase | None,
-    stockfish: StockfishSession,
+    stockfish: StockfishSession | None,
     sf_time_seconds: float,
     draw_threshold_cp: int,
+    engine_pool: EnginePool | None = None,
+    max_in_flight: int = 256,
+    eval_cache: EvaluationCache | None = None,
+    cache_profiles: tuple[str, str] | None = None,
+    adaptive: AdaptiveBudget | None = None,
 ) -> ExportStats:
-    stats = ExportStats()
-    ending = pgn_path.stem
+    """Evaluate every marker in one PGN and write rows in input order.
 
-    try:
-        parsed_games = parse_annotated_pgn(pgn_path, marker_text=marker_text)
-        for parsed_game in parsed_games:
-            if parsed_game.parse_errors:
+    With ``engine_pool``, Stockfish positions are submitted to it as soon as
+    the native scan yields them (tablebase positions are probed inline) and at
+    most ``max_in_flight`` rows are outstanding; rows are still written
+    strictly in PGN order.
+
+    With ``eval_cache``, positions already in the cache under the matching
+    entry of ``cache_profiles`` (see :func:`export_cache_profiles`) are not
+    re-evaluated, and fresh ``ok`` results are added to it.
+    """
+    ending = pgn_path.stem
+    marker_rows = 0
+    failures = 0
+    parse_error_rows = 0
+    # Each entry is (game, position, result, cache slot). ``position is None``
+    # marks a parse-error row; ``result`` is an EvaluationResult or an engine
+    # pool Future; the cache slot is the (position key, profile) to store a
+    # fresh result under.
+    in_flight: deque[
+        tuple[
+            ParsedAnnotatedGame,
+            AnnotatedPosition | None,
+            EvaluationResult | Future[EvaluationResult] | None,
+            tuple[str, str] | None,
+        ]
+    ] = deque()
+
+    def write_ready(limit: int) -> None:
+        nonlocal marker_rows, failures, parse_error_rows
+        while len(in_flight) > limit:
+            parsed_game, position, pending, cache_slot = in_flight.popleft()
+            if position is None:
                 writer.writerow(
                     build_parse_error_row(
                         source_pgn=source_pgn,
@@ -145,38 +219,76 @@ def process_pgn_file(
                         error_message=" | ".join(parsed_game.parse_errors),
                     )
                 )
-                stats = ExportStats(
-                    marker_rows=stats.marker_rows,
-                    failures=stats.failures + 1,
-                    parse_error_rows=stats.parse_error_rows + 1,
+                failures += 1
+                parse_error_rows += 1
+                continue
+
+            evaluation = pending if isinstance(pending, EvaluationResult) else pending.result()
+            if eval_cache is not None and cache_slot is not None:
+                eval_cache.put_result(*cache_slot, evaluation)
+            writer.writerow(
+                build_marker_row(
+                    source_pgn=source_pgn,
+                    ending=ending,
+                    game_index=parsed_game.game_index,
+                    headers=parsed_game.headers,
+                    marker_text=marker_text,
+                    position=position,
+                    evaluation=evaluation,
                 )
+            )
+            marker_rows += 1
+            if evaluation.eval_status != "ok":
+                failures += 1
+
+    window = max(1, max_in_flight) if engine_pool is not None else 0
+    try:
+        for parsed_game, _ in stream_annotated_pgn(pgn_path, marker_text=marker_text):
+            if parsed_game.parse_errors:
+                in_flight.append((parsed_game, None, None, None))
 
             for position in parsed_game.positions:
-                evaluation = evaluate_position(
-                    chess.Board(position.fen),
-                    tablebase=tablebase,
-                    stockfish=stockfish,
-                    sf_time_seconds=sf_time_seconds,
-                    draw_threshold_cp=draw_threshold_cp,
-                )
-                writer.writerow(
-                    build_marker_row(
-                        source_pgn=source_pgn,
-                        ending=ending,
-                        game_index=parsed_game.game_index,
-                        headers=parsed_game.headers,
-                        marker_text=marker_text,
-                        position=position,
-                        evaluation=evaluation,
+                cache_slot: tuple[str, str] | None = None
+                if eval_cache is not None and cache_profiles is not None:
+                    tablebase_profile_id, stockfish_profile_id = cache_profiles
+                    board = chess.Board(position.fen)
+                    cache_slot = (
+                        (position_key(board), tablebase_profile_id)
+                        if position.piece_count <= 5
+                        else (engine_position_key(board), stockfish_profile_id)
                     )
-                )
-                stats = ExportStats(
-                    marker_rows=stats.marker_rows + 1,
-                    failures=stats.failures
-                    + (0 if evaluation.eval_status == "ok" else 1),
-                    parse_error_rows=stats.parse_error_rows,
-                )
+                    cached = eval_cache.get_result(*cache_slot)
+                    if cached is not None:
+                        in_flight.append((parsed_game, position, cached, None))
+                        write_ready(window)
+                        continue
+
+                pending: EvaluationResult | Future[EvaluationResult]
+                if engine_pool is not None:
+                    board = chess.Board(position.fen)
+                    if position.piece_count <= 5:
+                        pending = evaluate_with_tablebase(board, tablebase)
+                    else:
+                        pending = engine_pool.submit_evaluation(board)
+                else:
+                    assert stockfish is not None
+                    pending = evaluate_position(
+                        chess.Board(position.fen),
+                        tablebase=tablebase,
+                        stockfish=stockfish,
+                        sf_time_seconds=sf_time_seconds,
+                        draw_threshold_cp=draw_threshold_cp,
+                        adaptive=adaptive,
+                    )
+                in_flight.append((parsed_game, position, pending, cache_slot))
+                write_ready(window)
+            write_ready(window)
+        write_ready(0)
     except Exception as exc:
+        try:
+            write_ready(0)
+        except Exception:
+            in_flight.clear()
         writer.writerow(
             build_file_error_row(
                 source_pgn=source_pgn,
@@ -185,13 +297,13 @@ def process_pgn_file(
                 error_message=str(exc),
             )
         )
-        return ExportStats(
-            marker_rows=stats.marker_rows,
-            failures=stats.failures + 1,
-            parse_error_rows=stats.parse_error_rows,
-        )
+        failures += 1
 
-    return stats
+    return ExportStats(
+        marker_rows=marker_rows,
+        failures=failures,
+        parse_error_rows=parse_error_rows,
+    )
 
 
 def export_cql_positions(
@@ -204,6 +316,10 @@ def export_cql_positions(
     sf_time_seconds: float,
     sf_threads: int,
     draw_threshold_cp: int,
+    workers: int = 1,
+    eval_cache_path: str | None = None,
+    sf_hash_mb: int | None = None,
+    sf_adaptive: bool = False,
 ) -> int:
     discovery = discover_pgn_files(pgn_location)
     if discovery is None:
@@ -220,7 +336,34 @@ def export_cql_positions(
     tablebase, tablebase_error = open_tablebase_from_directories(syzygy_dirs)
     if tablebase_error:
         progress_write(f"Tablebase setup warning: {tablebase_error}")
-    stockfish = StockfishSession(stockfish_bin, sf_threads)
+    adaptive = AdaptiveBudget() if sf_adaptive else None
+    stockfish: StockfishSession | None = None
+    engine_pool: EnginePool | None = None
+    if workers > 1:
+        engine_pool = EnginePool(
+            stockfish_bin,
+            engines=workers,
+            threads=sf_threads,
+            hash_mb=sf_hash_mb,
+            sf_time_seconds=sf_time_seconds,
+            draw_threshold_cp=draw_threshold_cp,
+            adaptive=adaptive,
+        )
+    else:
+        stockfish = StockfishSession(stockfish_bin, sf_threads, sf_hash_mb)
+
+    eval_cache: EvaluationCache | None = None
+    cache_profiles: tuple[str, str] | None = None
+    if eval_cache_path:
+        eval_cache = EvaluationCache(Path(eval_cache_path).expanduser())
+        cache_profiles = export_cache_profiles(
+            stockfish_bin,
+            sf_time_seconds=sf_time_seconds,
+            sf_threads=sf_threads,
+            draw_threshold_cp=draw_threshold_cp,
+            sf_hash_mb=sf_hash_mb,
+            adaptive=adaptive,
+        )
 
     total_rows = 0
     total_failures = 0
@@ -254,6 +397,11 @@ def export_cql_positions(
                     stockfish=stockfish,
                     sf_time_seconds=sf_time_seconds,
                     draw_threshold_cp=draw_threshold_cp,
+                    engine_pool=engine_pool,
+                    max_in_flight=workers * 64,
+                    eval_cache=eval_cache,
+                    cache_profiles=cache_profiles,
+                    adaptive=adaptive,
                 )
                 total_rows += stats.marker_rows
                 total_failures += stats.failures
@@ -261,13 +409,20 @@ def export_cql_positions(
                 handle.flush()
         progress.close()
     finally:
-        stockfish.close()
+        if engine_pool is not None:
+            engine_pool.close()
+        if stockfish is not None:
+            stockfish.close()
         if tablebase is not None:
             tablebase.close()
+        if eval_cache is not None:
+            eval_cache.close()
 
     print("\n--- Export Summary ---")
     print(f"Files: {len(pgn_files)}")
     print(f"Marker rows written: {total_rows}")
+    if eval_cache is not None:
+        print(f"Evaluation cache hits: {eval_cache.hits}")
     print(f"Parse error rows: {total_parse_error_rows}")
     print(f"Failures: {total_failures}")
     print(f"CSV: {output_csv_path}")
@@ -331,6 +486,42 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         default=1,
         help="Stockfish thread count. Defaults to 1.",
     )
+    parser.add_argument(
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help=(
+            "Run this many Stockfish processes from one asyncio engine pool. "
+            "Rows are still written in input order. Defaults to 1."
+        ),
+    )
+    parser.add_argument(
+        "--sf-hash-mb",
+        dest="sf_hash_mb",
+        type=int,
+        default=None,
+        help="Stockfish Hash size in MB for each engine. Defaults to the engine's own.",
+    )
+    parser.add_argument(
+        "--sf-adaptive",
+        dest="sf_adaptive",
+        action="store_true",
+        help=(
+            "Stop each Stockfish search early once its winning_side verdict has been "
+            "stable for a few depths or a mate is found. Borderline positions still "
+            "get the full --sf-time-seconds."
+        ),
+    )
+    parser.add_argument(
+        "--eval-cache",
+        dest="eval_cache",
+        default=None,
+        help=(
+            "SQLite evaluation cache shared with the other evaluation tools. "
+            "Positions already evaluated under the same settings are reused."
+        ),
+    )
     parser.add_argument(
         "--draw-threshold-cp",
         dest="draw_threshold_cp",
@@ -356,6 +547,12 @@ def main(argv: list[str] | None = None) -> int:
     if args.sf_threads < 1:
         print("Error: --sf-threads must be at least 1.")
         return 1
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.")
+        return 1
+    if args.sf_hash_mb is not None and args.sf_hash_mb < 1:
+        print("Error: --sf-hash-mb must be at least 1.")
+        return 1
     if args.draw_threshold_cp < 0:
         print("Error: --draw-threshold-cp must be at least 0.")
         return 1
@@ -369,6 +566,10 @@ def main(argv: list[str] | None = None) -> int:
         sf_time_seconds=args.sf_time_seconds,
         sf_threads=args.sf_threads,
         draw_threshold_cp=args.draw_threshold_cp,
+        workers=args.workers,
+        eval_cache_path=args.eval_cache,
+        sf_hash_mb=args.sf_hash_mb,
+        sf_adaptive=args.sf_adaptive,
     )
 
 
@@ -11,6 +11,7 @@ from pathlib import Path
 from typing import Any
 
 from reti.common.json_io import load_json
+from reti.common.pgn_catalog import GAME_COUNT_EVENT_TAG_LINES, PgnCatalog
 from reti.common.source_metadata import (
     classify_source_group as classify_lumbras_source_group,
     combined_source_bucket_key,
@@ -179,7 +180,10 @@ def parse_combined_summary(
 def load_source_totals(
     source_totals_json: Path,
     summary_rows: tuple[CombinedSummaryRow, ...],
+    *,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> dict[str, int]:
+    """Validated per-source game totals; also recorded in ``pgn_catalog``."""
     payload = load_json(source_totals_json)
     if payload.get("schemaVersion") != 1:
         raise SnapshotError(
@@ -253,6 +257,10 @@ def load_source_totals(
                 f"{stat.st_mtime_ns}, cached {cached.mtime_ns}"
             )
         totals[row.source_pgn] = cached.games
+        if pgn_catalog is not None:
+            pgn_catalog.record_game_count(
+                row.source_path, GAME_COUNT_EVENT_TAG_LINES, cached.games
+            )
     return totals
 
 
@@ -419,10 +427,16 @@ def progress_total_bytes(
     summary_rows: tuple[CombinedSummaryRow, ...],
     *,
     include_source_pgns: bool,
+    counted_sources: frozenset[str] = frozenset(),
 ) -> int:
+    """Bytes the scan will read; sources in ``counted_sources`` are not reread."""
     return sum(
         row.output_path.stat().st_size
-        + (row.source_path.stat().st_size if include_source_pgns else 0)
+        + (
+            row.source_path.stat().st_size
+            if include_source_pgns and row.source_pgn not in counted_sources
+            else 0
+        )
         for row in summary_rows
     )
 
@@ -458,6 +472,7 @@ def build_combined_manifest(
     source_totals_json: Path | None,
     hash_source_pgns: bool,
     hash_annotated_pgns: bool,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> tuple[dict[str, Any], tuple[CombinedSummaryRow, ...]]:
     rows = parse_combined_summary(
         annotated_run_dir=annotated_run_dir,
@@ -476,7 +491,11 @@ def build_combined_manifest(
             {
                 "sourcePgn": row.source_pgn,
                 "sourceGroup": row.source_group,
-                **file_signature(row.source_path, include_hash=hash_source_pgns),
+                **file_signature(
+                    row.source_path,
+                    include_hash=hash_source_pgns,
+                    catalog=pgn_catalog,
+                ),
                 "hashIncluded": hash_source_pgns,
             }
             for row in rows
@@ -744,6 +763,22 @@ def build_combined_snapshot_payload(
     return snapshot
 
 
+def cataloged_games(
+    row: CombinedSummaryRow,
+    pgn_catalog: PgnCatalog | None,
+    cataloged_totals: dict[str, int],
+    progress: Any | None,
+) -> int | None:
+    if row.source_pgn in cataloged_totals:
+        return cataloged_totals[row.source_pgn]
+    if pgn_catalog is None:
+        return None
+    return pgn_catalog.game_count(
+        row.source_path,
+        count=lambda path: count_event_tags_with_progress(path, progress=progress),
+    )
+
+
 def build_fce_combined_snapshot(
     *,
     annotated_run_dir: str | Path,
@@ -756,6 +791,7 @@ def build_fce_combined_snapshot(
     hash_annotated_pgns: bool = False,
     force: bool = False,
     show_progress: bool = False,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> SnapshotBuildResult:
     run_path = Path(annotated_run_dir).expanduser().resolve()
     corpus_path = Path(corpus_dir).expanduser().resolve()
@@ -776,6 +812,7 @@ def build_fce_combined_snapshot(
         source_totals_json=source_totals_path,
         hash_source_pgns=hash_source_pgns,
         hash_annotated_pgns=hash_annotated_pgns,
+        pgn_catalog=pgn_catalog,
     )
 
     manifest_path = output_path / "manifest.json"
@@ -799,16 +836,27 @@ def build_fce_combined_snapshot(
             )
 
     source_totals = (
-        load_source_totals(source_totals_path, summary_rows)
+        load_source_totals(source_totals_path, summary_rows, pgn_catalog=pgn_catalog)
         if source_totals_path is not None
         else None
     )
+    if source_totals is None and pgn_catalog is not None:
+        cataloged_totals = {}
+        for row in summary_rows:
+            games = pgn_catalog.entry(row.source_path).game_count(
+                (GAME_COUNT_EVENT_TAG_LINES,)
+            )
+            if games is not None:
+                cataloged_totals[row.source_pgn] = games
+    else:
+        cataloged_totals = {}
     known_stems = known_combined_stems()
     progress = create_progress_bar(
         enabled=show_progress,
         total=progress_total_bytes(
             summary_rows,
             include_source_pgns=source_totals is None,
+            counted_sources=frozenset(cataloged_totals),
         ),
     )
     try:
@@ -824,7 +872,7 @@ def build_fce_combined_snapshot(
                     original_games=(
                         source_totals[row.source_pgn]
                         if source_totals is not None
-                        else None
+                        else cataloged_games(row, pgn_catalog, cataloged_totals, progress)
                     ),
                 )
             )
@@ -869,6 +917,14 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         action="store_true",
         help="Disable the byte progress bar while scanning PGNs.",
     )
+    parser.add_argument(
+        "--no-pgn-catalog",
+        action="store_true",
+        help=(
+            "Recount (and rehash) source PGNs instead of reusing facts recorded "
+            "in the per-PGN catalog (~/.cache/reti/pgn-catalog)."
+        ),
+    )
     parser.add_argument("--force", action="store_true")
     return parser.parse_args(argv)
 
@@ -886,6 +942,7 @@ def main(argv: list[str] | None = None) -> int:
         hash_annotated_pgns=args.hash_annotated_pgns,
         force=args.force,
         show_progress=not args.no_progress,
+        pgn_catalog=None if args.no_pgn_catalog else PgnCatalog(),
     )
     if result.up_to_date:
         print(f"Up to date: {result.output_dir}")
@@ -16,9 +16,8 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
-import chess
-
 from reti.common.hashing import sha256_text
+from reti.common.pgn_catalog import PgnCatalog
 from reti.fce_combined_snapshot import (
     DEFAULT_COMBINED_CQL,
     CombinedSourceStats,
@@ -32,6 +31,7 @@ from reti.fce_eval_snapshot import (
     AGGREGATE_COLUMNS,
     AGGREGATE_INTEGER_COLUMNS,
     DEFAULT_TABLEBASE_THRESHOLD,
+    POSITION_WINNING_SIDE_SQL,
     classify_material_side,
     eval_key_for_fen,
     profile_id,
@@ -58,6 +58,7 @@ from reti.fce_snapshot import (
 
 
 DEFAULT_THRESHOLDS = (1, 2, 5, 10, 20)
+AGGREGATE_VIEWS = ("all", "otb", "online")
 DEFAULT_PGN_UTILS_BIN = (
     REPO_ROOT / "native" / "pgn-utils" / "target" / "release" / "pgn-utils"
 )
@@ -472,8 +473,8 @@ def ingest_facts(
                     if piece_count > tablebase_threshold:
                         continue
                     fen = str(raw["fen"])
-                    board = chess.Board(fen)
-                    material = classify_material_side(stem, board)
+                    material = classify_material_side(stem, fen)
+                    # Keyed on the full FEN, as the native --sqlite-db ingest does.
                     eval_key = eval_key_for_fen(fen, profile=profile)
                     values.update(
                         {
@@ -537,20 +538,33 @@ def source_group_where(view_key: str, alias: str = "") -> tuple[str, dict[str, A
     raise CombinedTablebaseSnapshotError(f"unknown dataset view {view_key!r}")
 
 
-def aggregate_wdl_for_view(
+def aggregate_wdl_buckets(
     conn: sqlite3.Connection,
     *,
-    view_key: str,
-    threshold: int,
+    thresholds: tuple[int, ...],
     tablebase_threshold: int,
-) -> list[dict[str, Any]]:
-    where_group, params = source_group_where(view_key, "p")
-    params = {**params, "threshold": threshold, "tablebase_threshold": tablebase_threshold}
-    select_columns = ", ".join(AGGREGATE_COLUMNS)
+) -> dict[tuple[str, int], list[dict[str, Any]]]:
+    """Classify every position once, bucketed by source group and threshold.
+
+    A position lands in the bucket of the largest threshold its run length
+    reaches, so the rows for ``run_length >= t`` are the sum of every bucket
+    ``>= t``. All aggregate columns are counts, which makes that fold exact.
+    """
+    ordered = sorted(set(thresholds), reverse=True)
+    params: dict[str, Any] = {"tablebase_threshold": tablebase_threshold}
+    bucket_cases = []
+    for index, threshold in enumerate(ordered):
+        params[f"threshold_{index}"] = threshold
+        bucket_cases.append(
+            f"WHEN p.run_length >= :threshold_{index} THEN :threshold_{index}"
+        )
+    params["min_threshold"] = ordered[-1]
     rows = conn.execute(
         f"""
-        WITH classified AS (
+        WITH joined AS (
             SELECT
+                p.source_group,
+                CASE {" ".join(bucket_cases)} END AS threshold_bucket,
                 p.stem AS ending,
                 p.material_label,
                 p.piece_count,
@@ -558,45 +572,60 @@ def aggregate_wdl_for_view(
                 p.result,
                 e.eval_status,
                 e.eval_source,
-                e.winning_side,
+                {POSITION_WINNING_SIDE_SQL} AS winning_side
+            FROM positions p
+            JOIN evaluations e ON e.eval_key = p.eval_key
+            WHERE p.run_length >= :min_threshold
+        ),
+        classified AS (
+            SELECT
+                source_group,
+                threshold_bucket,
+                ending,
+                material_label,
+                piece_count,
+                material_side,
+                result,
+                eval_status,
+                eval_source,
+                winning_side,
                 CASE
-                    WHEN e.eval_status != 'ok'
-                      OR e.winning_side = 'unknown'
-                      OR p.material_side = 'unknown' THEN 'unknown'
-                    WHEN p.material_side = 'symmetric'
-                      AND e.winning_side IN ('white', 'black') THEN 'decisive'
-                    WHEN p.material_side = 'symmetric'
-                      AND e.winning_side = 'draw' THEN 'draw'
-                    WHEN p.material_side IN ('white', 'black')
-                      AND e.winning_side = p.material_side THEN 'win'
-                    WHEN p.material_side IN ('white', 'black')
-                      AND e.winning_side = 'draw' THEN 'draw'
-                    WHEN p.material_side = 'white'
-                      AND e.winning_side = 'black' THEN 'loss'
-                    WHEN p.material_side = 'black'
-                      AND e.winning_side = 'white' THEN 'loss'
+                    WHEN eval_status != 'ok'
+                      OR winning_side = 'unknown'
+                      OR material_side = 'unknown' THEN 'unknown'
+                    WHEN material_side = 'symmetric'
+                      AND winning_side IN ('white', 'black') THEN 'decisive'
+                    WHEN material_side = 'symmetric'
+                      AND winning_side = 'draw' THEN 'draw'
+                    WHEN material_side IN ('white', 'black')
+                      AND winning_side = material_side THEN 'win'
+                    WHEN material_side IN ('white', 'black')
+                      AND winning_side = 'draw' THEN 'draw'
+                    WHEN material_side = 'white'
+                      AND winning_side = 'black' THEN 'loss'
+                    WHEN material_side = 'black'
+                      AND winning_side = 'white' THEN 'loss'
                     ELSE 'unknown'
                 END AS tb_outcome,
                 CASE
-                    WHEN p.result = '1/2-1/2' THEN 'draw'
-                    WHEN p.material_side = 'symmetric'
-                      AND p.result IN ('1-0', '0-1') THEN 'decisive'
-                    WHEN p.material_side = 'white'
-                      AND p.result = '1-0' THEN 'win'
-                    WHEN p.material_side = 'white'
-                      AND p.result = '0-1' THEN 'loss'
-                    WHEN p.material_side = 'black'
-                      AND p.result = '0-1' THEN 'win'
-                    WHEN p.material_side = 'black'
-                      AND p.result = '1-0' THEN 'loss'
+                    WHEN result = '1/2-1/2' THEN 'draw'
+                    WHEN material_side = 'symmetric'
+                      AND result IN ('1-0', '0-1') THEN 'decisive'
+                    WHEN material_side = 'white'
+                      AND result = '1-0' THEN 'win'
+                    WHEN material_side = 'white'
+                      AND result = '0-1' THEN 'loss'
+                    WHEN material_side = 'black'
+                      AND result = '0-1' THEN 'win'
+                    WHEN material_side = 'black'
+                      AND result = '1-0' THEN 'loss'
                     ELSE 'unknown'
                 END AS result_outcome
-            FROM positions p
-            JOIN evaluations e ON e.eval_key = p.eval_key
-            WHERE p.run_length >= :threshold
-            {where_group}
+            FROM joined
         )
         SELECT
+            source_group,
+            threshold_bucket,
             ending,
             material_label,
             COUNT(*) AS total_positions,
@@ -639,12 +668,49 @@ def aggregate_wdl_for_view(
             SUM(CASE WHEN tb_outcome = 'decisive' AND result_outcome = 'draw' THEN 1 ELSE 0 END) AS tb_decisive_result_draw,
             SUM(CASE WHEN tb_outcome = 'decisive' AND result_outcome = 'unknown' THEN 1 ELSE 0 END) AS tb_decisive_result_unknown
         FROM classified
-        GROUP BY ending, material_label
-        ORDER BY ending, material_label
+        GROUP BY source_group, threshold_bucket, ending, material_label
         """,
         params,
     ).fetchall()
-    return [{column: row[column] for column in select_columns.split(", ")} for row in rows]
+    buckets: dict[tuple[str, int], list[dict[str, Any]]] = {}
+    for row in rows:
+        buckets.setdefault(
+            (str(row["source_group"]), int(row["threshold_bucket"])), []
+        ).append({column: row[column] for column in AGGREGATE_COLUMNS})
+    return buckets
+
+
+def fold_threshold_views(
+    buckets: dict[tuple[str, int], list[dict[str, Any]]],
+    *,
+    thresholds: tuple[int, ...],
+) -> dict[tuple[str, int], list[dict[str, Any]]]:
+    """Sum bucketed rows into cumulative ``(view, threshold)`` aggregates."""
+    totals: dict[str, dict[tuple[str, str], dict[str, Any]]] = {
+        view_key: {} for view_key in AGGREGATE_VIEWS
+    }
+    folded: dict[tuple[str, int], list[dict[str, Any]]] = {}
+    for threshold in sorted(set(thresholds), reverse=True):
+        for (source_group, bucket), rows in buckets.items():
+            if bucket != threshold:
+                continue
+            for view_key in ("all", source_group):
+                if view_key not in totals:
+                    continue
+                running = totals[view_key]
+                for row in rows:
+                    key = (row["ending"], row["material_label"])
+                    current = running.get(key)
+                    if current is None:
+                        running[key] = dict(row)
+                        continue
+                    for column in AGGREGATE_INTEGER_COLUMNS:
+                        current[column] += row[column]
+        for view_key, running in totals.items():
+            folded[(view_key, threshold)] = [
+                dict(running[key]) for key in sorted(running)
+            ]
+    return folded
 
 
 def refresh_threshold_aggregates(
@@ -659,7 +725,7 @@ def refresh_threshold_aggregates(
     insert_columns = ("view_key", "threshold", *AGGREGATE_COLUMNS)
     placeholders = ", ".join("?" for _ in insert_columns)
     inserted = 0
-    total_steps = 3 * len(thresholds)
+    total_steps = len(AGGREGATE_VIEWS) * len(thresholds)
     step = 0
     progress = create_progress_bar(
         enabled=show_progress,
@@ -667,28 +733,34 @@ def refresh_threshold_aggregates(
         desc="Aggregate views",
         unit="view",
     )
-    for view_key in ("all", "otb", "online"):
+    folded = fold_threshold_views(
+        aggregate_wdl_buckets(
+            conn,
+            thresholds=thresholds,
+            tablebase_threshold=tablebase_threshold,
+        ),
+        thresholds=thresholds,
+    )
+    for view_key in AGGREGATE_VIEWS:
         for threshold in thresholds:
             step += 1
             if progress_callback is not None:
                 progress_callback(step, total_steps, view_key, threshold)
-            for row in aggregate_wdl_for_view(
-                conn,
-                view_key=view_key,
-                threshold=threshold,
-                tablebase_threshold=tablebase_threshold,
-            ):
-                conn.execute(
-                    f"""
-                    INSERT INTO aggregate_wdl ({", ".join(insert_columns)})
-                    VALUES ({placeholders})
-                    """,
-                    (view_key, threshold, *[row[column] for column in AGGREGATE_COLUMNS]),
-                )
-                inserted += 1
-            conn.commit()
+            rows = folded.get((view_key, threshold), [])
+            conn.executemany(
+                f"""
+                INSERT INTO aggregate_wdl ({", ".join(insert_columns)})
+                VALUES ({placeholders})
+                """,
+                [
+                    (view_key, threshold, *[row[column] for column in AGGREGATE_COLUMNS])
+                    for row in rows
+                ],
+            )
+            inserted += len(rows)
             if progress is not None:
                 progress.update(1)
+    conn.commit()
     if progress is not None:
         progress.close()
     return inserted
@@ -1211,6 +1283,7 @@ def build_fce_combined_tablebase_snapshot(
     keep_intermediates: bool = False,
     force: bool = False,
     show_progress: bool = True,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> CombinedTablebaseBuildResult:
     run_path = Path(annotated_run_dir).expanduser().resolve()
     corpus_path = Path(corpus_dir).expanduser().resolve()
@@ -1270,7 +1343,9 @@ def build_fce_combined_tablebase_snapshot(
             )
 
     log_phase("Validating cached source totals", enabled=show_progress)
-    source_totals = load_source_totals(source_totals_path, summary_rows)
+    source_totals = load_source_totals(
+        source_totals_path, summary_rows, pgn_catalog=pgn_catalog
+    )
     known_stems = known_combined_stems()
 
     temp_parent = work_path or output_path.parent
@@ -1381,7 +1456,7 @@ def build_fce_combined_tablebase_snapshot(
                     "check --syzygy-dir coverage"
                 )
             set_metadata(conn, "build_phase", "aggregating_threshold_views")
-            set_metadata(conn, "aggregate_steps_total", str(3 * len(thresholds)))
+            set_metadata(conn, "aggregate_steps_total", str(len(AGGREGATE_VIEWS) * len(thresholds)))
             set_metadata(conn, "aggregate_steps_completed", "0")
             conn.commit()
             log_phase("Phase 6/8: aggregating WDL/result stats by corpus and threshold", enabled=show_progress)
@@ -1406,7 +1481,7 @@ def build_fce_combined_tablebase_snapshot(
                 progress_callback=aggregate_progress,
             )
             set_metadata(conn, "aggregate_rows", str(aggregate_rows))
-            set_metadata(conn, "aggregate_steps_completed", str(3 * len(thresholds)))
+            set_metadata(conn, "aggregate_steps_completed", str(len(AGGREGATE_VIEWS) * len(thresholds)))
             set_metadata(conn, "build_phase", "building_snapshot_payload")
             conn.commit()
 
@@ -1507,6 +1582,14 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument("--keep-intermediates", action="store_true")
     parser.add_argument("--no-progress", action="store_true")
+    parser.add_argument(
+        "--no-pgn-catalog",
+        action="store_true",
+        help=(
+            "Do not record the validated source totals in the per-PGN catalog "
+            "(~/.cache/reti/pgn-catalog) for later builds to reuse."
+        ),
+    )
     parser.add_argument("--force", action="store_true")
     return parser.parse_args(argv)
 
@@ -1532,6 +1615,7 @@ def main(argv: list[str] | None = None) -> int:
             keep_intermediates=args.keep_intermediates,
             force=args.force,
             show_progress=not args.no_progress,
+            pgn_catalog=None if args.no_pgn_catalog else PgnCatalog(),
         )
     except (OSError, sqlite3.Error, json.JSONDecodeError, SnapshotError) as exc:
         print(f"Error: {exc}")
@@ -4,8 +4,13 @@ import argparse
 import json
 import shutil
 import sqlite3
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import Future
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from multiprocessing import Pool
 from pathlib import Path
 from typing import Any, Iterable
@@ -15,17 +20,48 @@ import chess
 from reti.common.hashing import canonical_json, sha256_file, sha256_text
 from reti.common.source_metadata import source_stem
 from reti.evaluation.backends import (
+    AdaptiveBudget,
+    EnginePool,
     StockfishSession,
     open_tablebase_from_directories,
 )
+from reti.evaluation.cache import (
+    HALFMOVE_BUCKET_PLIES,
+    EvaluationCache,
+    engine_position_key,
+    halfmove_bucket,
+    profile_id as cache_profile_id,
+    position_key as cache_position_key,
+    stockfish_profile,
+    tablebase_profile,
+)
 from reti.evaluation.csv_schema import EvaluationResult, classify_side_to_move_wdl
+from reti.pgn_utils import find_pgn_utils_binary
 
 
-SCHEMA_VERSION = 1
+SCHEMA_VERSION = 4
 DEFAULT_DRAW_THRESHOLD_CP = 30
 DEFAULT_SF_TIME_SECONDS = 0.1
 DEFAULT_SF_THREADS = 1
 DEFAULT_TABLEBASE_THRESHOLD = 5
+INGEST_CHUNK_ROWS = 20000
+# Winning side of the *position row*, not the shared evaluation row. Tablebase
+# evaluations may be folded onto a colour-flipped mirror, so their colour is
+# re-derived from the side-to-move-relative WDL and the position's own side to
+# move; engine evaluations are never folded and keep ``winning_side``.
+POSITION_WINNING_SIDE_SQL = """
+    CASE
+        WHEN e.eval_source = 'tablebase' AND e.tb_wdl > 0 THEN p.side_to_move
+        WHEN e.eval_source = 'tablebase' AND e.tb_wdl < 0 THEN
+            CASE p.side_to_move
+                WHEN 'white' THEN 'black'
+                WHEN 'black' THEN 'white'
+                ELSE 'unknown'
+            END
+        WHEN e.eval_source = 'tablebase' AND e.tb_wdl = 0 THEN 'draw'
+        ELSE e.winning_side
+    END
+"""
 AGGREGATE_ID_COLUMNS = ("ending", "material_label")
 AGGREGATE_BASE_INTEGER_COLUMNS = (
     "total_positions",
@@ -92,6 +128,9 @@ class EvalSettings:
     stockfish_bin: str | None
     sf_time_seconds: float = DEFAULT_SF_TIME_SECONDS
     sf_threads: int = DEFAULT_SF_THREADS
+    sf_hash_mb: int | None = None
+    sf_adaptive: bool = False
+    game_order: bool = False
     draw_threshold_cp: int = DEFAULT_DRAW_THRESHOLD_CP
     tablebase_threshold: int = DEFAULT_TABLEBASE_THRESHOLD
     tablebase_only: bool = False
@@ -101,6 +140,9 @@ class EvalSettings:
     max_evals: int | None = None
     hash_markers: bool = False
     force: bool = False
+    eval_cache: Path | None = None
+    native_eval: bool = True
+    pgn_utils_bin: Path | None = None
 
 
 @dataclass(frozen=True)
@@ -183,6 +225,8 @@ def build_manifest(settings: EvalSettings) -> dict[str, Any]:
             "stockfish": stockfish_payload,
             "sfTimeSeconds": settings.sf_time_seconds,
             "sfThreads": settings.sf_threads,
+            **({"sfHashMb": settings.sf_hash_mb} if settings.sf_hash_mb is not None else {}),
+            **({"sfAdaptive": AdaptiveBudget().profile()} if settings.sf_adaptive else {}),
             "drawThresholdCp": settings.draw_threshold_cp,
             "probeDtz": settings.probe_dtz,
         },
@@ -193,21 +237,88 @@ def profile_id(manifest: dict[str, Any]) -> str:
     return sha256_text(canonical_json(manifest["evaluation"]))[:16]
 
 
+@dataclass(frozen=True)
+class CanonicalPosition:
+    key: str
+    fen: str
+    mirrored: bool
+
+
+def mirror_epd(epd: str) -> str:
+    """Colour-flip an EPD: ranks reversed, piece colours and side to move swapped."""
+    placement, turn, castling, ep = epd.split(" ")[:4]
+    mirrored_castling = "-"
+    if castling != "-":
+        mirrored_castling = "".join(
+            sorted(
+                castling.swapcase(),
+                key=lambda right: (right.islower(), "KQ".find(right.upper()) % 3, right.upper()),
+            )
+        )
+    mirrored_ep = "-" if ep == "-" else f"{ep[0]}{9 - int(ep[1])}"
+    return " ".join(
+        (
+            "/".join(rank.swapcase() for rank in reversed(placement.split("/"))),
+            "b" if turn == "w" else "w",
+            mirrored_castling,
+            mirrored_ep,
+        )
+    )
+
+
+def canonical_position(
+    fen: str,
+    *,
+    fold_mirrors: bool,
+    halfmove_matters: bool,
+) -> CanonicalPosition:
+    """Canonical evaluation identity for a FEN.
+
+    The key is the EPD (the FEN minus move counters). When the profile is
+    colour-symmetric (Syzygy), the lexicographically smaller of the EPD and its
+    mirror is used. When the halfmove clock can change the answer (DTZ probes,
+    engine searches near the 50-move rule), a coarse clock bucket is appended.
+    ``fen`` is the position to actually evaluate, with normalized counters.
+    """
+    fields = fen.split()
+    epd = " ".join(fields[:4])
+    mirrored = False
+    if fold_mirrors:
+        flipped = mirror_epd(epd)
+        if flipped < epd:
+            epd, mirrored = flipped, True
+
+    halfmove = 0
+    key = epd
+    if halfmove_matters:
+        clock = int(fields[4]) if len(fields) > 4 and fields[4].isdigit() else 0
+        bucket = halfmove_bucket(clock)
+        halfmove = bucket * HALFMOVE_BUCKET_PLIES
+        key = f"{epd} h{bucket}"
+    return CanonicalPosition(key=key, fen=f"{epd} {halfmove} 1", mirrored=mirrored)
+
+
 def eval_key_for_fen(fen: str, *, profile: str) -> str:
     return sha256_text(f"{profile}\0{fen}")
 
 
+def eval_key_for_position(position: CanonicalPosition, *, profile: str) -> str:
+    return eval_key_for_fen(position.key, profile=profile)
+
+
+POSITION_KEY_FIELDS = (
+    "source_pgn",
+    "output_pgn",
+    "ending",
+    "game_index",
+    "marker_index",
+    "ply_index",
+    "fen",
+)
+
+
 def position_key(row: dict[str, Any]) -> str:
-    payload = {
-        "source_pgn": row.get("source_pgn", ""),
-        "output_pgn": row.get("output_pgn", ""),
-        "ending": row.get("ending", ""),
-        "game_index": row.get("game_index", ""),
-        "marker_index": row.get("marker_index", ""),
-        "ply_index": row.get("ply_index", ""),
-        "fen": row.get("fen", ""),
-    }
-    return sha256_text(canonical_json(payload))
+    return sha256_text("\x1f".join(str(row.get(field, "")) for field in POSITION_KEY_FIELDS))
 
 
 def source_bucket_from_source_pgn(source_pgn: str) -> str:
@@ -347,6 +458,7 @@ def init_schema(conn: sqlite3.Connection) -> None:
             sf_cp_white INTEGER,
             sf_mate_white INTEGER,
             sf_time_seconds REAL,
+            sf_depth INTEGER,
             draw_threshold_cp INTEGER,
             eval_status TEXT NOT NULL DEFAULT 'pending',
             error_message TEXT NOT NULL DEFAULT '',
@@ -390,12 +502,25 @@ def ending_wdl_schema_sql() -> str:
 
 
 def ensure_indexes(conn: sqlite3.Connection) -> None:
+    """Build the lookup indexes; pending evaluations get a partial covering index.
+
+    Only pending rows are ever looked up by status, so the index covering
+    :func:`pending_batches` holds just those and shrinks as evaluations are
+    written back. It replaces the older full ``idx_evaluations_status``.
+    ``idx_positions_game_ply`` walks games in ply order for
+    :func:`pending_game_runs` and serves plain ``game_key`` lookups too.
+    """
     conn.executescript(
         """
         CREATE INDEX IF NOT EXISTS idx_positions_ending ON positions(ending);
         CREATE INDEX IF NOT EXISTS idx_positions_eval_key ON positions(eval_key);
-        CREATE INDEX IF NOT EXISTS idx_positions_game_key ON positions(game_key);
-        CREATE INDEX IF NOT EXISTS idx_evaluations_status ON evaluations(eval_status);
+        CREATE INDEX IF NOT EXISTS idx_positions_game_ply
+            ON positions(game_key, ply_index, eval_key);
+        DROP INDEX IF EXISTS idx_positions_game_key;
+        CREATE INDEX IF NOT EXISTS idx_evaluations_pending
+            ON evaluations(piece_count, eval_key, fen, eval_status)
+            WHERE eval_status = 'pending';
+        DROP INDEX IF EXISTS idx_evaluations_status;
         """
     )
     conn.commit()
@@ -407,6 +532,13 @@ def remove_database_files(db_path: Path) -> None:
             path.unlink()
 
 
+def connect_snapshot_db(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    init_schema(conn)
+    return conn
+
+
 def open_snapshot_db(settings: EvalSettings, manifest: dict[str, Any]) -> sqlite3.Connection:
     db_path = settings.output_db
     if settings.force and db_path.exists():
@@ -414,9 +546,7 @@ def open_snapshot_db(settings: EvalSettings, manifest: dict[str, Any]) -> sqlite
 
     db_path.parent.mkdir(parents=True, exist_ok=True)
     had_db = db_path.exists()
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    init_schema(conn)
+    conn = connect_snapshot_db(db_path)
 
     manifest_text = canonical_json(manifest)
     existing_manifest = get_metadata(conn, "input_manifest")
@@ -437,6 +567,17 @@ def open_snapshot_db(settings: EvalSettings, manifest: dict[str, Any]) -> sqlite
                 "Use --force or choose a new --output-db."
             )
 
+    if (
+        existing_manifest is not None
+        and get_metadata(conn, "positions_ingest_started_at") is not None
+        and get_metadata(conn, "positions_ingest_complete") != "true"
+    ):
+        # Ingest runs without a rollback journal, so an interrupted one
+        # cannot be trusted; start the snapshot over.
+        conn.close()
+        remove_database_files(db_path)
+        return open_snapshot_db(settings, manifest)
+
     if existing_manifest is None:
         set_metadata(conn, "input_manifest", manifest)
         set_metadata(conn, "profile_id", profile_id(manifest))
@@ -446,6 +587,10 @@ def open_snapshot_db(settings: EvalSettings, manifest: dict[str, Any]) -> sqlite
     return conn
 
 
+MaterialCounts = tuple[dict[str, int], dict[str, int]]
+MATERIAL_SYMBOLS = ("P", "N", "B", "R", "Q")
+
+
 def piece_counts(board: chess.Board, color: chess.Color) -> dict[str, int]:
     return {
         "P": len(board.pieces(chess.PAWN, color)),
@@ -456,6 +601,20 @@ def piece_counts(board: chess.Board, color: chess.Color) -> dict[str, int]:
     }
 
 
+def placement_piece_counts(placement: str) -> MaterialCounts:
+    """White and black non-king counts read straight off a FEN placement field."""
+    white = {symbol: placement.count(symbol) for symbol in MATERIAL_SYMBOLS}
+    black = {symbol: placement.count(symbol.lower()) for symbol in MATERIAL_SYMBOLS}
+    return white, black
+
+
+def material_counts(position: chess.Board | str) -> MaterialCounts:
+    """Per-colour counts for a board, or for a FEN without building a board."""
+    if isinstance(position, str):
+        return placement_piece_counts(position.split(" ", 1)[0])
+    return piece_counts(position, chess.WHITE), piece_counts(position, chess.BLACK)
+
+
 def nonking(counts: dict[str, int]) -> int:
     return sum(counts.values())
 
@@ -475,19 +634,17 @@ def side_material_text(counts: dict[str, int]) -> str:
     return "".join(parts) or "bare"
 
 
-def material_signature(board: chess.Board) -> str:
-    white = side_material_text(piece_counts(board, chess.WHITE))
-    black = side_material_text(piece_counts(board, chess.BLACK))
-    return f"{white}v{black}"
+def material_signature(position: chess.Board | str | MaterialCounts) -> str:
+    white, black = position if isinstance(position, tuple) else material_counts(position)
+    return f"{side_material_text(white)}v{side_material_text(black)}"
 
 
 def select_material_side(
-    board: chess.Board,
+    counts: MaterialCounts,
     label: str,
     predicate,
 ) -> MaterialPerspective:
-    white = piece_counts(board, chess.WHITE)
-    black = piece_counts(board, chess.BLACK)
+    white, black = counts
     white_match = predicate(white, black)
     black_match = predicate(black, white)
     if white_match and not black_match:
@@ -498,7 +655,7 @@ def select_material_side(
         side = "symmetric"
     else:
         side = "unknown"
-    return MaterialPerspective(side, label, material_signature(board))
+    return MaterialPerspective(side, label, material_signature(counts))
 
 
 SYMMETRIC_ENDINGS = {
@@ -513,139 +670,252 @@ SYMMETRIC_ENDINGS = {
 }
 
 
-def classify_material_side(ending: str, board: chess.Board) -> MaterialPerspective:
+def classify_material_side(ending: str, board: chess.Board | str) -> MaterialPerspective:
+    """Attribute an ending's material to a colour; ``board`` may be a FEN string."""
+    counts = material_counts(board)
     if ending in SYMMETRIC_ENDINGS:
-        return MaterialPerspective("symmetric", "symmetric/either side", material_signature(board))
+        return MaterialPerspective("symmetric", "symmetric/either side", material_signature(counts))
 
     if ending == "1-4BN":
         return select_material_side(
-            board,
+            counts,
             "bishop+knight side",
             lambda own, opp: own["B"] >= 1 and own["N"] >= 1 and nonking(opp) == 0,
         )
     if ending == "1-5NNp":
         return select_material_side(
-            board,
+            counts,
             "two-knights side",
             lambda own, opp: own["N"] >= 2 and opp["P"] >= 1,
         )
     if ending == "2-1P":
         return select_material_side(
-            board,
+            counts,
             "pawn side",
             lambda own, opp: own["P"] >= 1 and nonking(opp) == 0,
         )
     if ending == "3-1Np":
         return select_material_side(
-            board,
+            counts,
             "knight side",
             lambda own, opp: own["N"] >= 1 and opp["P"] >= 1,
         )
     if ending == "4-1Bp":
         return select_material_side(
-            board,
+            counts,
             "bishop side",
             lambda own, opp: own["B"] >= 1 and opp["P"] >= 1,
         )
     if ending == "5-0BN":
         return select_material_side(
-            board,
+            counts,
             "bishop side",
             lambda own, opp: own["B"] >= 1 and opp["N"] >= 1,
         )
     if ending == "6-1-0RP":
         return select_material_side(
-            board,
+            counts,
             "rook side",
             lambda own, opp: own["R"] >= 1 and opp["P"] >= 1,
         )
     if ending == "6-2-1RPr":
         return select_material_side(
-            board,
+            counts,
             "rook+pawn side",
             lambda own, opp: own["R"] >= 1 and own["P"] >= 1 and opp["R"] >= 1,
         )
     if ending == "6-2-2RPPr":
         return select_material_side(
-            board,
+            counts,
             "rook+two-pawns side",
             lambda own, opp: own["R"] >= 1 and own["P"] >= 2 and opp["R"] >= 1,
         )
     if ending == "7-1RN":
         return select_material_side(
-            board,
+            counts,
             "rook side",
             lambda own, opp: own["R"] >= 1 and opp["N"] >= 1,
         )
     if ending == "7-2RB":
         return select_material_side(
-            board,
+            counts,
             "rook side",
             lambda own, opp: own["R"] >= 1 and opp["B"] >= 1,
         )
     if ending == "8-1RNr":
         return select_material_side(
-            board,
+            counts,
             "rook+knight side",
             lambda own, opp: own["R"] >= 1 and own["N"] >= 1 and opp["R"] >= 1,
         )
     if ending == "8-2RBr":
         return select_material_side(
-            board,
+            counts,
             "rook+bishop side",
             lambda own, opp: own["R"] >= 1 and own["B"] >= 1 and opp["R"] >= 1,
         )
     if ending == "9-1Qp":
         return select_material_side(
-            board,
+            counts,
             "queen side",
             lambda own, opp: own["Q"] >= 1 and opp["P"] >= 1,
         )
     if ending == "9-3QPq":
         return select_material_side(
-            board,
+            counts,
             "queen+pawn side",
             lambda own, opp: own["Q"] >= 1 and own["P"] >= 1 and opp["Q"] >= 1,
         )
     if ending in {"10-1Qa", "10-3Qaa", "10-6Qaaa"}:
         required_minors = {"10-1Qa": 1, "10-3Qaa": 2, "10-6Qaaa": 3}[ending]
         return select_material_side(
-            board,
+            counts,
             "queen side",
             lambda own, opp: own["Q"] >= 1 and minor_count(opp) >= required_minors,
         )
     if ending == "10-2Qr":
         return select_material_side(
-            board,
+            counts,
             "queen side",
             lambda own, opp: own["Q"] >= 1 and opp["R"] >= 1,
         )
     if ending == "10-4Qra":
         return select_material_side(
-            board,
+            counts,
             "queen side",
             lambda own, opp: own["Q"] >= 1 and opp["R"] >= 1 and minor_count(opp) >= 1,
         )
     if ending == "10-5Qrr":
         return select_material_side(
-            board,
+            counts,
             "queen side",
             lambda own, opp: own["Q"] >= 1 and opp["R"] >= 2,
         )
     if ending == "10-7QAq":
         return select_material_side(
-            board,
+            counts,
             "queen+minor side",
             lambda own, opp: own["Q"] >= 1 and minor_count(own) >= 1 and opp["Q"] >= 1,
         )
     if ending == "10-7-1Qbrr":
         return select_material_side(
-            board,
+            counts,
             "queen+bishop side",
             lambda own, opp: own["Q"] >= 1 and own["B"] >= 1 and opp["R"] >= 2,
         )
 
-    return MaterialPerspective("unknown", "unknown", material_signature(board))
+    return MaterialPerspective("unknown", "unknown", material_signature(counts))
+
+
+POSITION_COLUMNS = (
+    "position_key",
+    "source_pgn",
+    "source_bucket",
+    "ending",
+    "output_pgn",
+    "game_index",
+    "marker_index",
+    "marker_text",
+    "game_key",
+    "event",
+    "site",
+    "date",
+    "round",
+    "white",
+    "black",
+    "result",
+    "ply_index",
+    "fullmove_number",
+    "move_san",
+    "move_uci",
+    "fen",
+    "side_to_move",
+    "piece_count",
+    "material_side",
+    "material_label",
+    "material_signature",
+    "eval_key",
+)
+POSITION_TEXT_FIELDS = (
+    "source_pgn",
+    "source_bucket",
+    "ending",
+    "output_pgn",
+)
+POSITION_INTEGER_FIELDS = ("game_index", "marker_index")
+POSITION_TRAILING_TEXT_FIELDS = (
+    "marker_text",
+    "game_key",
+    "event",
+    "site",
+    "date",
+    "round",
+    "white",
+    "black",
+    "result",
+)
+
+
+def marker_ingest_rows(
+    row: dict[str, Any],
+    settings: EvalSettings,
+    *,
+    profile: str,
+) -> tuple[tuple[Any, ...], tuple[str, str, int]]:
+    """Position and evaluation insert tuples for one normalized marker row.
+
+    Everything is derived from the FEN text; no ``chess.Board`` is built.
+    """
+    fen = str(row["fen"])
+    fields = fen.split(" ")
+    placement = fields[0]
+    ending = str(row["ending"])
+    material = classify_material_side(ending, fen)
+    piece_count = int(
+        row.get("piece_count") or sum(1 for symbol in placement if symbol.isalpha())
+    )
+    tablebase_route = piece_count <= settings.tablebase_threshold
+    canonical = canonical_position(
+        fen,
+        fold_mirrors=tablebase_route,
+        halfmove_matters=settings.probe_dtz or not tablebase_route,
+    )
+    eval_key = eval_key_for_position(canonical, profile=profile)
+    position = (
+        position_key(row),
+        *(str(row.get(field, "")) for field in POSITION_TEXT_FIELDS),
+        *(int(row.get(field, 0)) for field in POSITION_INTEGER_FIELDS),
+        *(str(row.get(field, "")) for field in POSITION_TRAILING_TEXT_FIELDS),
+        int(row.get("ply_index", 0)),
+        int(row.get("fullmove_number", 0)),
+        str(row.get("move_san", "")),
+        str(row.get("move_uci", "")),
+        fen,
+        "black" if len(fields) > 1 and fields[1] == "b" else "white",
+        piece_count,
+        material.material_side,
+        material.material_label,
+        material.material_signature,
+        eval_key,
+    )
+    return position, (eval_key, canonical.fen, piece_count)
+
+
+def drop_secondary_indexes(conn: sqlite3.Connection) -> None:
+    """Drop the indexes :func:`ensure_indexes` builds, so bulk ingest skips them."""
+    names = [
+        row[0]
+        for row in conn.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE type = 'index' AND name LIKE 'idx_%'
+              AND tbl_name IN ('positions', 'evaluations')
+            """
+        )
+    ]
+    for name in names:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
 
 
 def ingest_markers(
@@ -653,96 +923,92 @@ def ingest_markers(
     settings: EvalSettings,
     *,
     profile: str,
+    chunk_rows: int = INGEST_CHUNK_ROWS,
 ) -> int:
+    """Bulk-load marker rows into ``positions`` and pending ``evaluations``.
+
+    Rows are parsed in chunks and written with ``executemany``, one
+    transaction per chunk. Secondary indexes are dropped for the load and
+    rebuilt by :func:`ensure_indexes` afterwards. The load runs without a
+    rollback journal; :func:`open_snapshot_db` discards a DB whose ingest
+    never reached ``positions_ingest_complete``.
+    """
     if get_metadata(conn, "positions_ingest_complete") == "true":
         return conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
 
     inserted_or_seen = 0
     set_metadata(conn, "positions_ingest_started_at", utc_now())
     conn.commit()
+    drop_secondary_indexes(conn)
 
-    insert_position_sql = """
-        INSERT OR IGNORE INTO positions (
-            position_key, source_pgn, source_bucket, ending, output_pgn,
-            game_index, marker_index, marker_text, game_key,
-            event, site, date, round, white, black, result,
-            ply_index, fullmove_number, move_san, move_uci, fen,
-            side_to_move, piece_count, material_side, material_label,
-            material_signature, eval_key
-        ) VALUES (
-            :position_key, :source_pgn, :source_bucket, :ending, :output_pgn,
-            :game_index, :marker_index, :marker_text, :game_key,
-            :event, :site, :date, :round, :white, :black, :result,
-            :ply_index, :fullmove_number, :move_san, :move_uci, :fen,
-            :side_to_move, :piece_count, :material_side, :material_label,
-            :material_signature, :eval_key
-        )
+    insert_position_sql = f"""
+        INSERT OR IGNORE INTO positions ({", ".join(POSITION_COLUMNS)})
+        VALUES ({", ".join("?" for _ in POSITION_COLUMNS)})
     """
+    insert_evaluation_sql = """
+        INSERT OR IGNORE INTO evaluations(eval_key, fen, piece_count)
+        VALUES (?, ?, ?)
+    """
+    position_rows: list[tuple[Any, ...]] = []
+    evaluation_rows: list[tuple[str, str, int]] = []
+
+    def flush() -> None:
+        if not position_rows:
+            return
+        conn.executemany(insert_position_sql, position_rows)
+        conn.executemany(insert_evaluation_sql, evaluation_rows)
+        conn.commit()
+        position_rows.clear()
+        evaluation_rows.clear()
 
-    with settings.markers_jsonl.open("r", encoding="utf-8") as handle:
-        for line_number, line in enumerate(handle, start=1):
-            if settings.max_markers is not None and inserted_or_seen >= settings.max_markers:
-                break
-            line = line.strip()
-            if not line:
-                continue
-            row = normalize_marker_row(
-                json.loads(line),
-                line_number=line_number,
-                path=settings.markers_jsonl,
-            )
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=OFF")
+    try:
+        with settings.markers_jsonl.open("r", encoding="utf-8") as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if settings.max_markers is not None and inserted_or_seen >= settings.max_markers:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                row = normalize_marker_row(
+                    json.loads(line),
+                    line_number=line_number,
+                    path=settings.markers_jsonl,
+                )
+                position, evaluation = marker_ingest_rows(row, settings, profile=profile)
+                position_rows.append(position)
+                evaluation_rows.append(evaluation)
+                inserted_or_seen += 1
+                if len(position_rows) >= chunk_rows:
+                    flush()
+        flush()
+        set_metadata(conn, "positions_ingest_complete", "true")
+        set_metadata(conn, "positions_ingest_completed_at", utc_now())
+        set_metadata(conn, "positions_seen_in_input", str(inserted_or_seen))
+        conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
 
-            fen = str(row["fen"])
-            board = chess.Board(fen)
-            ending = str(row["ending"])
-            material = classify_material_side(ending, board)
-            eval_key = eval_key_for_fen(fen, profile=profile)
-            values = {
-                "position_key": position_key(row),
-                "source_pgn": str(row.get("source_pgn", "")),
-                "source_bucket": str(row.get("source_bucket", "")),
-                "ending": ending,
-                "output_pgn": str(row.get("output_pgn", "")),
-                "game_index": int(row.get("game_index", 0)),
-                "marker_index": int(row.get("marker_index", 0)),
-                "marker_text": str(row.get("marker_text", "")),
-                "game_key": str(row.get("game_key", "")),
-                "event": str(row.get("event", "")),
-                "site": str(row.get("site", "")),
-                "date": str(row.get("date", "")),
-                "round": str(row.get("round", "")),
-                "white": str(row.get("white", "")),
-                "black": str(row.get("black", "")),
-                "result": str(row.get("result", "")),
-                "ply_index": int(row.get("ply_index", 0)),
-                "fullmove_number": int(row.get("fullmove_number", 0)),
-                "move_san": str(row.get("move_san", "")),
-                "move_uci": str(row.get("move_uci", "")),
-                "fen": fen,
-                "side_to_move": str(row.get("side_to_move", "")),
-                "piece_count": int(row.get("piece_count", len(board.piece_map()))),
-                "material_side": material.material_side,
-                "material_label": material.material_label,
-                "material_signature": material.material_signature,
-                "eval_key": eval_key,
-            }
-            conn.execute(insert_position_sql, values)
-            conn.execute(
-                """
-                INSERT OR IGNORE INTO evaluations(eval_key, fen, piece_count)
-                VALUES (?, ?, ?)
-                """,
-                (eval_key, fen, values["piece_count"]),
-            )
-            inserted_or_seen += 1
-            if inserted_or_seen % 10000 == 0:
-                conn.commit()
 
-    set_metadata(conn, "positions_ingest_complete", "true")
-    set_metadata(conn, "positions_ingest_completed_at", utc_now())
-    set_metadata(conn, "positions_seen_in_input", str(inserted_or_seen))
-    conn.commit()
-    return conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+EVALUATION_UPDATE_COLUMNS = (
+    "eval_source",
+    "winning_side",
+    "tb_wdl",
+    "tb_dtz",
+    "sf_cp_white",
+    "sf_mate_white",
+    "sf_time_seconds",
+    "sf_depth",
+    "draw_threshold_cp",
+    "eval_status",
+    "error_message",
+    "evaluated_at",
+)
 
 
 def evaluation_to_update(eval_key: str, result: EvaluationResult) -> tuple[Any, ...]:
@@ -754,6 +1020,7 @@ def evaluation_to_update(eval_key: str, result: EvaluationResult) -> tuple[Any,
         result.sf_cp_white,
         result.sf_mate_white,
         result.sf_time_seconds,
+        result.sf_depth,
         result.draw_threshold_cp,
         result.eval_status,
         result.error_message,
@@ -762,25 +1029,42 @@ def evaluation_to_update(eval_key: str, result: EvaluationResult) -> tuple[Any,
     )
 
 
-def update_evaluation(conn: sqlite3.Connection, eval_key: str, result: EvaluationResult) -> None:
+def write_evaluations(conn: sqlite3.Connection, updates: list[tuple[Any, ...]]) -> None:
+    """Apply many :func:`evaluation_to_update` rows with one ``UPDATE``.
+
+    The rows are ``executemany``-inserted into a temp staging table and
+    merged by primary key, instead of one ``UPDATE`` statement per eval key.
+    """
+    if not updates:
+        return
+    column_defs = ", ".join(EVALUATION_UPDATE_COLUMNS)
     conn.execute(
+        f"""
+        CREATE TEMP TABLE IF NOT EXISTS evaluation_updates (
+            {column_defs},
+            eval_key TEXT PRIMARY KEY
+        )
         """
-        UPDATE evaluations
-        SET eval_source = ?,
-            winning_side = ?,
-            tb_wdl = ?,
-            tb_dtz = ?,
-            sf_cp_white = ?,
-            sf_mate_white = ?,
-            sf_time_seconds = ?,
-            draw_threshold_cp = ?,
-            eval_status = ?,
-            error_message = ?,
-            evaluated_at = ?
-        WHERE eval_key = ?
+    )
+    conn.executemany(
+        f"""
+        INSERT OR REPLACE INTO evaluation_updates ({column_defs}, eval_key)
+        VALUES ({", ".join("?" for _ in range(len(EVALUATION_UPDATE_COLUMNS) + 1))})
         """,
-        evaluation_to_update(eval_key, result),
+        updates,
+    )
+    conn.execute(
+        f"""
+        UPDATE evaluations
+        SET ({column_defs}) = (
+            SELECT {column_defs}
+            FROM evaluation_updates
+            WHERE evaluation_updates.eval_key = evaluations.eval_key
+        )
+        WHERE eval_key IN (SELECT eval_key FROM evaluation_updates)
+        """
     )
+    conn.execute("DELETE FROM evaluation_updates")
 
 
 def mark_tablebase_skips(conn: sqlite3.Connection, settings: EvalSettings) -> int:
@@ -858,16 +1142,21 @@ def _init_worker(
     tablebase_threshold: int,
     tablebase_only: bool,
     probe_dtz: bool,
+    sf_hash_mb: int | None = None,
+    sf_adaptive: bool = False,
 ) -> None:
     global _WORKER_TABLEBASE, _WORKER_TABLEBASE_ERROR, _WORKER_STOCKFISH, _WORKER_SETTINGS
     _WORKER_TABLEBASE, _WORKER_TABLEBASE_ERROR = open_tablebase_from_directories(list(syzygy_dirs))
-    _WORKER_STOCKFISH = None if tablebase_only else StockfishSession(stockfish_bin, sf_threads)
+    _WORKER_STOCKFISH = (
+        None if tablebase_only else StockfishSession(stockfish_bin, sf_threads, sf_hash_mb)
+    )
     _WORKER_SETTINGS = {
         "sf_time_seconds": sf_time_seconds,
         "draw_threshold_cp": draw_threshold_cp,
         "tablebase_threshold": tablebase_threshold,
         "tablebase_only": tablebase_only,
         "probe_dtz": probe_dtz,
+        "adaptive": AdaptiveBudget() if sf_adaptive else None,
     }
 
 
@@ -905,9 +1194,62 @@ def _evaluate_task(task: tuple[str, str, int]) -> tuple[str, EvaluationResult]:
         board,
         sf_time_seconds=float(_WORKER_SETTINGS["sf_time_seconds"]),
         draw_threshold_cp=int(_WORKER_SETTINGS["draw_threshold_cp"]),
+        adaptive=_WORKER_SETTINGS["adaptive"],
+    )
+
+
+def shared_cache_profiles(settings: EvalSettings) -> tuple[str, str]:
+    """Shared evaluation-cache profile ids for the (tablebase, Stockfish) routes."""
+    return (
+        cache_profile_id(tablebase_profile(probe_dtz=settings.probe_dtz)),
+        cache_profile_id(
+            stockfish_profile(
+                settings.stockfish_bin,
+                sf_time_seconds=settings.sf_time_seconds,
+                draw_threshold_cp=settings.draw_threshold_cp,
+                threads=settings.sf_threads,
+                **({"hash_mb": settings.sf_hash_mb} if settings.sf_hash_mb is not None else {}),
+                **({"adaptive": AdaptiveBudget().profile()} if settings.sf_adaptive else {}),
+            )
+        ),
     )
 
 
+def split_cached_tasks(
+    batch: list[tuple[str, str, int]],
+    cache: EvaluationCache,
+    profiles: tuple[str, str],
+    *,
+    tablebase_threshold: int,
+) -> tuple[list[tuple[str, EvaluationResult]], list[tuple[str, str, int]], dict[str, tuple[str, str]]]:
+    """Split a pending batch into cache hits and tasks that still need evaluating.
+
+    Returns ``(hits, misses, slots)`` where ``slots`` maps each miss's
+    ``eval_key`` to the ``(position, profile)`` its result should be stored under.
+    Stockfish slots carry the same halfmove bucket as the snapshot's own
+    evaluation key, so a search near the 50-move rule is never reused for the
+    same EPD with a fresh clock.
+    """
+    tablebase_profile_id, stockfish_profile_id = profiles
+    hits: list[tuple[str, EvaluationResult]] = []
+    misses: list[tuple[str, str, int]] = []
+    slots: dict[str, tuple[str, str]] = {}
+    for task in batch:
+        eval_key, fen, piece_count = task
+        board = chess.Board(fen)
+        if piece_count <= tablebase_threshold:
+            slot = (cache_position_key(board), tablebase_profile_id)
+        else:
+            slot = (engine_position_key(board), stockfish_profile_id)
+        cached = cache.get_result(*slot)
+        if cached is not None:
+            hits.append((eval_key, cached))
+        else:
+            misses.append(task)
+            slots[eval_key] = slot
+    return hits, misses, slots
+
+
 def pending_count(conn: sqlite3.Connection) -> int:
     return int(
         conn.execute("SELECT COUNT(*) FROM evaluations WHERE eval_status = 'pending'").fetchone()[0]
@@ -920,28 +1262,115 @@ def pending_batches(
     max_evals: int | None,
     batch_size: int,
 ) -> Iterable[list[tuple[str, str, int]]]:
+    """Pending evaluations in ``(piece_count, eval_key)`` order, ``batch_size`` at a time.
+
+    Each batch resumes after the last key of the previous one, so it is a
+    range scan of ``idx_evaluations_pending`` rather than a fresh sort of
+    every pending row. A pending row the caller leaves pending is not
+    returned again.
+    """
     remaining = max_evals
+    after: tuple[int, str] | None = None
     while True:
         limit = batch_size if remaining is None else min(batch_size, remaining)
         if limit <= 0:
             break
-        rows = conn.execute(
-            """
-            SELECT eval_key, fen, piece_count
-            FROM evaluations
-            WHERE eval_status = 'pending'
-            ORDER BY piece_count, eval_key
-            LIMIT ?
-            """,
-            (limit,),
-        ).fetchall()
+        if after is None:
+            rows = conn.execute(
+                """
+                SELECT eval_key, fen, piece_count
+                FROM evaluations
+                WHERE eval_status = 'pending'
+                ORDER BY piece_count, eval_key
+                LIMIT ?
+                """,
+                (limit,),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                """
+                SELECT eval_key, fen, piece_count
+                FROM evaluations
+                WHERE eval_status = 'pending'
+                  AND (piece_count, eval_key) > (?, ?)
+                ORDER BY piece_count, eval_key
+                LIMIT ?
+                """,
+                (*after, limit),
+            ).fetchall()
         if not rows:
             break
         yield [(str(row["eval_key"]), str(row["fen"]), int(row["piece_count"])) for row in rows]
+        after = (int(rows[-1]["piece_count"]), str(rows[-1]["eval_key"]))
         if remaining is not None:
             remaining -= len(rows)
 
 
+PENDING_GAME_ROWS_SQL = """
+    SELECT p.game_key, e.eval_key, e.fen, e.piece_count
+    FROM positions AS p
+    CROSS JOIN evaluations AS e ON e.eval_key = p.eval_key
+    WHERE e.eval_status = 'pending' AND {where}
+    ORDER BY p.game_key, p.ply_index, p.eval_key
+"""
+
+
+def pending_game_runs(
+    conn: sqlite3.Connection,
+    *,
+    max_evals: int | None,
+    batch_size: int,
+) -> Iterable[list[list[tuple[str, str, int]]]]:
+    """Pending evaluations grouped into per-game runs in ply order.
+
+    Each run is one ``game_key``'s pending positions in ``ply_index`` order,
+    so an engine can search them back to back and reuse its hash between
+    plies. An ``eval_key`` shared by several games is yielded once, in the
+    first of them. Batches end on a game boundary and resume after the last
+    game, reading ``idx_positions_game_ply`` in order; a key the caller
+    leaves pending can come back with a later game.
+    """
+    remaining = max_evals
+    after: str | None = None
+    while remaining is None or remaining > 0:
+        if after is None:
+            rows = conn.execute(
+                PENDING_GAME_ROWS_SQL.format(where="1") + " LIMIT ?", (batch_size,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                PENDING_GAME_ROWS_SQL.format(where="p.game_key > ?") + " LIMIT ?",
+                (after, batch_size),
+            ).fetchall()
+        if not rows:
+            break
+        if len(rows) == batch_size:
+            # The LIMIT may have cut the last game short; take all of it.
+            last_game = rows[-1]["game_key"]
+            rows = [row for row in rows if row["game_key"] != last_game]
+            rows.extend(
+                conn.execute(
+                    PENDING_GAME_ROWS_SQL.format(where="p.game_key = ?"), (last_game,)
+                ).fetchall()
+            )
+        after = str(rows[-1]["game_key"])
+
+        runs: dict[str, list[tuple[str, str, int]]] = {}
+        seen: set[str] = set()
+        for row in rows:
+            if row["eval_key"] in seen:
+                continue
+            if remaining is not None and len(seen) >= remaining:
+                break
+            seen.add(row["eval_key"])
+            runs.setdefault(row["game_key"], []).append(
+                (str(row["eval_key"]), str(row["fen"]), int(row["piece_count"]))
+            )
+        if remaining is not None:
+            remaining -= len(seen)
+        yield list(runs.values())
+
+
 def evaluate_pending(
     conn: sqlite3.Connection,
     settings: EvalSettings,
@@ -965,6 +1394,59 @@ def evaluate_pending(
         if progress_callback is not None:
             progress_callback(completed, total_pending)
 
+    shared_cache = EvaluationCache(settings.eval_cache) if settings.eval_cache else None
+    profiles = shared_cache_profiles(settings) if shared_cache is not None else None
+    updates: list[tuple[Any, ...]] = []
+
+    def commit_batch() -> None:
+        write_evaluations(conn, updates)
+        updates.clear()
+        conn.commit()
+        report_progress()
+
+    def pending_runs() -> Iterable[list[list[tuple[str, str, int]]]]:
+        if settings.game_order and not settings.tablebase_only:
+            yield from pending_game_runs(
+                conn, max_evals=settings.max_evals, batch_size=batch_size
+            )
+            return
+        for batch in pending_batches(conn, max_evals=settings.max_evals, batch_size=batch_size):
+            yield [[task] for task in batch]
+
+    def cached_batches() -> Iterable[
+        tuple[list[list[tuple[str, str, int]]], dict[str, tuple[str, str]]]
+    ]:
+        """Yield (runs of tasks to evaluate, cache slots), writing shared-cache hits as we go."""
+        nonlocal completed
+        for runs in pending_runs():
+            if shared_cache is None or profiles is None:
+                yield runs, {}
+                continue
+            hits, misses, slots = split_cached_tasks(
+                [task for run in runs for task in run],
+                shared_cache,
+                profiles,
+                tablebase_threshold=settings.tablebase_threshold,
+            )
+            for eval_key, result in hits:
+                updates.append(evaluation_to_update(eval_key, result))
+                completed += 1
+                if progress is not None:
+                    progress.update(1)
+            missing = {eval_key for eval_key, _, _ in misses}
+            yield [
+                kept for run in runs if (kept := [task for task in run if task[0] in missing])
+            ], slots
+
+    def record(eval_key: str, result: EvaluationResult, slots: dict[str, tuple[str, str]]) -> None:
+        nonlocal completed
+        updates.append(evaluation_to_update(eval_key, result))
+        if shared_cache is not None and eval_key in slots:
+            shared_cache.put_result(*slots[eval_key], result)
+        completed += 1
+        if progress is not None:
+            progress.update(1)
+
     if settings.workers <= 1:
         _init_worker(
             settings.syzygy_dirs,
@@ -975,22 +1457,108 @@ def evaluate_pending(
             settings.tablebase_threshold,
             settings.tablebase_only,
             settings.probe_dtz,
+            settings.sf_hash_mb,
+            settings.sf_adaptive,
         )
         try:
-            for batch in pending_batches(conn, max_evals=settings.max_evals, batch_size=batch_size):
-                for task in batch:
-                    eval_key, result = _evaluate_task(task)
-                    update_evaluation(conn, eval_key, result)
-                    completed += 1
-                    if progress is not None:
-                        progress.update(1)
-                conn.commit()
-                report_progress()
+            for runs, slots in cached_batches():
+                for run in runs:
+                    for task in run:
+                        eval_key, result = _evaluate_task(task)
+                        record(eval_key, result, slots)
+                commit_batch()
         finally:
             if _WORKER_STOCKFISH is not None:
                 _WORKER_STOCKFISH.close()
             if _WORKER_TABLEBASE is not None:
                 _WORKER_TABLEBASE.close()
+            if shared_cache is not None:
+                shared_cache.close()
+            if progress is not None:
+                progress.close()
+        return completed
+
+    if not settings.tablebase_only:
+        # Stockfish searches go to one in-process engine pool and tablebase
+        # probes to a process pool. Each batch is submitted before the one
+        # ahead of it is written back, so neither pool idles at a batch boundary.
+        # The probe pool forks before the engine pool starts its loop thread.
+        submitted: deque[
+            tuple[Any, list[tuple[str, Future[EvaluationResult]]], dict[str, tuple[str, str]]]
+        ] = deque()
+        in_flight: set[str] = set()
+
+        def write_back_oldest() -> None:
+            probes, searches, slots = submitted.popleft()
+            for eval_key, result in probes.get():
+                record(eval_key, result, slots)
+                in_flight.discard(eval_key)
+            for eval_key, search in searches:
+                record(eval_key, search.result(), slots)
+                in_flight.discard(eval_key)
+            commit_batch()
+
+        try:
+            with Pool(
+                processes=settings.workers,
+                initializer=_init_worker,
+                initargs=(
+                    settings.syzygy_dirs,
+                    None,
+                    settings.sf_threads,
+                    settings.sf_time_seconds,
+                    settings.draw_threshold_cp,
+                    settings.tablebase_threshold,
+                    True,
+                    settings.probe_dtz,
+                ),
+            ) as probe_pool:
+                engine_pool = EnginePool(
+                    settings.stockfish_bin,
+                    engines=settings.workers,
+                    threads=settings.sf_threads,
+                    hash_mb=settings.sf_hash_mb,
+                    sf_time_seconds=settings.sf_time_seconds,
+                    draw_threshold_cp=settings.draw_threshold_cp,
+                    adaptive=AdaptiveBudget() if settings.sf_adaptive else None,
+                )
+                try:
+                    for runs, slots in cached_batches():
+                        probe_tasks = []
+                        searches = []
+                        for run in runs:
+                            # A key shared by several games can come back
+                            # while its first evaluation is still in flight.
+                            run = [task for task in run if task[0] not in in_flight]
+                            in_flight.update(eval_key for eval_key, _, _ in run)
+                            probe_tasks.extend(
+                                task for task in run if task[2] <= settings.tablebase_threshold
+                            )
+                            engine_tasks = [
+                                task for task in run if task[2] > settings.tablebase_threshold
+                            ]
+                            if not engine_tasks:
+                                continue
+                            # A game's plies go to one engine, in order, to share its hash.
+                            searches.extend(
+                                zip(
+                                    [eval_key for eval_key, _, _ in engine_tasks],
+                                    engine_pool.submit_run(
+                                        [chess.Board(fen) for _, fen, _ in engine_tasks]
+                                    ),
+                                )
+                            )
+                        probes = probe_pool.map_async(_evaluate_task, probe_tasks, chunksize=128)
+                        submitted.append((probes, searches, slots))
+                        if len(submitted) > 1:
+                            write_back_oldest()
+                    while submitted:
+                        write_back_oldest()
+                finally:
+                    engine_pool.close()
+        finally:
+            if shared_cache is not None:
+                shared_cache.close()
             if progress is not None:
                 progress.close()
         return completed
@@ -1010,21 +1578,98 @@ def evaluate_pending(
                 settings.probe_dtz,
             ),
         ) as pool:
-            for batch in pending_batches(conn, max_evals=settings.max_evals, batch_size=batch_size):
+            for runs, slots in cached_batches():
+                batch = [task for run in runs for task in run]
                 for eval_key, result in pool.imap_unordered(_evaluate_task, batch, chunksize=128):
-                    update_evaluation(conn, eval_key, result)
-                    completed += 1
-                    if progress is not None:
-                        progress.update(1)
-                conn.commit()
-                report_progress()
+                    record(eval_key, result, slots)
+                commit_batch()
     finally:
+        if shared_cache is not None:
+            shared_cache.close()
         if progress is not None:
             progress.close()
 
     return completed
 
 
+@lru_cache(maxsize=None)
+def _supports_native_syzygy_eval(binary: str) -> bool:
+    try:
+        completed = subprocess.run(
+            [binary, "fce-syzygy-eval", "--help"],
+            check=False,
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return completed.returncode == 0 and "--syzygy-dir" in completed.stdout
+
+
+def native_eval_binary(settings: EvalSettings) -> Path | None:
+    """The ``pgn-utils`` binary to evaluate pending rows with, if this profile allows it.
+
+    ``pgn-utils fce-syzygy-eval`` writes the same ``evaluations`` columns as
+    the Python pool, but only for the plain tablebase-only profile: it does
+    not probe DTZ and cannot read or fill the shared ``--eval-cache``.
+    """
+    if not (
+        settings.native_eval
+        and settings.tablebase_only
+        and settings.syzygy_dirs
+        and not settings.probe_dtz
+        and settings.eval_cache is None
+    ):
+        return None
+    binary = settings.pgn_utils_bin or find_pgn_utils_binary()
+    if binary is None or not _supports_native_syzygy_eval(str(binary)):
+        return None
+    return binary
+
+
+def evaluate_pending_native(settings: EvalSettings, binary: Path) -> int:
+    """Evaluate pending tablebase rows with ``pgn-utils fce-syzygy-eval``.
+
+    The snapshot DB must not be open elsewhere: the helper takes an
+    exclusive lock. Returns the number of evaluations written.
+    """
+    command = [
+        str(binary),
+        "fce-syzygy-eval",
+        "--no-progress",
+        "--db",
+        str(settings.output_db),
+        "--max-pieces",
+        str(settings.tablebase_threshold),
+        "--batch-rows",
+        str(max(4096, settings.workers * 1024)),
+        "--workers",
+        str(max(1, settings.workers)),
+    ]
+    for syzygy_dir in settings.syzygy_dirs:
+        command.extend(["--syzygy-dir", str(syzygy_dir)])
+    if settings.max_evals is not None:
+        command.extend(["--max-evals", str(settings.max_evals)])
+    completed = subprocess.run(command, check=False, capture_output=True, text=True)
+    if completed.returncode != 0:
+        detail = completed.stderr.strip() or completed.stdout.strip()
+        raise EvalSnapshotError(
+            f"native Syzygy evaluation failed with exit code {completed.returncode}"
+            + (f": {detail}" if detail else "")
+        )
+    stats_line = next(
+        (line.strip() for line in reversed(completed.stdout.splitlines()) if line.strip()),
+        "",
+    )
+    try:
+        return int(json.loads(stats_line)["attempted"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise EvalSnapshotError(
+            f"native Syzygy evaluation did not return JSON stats: {stats_line!r}"
+        ) from exc
+
+
 def refresh_aggregates(
     conn: sqlite3.Connection,
     *,
@@ -1038,7 +1683,7 @@ def refresh_aggregates(
         INSERT INTO ending_wdl (
             {column_names}
         )
-        WITH classified AS (
+        WITH joined AS (
             SELECT
                 p.ending,
                 p.material_label,
@@ -1047,41 +1692,53 @@ def refresh_aggregates(
                 p.result,
                 e.eval_status,
                 e.eval_source,
-                e.winning_side,
+                {POSITION_WINNING_SIDE_SQL} AS winning_side
+            FROM positions p
+            JOIN evaluations e ON e.eval_key = p.eval_key
+        ),
+        classified AS (
+            SELECT
+                ending,
+                material_label,
+                piece_count,
+                material_side,
+                result,
+                eval_status,
+                eval_source,
+                winning_side,
                 CASE
-                    WHEN e.eval_status != 'ok'
-                      OR e.winning_side = 'unknown'
-                      OR p.material_side = 'unknown' THEN 'unknown'
-                    WHEN p.material_side = 'symmetric'
-                      AND e.winning_side IN ('white', 'black') THEN 'decisive'
-                    WHEN p.material_side = 'symmetric'
-                      AND e.winning_side = 'draw' THEN 'draw'
-                    WHEN p.material_side IN ('white', 'black')
-                      AND e.winning_side = p.material_side THEN 'win'
-                    WHEN p.material_side IN ('white', 'black')
-                      AND e.winning_side = 'draw' THEN 'draw'
-                    WHEN p.material_side = 'white'
-                      AND e.winning_side = 'black' THEN 'loss'
-                    WHEN p.material_side = 'black'
-                      AND e.winning_side = 'white' THEN 'loss'
+                    WHEN eval_status != 'ok'
+                      OR winning_side = 'unknown'
+                      OR material_side = 'unknown' THEN 'unknown'
+                    WHEN material_side = 'symmetric'
+                      AND winning_side IN ('white', 'black') THEN 'decisive'
+                    WHEN material_side = 'symmetric'
+                      AND winning_side = 'draw' THEN 'draw'
+                    WHEN material_side IN ('white', 'black')
+                      AND winning_side = material_side THEN 'win'
+                    WHEN material_side IN ('white', 'black')
+                      AND winning_side = 'draw' THEN 'draw'
+                    WHEN material_side = 'white'
+                      AND winning_side = 'black' THEN 'loss'
+                    WHEN material_side = 'black'
+                      AND winning_side = 'white' THEN 'loss'
                     ELSE 'unknown'
                 END AS tb_outcome,
                 CASE
-                    WHEN p.result = '1/2-1/2' THEN 'draw'
-                    WHEN p.material_side = 'symmetric'
-                      AND p.result IN ('1-0', '0-1') THEN 'decisive'
-                    WHEN p.material_side = 'white'
-                      AND p.result = '1-0' THEN 'win'
-                    WHEN p.material_side = 'white'
-                      AND p.result = '0-1' THEN 'loss'
-                    WHEN p.material_side = 'black'
-                      AND p.result = '0-1' THEN 'win'
-                    WHEN p.material_side = 'black'
-                      AND p.result = '1-0' THEN 'loss'
+                    WHEN result = '1/2-1/2' THEN 'draw'
+                    WHEN material_side = 'symmetric'
+                      AND result IN ('1-0', '0-1') THEN 'decisive'
+                    WHEN material_side = 'white'
+                      AND result = '1-0' THEN 'win'
+                    WHEN material_side = 'white'
+                      AND result = '0-1' THEN 'loss'
+                    WHEN material_side = 'black'
+                      AND result = '0-1' THEN 'win'
+                    WHEN material_side = 'black'
+                      AND result = '1-0' THEN 'loss'
                     ELSE 'unknown'
                 END AS result_outcome
-            FROM positions p
-            JOIN evaluations e ON e.eval_key = p.eval_key
+            FROM joined
         )
         SELECT
             ending,
@@ -1168,7 +1825,18 @@ def build_eval_snapshot(
         ensure_indexes(conn)
         skipped = mark_tablebase_skips(conn, settings)
         pending_before = pending_count(conn)
-        completed = evaluate_pending(conn, settings)
+        completed: int | None = None
+        native_binary = native_eval_binary(settings) if pending_before else None
+        if native_binary is not None:
+            conn.commit()
+            conn.close()
+            try:
+                completed = evaluate_pending_native(settings, native_binary)
+            except EvalSnapshotError as exc:
+                print(f"Warning: {exc}; using the Python evaluator.", file=sys.stderr)
+            conn = connect_snapshot_db(settings.output_db)
+        if completed is None:
+            completed = evaluate_pending(conn, settings)
         pending_after = pending_count(conn)
         aggregate_rows = refresh_aggregates(
             conn,
@@ -1206,6 +1874,27 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser.add_argument("--stockfish-bin")
     parser.add_argument("--sf-time-seconds", type=float, default=DEFAULT_SF_TIME_SECONDS)
     parser.add_argument("--sf-threads", type=int, default=DEFAULT_SF_THREADS)
+    parser.add_argument(
+        "--sf-hash-mb",
+        type=int,
+        help="Stockfish Hash size in MB for each engine. Defaults to the engine's own.",
+    )
+    parser.add_argument(
+        "--game-order",
+        action="store_true",
+        help=(
+            "Evaluate pending positions game by game in ply order, each game's "
+            "Stockfish searches on one engine so consecutive plies reuse its hash."
+        ),
+    )
+    parser.add_argument(
+        "--sf-adaptive",
+        action="store_true",
+        help=(
+            "Stop each Stockfish search once its win/draw/loss verdict has been stable "
+            "for a few depths or a mate is found; borderline positions keep the full time."
+        ),
+    )
     parser.add_argument("--draw-threshold-cp", type=int, default=DEFAULT_DRAW_THRESHOLD_CP)
     parser.add_argument(
         "--tablebase-only",
@@ -1217,12 +1906,41 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
         action="store_true",
         help="Also probe Syzygy DTZ. Off by default because WDL stats only need WDL.",
     )
-    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Parallel evaluators: Stockfish processes in one engine pool, or "
+            "Syzygy worker processes for --tablebase-only."
+        ),
+    )
     parser.add_argument("--max-markers", type=int)
     parser.add_argument("--max-evals", type=int)
     parser.add_argument("--hash-markers", action="store_true")
     parser.add_argument("--force", action="store_true")
     parser.add_argument("--aggregate-csv", type=Path)
+    parser.add_argument(
+        "--eval-cache",
+        type=Path,
+        help="Shared SQLite evaluation cache; reuse positions other tools already evaluated.",
+    )
+    parser.add_argument(
+        "--pgn-utils-bin",
+        type=Path,
+        help=(
+            "pgn-utils binary for native Syzygy evaluation. Defaults to the repo build, "
+            "$PGN_UTILS_BIN or pgn-utils on PATH."
+        ),
+    )
+    parser.add_argument(
+        "--no-native-eval",
+        action="store_true",
+        help=(
+            "Always evaluate with the Python pool. By default --tablebase-only runs "
+            "without --probe-dtz or --eval-cache use pgn-utils fce-syzygy-eval when available."
+        ),
+    )
     return parser.parse_args(argv)
 
 
@@ -1235,6 +1953,9 @@ def main(argv: list[str] | None = None) -> int:
         stockfish_bin=args.stockfish_bin,
         sf_time_seconds=args.sf_time_seconds,
         sf_threads=args.sf_threads,
+        sf_hash_mb=args.sf_hash_mb,
+        sf_adaptive=args.sf_adaptive,
+        game_order=args.game_order,
         draw_threshold_cp=args.draw_threshold_cp,
         tablebase_only=args.tablebase_only,
         probe_dtz=args.probe_dtz,
@@ -1243,6 +1964,9 @@ def main(argv: list[str] | None = None) -> int:
         max_evals=args.max_evals,
         hash_markers=args.hash_markers,
         force=args.force,
+        eval_cache=args.eval_cache.expanduser() if args.eval_cache else None,
+        native_eval=not args.no_native_eval,
+        pgn_utils_bin=args.pgn_utils_bin.expanduser() if args.pgn_utils_bin else None,
     )
     try:
         stats = build_eval_snapshot(settings, aggregate_csv=args.aggregate_csv)
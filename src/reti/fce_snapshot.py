@@ -16,6 +16,7 @@ from typing import Any
 
 from reti.common.hashing import canonical_json, manifest_fingerprint, sha256_file
 from reti.common.json_io import load_json, write_json
+from reti.common.pgn_catalog import PgnCatalog
 from reti.common.source_metadata import (
     source_bucket_key,
     source_bucket_label,
@@ -142,7 +143,17 @@ class SnapshotBuildResult:
     up_to_date: bool = False
 
 
-def file_signature(path: Path, *, include_hash: bool) -> dict[str, Any]:
+def file_signature(
+    path: Path,
+    *,
+    include_hash: bool,
+    catalog: PgnCatalog | None = None,
+) -> dict[str, Any]:
+    """Path, size and mtime, plus SHA-256 when ``include_hash``.
+
+    With ``catalog`` the hash is memoized in the PGN catalog, so unchanged
+    source PGNs are not reread.
+    """
     if not path.exists():
         raise SnapshotError(f"Required input does not exist: {path}")
     stat = path.stat()
@@ -152,7 +163,7 @@ def file_signature(path: Path, *, include_hash: bool) -> dict[str, Any]:
         "mtimeNs": stat.st_mtime_ns,
     }
     if include_hash:
-        payload["sha256"] = sha256_file(path)
+        payload["sha256"] = catalog.sha256(path) if catalog is not None else sha256_file(path)
     return payload
 
 
@@ -299,13 +310,18 @@ def source_pgn_signatures(
     sources: tuple[str, ...],
     corpus_dir: Path,
     hash_source_pgns: bool,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> list[dict[str, Any]]:
     signatures = []
     for source in sources:
         signatures.append(
             {
                 "sourcePgn": source,
-                **file_signature(corpus_dir / source, include_hash=hash_source_pgns),
+                **file_signature(
+                    corpus_dir / source,
+                    include_hash=hash_source_pgns,
+                    catalog=pgn_catalog,
+                ),
                 "hashIncluded": hash_source_pgns,
             }
         )
@@ -322,6 +338,7 @@ def build_current_manifest(
     cql_table_dir: Path,
     hash_source_pgns: bool,
     examples_jsonl: Path | None,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> tuple[dict[str, Any], SummaryData]:
     summary_data = load_summary_data(summary_csv)
     inputs: dict[str, Any] = {
@@ -333,6 +350,7 @@ def build_current_manifest(
             sources=summary_data.sources,
             corpus_dir=corpus_dir,
             hash_source_pgns=hash_source_pgns,
+            pgn_catalog=pgn_catalog,
         ),
     }
     if examples_jsonl is not None:
@@ -3253,6 +3271,7 @@ def build_fce_gigabase_snapshot(
     examples_jsonl: str | Path | None = None,
     hash_source_pgns: bool = False,
     force: bool = False,
+    pgn_catalog: PgnCatalog | None = None,
 ) -> SnapshotBuildResult:
     if total_games <= 0:
         raise SnapshotError("--total-games must be a positive integer")
@@ -3275,6 +3294,7 @@ def build_fce_gigabase_snapshot(
         cql_table_dir=cql_path,
         hash_source_pgns=hash_source_pgns,
         examples_jsonl=examples_path,
+        pgn_catalog=pgn_catalog,
     )
 
     manifest_path = output_path / "manifest.json"
@@ -3379,6 +3399,14 @@ def parse_build_args(argv: list[str] | None = None) -> argparse.Namespace:
         action="store_true",
         help="Hash full source PGNs for stronger provenance.",
     )
+    parser.add_argument(
+        "--no-pgn-catalog",
+        action="store_true",
+        help=(
+            "Rehash source PGNs instead of reusing hashes memoized in the "
+            "per-PGN catalog (~/.cache/reti/pgn-catalog)."
+        ),
+    )
     parser.add_argument("--force", action="store_true")
     return parser.parse_args(argv)
 
@@ -3397,6 +3425,7 @@ def build_main(argv: list[str] | None = None) -> int:
             examples_jsonl=args.examples_jsonl,
             hash_source_pgns=args.hash_source_pgns,
             force=args.force,
+            pgn_catalog=None if args.no_pgn_catalog else PgnCatalog(),
         )
     except SnapshotError as exc:
         print(f"Snapshot build failed: {exc}")
@@ -8,6 +8,8 @@ import subprocess
 from dataclasses import dataclass
 from pathlib import Path
 
+from reti.common.compressed_pgn import open_pgn, pgn_stdin_argument
+
 
 @dataclass(frozen=True)
 class FastPgnRewriteStats:
@@ -307,16 +309,20 @@ def _rewrite_pgn_fast_native(
     *,
     preserve_markup: bool = False,
 ) -> FastPgnRewriteStats:
-    command = [str(binary_path), str(source_path), str(destination_path)]
-    if preserve_markup:
-        command.insert(1, "--preserve-markup")
-    process = subprocess.run(
-        command,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    with pgn_stdin_argument(source_path) as (source_argument, stdin, feed):
+        command = [str(binary_path), source_argument, str(destination_path)]
+        if preserve_markup:
+            command.insert(1, "--preserve-markup")
+        process = subprocess.run(
+            command,
+            stdin=stdin,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if feed is not None and feed.error is not None:
+        raise feed.error
     if process.returncode != 0:
         raise RuntimeError(process.stderr.strip() or "fast repair native helper failed")
     return _parse_native_stats(process.stdout)
@@ -390,7 +396,7 @@ def rewrite_pgn_fast_python(
 ) -> FastPgnRewriteStats:
     # Buffer the lexer output so strip mode can be re-flowed before writing.
     buffer = io.StringIO()
-    with source_path.open("rb") as raw_handle:
+    with open_pgn(source_path) as raw_handle:
         text_handle = io.TextIOWrapper(
             raw_handle,
             encoding="utf-8",
@@ -416,13 +422,17 @@ def _inspect_pgn_fast_native(
     source_path: Path,
     binary_path: Path,
 ) -> FastPgnRewriteStats:
-    process = subprocess.run(
-        [str(binary_path), "--inspect", str(source_path)],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    with pgn_stdin_argument(source_path) as (source_argument, stdin, feed):
+        process = subprocess.run(
+            [str(binary_path), "--inspect", source_argument],
+            stdin=stdin,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+    if feed is not None and feed.error is not None:
+        raise feed.error
     if process.returncode != 0:
         raise RuntimeError(process.stderr.strip() or "fast repair native helper failed")
     return _parse_native_stats(process.stdout)
@@ -440,7 +450,7 @@ def inspect_pgn_fast(source_path: Path) -> FastPgnRewriteStats:
         except Exception:
             pass
 
-    with source_path.open("rb") as raw_handle:
+    with open_pgn(source_path) as raw_handle:
         text_handle = io.TextIOWrapper(
             raw_handle,
             encoding="utf-8",
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import importlib
+import os
+import stat
 import subprocess
 import sys
 import tempfile
+import time
 import types
 import unittest
 from pathlib import Path
@@ -40,6 +44,20 @@ sys.modules.setdefault("tqdm", types.SimpleNamespace(tqdm=_dummy_tqdm))
 import reti.analyse_cql as analyse_cql
 import reti.cql.preflight as preflight_module
 
+# Further reti modules go through importlib so they still load after the tqdm stub.
+sharding = importlib.import_module("reti.cql.sharding")
+CqliBackend = importlib.import_module("reti.cql.backend").CqliBackend
+CqlResultCache = importlib.import_module("reti.cql.cache").CqlResultCache
+split_pgn_byte_ranges = sharding.split_pgn_byte_ranges
+stitch_pgn_outputs = sharding.stitch_pgn_outputs
+
+
+def _games_pgn(count: int) -> str:
+    return "".join(
+        f'[Event "g{index}"]\n[Result "*"]\n\n1. e4 e5 {{note}} *\n\n'
+        for index in range(count)
+    )
+
 
 class TestAnalyseCqlPreflight(unittest.TestCase):
     def test_parse_args_defaults_to_sequential_jobs_and_auto_cql_threads(self):
@@ -208,6 +226,50 @@ class TestAnalyseCqlPreflight(unittest.TestCase):
         self.assertEqual(progress.kwargs["unit"], "B")
         self.assertEqual(progress.updates, [small_size, large_size])
 
+    def test_parallel_preflight_keeps_input_order_for_results_and_messages(self):
+        real_inspect = preflight_module.inspect_pgn_fast
+        delays = {"a.pgn": 0.3, "b.pgn": 0.15, "c.pgn": 0.0}
+
+        def slow_inspect(pgn_path):
+            time.sleep(delays[pgn_path.name])
+            return real_inspect(pgn_path)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            pgns = [root / name for name in delays]
+            pgns[0].write_bytes(b'[Event "a"]\n\n1. e4 \x1f*\n')
+            pgns[1].write_text("*\n", encoding="utf-8")
+            pgns[2].write_bytes(b'[Event "c"]\n\n1. d4 \x1f*\n')
+
+            with mock.patch.object(
+                preflight_module, "inspect_pgn_fast", slow_inspect
+            ), mock.patch.object(preflight_module, "progress_write") as write_mock:
+                results = preflight_module.preflight_pgn_files(
+                    analyse_cql.InputCollection(root=root, files=pgns),
+                    analyse_cql.Cql6Backend(Path("/fake/cql")),
+                    root / "runtime",
+                    workers=3,
+                )
+
+        self.assertEqual([result.pgn_path for result in results], pgns)
+        self.assertEqual(
+            [result.success for result in results], [True, False, True]
+        )
+        messages = [call.args[0] for call in write_mock.call_args_list]
+        self.assertEqual(len(messages), 3)
+        self.assertIn("a.pgn", messages[0])
+        self.assertIn("FAILED preflight: b.pgn", messages[1])
+        self.assertIn("c.pgn", messages[2])
+
+    def test_resolve_preflight_workers_caps_auto(self):
+        with mock.patch.object(preflight_module.os, "cpu_count", return_value=64):
+            self.assertEqual(
+                preflight_module.resolve_preflight_workers("auto", 120),
+                preflight_module.AUTO_PREFLIGHT_WORKER_CAP,
+            )
+        self.assertEqual(preflight_module.resolve_preflight_workers(16, 3), 3)
+        self.assertEqual(preflight_module.resolve_preflight_workers("auto", 0), 1)
+
     @mock.patch("reti.cql.runner.subprocess.run")
     def test_run_cql_job_uses_explicit_cql_threads(self, run_mock):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -415,6 +477,394 @@ class TestAnalyseCqlPreflight(unittest.TestCase):
             run_args = run_mock.call_args.args[0]
             self.assertEqual(run_args[2], str(result.runtime_pgn_path))
 
+    def test_parse_args_accepts_shards(self):
+        args = analyse_cql.parse_args(
+            ["--pgn", "games", "--cql-bin", "cql", "--scripts", "filters", "--shards", "8"]
+        )
+        self.assertEqual(args.shards, 8)
+        args = analyse_cql.parse_args(
+            ["--pgn", "games", "--cql-bin", "cql", "--scripts", "filters", "--shards", "auto"]
+        )
+        self.assertEqual(args.shards, "auto")
+        with self.assertRaises(SystemExit):
+            analyse_cql.parse_args(
+                ["--pgn", "games", "--cql-bin", "cql", "--scripts", "filters", "--shards", "0"]
+            )
+
+    def test_split_pgn_byte_ranges_are_game_aligned_and_cover_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pgn = Path(tmpdir) / "db.pgn"
+            pgn.write_text(_games_pgn(10), encoding="utf-8")
+            data = pgn.read_bytes()
+
+            ranges = split_pgn_byte_ranges(pgn, 4)
+            few_games = Path(tmpdir) / "two.pgn"
+            few_games.write_text(_games_pgn(2), encoding="utf-8")
+            collapsed = split_pgn_byte_ranges(few_games, 8)
+
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(data))
+        self.assertEqual(b"".join(data[start:end] for start, end in ranges), data)
+        for start, _ in ranges[1:]:
+            self.assertTrue(data[start:].startswith(b"[Event "))
+        self.assertEqual(len(collapsed), 2)
+
+    def test_stitch_pgn_outputs_separates_parts_and_skips_empty(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            first = root / "a.pgn"
+            empty = root / "b.pgn"
+            last = root / "c.pgn"
+            first.write_text('[Event "a"]\n\n*\n', encoding="utf-8")
+            empty.write_text("", encoding="utf-8")
+            last.write_text('[Event "c"]\n\n*\n', encoding="utf-8")
+            out = root / "out.pgn"
+
+            stitch_pgn_outputs([first, empty, root / "missing.pgn", last], out)
+            stitched = out.read_text(encoding="utf-8")
+
+        self.assertEqual(stitched, '[Event "a"]\n\n*\n\n[Event "c"]\n\n*\n')
+
+    def test_merge_outputs_by_cql_copies_bytes_and_sums_match_counts(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            script = root / "cql" / "mate.cql"
+            script.parent.mkdir()
+            script.write_text("cql() mate\n", encoding="utf-8")
+            out_dir = root / "out"
+            outputs = [out_dir / "a" / "mate.pgn", out_dir / "b" / "mate.pgn"]
+            for output in outputs:
+                output.parent.mkdir(parents=True)
+            outputs[0].write_bytes(b'[Event "a"]\n\n1. e4 \xff *')
+            outputs[1].write_bytes(b'[Event "b"]\n\n*\n[Event "c"]\n\n*\n')
+            results = [
+                analyse_cql.JobResult(
+                    pgn_path=root / f"{name}.pgn",
+                    cql_path=script,
+                    output_pgn=output,
+                    success=True,
+                    match_count=count,
+                    returncode=0,
+                    stdout="",
+                    stderr="",
+                )
+                for name, output, count in (("a", outputs[0], 1), ("b", outputs[1], None))
+            ]
+
+            with mock.patch(
+                "reti.cql.output.count_games_in_pgn", return_value=2
+            ) as count_mock, mock.patch("builtins.print") as print_mock:
+                [merged] = analyse_cql.merge_outputs_by_cql(
+                    results,
+                    analyse_cql.InputCollection(root=script.parent, files=[script]),
+                    out_dir,
+                )
+
+            self.assertEqual(
+                merged.read_bytes(),
+                b'[Event "a"]\n\n1. e4 \xff *\n\n[Event "b"]\n\n*\n[Event "c"]\n\n*\n\n',
+            )
+            count_mock.assert_called_once_with(outputs[1])
+            self.assertIn("(3 game(s))", print_mock.call_args.args[0])
+            self.assertFalse(any(output.exists() for output in outputs))
+
+    @mock.patch("reti.cql.runner.subprocess.run")
+    def test_sharded_job_matrix_stitches_outputs_into_pair_result(self, run_mock):
+        inputs_seen: list[str] = []
+        input_kinds: list[bool] = []
+
+        def fake_run(command, **_: object):
+            input_path = Path(command[command.index("-i") + 1])
+            output_path = Path(command[command.index("-o") + 1])
+            inputs_seen.append(str(input_path))
+            input_kinds.append(stat.S_ISFIFO(os.stat(input_path).st_mode))
+            output_path.write_bytes(input_path.read_bytes())
+            return subprocess.CompletedProcess(
+                args=command, returncode=0, stdout="", stderr=""
+            )
+
+        run_mock.side_effect = fake_run
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            pgn = root / "db.pgn"
+            pgn.write_text(_games_pgn(9), encoding="utf-8")
+            cql = root / "filter.cql"
+            cql.write_text("cql() check\n", encoding="utf-8")
+            out = root / "out" / "db" / "filter.pgn"
+            spec = analyse_cql.JobSpec(
+                job_index=1,
+                pair_label="db.pgn x filter.cql",
+                source_pgn_path=pgn,
+                runtime_pgn_path=pgn,
+                cql_path=cql,
+                output_pgn=out,
+            )
+
+            results = analyse_cql.run_job_matrix(
+                Path("/fake/cql"),
+                [spec],
+                jobs=3,
+                cql_threads="auto",
+                shards=3,
+                shard_root=root / "shards",
+            )
+
+            self.assertEqual(len(results), 1)
+            result = results[0]
+            self.assertTrue(result.success)
+            self.assertEqual(result.output_pgn, out)
+            self.assertEqual(result.pgn_path, pgn)
+            self.assertEqual(result.match_count, 9)
+            self.assertEqual(out.read_text(encoding="utf-8"), pgn.read_text(encoding="utf-8"))
+            self.assertEqual(len(inputs_seen), 3)
+            self.assertNotIn(str(pgn), inputs_seen)
+            # Shards are streamed through named pipes, never copied.
+            self.assertEqual(input_kinds, [True, True, True])
+            self.assertIn("-threads", run_mock.call_args.args[0])
+
+    @mock.patch("reti.cql.runner.subprocess.run")
+    def test_sharded_job_matrix_copies_shards_lazily_for_seekable_backends(self, run_mock):
+        inputs_seen: list[Path] = []
+
+        def fake_run(command, **_: object):
+            input_path = Path(command[command.index("-i") + 1])
+            output_path = Path(command[command.index("-o") + 1])
+            self.assertTrue(input_path.is_file())
+            # Only the running job's shard exists on disk.
+            self.assertEqual(list(output_path.parent.parent.rglob("input-*.pgn")), [input_path])
+            inputs_seen.append(input_path)
+            output_path.write_bytes(input_path.read_bytes())
+            return subprocess.CompletedProcess(
+                args=command, returncode=0, stdout="", stderr=""
+            )
+
+        run_mock.side_effect = fake_run
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            pgn = root / "db.pgn"
+            pgn.write_text(_games_pgn(9), encoding="utf-8")
+            cql = root / "filter.cql"
+            cql.write_text("cql() check\n", encoding="utf-8")
+            out = root / "out" / "db" / "filter.pgn"
+            spec = analyse_cql.JobSpec(
+                job_index=1,
+                pair_label="db.pgn x filter.cql",
+                source_pgn_path=pgn,
+                runtime_pgn_path=pgn,
+                cql_path=cql,
+                output_pgn=out,
+            )
+
+            [result] = analyse_cql.run_job_matrix(
+                CqliBackend(Path("/fake/cqli")),
+                [spec],
+                jobs=1,
+                cql_threads="auto",
+                shards=3,
+                shard_root=root / "shards",
+            )
+
+            self.assertTrue(result.success)
+            self.assertEqual(out.read_text(encoding="utf-8"), pgn.read_text(encoding="utf-8"))
+            self.assertEqual(len(inputs_seen), 3)
+            self.assertFalse(any(path.exists() for path in inputs_seen))
+
+    @mock.patch("reti.cql.runner.subprocess.run")
+    def test_sharded_job_matrix_runs_whole_input_scripts_unsharded(self, run_mock):
+        inputs_seen: list[tuple[str, str]] = []
+
+        def fake_run(command, **_: object):
+            input_path = Path(command[command.index("-i") + 1])
+            output_path = Path(command[command.index("-o") + 1])
+            inputs_seen.append((Path(command[-1]).name, str(input_path)))
+            output_path.write_bytes(input_path.read_bytes())
+            return subprocess.CompletedProcess(
+                args=command, returncode=0, stdout="", stderr=""
+            )
+
+        run_mock.side_effect = fake_run
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            pgn = root / "db.pgn"
+            pgn.write_text(_games_pgn(9), encoding="utf-8")
+            scripts = {
+                "sorted.cql": "cql() sort ply\n",
+                "plain.cql": "// not sorted\ncql() check\n",
+            }
+            specs = []
+            for index, (name, text) in enumerate(scripts.items(), start=1):
+                (root / name).write_text(text, encoding="utf-8")
+                specs.append(
+                    analyse_cql.JobSpec(
+                        job_index=index,
+                        pair_label=f"db.pgn x {name}",
+                        source_pgn_path=pgn,
+                        runtime_pgn_path=pgn,
+                        cql_path=root / name,
+                        output_pgn=root / "out" / "db" / name.replace(".cql", ".pgn"),
+                    )
+                )
+
+            results = analyse_cql.run_job_matrix(
+                Path("/fake/cql"),
+                specs,
+                jobs=1,
+                cql_threads="auto",
+                shards=3,
+                shard_root=root / "shards",
+            )
+
+            self.assertTrue(all(result.success for result in results))
+            self.assertEqual([result.match_count for result in results], [9, 9])
+
+        self.assertEqual(
+            [path for name, path in inputs_seen if name == "sorted.cql"], [str(pgn)]
+        )
+        self.assertEqual(len([name for name, _ in inputs_seen if name == "plain.cql"]), 3)
+
+    @mock.patch("reti.cql.runner.subprocess.run")
+    def test_sharded_job_matrix_fails_pair_when_any_shard_fails(self, run_mock):
+        calls = {"count": 0}
+
+        def fake_run(command, **_: object):
+            calls["count"] += 1
+            output_path = Path(command[command.index("-o") + 1])
+            if calls["count"] == 2:
+                return subprocess.CompletedProcess(
+                    args=command, returncode=-6, stdout="", stderr="boom"
+                )
+            output_path.write_text("", encoding="utf-8")
+            return subprocess.CompletedProcess(
+                args=command, returncode=0, stdout="", stderr=""
+            )
+
+        run_mock.side_effect = fake_run
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            pgn = root / "db.pgn"
+            pgn.write_text(_games_pgn(6), encoding="utf-8")
+            cql = root / "filter.cql"
+            cql.write_text("cql() check\n", encoding="utf-8")
+            out = root / "out.pgn"
+            out.write_text('[Event "stale"]\n\n*\n', encoding="utf-8")
+            spec = analyse_cql.JobSpec(
+                job_index=1,
+                pair_label="db.pgn x filter.cql",
+                source_pgn_path=pgn,
+                runtime_pgn_path=pgn,
+                cql_path=cql,
+                output_pgn=out,
+            )
+
+            results = analyse_cql.run_job_matrix(
+                Path("/fake/cql"),
+                [spec],
+                jobs=1,
+                cql_threads="auto",
+                shards=3,
+            )
+
+            self.assertFalse(out.exists())
+
+        self.assertFalse(results[0].success)
+        self.assertEqual(results[0].returncode, -6)
+        self.assertEqual(results[0].stderr, "boom")
+
+    def test_parse_args_cache_switches(self):
+        base = ["--pgn", "games", "--cql-bin", "cql", "--scripts", "filters"]
+        args = analyse_cql.parse_args(base + ["--no-cache"])
+        self.assertTrue(args.no_cache)
+        args = analyse_cql.parse_args(base + ["--cache-dir", "/tmp/cache"])
+        self.assertEqual(args.cache_dir, Path("/tmp/cache"))
+        with self.assertRaises(SystemExit):
+            analyse_cql.parse_args(base + ["--no-cache", "--cache-dir", "/tmp/cache"])
+        with self.assertRaises(SystemExit):
+            analyse_cql.parse_args(base + ["--no-cache", "--cache"])
+        args = analyse_cql.parse_args(base)
+        self.assertFalse(args.cache)
+        self.assertIsNone(args.cache_dir)
+        self.assertTrue(analyse_cql.parse_args(base + ["--cache"]).cache)
+
+    @mock.patch("reti.cql.runner.subprocess.run")
+    def test_run_cql_job_restores_cache_hit_without_spawning_cql(self, run_mock):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            binary = root / "cql"
+            binary.write_bytes(b"fake binary")
+            pgn = root / "db.pgn"
+            cql = root / "filter.cql"
+            out = root / "out.pgn"
+            pgn.write_text(_games_pgn(2), encoding="utf-8")
+            cql.write_text("cql() check\n", encoding="utf-8")
+
+            def fake_run(command, **_: object):
+                out.write_text(_games_pgn(2), encoding="utf-8")
+                return subprocess.CompletedProcess(
+                    args=command, returncode=0, stdout="", stderr=""
+                )
+
+            run_mock.side_effect = fake_run
+            cache = CqlResultCache(root / "cache")
+
+            first = analyse_cql.run_cql_job(binary, pgn, pgn, cql, out, cache=cache)
+            out.unlink()
+            # Trailing whitespace and line endings do not change the key.
+            cql.write_text("cql() check   \r\n\n", encoding="utf-8")
+            second = analyse_cql.run_cql_job(binary, pgn, pgn, cql, out, cache=cache, cql_threads=4)
+            restored = out.read_text(encoding="utf-8")
+
+            cql.write_text("cql() mate\n", encoding="utf-8")
+            third = analyse_cql.run_cql_job(binary, pgn, pgn, cql, out, cache=cache)
+
+        self.assertTrue(first.success)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.success)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.match_count, 2)
+        self.assertEqual(restored, _games_pgn(2))
+        self.assertFalse(third.cached)
+        self.assertEqual(run_mock.call_count, 2)
+
+    def test_result_cache_evicts_least_recently_used_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            output = root / "out.pgn"
+            output.write_bytes(b"x" * 100)
+            cache = CqlResultCache(root / "cache", max_bytes=250)
+            for index, key in enumerate(["aa01", "bb02", "cc03"]):
+                cache.store(key, output, index)
+                meta = root / "cache" / key[:2] / f"{key}.json"
+                os.utime(meta, (1_000_000 + index, 1_000_000 + index))
+            cache.evict()
+
+            self.assertIsNone(cache.restore("aa01", root / "restored.pgn"))
+            self.assertEqual(cache.restore("cc03", root / "restored.pgn"), 2)
+
+    def test_result_cache_skips_oversized_outputs_and_scans_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            small = root / "small.pgn"
+            small.write_bytes(b"x" * 10)
+            huge = root / "huge.pgn"
+            huge.write_bytes(b"x" * 1000)
+            cache = CqlResultCache(root / "cache", max_bytes=500)
+            with mock.patch.object(
+                cache, "_scan_entries", wraps=cache._scan_entries
+            ) as scan_mock:
+                for index in range(5):
+                    cache.store(f"aa{index:02d}", small, index)
+                cache.store("bb00", huge, 9)
+
+            self.assertEqual(scan_mock.call_count, 1)
+            self.assertIsNone(cache.restore("bb00", root / "restored.pgn"))
+            for index in range(5):
+                self.assertEqual(cache.restore(f"aa{index:02d}", root / "restored.pgn"), index)
+
 
 if __name__ == "__main__":
     unittest.main()
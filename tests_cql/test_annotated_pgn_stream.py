@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import reti.annotated_pgn as annotated_pgn
+
+
+def _fake_helper(tmp_path: Path, records: list[dict], *, exit_code: int = 0) -> Path:
+    """Write a stand-in for ``pgn-utils annotated-pgn --output -``."""
+    script = tmp_path / "fake-pgn-utils"
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    script.write_text(
+        "#!" + sys.executable + "\n"
+        "import sys\n"
+        f"assert sys.argv[sys.argv.index('--output') + 1] == '-'\n"
+        f"sys.stdout.write({lines!r})\n"
+        "sys.stderr.write('{\"mode\":\"annotated-pgn\",\"games_read\":2}\\n')\n"
+        "sys.stderr.write('helper diagnostics\\n')\n"
+        f"sys.exit({exit_code})\n",
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return script
+
+
+def _record(game_index: int, byte_offset: int) -> dict:
+    return {
+        "schema_version": 1,
+        "game_index": game_index,
+        "byte_offset": byte_offset,
+        "headers": {"Event": f"g{game_index}"},
+        "parse_errors": [],
+        "move_uci_sequence": ["e2e4"],
+        "positions": [
+            {
+                "ply_index": 1,
+                "fullmove_number": 1,
+                "move_san": "e4",
+                "move_uci": "e2e4",
+                "fen": "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1",
+                "side_to_move": "black",
+                "piece_count": 32,
+            }
+        ],
+    }
+
+
+def test_stream_annotated_pgn_yields_games_with_native_offsets(tmp_path: Path) -> None:
+    pgn = tmp_path / "games.pgn"
+    pgn.write_bytes(b"x" * 100)
+    helper = _fake_helper(tmp_path, [_record(1, 40), _record(2, 100)])
+
+    with mock.patch.object(annotated_pgn, "find_pgn_utils_binary", return_value=helper):
+        rows = list(annotated_pgn.stream_annotated_pgn(pgn, marker_text="CQL"))
+
+    assert [(game.game_index, offset) for game, offset in rows] == [(1, 40), (2, 100)]
+    assert rows[0][0].positions[0].move_uci == "e2e4"
+
+
+def test_iter_annotated_pgn_reports_byte_deltas_summing_to_file_size(tmp_path: Path) -> None:
+    pgn = tmp_path / "games.pgn"
+    pgn.write_bytes(b"x" * 100)
+    helper = _fake_helper(tmp_path, [_record(1, 64), _record(2, 64), _record(3, 64)])
+
+    with mock.patch.object(annotated_pgn, "find_pgn_utils_binary", return_value=helper):
+        rows = list(annotated_pgn.iter_annotated_pgn(pgn, marker_text="CQL"))
+
+    assert [bytes_seen for _, bytes_seen in rows] == [64, 0, 36]
+
+
+def test_stream_annotated_pgn_raises_helper_stderr_on_failure(tmp_path: Path) -> None:
+    pgn = tmp_path / "games.pgn"
+    pgn.write_bytes(b"x")
+    helper = _fake_helper(tmp_path, [], exit_code=3)
+
+    with mock.patch.object(annotated_pgn, "find_pgn_utils_binary", return_value=helper):
+        with pytest.raises(RuntimeError, match="helper diagnostics"):
+            annotated_pgn.parse_annotated_pgn(pgn, marker_text="CQL")
+
+
+def test_stream_annotated_pgn_rejects_helpers_that_cannot_stream(tmp_path: Path) -> None:
+    pgn = tmp_path / "games.pgn"
+    pgn.write_bytes(b"x")
+    # An old build writes its games to a file named "-" and only the stats
+    # line to stdout.
+    helper = _fake_helper(tmp_path, [{"mode": "annotated-pgn", "games_read": 1}])
+
+    with mock.patch.object(annotated_pgn, "find_pgn_utils_binary", return_value=helper):
+        with pytest.raises(RuntimeError, match="too old to stream games.*cargo build"):
+            annotated_pgn.parse_annotated_pgn(pgn, marker_text="CQL")
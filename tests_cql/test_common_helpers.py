@@ -1,17 +1,19 @@
 from __future__ import annotations
 
+import errno
 import json
 import importlib.util
+import os
 import sys
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 
-SRC_ROOT = Path(__file__).resolve().parents[1] / "src"
-if str(SRC_ROOT) not in sys.path:
-    sys.path.insert(0, str(SRC_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
+from reti.common.file_copy import append_file, copy_byte_range, pgn_separator_after
 from reti.common.hashing import canonical_json, manifest_fingerprint, sha256_file, sha256_text
 from reti.common.json_io import load_json, write_json
 from reti.common.source_metadata import (
@@ -133,5 +135,58 @@ class HashingTests(unittest.TestCase):
             self.assertEqual(load_json(path), {"a": 1, "b": 2})
 
 
+class FileCopyTests(unittest.TestCase):
+    def _copy_all_ways(self, data: bytes, offset: int, count: int) -> list[bytes]:
+        copies = []
+        unsupported = OSError(errno.EXDEV, "cross-device")
+        patches = [
+            (),
+            (mock.patch.object(os, "copy_file_range", side_effect=unsupported, create=True),),
+            (
+                mock.patch.object(os, "copy_file_range", side_effect=unsupported, create=True),
+                mock.patch.object(os, "sendfile", side_effect=unsupported, create=True),
+            ),
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source_path = Path(tmpdir) / "source.pgn"
+            source_path.write_bytes(data)
+            for index, active in enumerate(patches):
+                out_path = Path(tmpdir) / f"out-{index}.pgn"
+                with source_path.open("rb") as source, out_path.open("wb") as out:
+                    for patch in active:
+                        patch.start()
+                    try:
+                        out.write(b"<")
+                        copied = copy_byte_range(out, source, offset, count)
+                        out.write(b">")
+                    finally:
+                        for patch in active:
+                            patch.stop()
+                self.assertEqual(copied, min(count, max(0, len(data) - offset)))
+                copies.append(out_path.read_bytes())
+        return copies
+
+    def test_copy_byte_range_matches_across_kernel_and_fallback_paths(self) -> None:
+        data = bytes(range(256)) * 1000
+        for offset, count in ((0, len(data)), (1000, 5000), (len(data) - 10, 100)):
+            expected = b"<" + data[offset : offset + count] + b">"
+            self.assertEqual(self._copy_all_ways(data, offset, count), [expected] * 3)
+
+    def test_append_file_returns_tail_for_separator(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            out_path = root / "out.pgn"
+            parts = [b'[Event "a"]\n\n*', b'[Event "b"]\n\n*\n', b"", b"x\n\n"]
+            with out_path.open("wb") as out:
+                for index, part in enumerate(parts):
+                    path = root / f"{index}.pgn"
+                    path.write_bytes(part)
+                    out.write(pgn_separator_after(append_file(out, path)))
+            self.assertEqual(
+                out_path.read_bytes(),
+                b'[Event "a"]\n\n*\n\n[Event "b"]\n\n*\n\nx\n\n',
+            )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,156 @@
+"""Unit tests for compressed PGN inputs and outputs."""
+
+from __future__ import annotations
+
+import shutil
+import stat
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import reti.common.compressed_pgn as compressed_pgn_module
+from reti.common.compressed_pgn import (
+    compress_pgn,
+    decompress_pgn,
+    open_pgn,
+    pgn_compression,
+    plain_pgn_name,
+)
+from reti.common.pgn_discovery import discover_input_files, relative_stem
+from reti.cql.backend import Cql6Backend
+from reti.cql.cli import parse_args
+from reti.cql.preflight import count_games_in_pgn
+from reti.cql.runner import JobSpec, run_job_matrix
+
+
+GAMES = '[Event "x"]\n\n1. e4 *\n\n' * 3000
+
+# Records whether CQL was handed a named pipe or a regular file.
+FAKE_CQL = """#!{python}
+import os, stat, sys
+args = sys.argv[1:]
+source = args[args.index("-i") + 1]
+kind = "fifo" if stat.S_ISFIFO(os.stat(source).st_mode) else "file"
+text = open(source, encoding="utf-8").read()
+open(args[args.index("-o") + 1], "w", encoding="utf-8").write(text)
+print(kind)
+"""
+
+COMPRESSIONS = [
+    pytest.param(
+        name,
+        marks=pytest.mark.skipif(
+            name == "zstd" and shutil.which("zstd") is None, reason="zstd not on PATH"
+        ),
+    )
+    for name in ("gzip", "bzip2", "zstd")
+]
+
+
+def _compressed(root: Path, compression: str, text: str = GAMES) -> Path:
+    plain = root / "db.pgn"
+    plain.write_text(text, encoding="utf-8")
+    return compress_pgn(plain, compression)
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_round_trip_and_discovery(tmp_path: Path, compression: str) -> None:
+    path = _compressed(tmp_path, compression)
+
+    assert not (tmp_path / "db.pgn").exists()
+    assert pgn_compression(path) == compression
+    assert plain_pgn_name(path) == "db.pgn"
+    with open_pgn(path) as reader:
+        assert reader.read().decode("utf-8") == GAMES
+        assert reader.source_position() == path.stat().st_size
+    assert count_games_in_pgn(path) == 3000
+
+    assert discover_input_files(str(tmp_path), ".pgn") is None
+    collection = discover_input_files(str(tmp_path), ".pgn", allow_compressed=True)
+    assert collection is not None and collection.files == [path]
+    assert relative_stem(path, tmp_path) == Path("db")
+
+    assert decompress_pgn(path, tmp_path / "plain" / "db.pgn").read_text() == GAMES
+
+
+def test_stdlib_fallback_without_external_tools(tmp_path: Path) -> None:
+    with mock.patch.object(compressed_pgn_module.shutil, "which", return_value=None):
+        path = _compressed(tmp_path, "bzip2")
+        with open_pgn(path) as reader:
+            assert reader.read().decode("utf-8") == GAMES
+        (tmp_path / "other.pgn.zst").write_bytes(b"")
+        with pytest.raises(OSError, match="needs the 'zstd' command"):
+            open_pgn(tmp_path / "other.pgn.zst")
+    with open_pgn(path) as reader:
+        assert reader.read().decode("utf-8") == GAMES
+
+
+def _fake_binary(root: Path) -> Path:
+    binary = root / "fake-cql"
+    binary.write_text(FAKE_CQL.format(python=sys.executable), encoding="utf-8")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return binary
+
+
+def _spec(root: Path, pgn: Path, name: str) -> JobSpec:
+    script = root / f"{name}.cql"
+    script.write_text("cql() check\n", encoding="utf-8")
+    return JobSpec(
+        job_index=1,
+        pair_label=f"{pgn.name} x {script.name}",
+        source_pgn_path=pgn,
+        runtime_pgn_path=pgn,
+        cql_path=script,
+        output_pgn=root / "out" / f"{name}.pgn",
+    )
+
+
+@pytest.mark.parametrize(
+    ("engine", "compressed_input", "expected_kind"),
+    [
+        ("threads", "auto", "fifo"),
+        ("asyncio", "auto", "fifo"),
+        ("asyncio", "tempfile", "file"),
+    ],
+)
+def test_cql_reads_compressed_input(
+    tmp_path: Path, engine: str, compressed_input: str, expected_kind: str
+) -> None:
+    backend = Cql6Backend(_fake_binary(tmp_path))
+    spec = _spec(tmp_path, _compressed(tmp_path, "gzip"), "a")
+
+    [result] = run_job_matrix(
+        backend,
+        [spec],
+        jobs=1,
+        cql_threads="auto",
+        engine=engine,
+        compressed_input=compressed_input,
+    )
+
+    assert result.success and result.match_count == 3000
+    assert result.stdout.strip() == expected_kind
+    assert spec.output_pgn.read_text(encoding="utf-8") == GAMES
+
+
+def test_corrupt_archive_fails_the_job(tmp_path: Path) -> None:
+    backend = Cql6Backend(_fake_binary(tmp_path))
+    corrupt = tmp_path / "bad.pgn.gz"
+    corrupt.write_bytes(b"not gzip at all" * 100)
+    spec = _spec(tmp_path, corrupt, "a")
+
+    [result] = run_job_matrix(backend, [spec], jobs=1, cql_threads="auto")
+
+    assert not result.success
+    assert "could not decompress bad.pgn.gz" in result.stderr
+
+
+def test_compress_output_conflicts_with_resume() -> None:
+    base = ["--pgn", "a.pgn", "--cql-bin", "cql", "--scripts", "s.cql", "-o", "out"]
+    assert parse_args([*base, "--compress-output", "zstd"]).compress_output == "zstd"
+    with pytest.raises(SystemExit):
+        parse_args([*base, "--resume", "--compress-output", "gzip"])
@@ -0,0 +1,115 @@
+"""Unit tests for the CQL throughput benchmark harness."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.common.json_io import load_json
+from reti.cql.backend import Cql6Backend
+from reti.cql.benchmark import (
+    BenchmarkConfig,
+    append_history,
+    build_run_entry,
+    compare_to_baseline,
+    run_configuration,
+    thread_scaling_sweep,
+)
+
+
+def _fake_cql(tmp_path: Path, *, exit_code: int = 0) -> Path:
+    """Stand-in for ``cql -i <pgn> -o <out> ... <script>`` that copies the input."""
+    script = tmp_path / "fake-cql"
+    script.write_text(
+        "#!" + sys.executable + "\n"
+        "import shutil, sys\n"
+        "args = sys.argv[1:]\n"
+        "shutil.copyfile(args[args.index('-i') + 1], args[args.index('-o') + 1])\n"
+        f"sys.exit({exit_code})\n",
+        encoding="utf-8",
+    )
+    script.chmod(0o755)
+    return script
+
+
+def _inputs(tmp_path: Path) -> tuple[Path, list[Path]]:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(
+        "".join(f'[Event "g{index}"]\n\n1. e4 *\n\n' for index in range(4)),
+        encoding="utf-8",
+    )
+    scripts = []
+    for name in ("a", "b"):
+        script = tmp_path / f"{name}.cql"
+        script.write_text("cql() check\n", encoding="utf-8")
+        scripts.append(script)
+    return pgn, scripts
+
+
+def test_run_configuration_measures_each_script(tmp_path: Path) -> None:
+    pgn, scripts = _inputs(tmp_path)
+    backend = Cql6Backend(_fake_cql(tmp_path))
+
+    result = run_configuration(backend, pgn, scripts, BenchmarkConfig(cql_threads=2, jobs=2), repeat=2)
+
+    assert result.success
+    assert result.games == 4
+    assert sorted(record.script for record in result.scripts) == ["a.cql", "b.cql"]
+    for record in result.scripts:
+        assert record.match_count == 4
+        assert record.wall_seconds > 0
+        assert record.peak_rss_bytes > 0
+        assert record.games_per_second > 0
+    assert result.games_per_second > 0
+
+
+def test_failed_script_is_reported_with_its_output(tmp_path: Path) -> None:
+    pgn, scripts = _inputs(tmp_path)
+    backend = Cql6Backend(_fake_cql(tmp_path, exit_code=3))
+
+    result = run_configuration(backend, pgn, scripts[:1], BenchmarkConfig(cql_threads="auto", jobs=1))
+
+    assert not result.success
+    assert not result.scripts[0].success
+
+
+def test_history_and_baseline_regression_gate(tmp_path: Path) -> None:
+    pgn, scripts = _inputs(tmp_path)
+    backend = Cql6Backend(_fake_cql(tmp_path))
+    entry = build_run_entry(
+        backend,
+        [run_configuration(backend, pgn, scripts, BenchmarkConfig(cql_threads=1, jobs=1))],
+    )
+    history = tmp_path / "history.json"
+    append_history(history, entry)
+    append_history(history, entry)
+    assert len(load_json(history)["runs"]) == 2
+
+    assert compare_to_baseline(entry, entry, tolerance=0.1) == []
+
+    faster = {
+        **entry,
+        "configurations": [
+            {
+                **config,
+                "games_per_second": config["games_per_second"] * 2,
+                "scripts": [],
+            }
+            for config in entry["configurations"]
+        ],
+    }
+    [regression] = compare_to_baseline(entry, faster, tolerance=0.1)
+    assert regression.key == "db.pgn threads=1 jobs=1"
+    assert regression.change < -0.4
+
+
+def test_thread_scaling_sweep_splits_cores() -> None:
+    configs = thread_scaling_sweep(8)
+    assert [(config.cql_threads, config.jobs) for config in configs] == [
+        (1, 8),
+        (2, 4),
+        (4, 2),
+        (8, 1),
+    ]
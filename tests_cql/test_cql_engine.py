@@ -0,0 +1,138 @@
+"""Unit tests for the asyncio CQL subprocess engine."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.backend import Cql6Backend
+from reti.cql.cli import ExecutionOptions, parse_args
+from reti.cql.engine import StreamTail, parse_progress_games, run_streaming_process
+from reti.cql.output import write_summary_csv
+from reti.cql.runner import JobSpec, run_job_matrix
+
+
+FAKE_CQL = """#!{python}
+import subprocess, sys, time
+args = sys.argv[1:]
+increment = int(args[args.index("-lineincrement") + 1]) if "-lineincrement" in args else 0
+source = open(args[args.index("-i") + 1], encoding="utf-8").read()
+games = source.count("[Event ")
+script = open(args[-1], encoding="utf-8").read()
+if "sleep" in script:
+    child = subprocess.Popen(["sleep", "30"])
+    open(args[-1] + ".pid", "w").write(str(child.pid))
+    time.sleep(30)
+sys.stderr.write("noise " * 20000)
+for number in range(1, games + 1):
+    if increment and number % increment == 0:
+        print(f"game number {{number}}", flush=True)
+open(args[args.index("-o") + 1], "w", encoding="utf-8").write(source)
+"""
+
+
+def _fake_binary(root: Path) -> Path:
+    binary = root / "fake-cql"
+    binary.write_text(FAKE_CQL.format(python=sys.executable), encoding="utf-8")
+    binary.chmod(0o755)
+    return binary
+
+
+def _specs(root: Path, scripts: dict[str, str], games: int) -> list[JobSpec]:
+    pgn = root / "db.pgn"
+    pgn.write_text('[Event "x"]\n\n1. e4 *\n\n' * games, encoding="utf-8")
+    specs = []
+    for name, body in scripts.items():
+        script = root / f"{name}.cql"
+        script.write_text(body, encoding="utf-8")
+        specs.append(
+            JobSpec(
+                job_index=len(specs) + 1,
+                pair_label=f"db.pgn x {script.name}",
+                source_pgn_path=pgn,
+                runtime_pgn_path=pgn,
+                cql_path=script,
+                output_pgn=root / "out" / f"{name}.pgn",
+            )
+        )
+    return specs
+
+
+def test_stream_tail_and_progress_parsing() -> None:
+    tail = StreamTail(limit=8)
+    for chunk in (b"abc", b"defgh", b"ijklm"):
+        tail.append(chunk)
+    assert tail.text() == "[... 5 earlier byte(s) dropped]\nfghijklm"
+    assert tail.total_bytes == 13
+    assert parse_progress_games(b"game number 3000") == 3000
+    assert parse_progress_games(b"  12000 games processed") is None
+    assert parse_progress_games(b"Examined 1000 of 2500 games") is None
+    assert parse_progress_games(b"CQL version 6.2") is None
+
+
+def test_asyncio_engine_is_opt_in() -> None:
+    base = ["--pgn", "a.pgn", "--cql-bin", "cql", "--scripts", "s.cql", "-o", "out"]
+    assert parse_args(base).engine == "threads"
+    assert parse_args([*base, "--engine", "asyncio"]).engine == "asyncio"
+    assert ExecutionOptions().engine == "threads"
+
+
+def test_asyncio_engine_matches_thread_engine(tmp_path: Path, capsys) -> None:
+    backend = Cql6Backend(_fake_binary(tmp_path))
+    specs = _specs(tmp_path, {"a": "cql() check\n", "b": "cql() mate\n"}, games=2500)
+
+    threaded = run_job_matrix(backend, specs, jobs=2, cql_threads="auto")
+    outputs = [spec.output_pgn.read_bytes() for spec in specs]
+    streamed = run_job_matrix(
+        backend, specs, jobs=2, cql_threads="auto", engine="asyncio", game_progress=True
+    )
+
+    assert "Counting games" not in capsys.readouterr().out
+    for before, after, output in zip(threaded, streamed, outputs):
+        assert after.success and after.match_count == before.match_count == 2500
+        assert len(before.stderr) == 6 * 20000
+        assert after.stderr.startswith("[... ")
+        assert len(after.stderr.encode()) < 17 * 1024
+        assert after.stderr_bytes == 6 * 20000
+        assert after.output_pgn.read_bytes() == output
+
+    summary = write_summary_csv(streamed, tmp_path / "out", tmp_path, tmp_path)
+    with summary.open(encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [row["stderr_bytes"] for row in rows] == [str(6 * 20000)] * 2
+
+
+def test_timeout_kills_the_whole_process_group(tmp_path: Path) -> None:
+    backend = Cql6Backend(_fake_binary(tmp_path))
+    specs = _specs(tmp_path, {"slow": "cql() sleep\n"}, games=1)
+
+    started = time.monotonic()
+    [result] = run_job_matrix(
+        backend, specs, jobs=1, cql_threads="auto", engine="asyncio", timeout_seconds=2
+    )
+
+    assert time.monotonic() - started < 20
+    assert result.timed_out and result.returncode == 124
+    grandchild = int(Path(str(specs[0].cql_path) + ".pid").read_text())
+    for _ in range(50):
+        try:
+            os.kill(grandchild, 0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        raise AssertionError("grandchild CQL process survived the timeout")
+
+
+def test_missing_binary_raises_for_the_runner_to_report(tmp_path: Path) -> None:
+    try:
+        asyncio.run(run_streaming_process([str(tmp_path / "missing-cql")]))
+    except FileNotFoundError:
+        return
+    raise AssertionError("expected FileNotFoundError")
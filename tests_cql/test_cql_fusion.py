@@ -0,0 +1,158 @@
+"""Unit tests for multi-script CQL fusion."""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.backend import Cql6Backend
+from reti.cql.fusion import (
+    inspect_fusable_script,
+    plan_fusion_groups,
+    render_fused_cql,
+    select_fused_game_ranges,
+)
+from reti.cql.runner import JobSpec, run_job_matrix
+
+
+def _game(index: int, moves: str) -> str:
+    return f'[Event "g{index}"]\n[White "w{index}"]\n\n{moves} *\n\n'
+
+
+GAMES = [
+    _game(1, "1. e4 e5"),
+    _game(2, "1. d4 d5"),
+    _game(3, "1. e4 c5"),
+    _game(4, "1. c4 e5"),
+]
+
+
+def _write_script(root: Path, name: str, body: str, header: str = "") -> Path:
+    path = root / f"{name}.cql"
+    path.write_text(f"// {name}\ncql({header})\n{body}\n", encoding="utf-8")
+    return path
+
+
+def test_unfusable_scripts_and_name_clashes_are_split_out(tmp_path: Path) -> None:
+    plain = _write_script(tmp_path, "plain", "check")
+    other = _write_script(tmp_path, "other", "mate")
+    quiet = _write_script(tmp_path, "quiet", "check", header="quiet")
+    sorted_ = _write_script(tmp_path, "sorted", "sort #[Aa]")
+    clash_a = _write_script(tmp_path, "clash_a", "x = #[Aa]\nx > 3")
+    clash_b = _write_script(tmp_path, "clash_b", "x = #[Pp]\nx > 1")
+    commented = _write_script(tmp_path, "commented", '// sort these later\ncomment("sort")\ncheck')
+
+    assert inspect_fusable_script(quiet) is None
+    assert inspect_fusable_script(sorted_) is None
+    assert inspect_fusable_script(commented) is not None
+
+    groups = plan_fusion_groups([plain, other, quiet, sorted_, clash_a, clash_b, commented])
+    assert [[script.cql_path.name for script in group] for group in groups] == [
+        ["plain.cql", "other.cql", "clash_a.cql", "commented.cql"]
+    ]
+    fused = render_fused_cql(groups[0])
+    assert fused.startswith("cql()\n")
+    assert 'comment("reti-fuse:3")' in fused
+    assert fused.rstrip().endswith("reti_fuse_hit == 1")
+
+
+def test_select_fused_game_ranges_maps_markers_to_input_games(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text("".join(GAMES), encoding="utf-8")
+    fused_output = tmp_path / "fused.pgn"
+    fused_output.write_text(
+        '[Event "g1"]\n[White "w1"]\n\n{reti-fuse:0} 1. e4 {reti-fuse:1} e5 *\n\n'
+        '[Event "g3"]\n[White "w3"]\n\n1. e4 {CQL reti-fuse:0} c5 *\n\n'
+        '[Event "gone"]\n\n1. h4 {reti-fuse:2} *\n\n',
+        encoding="utf-8",
+    )
+
+    kept = select_fused_game_ranges(pgn, fused_output, 3)
+
+    data = pgn.read_bytes()
+    assert [data[start:end].decode() for start, end in kept[0]] == [GAMES[0], GAMES[2]]
+    assert [data[start:end].decode() for start, end in kept[1]] == [GAMES[0]]
+    assert kept[2] is None
+
+
+def _fake_cql_run(command, **_: object) -> subprocess.CompletedProcess:
+    """CQL stand-in: a script matches games containing its ``// match <token>`` moves."""
+    input_pgn = Path(command[command.index("-i") + 1])
+    output_pgn = Path(command[command.index("-o") + 1])
+    script = Path(command[-1]).read_text(encoding="utf-8")
+    games = re.split(r"(?=\[Event )", input_pgn.read_text(encoding="utf-8"))
+    games = [game for game in games if game.strip()]
+    blocks = script.split("} or true")
+    written = []
+    if len(blocks) > 1:
+        for game in games:
+            markers = [
+                f"{{reti-fuse:{index}}}"
+                for index, block in enumerate(blocks[:-1])
+                if re.search(r"// match (.+)", block).group(1) in game
+            ]
+            if markers:
+                written.append(game.replace(" *", " " + " ".join(markers) + " *", 1))
+    else:
+        token = re.search(r"// match (.+)", script).group(1)
+        written = [game for game in games if token in game]
+    output_pgn.write_text("".join(written), encoding="utf-8")
+    return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
+
+
+def _specs(tmp_path: Path, pgn: Path, scripts: list[Path], out_name: str) -> list[JobSpec]:
+    return [
+        JobSpec(
+            job_index=index,
+            pair_label=f"db.pgn x {script.name}",
+            source_pgn_path=pgn,
+            runtime_pgn_path=pgn,
+            cql_path=script,
+            output_pgn=tmp_path / out_name / f"{script.stem}.pgn",
+        )
+        for index, script in enumerate(scripts, start=1)
+    ]
+
+
+@mock.patch("reti.cql.runner.subprocess.run")
+def test_fused_matrix_matches_unfused_outputs(run_mock, tmp_path: Path) -> None:
+    run_mock.side_effect = _fake_cql_run
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text("".join(GAMES * 5), encoding="utf-8")
+    scripts = [
+        _write_script(tmp_path, "e4", "// match 1. e4\ncheck"),
+        _write_script(tmp_path, "e5", "// match e5\ncheck"),
+        _write_script(tmp_path, "h4", "// match h4\ncheck"),
+        _write_script(tmp_path, "quiet", "// match d4\ncheck", header="quiet"),
+    ]
+    backend = Cql6Backend(Path("/fake/cql"))
+
+    unfused = run_job_matrix(backend, _specs(tmp_path, pgn, scripts, "plain"), jobs=1, cql_threads="auto")
+    run_mock.reset_mock()
+    fused = run_job_matrix(
+        backend,
+        _specs(tmp_path, pgn, scripts, "fused"),
+        jobs=1,
+        cql_threads="auto",
+        fuse_scripts=True,
+        fusion_root=tmp_path / "fusion",
+    )
+
+    assert [result.match_count for result in fused] == [10, 10, 0, 5]
+    for plain_result, fused_result in zip(unfused, fused):
+        assert fused_result.success
+        assert fused_result.match_count == plain_result.match_count
+        assert fused_result.output_pgn.read_bytes() == plain_result.output_pgn.read_bytes()
+
+    full_reads = [
+        call.args[0]
+        for call in run_mock.call_args_list
+        if Path(call.args[0][call.args[0].index("-i") + 1]) == pgn
+    ]
+    assert len(full_reads) == 2
+    assert any("fused-0001" in part for part in full_reads[0])
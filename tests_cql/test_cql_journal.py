@@ -0,0 +1,150 @@
+"""Unit tests for the ``--resume`` job journal."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.backend import Cql6Backend
+from reti.cql.journal import JOURNAL_FILENAME, JobJournal
+from reti.cql.output import write_summary_csv
+from reti.cql.runner import JobSpec, run_job_matrix
+
+
+GAMES = '[Event "g1"]\n\n1. e4 e5 *\n\n[Event "g2"]\n\n1. d4 d5 *\n\n'
+
+
+CHATTY_CQL = """#!{python}
+import sys
+args = sys.argv[1:]
+sys.stderr.write("noise " * 20000)
+source = open(args[args.index("-i") + 1], encoding="utf-8").read()
+open(args[args.index("-o") + 1], "w", encoding="utf-8").write(source)
+"""
+
+
+def _fake_cql_run(command, **_: object) -> subprocess.CompletedProcess:
+    input_pgn = Path(command[command.index("-i") + 1])
+    output_pgn = Path(command[command.index("-o") + 1])
+    output_pgn.write_bytes(input_pgn.read_bytes())
+    return subprocess.CompletedProcess(args=command, returncode=0, stdout="", stderr="")
+
+
+def _setup(tmp_path: Path) -> tuple[Cql6Backend, list[JobSpec]]:
+    binary = tmp_path / "cql"
+    binary.write_bytes(b"fake cql binary")
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(GAMES, encoding="utf-8")
+    specs = []
+    for index, name in enumerate(("a", "b", "c"), start=1):
+        script = tmp_path / f"{name}.cql"
+        script.write_text(f"// {name}\ncql() check\n", encoding="utf-8")
+        specs.append(
+            JobSpec(
+                job_index=index,
+                pair_label=f"db.pgn x {script.name}",
+                source_pgn_path=pgn,
+                runtime_pgn_path=pgn,
+                cql_path=script,
+                output_pgn=tmp_path / "out" / f"{name}.pgn",
+            )
+        )
+    return Cql6Backend(binary), specs
+
+
+def _run(backend: Cql6Backend, specs: list[JobSpec], journal: JobJournal):
+    return run_job_matrix(
+        backend, specs, jobs=1, cql_threads="auto", on_result=journal.record
+    )
+
+
+@mock.patch("reti.cql.runner.subprocess.run")
+def test_resume_reuses_journaled_jobs(run_mock, tmp_path: Path) -> None:
+    run_mock.side_effect = _fake_cql_run
+    backend, specs = _setup(tmp_path)
+    journal_path = tmp_path / "out" / JOURNAL_FILENAME
+
+    with JobJournal(journal_path, backend) as journal:
+        first = _run(backend, specs, journal)
+
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        resumed = journal.resumable_results(specs)
+
+    assert sorted(resumed) == [1, 2, 3]
+    assert [resumed[spec.job_index] for spec in specs] == first
+
+
+@mock.patch("reti.cql.runner.subprocess.run")
+def test_resume_reruns_changed_scripts_and_outputs(run_mock, tmp_path: Path) -> None:
+    run_mock.side_effect = _fake_cql_run
+    backend, specs = _setup(tmp_path)
+    journal_path = tmp_path / "out" / JOURNAL_FILENAME
+    with JobJournal(journal_path, backend) as journal:
+        _run(backend, specs, journal)
+
+    specs[0].cql_path.write_text("// a\ncql() mate\n", encoding="utf-8")
+    stat = specs[1].output_pgn.stat()
+    os.utime(specs[1].output_pgn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        resumed = journal.resumable_results(specs)
+        assert sorted(resumed) == [3]
+        run_mock.reset_mock()
+        _run(backend, [spec for spec in specs if spec.job_index not in resumed], journal)
+    assert run_mock.call_count == 2
+
+    # The rerun jobs were journaled again, so a second resume skips everything.
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        assert sorted(journal.resumable_results(specs)) == [1, 2, 3]
+
+
+@mock.patch("reti.cql.runner.subprocess.run")
+def test_torn_last_line_is_ignored(run_mock, tmp_path: Path) -> None:
+    run_mock.side_effect = _fake_cql_run
+    backend, specs = _setup(tmp_path)
+    journal_path = tmp_path / "out" / JOURNAL_FILENAME
+    with JobJournal(journal_path, backend) as journal:
+        _run(backend, specs, journal)
+
+    lines = journal_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    journal_path.write_text("".join(lines[:-1]) + lines[-1][:40], encoding="utf-8")
+
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        resumed = journal.resumable_results(specs)
+        assert sorted(resumed) == [1, 2]
+        _run(backend, [specs[2]], journal)
+
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        assert sorted(journal.resumable_results(specs)) == [1, 2, 3]
+
+    with JobJournal(journal_path, backend) as journal:
+        assert journal.resumable_results(specs) == {}
+
+
+def test_resume_keeps_full_stream_sizes_of_truncated_output(tmp_path: Path) -> None:
+    backend, specs = _setup(tmp_path)
+    backend.binary_path.write_text(CHATTY_CQL.format(python=sys.executable), encoding="utf-8")
+    backend.binary_path.chmod(0o755)
+    journal_path = tmp_path / "out" / JOURNAL_FILENAME
+
+    with JobJournal(journal_path, backend) as journal:
+        first = run_job_matrix(
+            backend, specs, jobs=1, cql_threads="auto", engine="asyncio", on_result=journal.record
+        )
+    assert all(result.stderr.startswith("[... ") for result in first)
+    summary = write_summary_csv(first, tmp_path / "out", tmp_path, tmp_path).read_text()
+
+    with JobJournal(journal_path, backend, resume=True) as journal:
+        resumed = journal.resumable_results(specs)
+
+    assert [resumed[spec.job_index] for spec in specs] == first
+    resumed_summary = write_summary_csv(
+        [resumed[spec.job_index] for spec in specs], tmp_path / "out", tmp_path, tmp_path
+    )
+    assert resumed_summary.read_text() == summary
+    assert str(6 * 20000) in summary
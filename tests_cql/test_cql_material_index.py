@@ -0,0 +1,90 @@
+"""Unit tests for the material-signature prefilter."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import chess
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.material_index import (
+    board_signature,
+    build_material_index,
+    parse_material_constraint,
+    select_game_ranges,
+)
+from reti.cql.runner import JobSpec, prefilter_job_specs
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# White wins the black knight on move 2, reaching KBN vs K from a set-up board.
+KBN_GAME = (
+    '[Event "kbn"]\n[SetUp "1"]\n[FEN "4k3/8/8/8/3n4/8/2N5/4K1B1 w - - 0 1"]\n\n'
+    "1. Kd2 Kd7 2. Nxd4 *\n\n"
+)
+OPENING_GAME = '[Event "opening"]\n\n1. e4 e5 2. Nf3 Nc6 *\n\n'
+
+
+def _signature(fen: str) -> tuple[int, ...]:
+    return board_signature(chess.Board(fen))
+
+
+def test_table_script_constraint_matches_only_its_ending() -> None:
+    text = (REPO_ROOT / "cql-files" / "FCE" / "table" / "1-4BN.cql").read_text(encoding="utf-8")
+    constraint = parse_material_constraint(text)
+    assert constraint is not None
+
+    assert constraint.predicate(_signature("4k3/8/8/8/8/8/2N5/4K1B1 w - - 0 1"))
+    assert constraint.predicate(_signature("4k1b1/2n5/8/8/8/8/8/4K3 w - - 0 1"))
+    assert not constraint.predicate(_signature("4k3/8/8/8/8/8/2N5/4KBB1 w - - 0 1"))
+    assert not constraint.predicate(board_signature(chess.Board()))
+
+
+def test_unsupported_script_disables_prefilter() -> None:
+    assert parse_material_constraint("cql(variations) N == 1\n") is None
+    assert parse_material_constraint("cql() move from N\n") is None
+
+
+def test_index_keeps_only_games_reaching_the_signature(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(OPENING_GAME + KBN_GAME + OPENING_GAME, encoding="utf-8")
+    index = build_material_index(pgn, tmp_path / "db.material-index.sqlite")
+    constraint = parse_material_constraint("cql() flipcolor (N == 1 and B == 1) [Aa] == 4\n")
+    assert constraint is not None
+
+    [kept] = select_game_ranges(index, [constraint.predicate])
+
+    data = pgn.read_bytes()
+    assert [data[start:end].decode("utf-8") for start, end in kept] == [KBN_GAME]
+
+
+def test_prefilter_job_specs_narrows_inputs_and_resolves_empty_jobs(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(OPENING_GAME * 8 + KBN_GAME, encoding="utf-8")
+    kbn = tmp_path / "kbn.cql"
+    kbn.write_text("cql()\nflipcolor (N == 1 and B == 1)\n[Aa] == 4\n", encoding="utf-8")
+    queens = tmp_path / "queens.cql"
+    queens.write_text("cql()\nQ == 3\n", encoding="utf-8")
+    specs = [
+        JobSpec(
+            job_index=index,
+            pair_label=f"db.pgn x {cql.name}",
+            source_pgn_path=pgn,
+            runtime_pgn_path=pgn,
+            cql_path=cql,
+            output_pgn=tmp_path / "out" / f"{cql.stem}.pgn",
+        )
+        for index, cql in enumerate((kbn, queens), start=1)
+    ]
+
+    remaining, empty = prefilter_job_specs(specs, tmp_path / "prefilter")
+
+    assert [spec.job_index for spec in remaining] == [1]
+    assert remaining[0].source_pgn_path == pgn
+    assert remaining[0].runtime_pgn_path.read_text(encoding="utf-8") == KBN_GAME
+    assert set(empty) == {2}
+    assert empty[2].success and empty[2].match_count == 0
+    assert empty[2].output_pgn.read_text(encoding="utf-8") == ""
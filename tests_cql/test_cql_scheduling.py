@@ -0,0 +1,88 @@
+"""Unit tests for cost-aware CQL job ordering."""
+
+from __future__ import annotations
+
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.cql.runner import JobSpec
+from reti.cql.scheduling import (
+    ThroughputHistory,
+    load_throughput_history,
+    schedule_job_specs,
+)
+
+
+def _matrix(root: Path) -> tuple[list[JobSpec], dict[str, Path]]:
+    pgns = {"small": 1_000, "big": 50_000}
+    scripts = {name: root / "cql" / f"{name}.cql" for name in ("fast", "slow")}
+    (root / "pgn").mkdir()
+    (root / "cql").mkdir()
+    for script in scripts.values():
+        script.write_text("cql() check\n", encoding="utf-8")
+    specs = []
+    for pgn_name, size in pgns.items():
+        pgn = root / "pgn" / f"{pgn_name}.pgn"
+        pgn.write_bytes(b"x" * size)
+        for script in scripts.values():
+            specs.append(
+                JobSpec(
+                    job_index=len(specs) + 1,
+                    pair_label=f"{pgn.name} x {script.name}",
+                    source_pgn_path=pgn,
+                    runtime_pgn_path=pgn,
+                    cql_path=script,
+                    output_pgn=root / "out" / f"{pgn_name}-{script.stem}.pgn",
+                )
+            )
+    return specs, scripts
+
+
+def test_schedule_runs_longest_jobs_first_grouped_by_pgn(tmp_path: Path) -> None:
+    specs, scripts = _matrix(tmp_path)
+    history = ThroughputHistory(
+        {scripts["fast"].resolve(): 1e-6, scripts["slow"].resolve(): 1e-4}
+    )
+
+    ordered = schedule_job_specs(specs, history)
+
+    assert [spec.pair_label for spec in ordered] == [
+        "big.pgn x slow.cql",
+        "big.pgn x fast.cql",
+        "small.pgn x slow.cql",
+        "small.pgn x fast.cql",
+    ]
+
+
+def test_schedule_without_history_orders_by_pgn_size(tmp_path: Path) -> None:
+    specs, _ = _matrix(tmp_path)
+
+    ordered = schedule_job_specs(specs)
+
+    assert [spec.job_index for spec in ordered] == [3, 4, 1, 2]
+
+
+def test_history_learns_rates_from_earlier_summaries(tmp_path: Path) -> None:
+    specs, scripts = _matrix(tmp_path)
+    summary = tmp_path / "summary.csv"
+    with summary.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(
+            handle, fieldnames=["pgn", "cql", "status", "duration_seconds", "cached"]
+        )
+        writer.writeheader()
+        writer.writerow({"pgn": "big.pgn", "cql": "slow.cql", "status": "ok", "duration_seconds": "5.0", "cached": "no"})
+        writer.writerow({"pgn": "small.pgn", "cql": "slow.cql", "status": "ok", "duration_seconds": "0.1", "cached": "no"})
+        writer.writerow({"pgn": "big.pgn", "cql": "fast.cql", "status": "ok", "duration_seconds": "0.0", "cached": "yes"})
+        writer.writerow({"pgn": "big.pgn", "cql": "fast.cql", "status": "error", "duration_seconds": "9.0", "cached": "no"})
+
+    history = load_throughput_history(
+        [summary, tmp_path / "missing.csv"], tmp_path / "pgn", tmp_path / "cql"
+    )
+
+    assert list(history.seconds_per_byte) == [scripts["slow"].resolve()]
+    assert history.rate_for(scripts["slow"]) == 5.1 / 51_000
+    # Scripts without history fall back to the median known rate.
+    assert history.rate_for(scripts["fast"]) == history.rate_for(scripts["slow"])
@@ -0,0 +1,286 @@
+"""Unit tests for ``EnginePool`` and ``AdaptiveBudget`` against scripted UCI engines."""
+
+from __future__ import annotations
+
+import stat
+import sys
+import time
+from pathlib import Path
+
+import chess
+import chess.engine
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.evaluation import AdaptiveBudget, EnginePool, StockfishSession
+
+# Scores every position at 10 cp per piece, logs each start-up, its options
+# and searches, and crashes on the first search of a bare-kings position.
+FAKE_UCI = """#!{python}
+import os, sys, time
+log = {log!r}
+with open(log, "a") as handle:
+    handle.write(f"start {{os.getpid()}}\\n")
+fen = ""
+for line in sys.stdin:
+    command = line.split()
+    if not command:
+        continue
+    if command[0] == "uci":
+        print("option name Threads type spin default 1 min 1 max 64")
+        print("option name Hash type spin default 16 min 1 max 1024")
+        print("uciok")
+    elif command[0] == "isready":
+        print("readyok")
+    elif command[0] == "setoption":
+        with open(log, "a") as handle:
+            handle.write(" ".join(command[1:]) + "\\n")
+    elif command[0] in ("ucinewgame", "position"):
+        with open(log, "a") as handle:
+            handle.write(command[0] + "\\n")
+        if command[0] == "position":
+            fen = command[2] if command[1] == "fen" else "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR"
+    elif command[0] == "go":
+        if fen == "8/8/8/8/8/8/2K5/6k1" and not os.path.exists(log + ".crashed"):
+            open(log + ".crashed", "w").close()
+            sys.exit(1)
+        with open(log, "a") as handle:
+            handle.write(f"go {{os.getpid()}} {{fen}}\\n")
+        time.sleep(0.02)
+        print(f"info depth 3 score cp {{10 * sum(c.isalpha() for c in fen)}}")
+        print("bestmove (none)")
+    elif command[0] == "quit":
+        break
+    sys.stdout.flush()
+"""
+
+# Deepens one ply every 10 ms until "stop" or movetime. The score depends on
+# the first rank of the FEN: "k7" mates, "K7" swings across the draw-band
+# edge, "4k3" is a quiet draw and anything else is a clear White win.
+DEEPENING_UCI = """#!{python}
+import queue, sys, threading, time
+lines = queue.Queue()
+threading.Thread(target=lambda: [lines.put(line) for line in sys.stdin], daemon=True).start()
+fen = ""
+while True:
+    command = lines.get().split()
+    if not command:
+        continue
+    if command[0] == "uci":
+        print("option name Threads type spin default 1 min 1 max 64")
+        print("uciok")
+    elif command[0] == "isready":
+        print("readyok")
+    elif command[0] == "position":
+        fen = command[2] if command[1] == "fen" else "startpos"
+    elif command[0] == "go":
+        movetime = int(command[command.index("movetime") + 1]) / 1000
+        started = time.monotonic()
+        depth = 0
+        while time.monotonic() - started < movetime:
+            depth += 1
+            if fen.startswith("k7"):
+                score = "mate 3" if depth >= 2 else "cp 500"
+            elif fen.startswith("K7"):
+                score = f"cp {{40 + depth % 2 * 10}}"
+            elif fen.startswith("4k3"):
+                score = f"cp {{depth % 3}}"
+            else:
+                score = f"cp {{300 + depth}}"
+            print(f"info depth {{depth}} score {{score}}", flush=True)
+            time.sleep(0.01)
+            try:
+                if lines.get_nowait().strip() == "stop":
+                    break
+            except queue.Empty:
+                pass
+        print("bestmove (none)")
+    elif command[0] == "quit":
+        break
+    sys.stdout.flush()
+"""
+
+BARE_KINGS = "8/8/8/8/8/8/2K5/6k1 w - - 0 1"
+ROOK_ENDING = "8/8/8/8/8/8/2K5/R5k1 w - - 0 1"
+
+
+@pytest.fixture
+def fake_engine(tmp_path: Path) -> tuple[Path, Path]:
+    log = tmp_path / "engine.log"
+    binary = tmp_path / "fake-uci"
+    binary.write_text(FAKE_UCI.format(python=sys.executable, log=str(log)), encoding="utf-8")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return binary, log
+
+
+def _pool(binary: Path, **overrides) -> EnginePool:
+    options = {
+        "engines": 3,
+        "threads": 2,
+        "hash_mb": 64,
+        "sf_time_seconds": 0.01,
+        "draw_threshold_cp": 25,
+    }
+    options.update(overrides)
+    return EnginePool(str(binary), **options)
+
+
+def test_pool_runs_engines_concurrently_and_keeps_hash(fake_engine) -> None:
+    binary, log = fake_engine
+    pool = _pool(binary)
+    try:
+        boards = [chess.Board(ROOK_ENDING)] * 8 + [chess.Board()]
+        results = pool.evaluate_many(boards)
+        info = pool.submit(chess.Board(), chess.engine.Limit(depth=3)).result()
+    finally:
+        pool.close()
+
+    assert [result.sf_cp_white for result in results] == [30] * 8 + [320]
+    assert {result.winning_side for result in results} == {"white"}
+    assert results[0].sf_time_seconds == 0.01
+    assert info["score"].white().score() == 320
+
+    lines = log.read_text(encoding="utf-8").splitlines()
+    assert sum(line.startswith("start") for line in lines) == 3
+    assert lines.count("name Threads value 2") == 3
+    assert lines.count("name Hash value 64") == 3
+    # Only each engine's first search clears the hash.
+    assert lines.count("ucinewgame") == 3
+    assert lines.count("position") == 10
+
+
+def test_run_is_searched_in_order_on_one_engine(fake_engine) -> None:
+    binary, log = fake_engine
+    pool = _pool(binary)
+    runs = [
+        [f"{8 - len(rank)}{rank}/8/8/8/8/8/2K5/6k1" for rank in ("R", "RN", "RNB", "RNBQ")],
+        [f"{8 - len(rank)}{rank}/8/8/8/8/8/2K5/6k1" for rank in ("r", "rn", "rnb")],
+    ]
+    try:
+        futures = [
+            pool.submit_run([chess.Board(f"{fen} w - - 0 1") for fen in run]) for run in runs
+        ]
+        results = [[future.result().sf_cp_white for future in run] for run in futures]
+    finally:
+        pool.close()
+
+    assert results == [[30, 40, 50, 60], [30, 40, 50]]
+    searches = [
+        line.split()[1:]
+        for line in log.read_text(encoding="utf-8").splitlines()
+        if line.startswith("go ")
+    ]
+    for run in runs:
+        [engine] = {pid for pid, fen in searches if fen in run}
+        assert [fen for pid, fen in searches if pid == engine] == run
+
+
+def test_crashed_engine_is_restarted_and_search_retried(fake_engine) -> None:
+    binary, log = fake_engine
+    pool = _pool(binary, engines=1)
+    try:
+        result = pool.evaluate(chess.Board(BARE_KINGS))
+        after = pool.evaluate(chess.Board(ROOK_ENDING))
+    finally:
+        pool.close()
+
+    assert (result.eval_status, result.sf_cp_white, result.winning_side) == ("ok", 20, "draw")
+    assert after.sf_cp_white == 30
+    assert pool.restarts == 1
+    assert log.read_text(encoding="utf-8").count("start") == 2
+
+
+def test_restart_budget_turns_crashes_into_error_results(fake_engine) -> None:
+    binary, _ = fake_engine
+    pool = _pool(binary, engines=1, max_restarts=0)
+    try:
+        result = pool.evaluate(chess.Board(BARE_KINGS))
+    finally:
+        pool.close()
+
+    assert result.eval_status == "stockfish_error"
+    assert result.winning_side == "unknown"
+
+
+def test_missing_binary_fails_every_search() -> None:
+    pool = EnginePool("no-such-stockfish", engines=2, sf_time_seconds=0.1, draw_threshold_cp=30)
+    result = pool.evaluate(chess.Board())
+    with pytest.raises(RuntimeError, match="Stockfish binary not found"):
+        pool.submit(chess.Board()).result()
+    pool.close()
+
+    assert result.eval_status == "stockfish_error"
+    assert result.error_message == "Stockfish binary not found: no-such-stockfish"
+
+
+ADAPTIVE_POSITIONS = {
+    "clear": "1k6/8/8/8/8/8/8/R3K3 w - - 0 1",
+    "mate": "k7/8/8/8/8/8/8/R3K3 w - - 0 1",
+    "draw": "4k3/8/8/8/8/8/8/4K3 w - - 0 1",
+    "borderline": "K7/8/8/8/8/8/8/r3k3 w - - 0 1",
+}
+
+
+@pytest.fixture
+def deepening_engine(tmp_path: Path) -> Path:
+    binary = tmp_path / "deepening-uci"
+    binary.write_text(DEEPENING_UCI.format(python=sys.executable), encoding="utf-8")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return binary
+
+
+def _adaptive_outcomes(evaluate) -> dict[str, tuple[str, int, float]]:
+    outcomes = {}
+    for name, fen in ADAPTIVE_POSITIONS.items():
+        started = time.monotonic()
+        result = evaluate(chess.Board(fen))
+        outcomes[name] = (result.winning_side, result.sf_depth, time.monotonic() - started)
+    return outcomes
+
+
+def _assert_settled_positions_stop_early(outcomes) -> None:
+    assert [outcomes[name][:2] for name in ADAPTIVE_POSITIONS] == [
+        ("white", 4),
+        ("white", 2),
+        ("draw", 4),
+        ("white", outcomes["borderline"][1]),
+    ]
+    assert outcomes["borderline"][1] > 10
+    assert outcomes["borderline"][2] >= 0.4
+    assert max(outcomes[name][2] for name in ("clear", "mate", "draw")) < 0.3
+
+
+def test_adaptive_session_stops_once_the_verdict_settles(deepening_engine: Path) -> None:
+    session = StockfishSession(str(deepening_engine), 1)
+    budget = AdaptiveBudget(min_depth=4, stable_depths=3, margin_cp=50)
+    try:
+        outcomes = _adaptive_outcomes(
+            lambda board: session.analyse(
+                board, sf_time_seconds=0.4, draw_threshold_cp=30, adaptive=budget
+            )
+        )
+        fixed = session.analyse(
+            chess.Board(ADAPTIVE_POSITIONS["clear"]), sf_time_seconds=0.2, draw_threshold_cp=30
+        )
+    finally:
+        session.close()
+
+    _assert_settled_positions_stop_early(outcomes)
+    assert fixed.sf_depth > 4
+
+
+def test_adaptive_pool_stops_once_the_verdict_settles(deepening_engine: Path) -> None:
+    pool = EnginePool(
+        str(deepening_engine),
+        engines=2,
+        sf_time_seconds=0.4,
+        draw_threshold_cp=30,
+        adaptive=AdaptiveBudget(min_depth=4, stable_depths=3, margin_cp=50),
+    )
+    try:
+        outcomes = _adaptive_outcomes(pool.evaluate)
+    finally:
+        pool.close()
+
+    _assert_settled_positions_stop_early(outcomes)
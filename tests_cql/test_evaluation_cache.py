@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import chess
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reti.evaluation import (
+    CachedEvaluator,
+    EvaluationCache,
+    EvaluationResult,
+    PositionEvaluator,
+    engine_position_key,
+    position_key,
+    profile_id,
+    stockfish_profile,
+    tablebase_profile,
+)
+
+
+class _CountingEvaluator(PositionEvaluator):
+    def __init__(self, status: str = "ok") -> None:
+        self.calls = 0
+        self.status = status
+
+    def evaluate(self, board: chess.Board) -> EvaluationResult:
+        self.calls += 1
+        return EvaluationResult(
+            eval_source="tablebase",
+            winning_side="draw",
+            tb_wdl=0,
+            tb_dtz=0,
+            eval_status=self.status,
+        )
+
+
+def test_position_key_ignores_move_counters_and_illegal_en_passant() -> None:
+    early = chess.Board("8/8/8/8/8/8/4K3/6k1 w - - 0 1")
+    late = chess.Board("8/8/8/8/8/8/4K3/6k1 w - - 37 90")
+    assert position_key(early) == position_key(late)
+
+    # The e3 square is not capturable here, so it must not split the key.
+    with_ep = chess.Board("4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1")
+    without_ep = chess.Board("4k3/8/8/8/4P3/8/8/4K3 b - - 0 1")
+    assert position_key(with_ep) == position_key(without_ep)
+
+
+def test_engine_position_key_buckets_the_halfmove_clock() -> None:
+    def key(clock: int) -> str:
+        return engine_position_key(chess.Board(f"8/8/8/8/8/8/4K3/6k1 w - - {clock} 90"))
+
+    assert key(0) == key(9) == "8/8/8/8/8/8/4K3/6k1 w - - h0"
+    assert key(10) != key(9)
+    assert key(100) == key(140) == "8/8/8/8/8/8/4K3/6k1 w - - h10"
+
+
+def test_profile_id_separates_evaluator_settings() -> None:
+    fast = profile_id(stockfish_profile(None, sf_time_seconds=0.1, draw_threshold_cp=30))
+    slow = profile_id(stockfish_profile(None, sf_time_seconds=1.0, draw_threshold_cp=30))
+    assert fast != slow
+    assert profile_id(tablebase_profile()) != profile_id(tablebase_profile(probe_dtz=False))
+
+
+def test_cached_evaluator_reuses_results_across_cache_instances(tmp_path: Path) -> None:
+    db_path = tmp_path / "evals.sqlite"
+    board = chess.Board("8/8/8/8/8/8/4K3/6k1 w - - 0 1")
+    profile = tablebase_profile()
+
+    inner = _CountingEvaluator()
+    with EvaluationCache(db_path) as cache:
+        first = CachedEvaluator(inner, cache, profile).evaluate(board)
+
+    inner_again = _CountingEvaluator()
+    with EvaluationCache(db_path) as cache:
+        board.halfmove_clock = 12
+        second = CachedEvaluator(inner_again, cache, profile).evaluate(board)
+        assert cache.hits == 1
+
+    assert inner.calls == 1
+    assert inner_again.calls == 0
+    assert second == first
+
+
+def test_cached_evaluator_does_not_store_errors(tmp_path: Path) -> None:
+    board = chess.Board("8/8/8/8/8/8/4K3/6k1 w - - 0 1")
+    inner = _CountingEvaluator(status="tablebase_error")
+    with EvaluationCache(tmp_path / "evals.sqlite") as cache:
+        evaluator = CachedEvaluator(inner, cache, tablebase_profile())
+        evaluator.evaluate(board)
+        evaluator.evaluate(board)
+    assert inner.calls == 2
@@ -3,6 +3,7 @@ from __future__ import annotations
 import csv
 import sys
 import tempfile
+import time
 import types
 import unittest
 from pathlib import Path
@@ -67,9 +68,10 @@ class _FakeTablebase:
 
 
 class _FakeStockfishSession:
-    def __init__(self, binary: str | None, threads: int) -> None:
+    def __init__(self, binary: str | None, threads: int, hash_mb: int | None = None) -> None:
         self.binary = binary
         self.threads = threads
+        self.hash_mb = hash_mb
         self.closed = False
 
     def analyse(
@@ -78,6 +80,7 @@ class _FakeStockfishSession:
         *,
         sf_time_seconds: float,
         draw_threshold_cp: int,
+        adaptive: export_cql_positions.AdaptiveBudget | None = None,
     ) -> export_cql_positions.EvaluationResult:
         _ = board
         cp_white = 65
@@ -452,6 +455,135 @@ class TestExportCqlPositions(unittest.TestCase):
             self.assertEqual(rows[0]["draw_threshold_cp"], "30")
             self.assertEqual(rows[0]["winning_side"], "white")
 
+    def test_prepare_output_csv_upgrades_pre_sf_depth_header(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = Path(tmpdir) / "positions.csv"
+            legacy = [
+                column for column in export_cql_positions.CSV_COLUMNS if column != "sf_depth"
+            ]
+            with csv_path.open("w", encoding="utf-8", newline="") as handle:
+                writer = csv.DictWriter(handle, fieldnames=legacy)
+                writer.writeheader()
+                writer.writerow(
+                    dict.fromkeys(legacy, "")
+                    | {"source_pgn": "old.pgn", "sf_time_seconds": "1.5", "draw_threshold_cp": "30"}
+                )
+
+            write_header = export_cql_positions.prepare_output_csv(csv_path)
+            with csv_path.open("a", encoding="utf-8", newline="") as handle:
+                csv.DictWriter(handle, fieldnames=export_cql_positions.CSV_COLUMNS).writerow(
+                    export_cql_positions.empty_row(
+                        source_pgn="new.pgn", ending="new", marker_text="CQL", sf_depth=18
+                    )
+                )
+            rows = _read_rows(csv_path)
+
+        self.assertFalse(write_header)
+        self.assertEqual(list(rows[0]), export_cql_positions.CSV_COLUMNS)
+        fields = ("source_pgn", "sf_time_seconds", "sf_depth", "draw_threshold_cp")
+        self.assertEqual(
+            [tuple(row[field] for field in fields) for row in rows],
+            [("old.pgn", "1.5", "", "30"), ("new.pgn", "", "18", "")],
+        )
+
+    def test_engine_pool_writes_rows_in_input_order(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        fens = [
+            f"8/8/8/8/8/8/{file_index}K{7 - file_index}/6k1 w - - 0 1"
+            for file_index in range(1, 7)
+        ]
+        fens[3] = "r3k3/p7/8/8/8/8/3K4/R6R w - - 0 1"
+        fens[4] = "r3k3/p7/8/8/8/8/4K3/R6R w - - 0 1"
+
+        def piece_count(fen: str) -> int:
+            return len(chess.Board(fen).piece_map())
+
+        games = [
+            (
+                export_cql_positions.ParsedAnnotatedGame(
+                    game_index=game_index,
+                    headers={"Event": f"G{game_index}"},
+                    parse_errors=("bad move",) if game_index == 2 else (),
+                    move_uci_sequence=(),
+                    positions=tuple(
+                        export_cql_positions.AnnotatedPosition(
+                            ply_index=ply,
+                            fullmove_number=1,
+                            move_san="Kd2",
+                            move_uci="e2d2",
+                            fen=fen,
+                            side_to_move="white",
+                            piece_count=piece_count(fen),
+                        )
+                        for ply, fen in enumerate(fens[game_index - 1 :: 3], start=1)
+                    ),
+                ),
+                0,
+            )
+            for game_index in (1, 2, 3)
+        ]
+
+        class _FakeEnginePool:
+            """Finishes the first submission last, so writes must wait for it."""
+
+            def __init__(self) -> None:
+                self.executor = ThreadPoolExecutor(3)
+                self.submitted: list[str] = []
+
+            def submit_evaluation(self, board: chess.Board):
+                self.submitted.append(board.fen())
+                delay = 0.2 if len(self.submitted) == 1 else 0.0
+                session = _FakeStockfishSession(None, 1)
+
+                def run():
+                    time.sleep(delay)
+                    return session.analyse(board, sf_time_seconds=0.1, draw_threshold_cp=30)
+
+                return self.executor.submit(run)
+
+        engine_pool = _FakeEnginePool()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = Path(tmpdir) / "positions.csv"
+            with (
+                csv_path.open("w", encoding="utf-8", newline="") as handle,
+                mock.patch.object(
+                    export_cql_positions, "stream_annotated_pgn", return_value=iter(games)
+                ),
+            ):
+                writer = csv.DictWriter(handle, fieldnames=export_cql_positions.CSV_COLUMNS)
+                writer.writeheader()
+                stats = export_cql_positions.process_pgn_file(
+                    pgn_path=Path("games.pgn"),
+                    source_pgn="games.pgn",
+                    marker_text="CQL",
+                    writer=writer,
+                    tablebase=_FakeTablebase(wdl=0, dtz=0),
+                    stockfish=None,
+                    sf_time_seconds=0.1,
+                    draw_threshold_cp=30,
+                    engine_pool=engine_pool,
+                    max_in_flight=2,
+                )
+            engine_pool.executor.shutdown()
+
+            rows = _read_rows(csv_path)
+
+        self.assertEqual(stats.marker_rows, 6)
+        self.assertEqual(stats.parse_error_rows, 1)
+        self.assertEqual(engine_pool.submitted, [fens[3], fens[4]])
+        self.assertEqual(
+            [(row["game_index"], row["fen"], row["eval_source"]) for row in rows],
+            [
+                ("1", fens[0], "tablebase"),
+                ("1", fens[3], "stockfish"),
+                ("2", "", ""),
+                ("2", fens[1], "tablebase"),
+                ("2", fens[4], "stockfish"),
+                ("3", fens[2], "tablebase"),
+                ("3", fens[5], "tablebase"),
+            ],
+        )
 
 if __name__ == "__main__":
     unittest.main()
@@ -99,6 +99,48 @@ class CombinedTablebaseSnapshotTests(unittest.TestCase):
             ).fetchone()
             self.assertEqual(row["evaluated_positions"], 2)
 
+    def test_single_pass_aggregates_match_per_view_counts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            facts = Path(tmpdir) / "facts.jsonl"
+            self.write_facts(facts)
+            conn = sqlite3.connect(":memory:")
+            conn.row_factory = sqlite3.Row
+            init_schema(conn)
+            ingest_facts(
+                conn,
+                facts,
+                known_stems={"1-4BN"},
+                profile=profile_id({"evaluation": {"tablebase": "fixture"}}),
+                tablebase_threshold=5,
+            )
+            inserted = refresh_threshold_aggregates(
+                conn, thresholds=(1, 2, 5), tablebase_threshold=5
+            )
+
+            expected_rows = 0
+            for view_key in ("all", "otb", "online"):
+                for threshold in (1, 2, 5):
+                    group_filter = "" if view_key == "all" else "AND source_group = ?"
+                    params = (threshold,) if view_key == "all" else (threshold, view_key)
+                    expected = conn.execute(
+                        f"""
+                        SELECT COUNT(*) FROM positions
+                        WHERE run_length >= ? {group_filter}
+                        """,
+                        params,
+                    ).fetchone()[0]
+                    actual = conn.execute(
+                        """
+                        SELECT COALESCE(SUM(total_positions), 0)
+                        FROM aggregate_wdl
+                        WHERE view_key = ? AND threshold = ?
+                        """,
+                        (view_key, threshold),
+                    ).fetchone()[0]
+                    self.assertEqual(actual, expected, (view_key, threshold))
+                    expected_rows += 1 if expected else 0
+            self.assertEqual(inserted, expected_rows)
+
     def test_renderer_embeds_precomputed_threshold_tablebase_payloads(self) -> None:
         with tempfile.TemporaryDirectory() as tmpdir:
             root = Path(tmpdir)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import importlib.util
+import json
 import sqlite3
+import stat
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -15,20 +18,58 @@ CHESS_AVAILABLE = importlib.util.find_spec("chess") is not None
 if CHESS_AVAILABLE:
     import chess
 
+    from reti.evaluation import (
+        EvaluationCache,
+        EvaluationResult,
+        engine_position_key,
+        position_key,
+    )
     from reti.fce_eval_snapshot import (
         EvalSettings,
+        build_eval_snapshot,
+        build_manifest,
+        canonical_position,
         classify_material_side,
+        ensure_indexes,
+        evaluate_pending,
+        evaluation_to_update,
+        ingest_markers,
         init_schema,
         mark_tablebase_skips,
+        native_eval_binary,
         normalize_marker_row,
+        open_snapshot_db,
+        pending_batches,
+        pending_game_runs,
         refresh_aggregates,
+        shared_cache_profiles,
+        split_cached_tasks,
+        write_evaluations,
     )
 else:
     EvalSettings = None
+    build_eval_snapshot = None
+    build_manifest = None
+    ingest_markers = None
+    open_snapshot_db = None
+    EvaluationCache = None
+    EvaluationResult = None
+    canonical_position = None
     chess = None
     classify_material_side = None
+    ensure_indexes = None
+    evaluate_pending = None
+    evaluation_to_update = None
+    pending_batches = None
+    pending_game_runs = None
+    write_evaluations = None
+    position_key = None
+    engine_position_key = None
+    shared_cache_profiles = None
+    split_cached_tasks = None
     init_schema = None
     mark_tablebase_skips = None
+    native_eval_binary = None
     normalize_marker_row = None
     refresh_aggregates = None
 
@@ -56,6 +97,59 @@ class MaterialSideTests(unittest.TestCase):
         perspective = classify_material_side("9-2Qq", board)
         self.assertEqual(perspective.material_side, "symmetric")
 
+    def test_fen_placement_matches_board_classification(self) -> None:
+        for ending, fen in (
+            ("10-2Qr", "3qk2R/8/2K5/8/8/8/8/8 w - - 0 1"),
+            ("6-2-1RPr", "8/8/4k3/8/3P4/2K5/R7/7r b - - 3 50"),
+            ("10-3Qaa", "8/2n5/4k3/8/3b4/2K5/8/Q7 w - - 0 1"),
+        ):
+            self.assertEqual(
+                classify_material_side(ending, fen),
+                classify_material_side(ending, chess.Board(fen)),
+            )
+
+
+@unittest.skipIf(not CHESS_AVAILABLE, "python-chess is not installed in this environment")
+class CanonicalPositionTests(unittest.TestCase):
+    def test_clock_and_transposition_share_a_key_when_clock_does_not_matter(self) -> None:
+        early = canonical_position(
+            "8/8/8/8/8/2k5/8/3QK2r w - - 0 1",
+            fold_mirrors=True,
+            halfmove_matters=False,
+        )
+        late = canonical_position(
+            "8/8/8/8/8/2k5/8/3QK2r w - - 37 88",
+            fold_mirrors=True,
+            halfmove_matters=False,
+        )
+        self.assertEqual(early.key, late.key)
+        self.assertTrue(early.fen.endswith(" 0 1"))
+
+    def test_halfmove_bucket_splits_keys_when_clock_matters(self) -> None:
+        fen = "8/8/8/8/8/2k5/8/3QK2r w - - {} 60"
+        near_start = canonical_position(fen.format(3), fold_mirrors=True, halfmove_matters=True)
+        same_bucket = canonical_position(fen.format(7), fold_mirrors=True, halfmove_matters=True)
+        near_limit = canonical_position(fen.format(95), fold_mirrors=True, halfmove_matters=True)
+        self.assertEqual(near_start.key, same_bucket.key)
+        self.assertNotEqual(near_start.key, near_limit.key)
+        self.assertEqual(near_limit.fen.split()[4], "90")
+
+    def test_colour_flipped_positions_fold_only_when_allowed(self) -> None:
+        white = "8/8/8/8/8/2k5/8/3QK2r w - - 0 1"
+        black = chess.Board(white).mirror().fen()
+        folded = {
+            canonical_position(fen, fold_mirrors=True, halfmove_matters=False).key
+            for fen in (white, black)
+        }
+        unfolded = {
+            canonical_position(fen, fold_mirrors=False, halfmove_matters=False).key
+            for fen in (white, black)
+        }
+        self.assertEqual(len(folded), 1)
+        self.assertEqual(len(unfolded), 2)
+        canonical = canonical_position(black, fold_mirrors=True, halfmove_matters=False)
+        self.assertEqual(chess.Board(canonical.fen).epd(), canonical.key)
+
 
 @unittest.skipIf(not CHESS_AVAILABLE, "python-chess is not installed in this environment")
 class AggregateTests(unittest.TestCase):
@@ -117,6 +211,342 @@ class AggregateTests(unittest.TestCase):
         self.assertEqual(large["eval_status"], "skipped_non_tablebase")
         self.assertEqual(small["eval_status"], "pending")
 
+    def test_chunked_ingest_dedupes_positions_and_shares_evaluations(self) -> None:
+        rows = [
+            {
+                "schema_version": 1,
+                "source_pgn": "source.pgn",
+                "output_pgn": "source/1-4BN.pgn",
+                "ending": "1-4BN",
+                "game_index": index,
+                "marker_index": 1,
+                "ply_index": 90,
+                "fen": f"8/8/8/8/8/2k5/3NB3/4K3 w - - {index} 60",
+                "piece_count": 4,
+            }
+            for index in range(5)
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            markers = Path(tmpdir) / "markers.jsonl"
+            lines = [json.dumps(row) for row in rows]
+            markers.write_text("\n".join([*lines, lines[0]]) + "\n", encoding="utf-8")
+            settings = EvalSettings(
+                markers_jsonl=markers,
+                output_db=Path(tmpdir) / "out.sqlite3",
+                syzygy_dirs=(),
+                stockfish_bin=None,
+            )
+            manifest = build_manifest(settings)
+            conn = open_snapshot_db(settings, manifest)
+            try:
+                positions = ingest_markers(conn, settings, profile="p", chunk_rows=2)
+                evaluations = conn.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+                material = conn.execute(
+                    "SELECT DISTINCT material_side, material_signature FROM positions"
+                ).fetchall()
+                journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            finally:
+                conn.close()
+
+        self.assertEqual(positions, 5)
+        self.assertEqual(evaluations, 1)
+        self.assertEqual([tuple(row) for row in material], [("white", "BNvbare")])
+        self.assertEqual(journal_mode, "wal")
+
+    def test_shared_eval_cache_hits_skip_evaluation(self) -> None:
+        fen = "8/8/8/8/8/2k5/8/3QK2r w - - 0 1"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = Path(tmpdir) / "evals.sqlite"
+            settings = EvalSettings(
+                markers_jsonl=Path("markers.jsonl"),
+                output_db=Path("out.sqlite3"),
+                syzygy_dirs=(),
+                stockfish_bin=None,
+                eval_cache=cache_path,
+            )
+            tablebase_profile_id, _ = shared_cache_profiles(settings)
+            with EvaluationCache(cache_path) as cache:
+                cache.put_result(
+                    position_key(chess.Board(fen)),
+                    tablebase_profile_id,
+                    EvaluationResult(eval_source="tablebase", winning_side="white", tb_wdl=2),
+                )
+
+            conn = sqlite3.connect(":memory:")
+            conn.row_factory = sqlite3.Row
+            init_schema(conn)
+            conn.execute(
+                "INSERT INTO evaluations(eval_key, fen, piece_count, eval_status) "
+                "VALUES ('e1', ?, 4, 'pending')",
+                (fen.replace(" 0 1", " 12 40"),),
+            )
+            completed = evaluate_pending(conn, settings)
+
+        self.assertEqual(completed, 1)
+        row = conn.execute("SELECT * FROM evaluations WHERE eval_key = 'e1'").fetchone()
+        # Without the cache this would be a tablebase_error: no --syzygy-dir.
+        self.assertEqual(row["eval_status"], "ok")
+        self.assertEqual(row["winning_side"], "white")
+        self.assertEqual(row["tb_wdl"], 2)
+
+    def test_shared_eval_cache_stockfish_slots_keep_the_halfmove_bucket(self) -> None:
+        epd = "r3k3/8/8/8/8/8/8/R3K2R w - -"
+        fresh, late = f"{epd} 0 1", f"{epd} 90 1"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with EvaluationCache(Path(tmpdir) / "evals.sqlite") as cache:
+                profiles = ("tb", "sf")
+                _, misses, slots = split_cached_tasks(
+                    [("fresh", fresh, 5), ("late", late, 5)],
+                    cache,
+                    profiles,
+                    tablebase_threshold=4,
+                )
+                self.assertEqual(len(misses), 2)
+                # The exporter and scripts key Stockfish entries the same way.
+                self.assertEqual(slots["late"], (engine_position_key(chess.Board(late)), "sf"))
+                self.assertNotEqual(slots["fresh"], slots["late"])
+                cache.put_result(
+                    *slots["late"],
+                    EvaluationResult(eval_source="stockfish", winning_side="draw"),
+                )
+
+                hits, misses, _ = split_cached_tasks(
+                    [("fresh", fresh, 5), ("late-again", f"{epd} 95 60", 5)],
+                    cache,
+                    profiles,
+                    tablebase_threshold=4,
+                )
+
+        self.assertEqual([key for key, _ in hits], ["late-again"])
+        self.assertEqual([task[0] for task in misses], ["fresh"])
+
+    def test_pending_batches_page_by_key_and_bulk_write_back(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        conn.executemany(
+            "INSERT INTO evaluations(eval_key, fen, piece_count) VALUES (?, 'fen', ?)",
+            [(f"k{index:02d}", 3 + index % 3) for index in range(10)],
+        )
+        ensure_indexes(conn)
+        plan = " ".join(
+            row[3]
+            for row in conn.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT eval_key, fen, piece_count FROM evaluations
+                WHERE eval_status = 'pending' AND (piece_count, eval_key) > (3, 'k00')
+                ORDER BY piece_count, eval_key LIMIT 4
+                """
+            )
+        )
+        self.assertIn("COVERING INDEX idx_evaluations_pending", plan)
+
+        seen: list[str] = []
+        for batch in pending_batches(conn, max_evals=None, batch_size=4):
+            seen.extend(eval_key for eval_key, _, _ in batch)
+            # Leave the last row of each batch pending: it must not come back.
+            write_evaluations(
+                conn,
+                [
+                    evaluation_to_update(
+                        eval_key,
+                        EvaluationResult(eval_source="tablebase", winning_side="white", tb_wdl=2),
+                    )
+                    for eval_key, _, _ in batch[:-1]
+                ],
+            )
+
+        expected = [
+            f"k{index:02d}"
+            for index in sorted(range(10), key=lambda index: (3 + index % 3, index))
+        ]
+        self.assertEqual(seen, expected)
+        rows = {
+            row["eval_key"]: row
+            for row in conn.execute("SELECT eval_key, eval_status, tb_wdl FROM evaluations")
+        }
+        self.assertEqual(
+            sorted(key for key, row in rows.items() if row["eval_status"] == "pending"),
+            sorted([expected[3], expected[7], expected[9]]),
+        )
+        self.assertEqual(rows[expected[0]]["tb_wdl"], 2)
+        self.assertEqual(
+            len(list(pending_batches(conn, max_evals=2, batch_size=4))[0]), 2
+        )
+
+    def test_pending_game_runs_group_plies_by_game(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        ensure_indexes(conn)
+        # (game, ply, eval_key): "shared" recurs in g2 and "done" is evaluated.
+        for index, (game_key, ply_index, eval_key) in enumerate(
+            [
+                ("g2", 9, "shared"),
+                ("g1", 7, "a2"),
+                ("g1", 3, "a1"),
+                ("g2", 4, "b1"),
+                ("g1", 5, "shared"),
+                ("g3", 1, "c1"),
+                ("g3", 2, "done"),
+            ]
+        ):
+            self.add_game_position(conn, f"p{index}", game_key, ply_index, eval_key)
+        conn.executemany(
+            "INSERT INTO evaluations(eval_key, fen, piece_count, eval_status) "
+            "VALUES (?, 'fen', 6, ?)",
+            [
+                (key, "ok" if key == "done" else "pending")
+                for key in ("a1", "a2", "b1", "c1", "shared", "done")
+            ],
+        )
+
+        def keys(runs) -> list[list[str]]:
+            return [[eval_key for eval_key, _, _ in run] for run in runs]
+
+        self.assertEqual(
+            [keys(runs) for runs in pending_game_runs(conn, max_evals=None, batch_size=100)],
+            [[["a1", "shared", "a2"], ["b1"], ["c1"]]],
+        )
+        # A LIMIT that cuts g1 short still yields the whole game.
+        self.assertEqual(
+            [keys(runs) for runs in pending_game_runs(conn, max_evals=None, batch_size=2)],
+            [[["a1", "shared", "a2"]], [["b1", "shared"]], [["c1"]]],
+        )
+        self.assertEqual(
+            [keys(runs) for runs in pending_game_runs(conn, max_evals=4, batch_size=100)],
+            [[["a1", "shared", "a2"], ["b1"]]],
+        )
+
+    def test_engine_pool_takes_stockfish_work_when_parallel(self) -> None:
+        from unittest import mock
+
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        conn.executemany(
+            "INSERT INTO evaluations(eval_key, fen, piece_count, eval_status) "
+            "VALUES (?, ?, ?, 'pending')",
+            [
+                ("small", "8/8/8/8/8/2k5/8/3QK3 w - - 0 1", 3),
+                ("large1", "r3k3/p7/8/8/8/8/3K4/R6R w - - 0 1", 6),
+                ("large2", "r3k3/p7/8/8/8/8/4K3/R6R w - - 0 1", 6),
+            ],
+        )
+        settings = EvalSettings(
+            markers_jsonl=Path("markers.jsonl"),
+            output_db=Path("out.sqlite3"),
+            syzygy_dirs=(),
+            stockfish_bin="stockfish",
+            sf_hash_mb=128,
+            workers=4,
+        )
+        FakeEnginePool.instances = []
+        with mock.patch("reti.fce_eval_snapshot.EnginePool", FakeEnginePool):
+            completed = evaluate_pending(conn, settings)
+
+        [pool] = FakeEnginePool.instances
+        self.assertEqual(completed, 3)
+        self.assertTrue(pool.closed)
+        self.assertEqual((pool.options["engines"], pool.options["hash_mb"]), (4, 128))
+        self.assertEqual([len(run) for run in pool.runs], [1, 1])
+        rows = {
+            row["eval_key"]: row
+            for row in conn.execute(
+                "SELECT eval_key, eval_source, eval_status, sf_depth FROM evaluations"
+            )
+        }
+        self.assertEqual(rows["small"]["eval_source"], "tablebase")
+        self.assertEqual(rows["small"]["eval_status"], "tablebase_error")
+        self.assertEqual(rows["large1"]["eval_source"], "stockfish")
+        self.assertEqual(rows["large2"]["eval_status"], "ok")
+        self.assertEqual(rows["large2"]["sf_depth"], 12)
+
+    def test_engine_pool_gets_the_next_batch_before_write_back(self) -> None:
+        from unittest import mock
+
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        tasks = [
+            ("large1", "r3k3/p7/8/8/8/8/3K4/R6R w - - 0 1", 6),
+            ("small", "8/8/8/8/8/2k5/8/3QK3 w - - 0 1", 3),
+            ("large2", "r3k3/p7/8/8/8/8/4K3/R6R w - - 0 1", 6),
+        ]
+        conn.executemany(
+            "INSERT INTO evaluations(eval_key, fen, piece_count, eval_status) "
+            "VALUES (?, ?, ?, 'pending')",
+            tasks,
+        )
+        settings = EvalSettings(
+            markers_jsonl=Path("markers.jsonl"),
+            output_db=Path("out.sqlite3"),
+            syzygy_dirs=(),
+            stockfish_bin="stockfish",
+            workers=2,
+        )
+        # The second batch repeats "large1", as a key shared by two games can.
+        batches = [tasks[:2], [tasks[0], tasks[2]]]
+        FakeEnginePool.instances = []
+        with (
+            mock.patch("reti.fce_eval_snapshot.EnginePool", FakeEnginePool),
+            mock.patch("reti.fce_eval_snapshot.pending_batches", return_value=iter(batches)),
+        ):
+            completed = evaluate_pending(conn, settings)
+
+        [pool] = FakeEnginePool.instances
+        self.assertEqual(completed, 3)
+        self.assertEqual(pool.runs, [[tasks[0][1]], [tasks[2][1]]])
+        # Both batches were searching before the first was written back.
+        self.assertEqual(pool.runs_submitted_at_first_result, 2)
+        rows = dict(conn.execute("SELECT eval_key, eval_status FROM evaluations").fetchall())
+        self.assertEqual(rows, {"large1": "ok", "small": "tablebase_error", "large2": "ok"})
+
+    def test_game_order_submits_each_game_as_one_run(self) -> None:
+        from unittest import mock
+
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        ensure_indexes(conn)
+        fens = {
+            "a1": ("r3k3/p7/8/8/8/8/3K4/R6R w - - 0 1", 6),
+            "a2": ("r3k3/p7/8/8/8/8/4K3/R6R b - - 0 1", 6),
+            "small": ("8/8/8/8/8/2k5/8/3QK3 w - - 0 1", 3),
+            "b1": ("r3k3/p7/8/8/8/8/5K2/R6R w - - 0 1", 6),
+        }
+        for index, (game_key, ply_index, eval_key) in enumerate(
+            [("g1", 2, "a2"), ("g1", 1, "a1"), ("g1", 3, "small"), ("g2", 1, "b1")]
+        ):
+            self.add_game_position(conn, f"p{index}", game_key, ply_index, eval_key)
+        conn.executemany(
+            "INSERT INTO evaluations(eval_key, fen, piece_count, eval_status) "
+            "VALUES (?, ?, ?, 'pending')",
+            [(key, fen, piece_count) for key, (fen, piece_count) in fens.items()],
+        )
+        settings = EvalSettings(
+            markers_jsonl=Path("markers.jsonl"),
+            output_db=Path("out.sqlite3"),
+            syzygy_dirs=(),
+            stockfish_bin="stockfish",
+            workers=2,
+            game_order=True,
+        )
+        FakeEnginePool.instances = []
+        with mock.patch("reti.fce_eval_snapshot.EnginePool", FakeEnginePool):
+            completed = evaluate_pending(conn, settings)
+
+        [pool] = FakeEnginePool.instances
+        self.assertEqual(completed, 4)
+        self.assertEqual(pool.runs, [[fens["a1"][0], fens["a2"][0]], [fens["b1"][0]]])
+        self.assertEqual(
+            conn.execute(
+                "SELECT COUNT(*) FROM evaluations WHERE eval_status = 'pending'"
+            ).fetchone()[0],
+            0,
+        )
+
     def test_refresh_aggregates_counts_material_side_wdl(self) -> None:
         conn = sqlite3.connect(":memory:")
         conn.row_factory = sqlite3.Row
@@ -168,6 +598,30 @@ class AggregateTests(unittest.TestCase):
         self.assertEqual(row["tb_draw_result_draw"], 1)
         self.assertEqual(row["tb_loss_result_loss"], 1)
 
+    def test_refresh_aggregates_reads_folded_evaluations_per_position(self) -> None:
+        conn = sqlite3.connect(":memory:")
+        conn.row_factory = sqlite3.Row
+        init_schema(conn)
+        # One stored probe (side to move wins) shared by a position and its
+        # colour-flipped twin: each position's own side to move wins.
+        self.add_position(conn, "p1", "1-3Q", "white", "queen side", "shared")
+        self.add_position(
+            conn, "p2", "1-3Q", "black", "queen side", "shared", side_to_move="black"
+        )
+        conn.execute(
+            """
+            INSERT INTO evaluations (
+                eval_key, fen, piece_count, eval_source, winning_side, tb_wdl, eval_status
+            ) VALUES ('shared', 'fen', 4, 'tablebase', 'black', 2, 'ok')
+            """
+        )
+
+        refresh_aggregates(conn)
+        row = conn.execute("SELECT * FROM ending_wdl WHERE ending = '1-3Q'").fetchone()
+        self.assertEqual(row["total_positions"], 2)
+        self.assertEqual(row["side_wins"], 2)
+        self.assertEqual(row["side_losses"], 0)
+
     @staticmethod
     def add_position(
         conn: sqlite3.Connection,
@@ -178,6 +632,7 @@ class AggregateTests(unittest.TestCase):
         eval_key: str,
         *,
         result: str = "*",
+        side_to_move: str = "white",
     ) -> None:
         conn.execute(
             """
@@ -193,10 +648,32 @@ class AggregateTests(unittest.TestCase):
                 1, 1, 'CQL', 'game',
                 '', '', '', '', '', '', ?,
                 1, 1, 'e4', 'e2e4', '8/8/8/8/8/2k5/8/3QK2r w - - 0 1',
-                'white', 4, ?, ?, 'QvR', ?
+                ?, 4, ?, ?, 'QvR', ?
             )
             """,
-            (position_key, ending, result, material_side, material_label, eval_key),
+            (
+                position_key,
+                ending,
+                result,
+                side_to_move,
+                material_side,
+                material_label,
+                eval_key,
+            ),
+        )
+
+    def add_game_position(
+        self,
+        conn: sqlite3.Connection,
+        position_key: str,
+        game_key: str,
+        ply_index: int,
+        eval_key: str,
+    ) -> None:
+        self.add_position(conn, position_key, "1-4BN", "white", "bishop+knight side", eval_key)
+        conn.execute(
+            "UPDATE positions SET game_key = ?, ply_index = ? WHERE position_key = ?",
+            (game_key, ply_index, position_key),
         )
 
     @staticmethod
@@ -211,5 +688,155 @@ class AggregateTests(unittest.TestCase):
         )
 
 
+class FakeEnginePool:
+    """Stands in for ``EnginePool``: records each run and calls every search a draw."""
+
+    instances: list["FakeEnginePool"] = []
+
+    def __init__(self, binary, **options) -> None:
+        self.options = options
+        self.runs: list[list[str]] = []
+        self.runs_submitted_at_first_result: int | None = None
+        self.closed = False
+        FakeEnginePool.instances.append(self)
+
+    def submit_run(self, boards):
+        from concurrent.futures import Future
+
+        pool = self
+
+        class RecordingFuture(Future):
+            def result(self, timeout=None):
+                if pool.runs_submitted_at_first_result is None:
+                    pool.runs_submitted_at_first_result = len(pool.runs)
+                return super().result(timeout)
+
+        self.runs.append([board.fen() for board in boards])
+        futures = []
+        for _ in boards:
+            future = RecordingFuture()
+            future.set_result(
+                EvaluationResult(
+                    eval_source="stockfish",
+                    winning_side="draw",
+                    sf_cp_white=len(self.runs),
+                    sf_depth=12,
+                )
+            )
+            futures.append(future)
+        return futures
+
+    def close(self) -> None:
+        self.closed = True
+
+
+# Stands in for ``pgn-utils fce-syzygy-eval``: every pending row is a draw.
+FAKE_PGN_UTILS = """#!{python}
+import json, sqlite3, sys
+args = sys.argv[1:]
+if "--help" in args:
+    print("usage: pgn-utils fce-syzygy-eval --db PATH --syzygy-dir DIR")
+    raise SystemExit(0)
+if {fail}:
+    print("no Syzygy table files were found", file=sys.stderr)
+    raise SystemExit(1)
+open(sys.argv[0] + ".args", "w").write(json.dumps(args))
+conn = sqlite3.connect(args[args.index("--db") + 1])
+cursor = conn.execute(
+    "UPDATE evaluations SET eval_source = 'tablebase', winning_side = 'draw', tb_wdl = 0, "
+    "eval_status = 'ok', evaluated_at = '0' "
+    "WHERE eval_status = 'pending' AND piece_count <= ?",
+    (int(args[args.index("--max-pieces") + 1]),),
+)
+conn.commit()
+print(json.dumps({{"mode": "fce-syzygy-eval", "attempted": cursor.rowcount}}))
+"""
+
+
+@unittest.skipIf(not CHESS_AVAILABLE, "python-chess is not installed in this environment")
+class NativeEvalRoutingTests(unittest.TestCase):
+    def _settings(self, root: Path, *, fail: bool = False, **overrides) -> EvalSettings:
+        markers = root / "markers.jsonl"
+        markers.write_text(
+            json.dumps(
+                {
+                    "schema_version": 1,
+                    "source_pgn": "source.pgn",
+                    "output_pgn": "source/1-4BN.pgn",
+                    "ending": "1-4BN",
+                    "game_index": 1,
+                    "marker_index": 1,
+                    "ply_index": 90,
+                    "fen": "8/8/8/8/8/2k5/3NB3/4K3 w - - 0 60",
+                    "piece_count": 4,
+                }
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        binary = root / "pgn-utils"
+        binary.write_text(
+            FAKE_PGN_UTILS.format(python=sys.executable, fail=fail), encoding="utf-8"
+        )
+        binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+        syzygy_dir = root / "syzygy"
+        syzygy_dir.mkdir()
+        options = {
+            "markers_jsonl": markers,
+            "output_db": root / "out.sqlite3",
+            "syzygy_dirs": (str(syzygy_dir),),
+            "stockfish_bin": None,
+            "tablebase_only": True,
+            "pgn_utils_bin": binary,
+        }
+        options.update(overrides)
+        return EvalSettings(**options)
+
+    def _evaluation(self, settings: EvalSettings) -> sqlite3.Row:
+        conn = sqlite3.connect(settings.output_db)
+        conn.row_factory = sqlite3.Row
+        try:
+            return conn.execute("SELECT * FROM evaluations").fetchone()
+        finally:
+            conn.close()
+
+    def test_tablebase_only_profile_runs_native_helper(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings = self._settings(Path(tmpdir), workers=8)
+            stats = build_eval_snapshot(settings)
+            row = self._evaluation(settings)
+            args = json.loads(Path(str(settings.pgn_utils_bin) + ".args").read_text())
+
+        self.assertEqual(stats.evaluations_completed, 1)
+        self.assertEqual(stats.evaluations_pending_after, 0)
+        self.assertEqual((row["eval_status"], row["winning_side"]), ("ok", "draw"))
+        self.assertEqual(args[args.index("--workers") + 1], "8")
+        self.assertEqual(args[args.index("--max-pieces") + 1], "5")
+
+    def test_other_profiles_stay_on_the_python_pool(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings = self._settings(Path(tmpdir))
+            self.assertEqual(native_eval_binary(settings), settings.pgn_utils_bin)
+            for overrides in (
+                {"probe_dtz": True},
+                {"eval_cache": Path(tmpdir) / "cache.sqlite"},
+                {"native_eval": False},
+                {"tablebase_only": False},
+                {"syzygy_dirs": ()},
+            ):
+                changed = EvalSettings(**{**settings.__dict__, **overrides})
+                self.assertIsNone(native_eval_binary(changed), overrides)
+
+    def test_native_failure_falls_back_to_python_pool(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            settings = self._settings(Path(tmpdir), fail=True)
+            stats = build_eval_snapshot(settings)
+            row = self._evaluation(settings)
+
+        self.assertEqual(stats.evaluations_completed, 1)
+        # The Python pool ran against an empty Syzygy directory.
+        self.assertEqual(row["eval_status"], "tablebase_error")
+
+
 if __name__ == "__main__":
     unittest.main()
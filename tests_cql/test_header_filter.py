@@ -0,0 +1,169 @@
+"""Unit tests for ``--where`` header filters."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import stat
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import reti.cql.header_filter as header_filter_module
+from reti.common.compressed_pgn import compress_pgn
+from reti.cql.backend import Cql6Backend
+from reti.cql.cli import parse_args
+from reti.cql.header_filter import (
+    HeaderFilter,
+    fold_text,
+    open_filtered_pgn,
+    parse_where_value,
+)
+from reti.cql.output import write_summary_csv
+from reti.cql.runner import JobSpec, run_job_matrix
+
+
+def _game(white: str, black: str, white_elo: str, date: str) -> str:
+    return (
+        f'[Event "Test"]\n[Date "{date}"]\n[White "{white}"]\n[Black "{black}"]\n'
+        f'[WhiteElo "{white_elo}"]\n\n1. e4 e5 *\n\n'
+    )
+
+
+GAMES = [
+    _game("Müller, Hans", "Smith, Ann", "2250", "2003.05.01"),
+    _game("Smith, Ann", "Jones, Bob", "2100", "2004.01.01"),
+    _game("Jones, Bob", "Muller, Hans", "?", "1999.02.02"),
+    _game("Carlsen, Magnus", "Jones, Bob", "2850", "????.??.??"),
+]
+
+FAKE_CQL = """#!{python}
+import sys
+args = sys.argv[1:]
+text = open(args[args.index("-i") + 1], encoding="utf-8").read()
+open(args[args.index("-o") + 1], "w", encoding="utf-8").write(text)
+"""
+
+
+def _filter(*expressions: str) -> HeaderFilter:
+    return HeaderFilter(tuple(parse_where_value(expression) for expression in expressions))
+
+
+def _headers(game: str) -> dict[str, str]:
+    return {
+        line[1:].split(" ", 1)[0]: line.split('"')[1]
+        for line in game.splitlines()
+        if line.startswith("[")
+    }
+
+
+def test_parse_where_value() -> None:
+    predicate = parse_where_value(" WhiteElo >= 2200 ")
+    assert (predicate.tag, predicate.operator, predicate.value) == ("WhiteElo", ">=", "2200")
+    assert str(parse_where_value('Site!="lichess.org"')) == "Site!=lichess.org"
+    for bad in ("WhiteElo", "WhiteElo>=strong", "Event~", "=x"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_where_value(bad)
+
+
+def test_predicates_match_like_pgn_utils_grep() -> None:
+    assert fold_text("Müller Æsir ß") == "muller aesir ss"
+    headers = [_headers(game) for game in GAMES]
+
+    def kept(*expressions: str) -> list[int]:
+        header_filter = _filter(*expressions)
+        return [index for index, game in enumerate(headers) if header_filter.matches(game)]
+
+    assert kept("Player~hans muller") == [0, 2]
+    assert kept("White~muller") == [0]
+    assert kept("WhiteElo>=2200") == [0, 3]
+    assert kept("WhiteElo<2200") == [1]
+    assert kept("Year>=2000", "Year<2004") == [0]
+    assert kept("Black=jones, bob") == [1, 3]
+    assert kept("Black!=jones, bob") == [0, 2]
+
+
+def test_native_grep_args() -> None:
+    assert _filter("Player~carlsen", "Year>1999", "Year<=2005", "ECO~B90").native_grep_args() == [
+        "--player",
+        "carlsen",
+        "--year-min",
+        "2000",
+        "--year-max",
+        "2005",
+        "--tag",
+        "ECO=B90",
+    ]
+    assert _filter("Year=2003").native_grep_args() == ["--year", "2003"]
+    assert _filter("WhiteElo>=2200").native_grep_args() is None
+    assert _filter("White~a", "White~b").native_grep_args() is None
+    assert _filter("Event=Test").native_grep_args() is None
+
+
+def test_filtered_stream_counts_games(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text("preamble\n" + "".join(GAMES), encoding="utf-8")
+    compressed = compress_pgn(pgn, "gzip")
+
+    with open_filtered_pgn(compressed, _filter("WhiteElo>=2200")) as reader:
+        assert reader.counts is None
+        assert reader.read().decode("utf-8") == GAMES[0] + GAMES[3]
+        assert (reader.counts.games_scanned, reader.counts.games_kept) == (4, 2)
+
+
+def _fake_backend(root: Path) -> Cql6Backend:
+    binary = root / "fake-cql"
+    binary.write_text(FAKE_CQL.format(python=sys.executable), encoding="utf-8")
+    binary.chmod(binary.stat().st_mode | stat.S_IEXEC)
+    return Cql6Backend(binary)
+
+
+@pytest.mark.parametrize(
+    ("engine", "shards"),
+    [("threads", 1), ("asyncio", 1), ("threads", 2)],
+)
+def test_run_keeps_only_filtered_games(tmp_path: Path, engine: str, shards: int) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text("".join(GAMES), encoding="utf-8")
+    script = tmp_path / "a.cql"
+    script.write_text("cql() check\n", encoding="utf-8")
+    spec = JobSpec(
+        job_index=1,
+        pair_label="db.pgn x a.cql",
+        source_pgn_path=pgn,
+        runtime_pgn_path=pgn,
+        cql_path=script,
+        output_pgn=tmp_path / "out" / "a.pgn",
+    )
+
+    with mock.patch.object(header_filter_module, "find_pgn_utils_binary", return_value=None):
+        [result] = run_job_matrix(
+            _fake_backend(tmp_path),
+            [spec],
+            jobs=1,
+            cql_threads="auto",
+            engine=engine,
+            shards=shards,
+            header_filter=_filter("Player~muller", "Year>=2000"),
+        )
+
+    assert result.success and result.match_count == 1
+    assert (result.games_before_filter, result.games_after_filter) == (4, 1)
+    assert spec.output_pgn.read_text(encoding="utf-8") == GAMES[0]
+
+    summary = write_summary_csv([result], tmp_path / "out", tmp_path, tmp_path)
+    with summary.open(encoding="utf-8") as handle:
+        [row] = list(csv.DictReader(handle))
+    assert (row["games_before_filter"], row["games_after_filter"]) == ("4", "1")
+
+
+def test_where_flag_is_repeatable() -> None:
+    base = ["--pgn", "a.pgn", "--cql-bin", "cql", "--scripts", "s.cql", "-o", "out"]
+    args = parse_args([*base, "--where", "WhiteElo>=2200", "--where", "Year>=2000"])
+    assert [str(predicate) for predicate in args.where] == ["WhiteElo>=2200", "Year>=2000"]
+    with pytest.raises(SystemExit):
+        parse_args([*base, "--where", "WhiteElo>>2200"])
@@ -0,0 +1,119 @@
+"""Unit tests for the persistent per-PGN catalog."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import reti.cql.preflight as preflight_module
+from reti.common.pgn_catalog import (
+    GAME_COUNT_EVENT_TAG_LINES,
+    GAME_COUNT_PGN_UTILS,
+    PgnCatalog,
+    pgn_catalog_sidecar_path,
+)
+from reti.common.pgn_discovery import InputCollection
+from reti.cql.backend import Cql6Backend
+
+
+GAMES = '[Event "g1"]\n\n1. e4 e5 *\n\n  [Event "g2"]\n\n1. d4 d5 *\n\n'
+
+
+def test_entry_round_trips_and_is_invalidated_by_changes(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(GAMES, encoding="utf-8")
+    catalog = PgnCatalog(tmp_path / "catalog")
+
+    counter = mock.Mock(return_value=7)
+    assert catalog.game_count(pgn, count=counter) == 7
+    assert catalog.game_count(pgn, count=counter) == 7
+    assert counter.call_count == 1
+    # Entries live under the catalog root; the corpus directory is untouched.
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["catalog", "db.pgn"]
+    assert list((tmp_path / "catalog" / "entries").rglob("*.catalog.json"))
+    assert catalog.entry(pgn).game_counts == {GAME_COUNT_EVENT_TAG_LINES: 7}
+
+    stat = pgn.stat()
+    os.utime(pgn, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert catalog.entry(pgn).game_counts == {}
+    assert catalog.game_count(pgn) == 2
+
+
+def test_sidecars_are_opt_in_and_fall_back_to_catalog_root(tmp_path: Path) -> None:
+    pgn = tmp_path / "db.pgn"
+    pgn.write_text(GAMES, encoding="utf-8")
+    catalog = PgnCatalog(tmp_path / "catalog", sidecars=True)
+    sidecar = pgn_catalog_sidecar_path(pgn)
+
+    catalog.record_game_count(pgn, GAME_COUNT_EVENT_TAG_LINES, 2)
+    assert sidecar.exists()
+    assert not (tmp_path / "catalog" / "entries").exists()
+    sidecar.unlink()
+
+    real_replace = Path.replace
+
+    def refuse_sidecar(self: Path, target: Path) -> Path:
+        if Path(target) == sidecar:
+            raise PermissionError(target)
+        return real_replace(self, target)
+
+    with mock.patch.object(Path, "replace", refuse_sidecar):
+        catalog.record_game_count(pgn, GAME_COUNT_PGN_UTILS, 2)
+
+    assert not sidecar.exists()
+    assert list((tmp_path / "catalog" / "entries").rglob("*.catalog.json"))
+    assert catalog.entry(pgn).game_count((GAME_COUNT_PGN_UTILS,)) == 2
+    assert catalog.sha256(pgn) == catalog.entry(pgn).sha256
+
+
+@mock.patch("reti.cql.preflight.subprocess.run")
+def test_warm_preflight_skips_inspect_and_reuses_sanitized_copy(
+    run_mock, tmp_path: Path
+) -> None:
+    run_mock.return_value = subprocess.CompletedProcess(
+        args=[], returncode=0, stdout="", stderr=""
+    )
+    pgn = tmp_path / "db.pgn"
+    original_bytes = b'[Event "x"]\n\n1. e4 e5 \x1f*\n'
+    pgn.write_bytes(original_bytes)
+    catalog = PgnCatalog(tmp_path / "catalog")
+    inputs = InputCollection(root=tmp_path, files=[pgn])
+
+    def run_preflight(runtime_root: Path):
+        [result] = preflight_module.preflight_pgn_files(
+            inputs,
+            Cql6Backend(Path("/fake/cql")),
+            runtime_root,
+            smoke_test_pgns=True,
+            catalog=catalog,
+        )
+        return result
+
+    cold = run_preflight(tmp_path / "runtime-1")
+    assert cold.success and cold.sanitized
+    assert cold.runtime_pgn_path.is_relative_to(tmp_path / "catalog" / "sanitized")
+    assert "\x1f" not in cold.runtime_pgn_path.read_text(encoding="utf-8")
+    copy_mtime = cold.runtime_pgn_path.stat().st_mtime_ns
+
+    with mock.patch.object(
+        preflight_module,
+        "inspect_pgn_fast",
+        side_effect=AssertionError("inspect should come from the catalog"),
+    ), mock.patch.object(
+        preflight_module,
+        "rewrite_pgn_fast",
+        side_effect=AssertionError("sanitized copy should be reused"),
+    ):
+        warm = run_preflight(tmp_path / "runtime-2")
+
+    assert warm.success and warm.sanitized
+    assert warm.runtime_pgn_path == cold.runtime_pgn_path
+    assert warm.runtime_pgn_path.stat().st_mtime_ns == copy_mtime
+    assert "OK (1 game(s)" in warm.message
+    assert "sanitized cached copy" in warm.message
+    assert pgn.read_bytes() == original_bytes
@@ -520,3 +520,123 @@ def test_summary_can_point_at_retained_merged_output(tmp_path: Path) -> None:
 
     assert "games.merged.pgn" in text
     assert "games/marker.pgn" in text
+
+
+def test_out_of_order_outputs_fall_back_to_in_memory_merge(tmp_path: Path) -> None:
+    source_pgn, pgn_inputs, output_dir, hedgehog_out, maroczy_out, qgd_out = _make_setup(tmp_path)
+    # One output lists the second game before the first.
+    hedgehog_out.write_text(_qgd_annotated() + "\n" + _hedgehog_annotated(), encoding="utf-8")
+    results = _make_results(
+        source_pgn,
+        tmp_path / "cql",
+        {"hedgehog": hedgehog_out, "maroczy": maroczy_out, "qgd": qgd_out},
+    )
+
+    [merged] = merge_single_output(results, pgn_inputs, output_dir, include_unmatched=False)
+
+    text = merged.read_text(encoding="utf-8")
+    assert "{hedgehog}" in text and "{maroczy}" in text and "{qgd}" in text
+    assert text.count('White "Alice"') == 1
+    assert text.count('White "Carol"') == 1
+
+
+def test_parallel_merge_matches_sequential_merge(tmp_path: Path) -> None:
+    merged_texts = []
+    for workers in (1, 2):
+        root = tmp_path / f"workers-{workers}"
+        root.mkdir()
+        source_pgn, pgn_inputs, output_dir, hedgehog_out, maroczy_out, qgd_out = _make_setup(root)
+        second_pgn = source_pgn.with_name("more.pgn")
+        second_pgn.write_text(SOURCE_PGN, encoding="utf-8")
+        more_dir = output_dir / "more"
+        more_dir.mkdir()
+        more_outputs = {
+            "hedgehog": more_dir / "hedgehog.pgn",
+            "qgd": more_dir / "qgd.pgn",
+        }
+        more_outputs["hedgehog"].write_text(_hedgehog_annotated(), encoding="utf-8")
+        more_outputs["qgd"].write_text(_qgd_annotated(), encoding="utf-8")
+        pgn_inputs = InputCollection(files=[source_pgn, second_pgn], root=pgn_inputs.root)
+        results = _make_results(
+            source_pgn,
+            root / "cql",
+            {"hedgehog": hedgehog_out, "maroczy": maroczy_out, "qgd": qgd_out},
+        ) + _make_results(second_pgn, root / "cql", more_outputs)
+
+        merged = merge_single_output(
+            results,
+            pgn_inputs,
+            output_dir,
+            include_unmatched=True,
+            show_progress=False,
+            workers=workers,
+        )
+        assert [path.name for path in merged] == ["games.merged.pgn", "more.merged.pgn"]
+        merged_texts.append([path.read_text(encoding="utf-8") for path in merged])
+
+    assert merged_texts[0] == merged_texts[1]
+    assert "{qgd}" in merged_texts[1][1] and "{maroczy}" not in merged_texts[1][1]
+
+
+def test_annotations_stay_on_the_matching_duplicate_game(tmp_path: Path) -> None:
+    pgn_root = tmp_path / "pgns"
+    pgn_root.mkdir()
+    source_pgn = pgn_root / "games.pgn"
+    short_game = '[Event "Dup"]\n\n1. e4 e5 *\n'
+    long_game = '[Event "Dup"]\n\n1. e4 e5 2. Nf3 Nc6 *\n'
+    source_pgn.write_text(short_game + "\n" + long_game, encoding="utf-8")
+    output_dir = tmp_path / "out"
+    (output_dir / "games").mkdir(parents=True)
+    outputs = {
+        "a": output_dir / "games" / "a.pgn",
+        "b": output_dir / "games" / "b.pgn",
+    }
+    outputs["a"].write_text('[Event "Dup"]\n\n1. e4 e5 2. Nf3 {a} Nc6 *\n', encoding="utf-8")
+    outputs["b"].write_text('[Event "Dup"]\n\n1. e4 {b} e5 *\n', encoding="utf-8")
+    results = _make_results(source_pgn, tmp_path / "cql", outputs)
+
+    [merged] = merge_single_output(
+        results,
+        InputCollection(files=[source_pgn], root=pgn_root),
+        output_dir,
+        include_unmatched=False,
+        show_progress=False,
+    )
+
+    assert merged.read_text(encoding="utf-8") == (
+        '[Event "Dup"]\n\n1. e4 {b} e5 *\n\n'
+        '[Event "Dup"]\n\n1. e4 e5 2. Nf3 {a} Nc6 *\n\n'
+    )
+
+
+def test_duplicate_header_games_of_equal_length_are_told_apart_by_moves(
+    tmp_path: Path,
+) -> None:
+    pgn_root = tmp_path / "pgns"
+    pgn_root.mkdir()
+    source_pgn = pgn_root / "games.pgn"
+    e4_game = '[Event "?"]\n\n1. e4 e5 *\n'
+    d4_game = '[Event "?"]\n\n1. d4 d5 *\n'
+    source_pgn.write_text(e4_game + "\n" + d4_game, encoding="utf-8")
+    output_dir = tmp_path / "out"
+    (output_dir / "games").mkdir(parents=True)
+    outputs = {
+        "a": output_dir / "games" / "a.pgn",
+        "b": output_dir / "games" / "b.pgn",
+    }
+    outputs["a"].write_text('[Event "?"]\n\n1. d4 {A} d5 *\n', encoding="utf-8")
+    outputs["b"].write_text('[Event "?"]\n\n1. e4 e5 {B} *\n', encoding="utf-8")
+    results = _make_results(source_pgn, tmp_path / "cql", outputs)
+
+    [merged] = merge_single_output(
+        results,
+        InputCollection(files=[source_pgn], root=pgn_root),
+        output_dir,
+        include_unmatched=False,
+        show_progress=False,
+    )
+
+    assert merged.read_text(encoding="utf-8") == (
+        '[Event "?"]\n\n1. e4 e5 {B} *\n\n'
+        '[Event "?"]\n\n1. d4 {A} d5 *\n\n'
+    )